@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
+import time
 import traceback
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
 
 from apps.backend.celery import app
+from apps.backend.constants import COLLECT_LOG_POLL_INTERVAL, COLLECT_LOG_TIMEOUT
 from apps.backend.utils.ssh import SshMan
 from apps.backend.utils.wmi import execute_cmd
 from apps.node_man import constants
@@ -13,105 +20,177 @@ from common.log import logger
 from pipeline.log.models import LogEntry
 
 
-def collect_log_exception_handler(collect_log_func):
-    """日志收集处理装饰器：捕获SshMan抛出异常并记录到LogEntry
-    :param collect_log_func: collect_log方法
-    :return:
+def collect_failed_output(e):
+    return "Collect log failed[{error}]: {exception_detail}".format(error=e, exception_detail=traceback.format_exc())
+
+
+def get_collect_cmd(host, node_id):
     """
+    生成在主机本机上读取安装日志的命令
+    """
+    dest_dir = suffix_slash(host.os_type.lower(), host.agent_config["temp_path"])
+    if host.node_type == constants.NodeType.PROXY:
+        return f"cat {dest_dir}nm.setup_proxy.sh.{node_id}.debug"
+    if host.os_type.lower() == "linux":
+        return f"cat {dest_dir}nm.setup_agent.sh.{node_id}.debug"
+    return f"type {dest_dir}nm.setup_agent.bat.{node_id}.debug"
 
-    def exception_handler(bk_host_id, node_id=None):
-        try:
-            collect_log_func(bk_host_id, node_id)
-        except Exception as e:
-            insert_logs(
-                "Collect log failed[{error}]: {exception_detail}".format(
-                    error=e, exception_detail=traceback.format_exc()
-                ),
-                node_id,
-            )
 
-    return exception_handler
+def group_collect_targets(hosts, host_node_ids):
+    """
+    按主机对采集目标分组：同一主机的多个节点共用一个登录会话
+    :param hosts: {bk_host_id: Host}
+    :param host_node_ids: [(bk_host_id, node_id), ...]
+    :return: {(会话类型, bk_host_id): [(host, node_id), ...]}, 无法采集的 [(node_id, output), ...]
+    """
+    groups = defaultdict(list)
+    failed_outputs = []
+    for bk_host_id, node_id in host_node_ids:
+        host = hosts.get(bk_host_id)
+        if not host:
+            failed_outputs.append((node_id, f"Collect log failed: host[{bk_host_id}] does not exist"))
+        elif host.node_type == constants.NodeType.PAGENT:
+            # @TODO PAGENT的日志采集需要通过作业平台
+            continue
+        elif host.node_type == constants.NodeType.PROXY or host.os_type.lower() == "linux":
+            groups[("ssh", bk_host_id)].append((host, node_id))
+        else:
+            groups[("wmi", bk_host_id)].append((host, node_id))
+    return groups, failed_outputs
 
 
-@app.task(queue="backend")
-@collect_log_exception_handler
-def collect_log(bk_host_id, node_id=None):
-    host = Host.get_by_host_info({"bk_host_id": bk_host_id})
-    dest_dir = host.agent_config["temp_path"]
-    dest_dir = suffix_slash(host.os_type.lower(), dest_dir)
-    ssh_man = None
-    if host.node_type == constants.NodeType.PAGENT:
-        # @TODO PAGENT的日志采集需要通过作业平台
-        return None
-        # PAEGNT 需要登录 PROXY，在 PROXY 上报日志
-    #         proxy = host.get_random_alive_proxy()
-    #         proxy_dest_dir = proxy.ap.agent_config["linux"]["temp_path"]
-    #         proxy_dest_dir = suffix_slash("linux", proxy_dest_dir)
-    #         ssh_man = SshMan(proxy, logger)
-    #         if host.os_type.lower() == "linux":
-    #             cmd = f"""\
-    # /opt/py36/bin/python -c '\
-    # import sys;\
-    # sys.path.append("{proxy_dest_dir}");\
-    # from setup_pagent import SshMan;\
-    # ssh = SshMan("{host.login_ip or host.inner_ip}", {host.identity.port},
-    #  "{host.identity.account}", "{host.identity.password}");\
-    # ssh.get_and_set_prompt();\
-    # res = ssh.send_cmd("cat {dest_dir}nm.setup_agent.sh.{node_id}.debug", check_output=False);\
-    # print(res)'
-    # """
-    #             output = ssh_man.send_cmd(cmd, is_clear_cmd_and_prompt=False, check_output=False)
-    #             output = output.replace(f'SshMan(""{host.identity.password}");', 'SshMan(""********");',)
-    #         else:
-    #             dest_dir = "".join([char if char != "\\" else "\\\\" for char in dest_dir])
-    #             write_code_cmd = f"""echo '\
-    # import sys;\
-    # sys.path.append("{proxy_dest_dir}");\
-    # from setup_pagent import execute_cmd;\
-    # execute_cmd("type {dest_dir}nm.setup_agent.bat.{node_id}.debug",
-    # "{host.login_ip or host.inner_ip}","{host.identity.account}", "{host.identity.password}", "", noOutput=False);' \
-    # > {proxy_dest_dir}collect_win_log_{node_id}.py
-    # """
-    #             ssh_man.send_cmd(write_code_cmd)
-    #             cmd = f"/opt/py36/bin/python {proxy_dest_dir}collect_win_log_{node_id}.py"
-    #             output = ssh_man.send_cmd(cmd, is_adding_output=True, check_output=False)
-    #             ssh_man.send_cmd("rm -f {proxy_dest_dir}collect_win_log_{node_id}.py")
-    elif host.node_type == constants.NodeType.PROXY:
-        ssh_man = SshMan(host, logger)
+def collect_host_log(session_type, targets, context):
+    """
+    在一个登录会话中采集同一主机各节点的日志，单个节点失败不影响其他节点
+    :param context: 与调度线程共享的状态，记录开始时间及会话，超时后由调度线程置为 abandoned
+    :return: [(node_id, output), ...]
+    """
+    context["begin_time"] = time.time()
+    outputs = []
+    try:
+        if session_type == "wmi":
+            for host, node_id in targets:
+                if context["abandoned"]:
+                    break
+                try:
+                    output = execute_cmd(
+                        get_collect_cmd(host, node_id),
+                        host.login_ip or host.inner_ip,
+                        host.identity.account,
+                        host.identity.password,
+                    )["data"]
+                except Exception as e:
+                    output = collect_failed_output(e)
+                outputs.append((node_id, output))
+            return outputs
+
+        ssh_man = SshMan(targets[0][0], logger)
+        context["ssh_man"] = ssh_man
+        # 登录期间已超时，调度线程无法关闭尚未建立的会话，由 finally 关闭
+        if context["abandoned"]:
+            return outputs
+        ssh_man.setup_channel(timeout=context["timeout"])
         # 一定要先设置一个干净的提示符号，否则会导致console_ready识别失效
         ssh_man.get_and_set_prompt()
-        output = ssh_man.send_cmd(
-            f"cat {dest_dir}nm.setup_proxy.sh.{node_id}.debug", is_clear_cmd_and_prompt=False, check_output=False,
-        )
-    else:
-        if host.os_type.lower() == "linux":
-            ssh_man = SshMan(host, logger)
-            # 一定要先设置一个干净的提示符号，否则会导致console_ready识别失效
-            ssh_man.get_and_set_prompt()
-            output = ssh_man.send_cmd(
-                f"cat {dest_dir}nm.setup_agent.sh.{node_id}.debug", is_clear_cmd_and_prompt=False, check_output=False,
-            )
-        else:
-            output = execute_cmd(
-                f"type {dest_dir}nm.setup_agent.bat.{node_id}.debug",
-                host.login_ip or host.inner_ip,
-                host.identity.account,
-                host.identity.password,
-            )["data"]
-    if ssh_man:
-        ssh_man.safe_close(ssh_man.ssh)
-    insert_logs(output, node_id)
+        for host, node_id in targets:
+            if context["abandoned"]:
+                break
+            try:
+                output = ssh_man.send_cmd(
+                    get_collect_cmd(host, node_id), is_clear_cmd_and_prompt=False, check_output=False
+                )
+            except Exception as e:
+                output = collect_failed_output(e)
+            outputs.append((node_id, output))
+    except Exception as e:
+        # 会话建立失败，未采集的节点统一记录失败原因
+        collected_node_ids = {node_id for node_id, __ in outputs}
+        output = collect_failed_output(e)
+        outputs.extend((node_id, output) for __, node_id in targets if node_id not in collected_node_ids)
+    finally:
+        if context.get("ssh_man"):
+            context["ssh_man"].safe_close(context["ssh_man"].ssh)
+        # 工作线程中的数据库连接不会被请求周期回收，需手动关闭
+        connections.close_all()
+    return outputs
 
 
-def insert_logs(logs, node_id):
+@app.task(queue="backend")
+def bulk_collect_log(host_node_ids, timeout=COLLECT_LOG_TIMEOUT):
+    """
+    批量采集安装日志：按主机分组后并发采集，采集结果一次性入库
+    :param host_node_ids: [(bk_host_id, node_id), ...]
+    :param timeout: 单台主机采集超时时间(s)，从该主机开始采集时计算
+    """
+    host_node_ids = [(bk_host_id, node_id) for bk_host_id, node_id in host_node_ids]
+    hosts = {
+        host.bk_host_id: host
+        for host in Host.objects.filter(bk_host_id__in={bk_host_id for bk_host_id, __ in host_node_ids})
+    }
+    groups, outputs = group_collect_targets(hosts, host_node_ids)
+
+    if groups:
+        ex = ThreadPoolExecutor(max_workers=min(settings.CONCURRENT_NUMBER, len(groups)))
+        pending = {}
+        for (session_type, __), targets in groups.items():
+            context = {"begin_time": None, "ssh_man": None, "abandoned": False, "timeout": timeout}
+            pending[ex.submit(collect_host_log, session_type, targets, context)] = (targets, context)
+
+        while pending:
+            done, __ = wait(pending, timeout=COLLECT_LOG_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                outputs.extend(future.result())
+
+            now = time.time()
+            for future, (targets, context) in list(pending.items()):
+                if context["begin_time"] is None or now - context["begin_time"] < timeout:
+                    continue
+                # 超时的主机直接关闭会话，阻塞中的读写随之退出，不再等待其结果
+                context["abandoned"] = True
+                if context["ssh_man"]:
+                    context["ssh_man"].safe_close(context["ssh_man"].ssh)
+                pending.pop(future)
+                outputs.extend(
+                    (node_id, f"Collect log failed: timeout after {timeout} seconds") for __, node_id in targets
+                )
+        # 超时的 WMI 调用无法中断，由其自身的连接超时结束，无需阻塞等待
+        ex.shutdown(wait=False)
+
+    insert_logs_bulk(outputs)
+
+
+@app.task(queue="backend")
+def collect_log(bk_host_id, node_id=None):
+    bulk_collect_log([(bk_host_id, node_id)])
+
+
+def build_log_entries(logs, node_id):
     # 覆盖原子日志
-    insert_log(" Begin of collected logs: ".center(100, "*"), node_id)
-    message = f"[collect] {logs}"
-    insert_log(message, node_id)
-    insert_log(" End of collected logs ".center(100, "*"), node_id)
+    return [
+        build_log_entry(" Begin of collected logs: ".center(100, "*"), node_id),
+        build_log_entry(f"[collect] {logs}", node_id),
+        build_log_entry(" End of collected logs ".center(100, "*"), node_id),
+    ]
+
+
+def build_log_entry(message, node_id, level="DEBUG"):
+    return LogEntry(logger_name="pipeline.logging", level_name=level, message=message, node_id=node_id)
+
+
+def insert_logs_bulk(node_outputs):
+    """
+    :param node_outputs: [(node_id, output), ...]
+    """
+    log_entries = []
+    for node_id, output in node_outputs:
+        log_entries.extend(build_log_entries(output, node_id))
+    LogEntry.objects.bulk_create(log_entries)
+
+
+def insert_logs(logs, node_id):
+    LogEntry.objects.bulk_create(build_log_entries(logs, node_id))
 
 
 def insert_log(message, node_id, level="DEBUG"):
-    LogEntry.objects.create(
-        logger_name="pipeline.logging", level_name=level, message=message, node_id=node_id,
-    )
+    build_log_entry(message, node_id, level).save()
@@ -10,6 +10,8 @@ class BackendConfig(AppConfig):
 
     def ready(self):
         from apps.backend.plugin.signals import activity_failed_handler
-        from pipeline.engine.signals import activity_failed
+        from apps.backend.subscription.signals import pipeline_state_change_handler
+        from pipeline.engine.signals import activity_failed, pipeline_state_change
 
         activity_failed.connect(activity_failed_handler, dispatch_uid="_activity_failed")
+        pipeline_state_change.connect(pipeline_state_change_handler, dispatch_uid="_pipeline_state_change")
@@ -11,6 +11,12 @@ SSH_CON_TIMEOUT = 10  # SSH连接超时设置10s
 MAX_WAIT_OUTPUT = 32  # 最大重试等待recv_ready次数
 SLEEP_INTERVAL = 1  # recv等待间隔
 
+########################################################################################################
+# 日志采集相关配置
+########################################################################################################
+COLLECT_LOG_TIMEOUT = 60  # 单台主机日志采集超时时间(s)
+COLLECT_LOG_POLL_INTERVAL = 1  # 检查采集超时的间隔(s)
+
 
 class TargetNodeType(object):
     """
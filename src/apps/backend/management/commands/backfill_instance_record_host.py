@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.node_man.models import SubscriptionInstanceRecord
+
+
+class Command(BaseCommand):
+    help = "回填存量订阅实例执行记录的主机标识（bk_host_id, bk_cloud_id, ip）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="每批处理的记录数")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        begin = time.perf_counter()
+        queryset = SubscriptionInstanceRecord.objects.filter(bk_host_id__isnull=True, ip="").order_by("id")
+        last_id = 0
+        total = 0
+        while True:
+            # 按主键分段扫描，避免大偏移量分页
+            records = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not records:
+                break
+            for record in records:
+                record.fill_host_fields()
+            SubscriptionInstanceRecord.objects.bulk_update(records, fields=["bk_host_id", "bk_cloud_id", "ip"])
+            last_id = records[-1].id
+            total += len(records)
+            self.stdout.write(f"已回填 {total} 条记录，当前ID: {last_id}")
+
+        self.stdout.write(f"回填完成，共 {total} 条记录，耗时 {time.perf_counter() - begin:.2f}s")
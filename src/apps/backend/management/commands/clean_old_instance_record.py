@@ -7,7 +7,7 @@ from concurrent.futures import ThreadPoolExecutor
 
 from django.core.management.base import BaseCommand
 
-from apps.node_man.models import SubscriptionInstanceRecord, PipelineTree
+from apps.node_man.models import SubscriptionInstanceRecord, SubscriptionInstanceStepStatus, PipelineTree
 from common.log import logger
 from pipeline.engine.models import NodeRelationship, Status
 
@@ -51,6 +51,7 @@ def clean_pipeline_data(index, pipeline_id, count, instance_record_pipeline_ids)
     list_tree_node_ids(pipeline_tree.tree, node_ids)
     NodeRelationship.objects.filter(ancestor_id=pipeline_id).delete()
     Status.objects.filter(id__in=node_ids).delete()
+    SubscriptionInstanceStepStatus.objects.filter(node_id__in=node_ids).delete()
 
 
 class Command(BaseCommand):
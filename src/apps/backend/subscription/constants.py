@@ -23,3 +23,18 @@ MAX_RETRY_TIME = 10
 
 # 自动下发 - 订阅配置单个切片所包含的最大订阅个数 (根据经验，一个订阅需要消耗1~2s）
 SUBSCRIPTION_UPDATE_SLICE_SIZE = 50
+
+# 自动下发 - 同时执行的分片子任务上限
+SUBSCRIPTION_UPDATE_CONCURRENCY = 10
+
+# 自动下发 - 订阅输入指纹有效期，超过有效期即使指纹未变化也重新计算，兜底配置模板等未纳入指纹的变更
+SUBSCRIPTION_FINGERPRINT_TTL = 60 * 60 * 6
+
+# 自动下发 - 订阅预检指纹有效期，有效期内预检指纹未变化时不查询CMDB，主机及拓扑的变化在有效期后感知
+SUBSCRIPTION_PREFETCH_FINGERPRINT_TTL = 60 * 60
+
+# 节点日志分页 - 单次读取的最大日志条数
+NODE_LOG_CHUNK_SIZE = 500
+
+# 创建订阅任务 - 实例记录及 Pipeline 拓扑树单次批量写入的条数
+SUBSCRIPTION_TASK_BULK_BATCH_SIZE = 500
@@ -5,6 +5,7 @@ from rest_framework import serializers
 
 from apps.exceptions import ValidationError
 from apps.backend.constants import TargetNodeType
+from apps.backend.subscription.constants import NODE_LOG_CHUNK_SIZE
 
 
 class GatewaySerializer(serializers.Serializer):
@@ -132,6 +133,16 @@ class TaskResultDetailSerializer(GatewaySerializer):
     subscription_id = serializers.IntegerField()
     task_id = serializers.IntegerField(required=False)
     instance_id = serializers.CharField()
+    need_log = serializers.BooleanField(default=True)
+
+
+class TaskResultNodeLogSerializer(GatewaySerializer):
+    subscription_id = serializers.IntegerField()
+    task_id = serializers.IntegerField(required=False)
+    instance_id = serializers.CharField()
+    node_id = serializers.CharField()
+    cursor = serializers.IntegerField(default=0, min_value=0)
+    limit = serializers.IntegerField(default=NODE_LOG_CHUNK_SIZE, min_value=1, max_value=NODE_LOG_CHUNK_SIZE)
 
 
 class InstanceHostStatusSerializer(GatewaySerializer):
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from django.db import transaction
+
+from apps.backend.utils.pipeline_parser import PIPELINE_STATES_MAPPING
+from apps.node_man.models import SubscriptionInstanceStepStatus
+from common.log import logger
+
+
+def pipeline_state_change_handler(pipeline_ids, to_state, *args, **kwargs):
+    # 同步实例及步骤状态，失败不影响流程推进，查询时回退到 pipeline 状态
+    try:
+        # 可能在引擎的事务中被调用，使用保存点避免写入失败时破坏外层事务
+        with transaction.atomic():
+            SubscriptionInstanceStepStatus.update_statuses(
+                pipeline_ids, PIPELINE_STATES_MAPPING.get(to_state, "UNKNOWN")
+            )
+    except Exception as e:
+        logger.exception(f"[pipeline state change] update statuses of {pipeline_ids} to {to_state} failed: {e}")
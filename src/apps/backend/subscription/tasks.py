@@ -2,27 +2,48 @@
 from __future__ import absolute_import, unicode_literals
 
 import logging
+import math
+import time
 import traceback
 from collections import OrderedDict, defaultdict
 
 from celery.task import periodic_task
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
 from apps.backend.celery import app
-from apps.backend.subscription.constants import SUBSCRIPTION_UPDATE_INTERVAL, SUBSCRIPTION_UPDATE_SLICE_SIZE
+from apps.backend.subscription.constants import (
+    SUBSCRIPTION_FINGERPRINT_TTL,
+    SUBSCRIPTION_PREFETCH_FINGERPRINT_TTL,
+    SUBSCRIPTION_TASK_BULK_BATCH_SIZE,
+    SUBSCRIPTION_UPDATE_CONCURRENCY,
+    SUBSCRIPTION_UPDATE_INTERVAL,
+    SUBSCRIPTION_UPDATE_SLICE_SIZE,
+)
 from apps.backend.subscription.errors import InstanceTaskIsRunning, PluginValidationError, SubscriptionInstanceEmpty
 from apps.backend.subscription.steps import StepFactory
 from apps.backend.subscription.steps.agent import InstallAgent, InstallProxy
 from apps.backend.subscription.tools import (
     get_instances_by_scope,
+    get_subscription_fingerprint,
+    get_subscription_prefetch_fingerprint,
     get_subscription_task_instance_status,
     parse_host_key,
     parse_node_id,
 )
 from apps.backend.utils.pipeline_parser import PipelineParser, check_running_records
 from apps.node_man import constants
-from apps.node_man.models import Job, PipelineTree, Subscription, SubscriptionInstanceRecord, SubscriptionTask
+from apps.node_man.models import (
+    Job,
+    PipelineTree,
+    Subscription,
+    SubscriptionFingerprint,
+    SubscriptionInstanceInfo,
+    SubscriptionInstanceRecord,
+    SubscriptionInstanceStepStatus,
+    SubscriptionTask,
+)
 from pipeline import builder
 from pipeline.service import task_service
 
@@ -142,6 +163,39 @@ def build_task(subscription_task, instances_action, instance_records):
     return to_be_saved_records, to_be_saved_pipelines, to_be_displayed_errors
 
 
+def save_task_records(instance_records, pipeline_trees):
+    """
+    分批写入实例执行记录、对应的 Pipeline 拓扑树及实例步骤状态，需在事务中调用
+    :param instance_records: 已设置 pipeline_id 的 SubscriptionInstanceRecord 列表
+    :param pipeline_trees: PipelineTree 列表
+    """
+    # bulk_create 不经过 save，需手动填充主机标识
+    for record in instance_records:
+        record.fill_host_fields()
+
+    if getattr(settings, "SUBSCRIPTION_INSTANCE_INFO_DEDUP", False):
+        # 实例信息按内容哈希去重存储
+        # 包含密码、密钥等需清洗信息的记录仍保存在实例记录上，避免清洗后残留在共享的实例信息中
+        instance_infos = {}
+        for record in instance_records:
+            if record.need_clean:
+                continue
+            instance_info = record.deduplicate_instance_info()
+            instance_infos[instance_info.hash] = instance_info
+        SubscriptionInstanceInfo.objects.bulk_create(
+            list(instance_infos.values()), batch_size=SUBSCRIPTION_TASK_BULK_BATCH_SIZE, ignore_conflicts=True
+        )
+
+    SubscriptionInstanceRecord.objects.bulk_create(instance_records, batch_size=SUBSCRIPTION_TASK_BULK_BATCH_SIZE)
+    PipelineTree.objects.bulk_create(pipeline_trees, batch_size=SUBSCRIPTION_TASK_BULK_BATCH_SIZE)
+
+    # 初始化实例及步骤状态，后续由 pipeline 状态变更信号更新
+    step_statuses = []
+    for record in instance_records:
+        step_statuses.extend(SubscriptionInstanceStepStatus.build_for_record(record))
+    SubscriptionInstanceStepStatus.objects.bulk_create(step_statuses, batch_size=SUBSCRIPTION_TASK_BULK_BATCH_SIZE)
+
+
 def create_task(subscription, instances, instance_actions, auto_trigger=False):
     """
     创建执行任务
@@ -220,23 +274,24 @@ def create_task(subscription, instances, instance_actions, auto_trigger=False):
             is_latest=True,
             instance_id__in=[record.instance_id for record in to_be_saved_records],
         ).update(is_latest=False)
-        SubscriptionInstanceRecord.objects.bulk_create(to_be_saved_records)
-        PipelineTree.objects.bulk_create(to_be_saved_pipelines)
+        save_task_records(to_be_saved_records, to_be_saved_pipelines)
 
         logger.info("subscription({}) execute actions: {}".format(subscription.id, instance_actions))
 
     return subscription_task
 
 
-def create_subscription_task(subscription, auto_trigger=False):
+def create_subscription_task(subscription, auto_trigger=False, instances=None):
     """
     自动检查实例及配置的变更，执行相应动作
     :param subscription: Subscription
     :param auto_trigger: 是否为自动触发
+    :param instances: 订阅范围内全部实例，调用方已查询时传入以避免重复查询
     """
 
     # 获取订阅范围内全部实例
-    instances = get_instances_by_scope(subscription.scope)
+    if instances is None:
+        instances = get_instances_by_scope(subscription.scope)
     logger.info(f"[create_subscription_task] instances={instances}")
     # 创建步骤管理器实例
     step_managers = {step.step_id: StepFactory.get_step_manager(step) for step in subscription.steps}
@@ -345,46 +400,100 @@ def update_subscription_instances():
     """
     subscription_ids = list(Subscription.objects.filter(enable=True, is_deleted=False).values_list("id", flat=True))
 
-    for index in range(0, len(subscription_ids), SUBSCRIPTION_UPDATE_SLICE_SIZE):
-        # 按照 SUBSCRIPTION_UPDATE_SLICE_SIZE 切分成多个分片
-        chunks = subscription_ids[index : index + SUBSCRIPTION_UPDATE_SLICE_SIZE]
+    # 按照 SUBSCRIPTION_UPDATE_SLICE_SIZE 切分成多个分片，分片数不超过并发上限
+    slice_size = max(SUBSCRIPTION_UPDATE_SLICE_SIZE, math.ceil(len(subscription_ids) / SUBSCRIPTION_UPDATE_CONCURRENCY))
+    for index in range(0, len(subscription_ids), slice_size):
+        chunks = subscription_ids[index : index + slice_size]
         update_subscription_instances_chunk.delay(chunks)
 
 
+class UpdateResult(object):
+    CREATED = "created"
+    NO_CHANGE = "no_change"
+    SKIPPED = "skipped"
+    RUNNING = "running"
+    FAILED = "failed"
+
+
+def update_subscription_instance(subscription):
+    """
+    检查单个订阅的输入指纹，发生变化时计算变更并创建任务
+    :return: UpdateResult
+    """
+    if subscription.is_running():
+        logger.info(
+            "[update_subscription_instances] subscription({subscription_id}) "
+            "task created failed, some instances is running".format(subscription_id=subscription.id)
+        )
+        return UpdateResult.RUNNING
+
+    # 先以无需查询CMDB的预检指纹判断，未变化时跳过实例拉取
+    prefetch_fingerprint = get_subscription_prefetch_fingerprint(subscription)
+    if SubscriptionFingerprint.is_prefetch_unchanged(
+        subscription.id, prefetch_fingerprint["prefetch_hash"], SUBSCRIPTION_PREFETCH_FINGERPRINT_TTL
+    ):
+        return UpdateResult.SKIPPED
+
+    instances = get_instances_by_scope(subscription.scope)
+    fingerprint = get_subscription_fingerprint(subscription, instances, prefetch_fingerprint)
+    if SubscriptionFingerprint.is_unchanged(subscription.id, fingerprint, SUBSCRIPTION_FINGERPRINT_TTL):
+        SubscriptionFingerprint.mark_checked(subscription.id, fingerprint["prefetch_hash"])
+        return UpdateResult.SKIPPED
+
+    try:
+        subscription_task = create_subscription_task(subscription, auto_trigger=True, instances=instances)
+    except SubscriptionInstanceEmpty:
+        logger.info(
+            "[update_subscription_instances] subscription({subscription_id}) "
+            "has no change, do nothing.".format(subscription_id=subscription.id)
+        )
+        SubscriptionFingerprint.record(subscription.id, fingerprint)
+        return UpdateResult.NO_CHANGE
+
+    run_subscription_task.delay(subscription_task)
+    SubscriptionFingerprint.record(subscription.id, fingerprint)
+    logger.info(
+        "[update_subscription_instances] subscription({subscription_id}) "
+        "task created successful, task_id({task_id})".format(
+            subscription_id=subscription.id, task_id=subscription_task.id
+        )
+    )
+    return UpdateResult.CREATED
+
+
 @app.task(queue="backend_additional_task")
 def update_subscription_instances_chunk(subscription_ids):
     """
     分片更新订阅状态
     """
-    subscriptions = Subscription.objects.filter(id__in=subscription_ids, enable=True, is_deleted=False)
+    chunk_begin = time.time()
+    result_counter = defaultdict(int)
+    subscriptions = Subscription.get_subscriptions(subscription_ids)
     for subscription in subscriptions:
+        if not subscription.enable:
+            continue
 
+        begin = time.time()
         try:
-            if subscription.is_running():
-                logger.info(
-                    "[update_subscription_instances] subscription({subscription_id}) "
-                    "task created failed, some instances is running".format(subscription_id=subscription.id)
-                )
-                continue
-
-            subscription_task = create_subscription_task(subscription, auto_trigger=True)
-            run_subscription_task.delay(subscription_task)
-            logger.info(
-                "[update_subscription_instances] subscription({subscription_id}) "
-                "task created successful, task_id({task_id})".format(
-                    subscription_id=subscription.id, task_id=subscription_task.id
-                )
-            )
-        except SubscriptionInstanceEmpty:
-            logger.info(
-                "[update_subscription_instances] subscription({subscription_id}) "
-                "has no change, do nothing.".format(subscription_id=subscription.id)
-            )
+            result = update_subscription_instance(subscription)
         except Exception as e:
+            result = UpdateResult.FAILED
             logger.exception(
                 "[update_subscription_instances] subscription({subscription_id}) task created failed, "
                 "exception: {message}, {e}".format(subscription_id=subscription.id, message=traceback.format_exc(), e=e)
             )
+        result_counter[result] += 1
+        logger.info(
+            "[update_subscription_instances] subscription({subscription_id}) result({result}) "
+            "cost({cost:.2f}s)".format(subscription_id=subscription.id, result=result, cost=time.time() - begin)
+        )
+
+    logger.info(
+        "[update_subscription_instances] chunk({count}) finished, cost({cost:.2f}s), results({results})".format(
+            count=len(subscription_ids), cost=time.time() - chunk_begin, results=dict(result_counter)
+        )
+    )
+    return dict(result_counter)
 
 
 @periodic_task(run_every=30, ignore_result=True)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import hashlib
+import json
 import logging
 import os
 from collections import defaultdict
@@ -12,12 +13,12 @@ from django.utils import timezone
 from apps.utils.batch_request import batch_request
 from apps.backend.constants import TargetNodeType
 from apps.backend.subscription.errors import ConfigRenderFailed, PipelineTreeParseError
-from apps.backend.utils.pipeline_parser import PipelineParser
+from apps.backend.utils.pipeline_parser import get_node_statuses
 from apps.component.esbclient import client_v2
 from apps.exceptions import ComponentCallError
 from apps.node_man import constants
 from apps.utils.basic import chunk_lists
-from apps.node_man.models import Host, Job, JobTask, SubscriptionInstanceRecord, Packages
+from apps.node_man.models import Host, Job, JobTask, ProcessStatus, SubscriptionInstanceRecord, Packages
 
 logger = logging.getLogger("app")
 
@@ -730,11 +731,12 @@ def render_config_files(config_templates, host_status, context):
     return rendered_configs
 
 
-def get_subscription_task_instance_status(instance_record, pipeline_parser, need_detail=False):
+def get_subscription_task_instance_status(instance_record, pipeline_parser, need_detail=False, need_log=True):
     """
     :param instance_record:
-    :param PipelineParser pipeline_parser:
+    :param apps.backend.utils.pipeline_parser.PipelineParser pipeline_parser:
     :param need_detail: 是否需要详细信息
+    :param need_log: 详细信息中是否需要完整日志，为 False 时仅返回日志大小，日志通过节点日志接口分页获取
     :return:
     """
     # 解析 pipeline 任务树
@@ -799,10 +801,12 @@ def get_subscription_task_instance_status(instance_record, pipeline_parser, need
 
                 if need_detail:
                     sub_step.update(pipeline_parser.get_node_data(single_host_step["id"]))
-                    log = pipeline_parser.get_node_log(single_host_step["id"])
-                    if sub_step["ex_data"]:
-                        log = f"{log}\n{sub_step['ex_data']}"
-                    sub_step.update(log=log)
+                    sub_step.update(pipeline_parser.get_node_log_size(single_host_step["id"]))
+                    if need_log:
+                        log = pipeline_parser.get_node_log(single_host_step["id"])
+                        if sub_step["ex_data"]:
+                            log = f"{log}\n{sub_step['ex_data']}"
+                        sub_step.update(log=log)
 
                 target_host_info["sub_steps"].append(sub_step)
                 target_host_info["sub_steps"].sort(key=lambda i: i["index"])
@@ -833,9 +837,7 @@ def update_job_status(pipeline_id, result=None):
     instances_dict = {instance_record.instance_id: instance_record for instance_record in instance_records}
     instance_records = instances_dict.values()
 
-    pipeline_ids = [r.pipeline_id for r in instance_records]
-
-    pipeline_parser = PipelineParser(pipeline_ids)
+    statuses = get_node_statuses([r.pipeline_id for r in instance_records])
 
     success_count = 0
     failed_count = 0
@@ -843,7 +845,7 @@ def update_job_status(pipeline_id, result=None):
     pending_count = 0
 
     for instance_record in instance_records:
-        status = get_subscription_task_instance_status(instance_record, pipeline_parser)["status"]
+        status = statuses[instance_record.pipeline_id]
         if instance_record.pipeline_id == pipeline_id:
             # 查询状态时，此pipeline还未结算，因此需要根据result把本pipeline也进行结算
             if result is False:
@@ -878,3 +880,42 @@ def update_job_status(pipeline_id, result=None):
     )
     job.save(update_fields=["statistics", "status", "end_time"])
     logger.info(f"end_updating_job_status: {pipeline_id}")
+
+
+def get_data_hash(data):
+    return hashlib.md5(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_subscription_prefetch_fingerprint(subscription):
+    """
+    计算无需查询CMDB即可得到的订阅输入指纹，用于在拉取订阅范围内实例前预检
+    :param subscription: Subscription
+    :return: {"scope_hash": "xxx", "steps_hash": "xxx", "status_hash": "xxx", "prefetch_hash": "xxx"}
+    """
+    steps = [
+        {"step_id": step.step_id, "type": step.type, "config": step.config, "params": step.params}
+        for step in subscription.steps
+    ]
+    statuses = ProcessStatus.objects.filter(
+        source_type=ProcessStatus.SourceType.SUBSCRIPTION, source_id=subscription.id
+    ).values_list("id", "bk_host_id", "group_id", "status", "version", "retry_times")
+    fingerprint = {
+        "scope_hash": get_data_hash([subscription.scope, subscription.target_hosts]),
+        "steps_hash": get_data_hash(steps),
+        "status_hash": get_data_hash(sorted(statuses)),
+    }
+    fingerprint["prefetch_hash"] = get_data_hash([fingerprint, subscription.update_time])
+    return fingerprint
+
+
+def get_subscription_fingerprint(subscription, instances, prefetch_fingerprint=None):
+    """
+    计算订阅自动下发的输入指纹，各项均未变化时计算出的变更动作也不会变化
+    :param subscription: Subscription
+    :param instances: 订阅范围内的全部实例，实例信息中包含主机及所属拓扑
+    :param prefetch_fingerprint: 已计算的预检指纹，为空时重新计算
+    :return: {"scope_hash": "xxx", "instances_hash": "xxx", "steps_hash": "xxx", "status_hash": "xxx", ...}
+    """
+    fingerprint = dict(prefetch_fingerprint or get_subscription_prefetch_fingerprint(subscription))
+    fingerprint["instances_hash"] = get_data_hash(instances)
+    return fingerprint
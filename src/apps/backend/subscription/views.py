@@ -13,7 +13,7 @@ from rest_framework.decorators import action
 from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 
-from apps.backend.agent.tasks import collect_log
+from apps.backend.agent.tasks import bulk_collect_log, collect_log
 from apps.backend.agent.tools import gen_commands
 from apps.backend.subscription.serializers import (
     CMDBSubscriptionSerializer,
@@ -27,6 +27,7 @@ from apps.backend.subscription.serializers import (
     RunSubscriptionSerializer,
     SwitchSubscriptionSerializer,
     TaskResultDetailSerializer,
+    TaskResultNodeLogSerializer,
     TaskResultSerializer,
     UpdateSubscriptionSerializer,
     RetryNodeSerializer,
@@ -38,7 +39,7 @@ from apps.backend.subscription.tools import (
     get_instances_by_scope,
     get_subscription_task_instance_status,
 )
-from apps.backend.utils.pipeline_parser import PipelineParser
+from apps.backend.utils.pipeline_parser import PipelineParser, get_latest_instance_ids_by_status, get_node_statuses
 from apps.generic import APIViewSet
 from apps.node_man import constants, models
 from apps.node_man.models import Host, JobTask, SubscriptionTask
@@ -73,6 +74,7 @@ class SubscriptionViewSet(APIViewSet):
         fetch_commands=FetchCommandsSerializer,
         instance_status=InstanceHostStatusSerializer,
         task_result_detail=TaskResultDetailSerializer,
+        task_result_node_log=TaskResultNodeLogSerializer,
         retry_node=RetryNodeSerializer,
     )
 
@@ -433,33 +435,7 @@ class SubscriptionViewSet(APIViewSet):
             subscription_task = models.SubscriptionTask.objects.filter(subscription_id=subscription_id).first()
             task_id_list = [subscription_task.id]
 
-        # 查询这些任务下的全部instance记录
-        instance_records = models.SubscriptionInstanceRecord.objects.filter(task_id__in=task_id_list).order_by("id")
-
-        # 实例去重
-        instances_dict = {}
-        for instance_record in instance_records:
-            node_data = {
-                "node_type": subscription.NodeType.INSTANCE,
-                "object_type": subscription.object_type,
-            }
-            # 区分主机还是服务实例
-            if subscription.object_type == subscription.ObjectType.HOST:
-                host_info = instance_record.instance_info["host"]
-                # 使用bk_host_id作业为会导致重试任务时无法去重
-                node_data.update(
-                    {
-                        "ip": host_info["bk_host_innerip"],
-                        "bk_cloud_id": host_info["bk_cloud_id"],
-                        "bk_supplier_id": constants.DEFAULT_SUPPLIER_ID,
-                    }
-                )
-            else:
-                node_data.update({"id": instance_record.instance_info["service"]["id"]})
-            node_id = create_node_id(node_data)
-            instances_dict[node_id] = instance_record
-
-        instance_records = list(instances_dict.values())
+        instance_records = self.get_task_instance_records(subscription, task_id_list)
 
         pipeline_ids = [r.pipeline_id for r in instance_records]
 
@@ -471,6 +447,42 @@ class SubscriptionViewSet(APIViewSet):
 
         return Response(instance_status)
 
+    @staticmethod
+    def get_task_instance_records(subscription, task_id_list):
+        """
+        查询任务下的实例执行记录，同一实例取最新的一条
+        主机实例按记录上的主机 IP 及云区域去重，仅加载去重后的记录，避免逐条解析实例信息
+        """
+        instance_records = models.SubscriptionInstanceRecord.objects.filter(task_id__in=task_id_list).order_by("id")
+        if subscription.object_type != subscription.ObjectType.HOST:
+            # 服务实例按服务实例ID去重
+            instances_dict = {}
+            for instance_record in instance_records:
+                node_id = create_node_id(
+                    {
+                        "node_type": subscription.NodeType.INSTANCE,
+                        "object_type": subscription.object_type,
+                        "id": instance_record.instance_info["service"]["id"],
+                    }
+                )
+                instances_dict[node_id] = instance_record
+            return list(instances_dict.values())
+
+        host_rows = list(instance_records.values_list("id", "ip", "bk_cloud_id"))
+        # 未记录主机信息的存量记录从实例信息中解析
+        legacy_records = instance_records.filter(id__in=[row[0] for row in host_rows if not row[1]])
+        for instance_record in legacy_records:
+            instance_record.fill_host_fields()
+        legacy_hosts = {record.id: (record.ip, record.bk_cloud_id) for record in legacy_records}
+
+        # 使用bk_host_id作业为会导致重试任务时无法去重
+        record_ids_by_host = {}
+        for record_id, ip, bk_cloud_id in host_rows:
+            record_ids_by_host[legacy_hosts.get(record_id, (ip, bk_cloud_id))] = record_id
+
+        records_by_id = models.SubscriptionInstanceRecord.objects.in_bulk(list(record_ids_by_host.values()))
+        return [records_by_id[record_id] for record_id in record_ids_by_host.values()]
+
     @action(detail=False, methods=["GET", "POST"], url_path="task_result_detail")
     def task_result_detail(self, request):
         """
@@ -479,6 +491,53 @@ class SubscriptionViewSet(APIViewSet):
         @apiGroup subscription
         """
         params = self.get_validated_data()
+        instance_record = self.get_instance_record(params)
+
+        pipeline_parser = PipelineParser([instance_record.pipeline_id])
+
+        instance_status = get_subscription_task_instance_status(
+            instance_record, pipeline_parser, need_detail=True, need_log=params["need_log"]
+        )
+        return Response(instance_status)
+
+    @action(detail=False, methods=["GET", "POST"], url_path="task_result_node_log")
+    def task_result_node_log(self, request):
+        """
+        @api {POST} /subscription/task_result_node_log/ 分页查询任务节点日志
+        @apiName subscription_task_result_node_log
+        @apiGroup subscription
+        @apiParam {Int} subscription_id 订阅ID
+        @apiParam {Int} [task_id] 任务ID
+        @apiParam {String} instance_id 实例ID
+        @apiParam {String} node_id 节点ID，即子步骤的 pipeline_id
+        @apiParam {Int} [cursor] 日志游标，首次查询传 0，之后取上一次返回的 cursor
+        @apiParam {Int} [limit] 日志条数
+        @apiSuccessExample {json} 成功返回:
+        {
+            "node_id": "c2bdb95bc72239eeade47419840923d7",
+            "log": "[2020-09-01 10:00:00 INFO] xxx",
+            "cursor": 123,
+            "has_more": true,
+            "ex_data": ""
+        }
+        """
+        params = self.get_validated_data()
+        instance_record = self.get_instance_record(params)
+
+        # 只允许查询该实例 pipeline 内的节点，尚未开始执行的节点返回空日志
+        pipeline_parser = PipelineParser([instance_record.pipeline_id])
+        if params["node_id"] not in pipeline_parser.get_tree_node_ids():
+            raise SubscriptionInstanceRecordNotExist()
+
+        node_log = PipelineParser.get_node_log_slice(params["node_id"], params["cursor"], params["limit"])
+        node_log["node_id"] = params["node_id"]
+        return Response(node_log)
+
+    @staticmethod
+    def get_instance_record(params):
+        """
+        根据订阅ID、实例ID及可选的任务ID获取实例执行记录，未指定任务时取最新一条
+        """
         subscription_id = params["subscription_id"]
         task_id = params.get("task_id")
         instance_id = params["instance_id"]
@@ -497,11 +556,7 @@ class SubscriptionViewSet(APIViewSet):
 
         if not instance_record:
             raise SubscriptionInstanceRecordNotExist()
-
-        pipeline_parser = PipelineParser([instance_record.pipeline_id])
-
-        instance_status = get_subscription_task_instance_status(instance_record, pipeline_parser, need_detail=True)
-        return Response(instance_status)
+        return instance_record
 
     @action(detail=False, methods=["POST"], url_path="collect_task_result_detail")
     def collect_task_result_detail(self, request):
@@ -519,6 +574,25 @@ class SubscriptionViewSet(APIViewSet):
         res = collect_log.delay(job_task.bk_host_id, job_task.pipeline_id)
         return Response({"celery_id": res.id})
 
+    @action(detail=False, methods=["POST"], url_path="bulk_collect_task_result_detail")
+    def bulk_collect_task_result_detail(self, request):
+        """
+        @api {POST} /subscription/bulk_collect_task_result_detail/ 批量采集任务执行详细结果
+        @apiName bulk_collect_subscription_task_result_detail
+        @apiGroup subscription
+        @apiParam {Int} job_id 任务ID
+        @apiParam {List} instance_ids 实例ID列表
+        """
+        job_id = self.request.data.get("job_id")
+        instance_ids = self.request.data.get("instance_ids") or []
+        host_node_ids = list(
+            JobTask.objects.filter(job_id=job_id, instance_id__in=instance_ids).values_list("bk_host_id", "pipeline_id")
+        )
+        if not host_node_ids:
+            return Response({"celery_id": -1})
+        res = bulk_collect_log.delay(host_node_ids)
+        return Response({"celery_id": res.id})
+
     @action(detail=False, methods=["GET", "POST"], url_path="instance_status")
     def instance_status(self, request):
         """
@@ -554,7 +628,9 @@ class SubscriptionViewSet(APIViewSet):
                 if record.pipeline_id:
                     node_ids.append(record.pipeline_id)
 
-        pipeline_parser = PipelineParser(node_ids)
+        node_statuses = get_node_statuses(node_ids)
+        # 仅展示任务详情时需要解析 pipeline 任务树
+        pipeline_parser = PipelineParser(node_ids) if params["show_task_detail"] else None
 
         running_records = {}
         # 更新每条record的status字段
@@ -563,7 +639,7 @@ class SubscriptionViewSet(APIViewSet):
             for instance_id in records:
                 record = records[instance_id]
                 # 注入 status 属性。查不到执行记录的，默认设为 PENDING
-                record.status = pipeline_parser.get_node_state(record.pipeline_id)["status"]
+                record.status = node_statuses.get(record.pipeline_id, "PENDING")
                 if record.status in ["PENDING", "RUNNING"]:
                     # 如果实例正在执行，则记下它对应的ID
                     running_records[record.task_id] = record
@@ -674,16 +750,7 @@ class SubscriptionViewSet(APIViewSet):
 
         # 如果不传终止范围，则查询正在执行中的任务
         if not instance_id_list:
-            instance_id_list = []
-            instance_records = models.SubscriptionInstanceRecord.objects.filter(
-                subscription_id=subscription_id, is_latest=True
-            )
-            pipeline_parser = PipelineParser([record.pipeline_id for record in instance_records])
-
-            for instance_record in instance_records:
-                instance_status = get_subscription_task_instance_status(instance_record, pipeline_parser)
-                if instance_status["status"] in ["RUNNING", "PENDING"]:
-                    instance_id_list.append(instance_record.instance_id)
+            instance_id_list = get_latest_instance_ids_by_status(subscription_id, ["RUNNING", "PENDING"])
 
         records = models.SubscriptionInstanceRecord.objects.filter(
             subscription_id=subscription_id, instance_id__in=instance_id_list
@@ -723,16 +790,7 @@ class SubscriptionViewSet(APIViewSet):
 
         # 如果不传终止范围，则查询已失败的任务
         if not instance_id_list:
-            instance_id_list = []
-            instance_records = models.SubscriptionInstanceRecord.objects.filter(
-                subscription_id=subscription_id, is_latest=True
-            )
-            pipeline_parser = PipelineParser([record.pipeline_id for record in instance_records])
-
-            for instance_record in instance_records:
-                instance_status = get_subscription_task_instance_status(instance_record, pipeline_parser)
-                if instance_status["status"] == "FAILED":
-                    instance_id_list.append(instance_record.instance_id)
+            instance_id_list = get_latest_instance_ids_by_status(subscription_id, ["FAILED"])
 
         scope = deepcopy(subscription.scope)
         scope["nodes"] = []
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import time
+
+import mock
+from django.test import TestCase
+
+from apps.backend.agent import tasks
+from apps.node_man import constants
+from apps.node_man.models import Host
+from pipeline.log.models import LogEntry
+
+
+class TestBulkCollectLog(TestCase):
+    def setUp(self):
+        host_infos = [
+            (1, constants.NodeType.AGENT, constants.OsType.LINUX),
+            (2, constants.NodeType.AGENT, constants.OsType.WINDOWS),
+            (3, constants.NodeType.PAGENT, constants.OsType.LINUX),
+            (4, constants.NodeType.PAGENT, constants.OsType.WINDOWS),
+            (5, constants.NodeType.PROXY, constants.OsType.LINUX),
+        ]
+        Host.objects.bulk_create(
+            [
+                Host(
+                    bk_host_id=bk_host_id,
+                    bk_biz_id=1,
+                    bk_cloud_id=1,
+                    inner_ip=f"127.0.0.{bk_host_id}",
+                    node_type=node_type,
+                    os_type=os_type,
+                )
+                for bk_host_id, node_type, os_type in host_infos
+            ]
+        )
+
+    def test_group_collect_targets(self):
+        hosts = {host.bk_host_id: host for host in Host.objects.all()}
+        groups, failed_outputs = tasks.group_collect_targets(
+            hosts, [(1, "n1"), (1, "n1_retry"), (2, "n2"), (3, "n3"), (4, "n4"), (5, "n5"), (6, "n6")]
+        )
+        # PAGENT 暂不采集
+        self.assertEqual(
+            {key: [node_id for __, node_id in targets] for key, targets in groups.items()},
+            {("ssh", 1): ["n1", "n1_retry"], ("wmi", 2): ["n2"], ("ssh", 5): ["n5"]},
+        )
+        self.assertEqual([node_id for node_id, __ in failed_outputs], ["n6"])
+
+    def test_bulk_collect_log(self):
+        def collect_host_log(session_type, targets, context):
+            return [(node_id, f"{session_type} log") for __, node_id in targets]
+
+        with mock.patch("apps.backend.agent.tasks.collect_host_log", collect_host_log):
+            tasks.bulk_collect_log([(1, "n1"), (2, "n2"), (3, "n3"), (6, "n6")])
+
+        self.assertEqual(LogEntry.objects.count(), 3 * 3)
+        self.assertEqual(LogEntry.objects.filter(node_id="n1", message="[collect] ssh log").count(), 1)
+        self.assertEqual(LogEntry.objects.filter(node_id="n2", message="[collect] wmi log").count(), 1)
+        self.assertFalse(LogEntry.objects.filter(node_id="n3").exists())
+        self.assertTrue(LogEntry.objects.get(node_id="n6", message__startswith="[collect]").message.endswith("exist"))
+
+    def test_bulk_collect_log_timeout(self):
+        ssh_man = mock.MagicMock()
+
+        def collect_host_log(session_type, targets, context):
+            context["begin_time"] = time.time()
+            if session_type == "wmi":
+                return [(node_id, "wmi log") for __, node_id in targets]
+            context["ssh_man"] = ssh_man
+            # 模拟会话阻塞，直至被调度线程放弃
+            while not context["abandoned"]:
+                time.sleep(0.01)
+            return []
+
+        with mock.patch("apps.backend.agent.tasks.collect_host_log", collect_host_log), mock.patch(
+            "apps.backend.agent.tasks.COLLECT_LOG_POLL_INTERVAL", 0.05
+        ):
+            begin_time = time.time()
+            tasks.bulk_collect_log([(1, "n1"), (2, "n2")], timeout=0.2)
+
+        # 超时按主机计算，且超时的会话被关闭
+        self.assertLess(time.time() - begin_time, 1)
+        ssh_man.safe_close.assert_called_once_with(ssh_man.ssh)
+        self.assertEqual(LogEntry.objects.filter(node_id="n2", message="[collect] wmi log").count(), 1)
+        self.assertTrue(
+            LogEntry.objects.get(node_id="n1", message__startswith="[collect]").message.endswith(
+                "timeout after 0.2 seconds"
+            )
+        )
@@ -23,6 +23,7 @@ from apps.node_man.models import (
     ProcControl,
     UploadPackage,
 )
+from apps.utils.basic import md5
 
 # 全局使用的mock
 mock.patch("apps.backend.plugin.tasks.export_plugin", delay=export_plugin).start()
@@ -136,11 +137,73 @@ class TestPackageFunction(TestCase):
 
         settings.EXPORT_PATH = self.temp_path
 
+        # TestCase 的事务不会提交，提交后发布的包文件改为立即发布
+        self.defer_on_commit = False
+        self.on_commit_callbacks = []
+        on_commit_patcher = mock.patch("django.db.transaction.on_commit", side_effect=self.run_on_commit)
+        on_commit_patcher.start()
+        self.addCleanup(on_commit_patcher.stop)
+
+    def run_on_commit(self, func):
+        if self.defer_on_commit:
+            self.on_commit_callbacks.append(func)
+        else:
+            func()
+
     def tearDown(self):
         """测试清理配置"""
 
         shutil.rmtree(self.temp_path)
 
+    def create_upload_package(self):
+        return UploadPackage.create_record(
+            module="gse_plugin",
+            file_path=self.tarfile_path,
+            md5="abcefg",
+            operator="haha_test",
+            source_app_code="bk_nodeman",
+            file_name="tarfile.tgz",
+        )
+
+    def list_package_files(self):
+        return sorted(
+            file_name
+            for package_os, cpu_arch in (("linux", "x86_64"), ("windows", "x86"))
+            for file_name in os.listdir(os.path.join(settings.NGINX_DOWNLOAD_PATH, package_os, cpu_arch))
+        )
+
+    def test_create_package_records__publish_on_commit(self):
+        """测试插件包在记录提交后才发布到nginx路径"""
+        upload_object = self.create_upload_package()
+        self.defer_on_commit = True
+        package_object_list = upload_object.create_package_records(is_release=True)
+
+        # 提交前仅有暂存文件
+        package_files = self.list_package_files()
+        self.assertEqual(len(package_files), 2)
+        self.assertTrue(all(file_name.endswith(".tmp") for file_name in package_files))
+
+        for callback in self.on_commit_callbacks:
+            callback()
+        self.assertEqual(self.list_package_files(), ["test_plugin-1.0.1.tgz", "test_plugin-1.0.1.tgz"])
+        for package in package_object_list:
+            self.assertEqual(package.md5, md5(os.path.join(package.pkg_path, package.pkg_name)))
+
+    def test_create_package_records__discard_on_failure(self):
+        """测试注册失败时不覆盖已发布的插件包，并清理暂存文件"""
+        upload_object = self.create_upload_package()
+        upload_object.create_package_records(is_release=True)
+        linux_file_path = os.path.join(settings.NGINX_DOWNLOAD_PATH, "linux", "x86_64", "test_plugin-1.0.1.tgz")
+        published_md5 = md5(linux_file_path)
+
+        # 内容变化后重新注册，注册过程中校验失败
+        upload_object.md5 = "changed"
+        with mock.patch("apps.node_man.models.Packages.create_record", side_effect=ValueError):
+            self.assertRaises(ValueError, upload_object.create_package_records, is_release=True)
+
+        self.assertEqual(self.list_package_files(), ["test_plugin-1.0.1.tgz", "test_plugin-1.0.1.tgz"])
+        self.assertEqual(md5(linux_file_path), published_md5)
+
     def test_create_upload_record_and_register(self):
         """测试创建上传包记录功能"""
         UploadPackage.create_record(
@@ -188,26 +251,56 @@ class TestPackageFunction(TestCase):
             pkg_name="test_plugin-1.0.1.tgz", os="linux", version="1.0.1", cpu_arch="x86_64",
         )
 
-        # 3. 验证打包的包目录结构符合预期
-        self.assertTrue(os.path.exists("/tmp/test_plugin-1.0.1-windows-x86.tgz"))
-        self.assertTrue(os.path.exists("/tmp/test_plugin-1.0.1-linux-x86_64.tgz"))
-
-        with tarfile.open("/tmp/test_plugin-1.0.1-windows-x86.tgz") as linux_tar:
-            linux_tar.getmember("external_plugins/%s/project.yaml" % self.plugin_name)
-            linux_tar.getmember("external_plugins/%s/plugin" % self.plugin_name)
-
-        # 测试导出的功能
-        # 准备一个临时的文件在模拟的nginx路径下
+        # 3. 验证打包的包直接写入nginx路径，且目录结构及MD5符合预期
         windows_file_path = os.path.join(settings.NGINX_DOWNLOAD_PATH, "windows", "x86", "test_plugin-1.0.1.tgz")
         linux_file_path = os.path.join(settings.NGINX_DOWNLOAD_PATH, "linux", "x86_64", "test_plugin-1.0.1.tgz")
+        self.assertTrue(os.path.exists(windows_file_path))
+        self.assertTrue(os.path.exists(linux_file_path))
+
+        with tarfile.open(windows_file_path) as windows_tar:
+            windows_tar.getmember("external_plugins/%s/project.yaml" % self.plugin_name)
+            windows_tar.getmember("external_plugins/%s/plugin" % self.plugin_name)
 
-        if not os.path.exists(os.path.dirname(windows_file_path)):
-            os.makedirs(os.path.dirname(windows_file_path))
-        if not os.path.exists(os.path.dirname(linux_file_path)):
-            os.makedirs(os.path.dirname(linux_file_path))
+        for package in package_object_list:
+            package_file_path = os.path.join(package.pkg_path, package.pkg_name)
+            self.assertEqual(package.md5, md5(package_file_path))
+            self.assertEqual(package.pkg_size, os.path.getsize(package_file_path))
+            self.assertEqual(package.source_md5, upload_object.md5)
+
+        # 4. 重复注册相同内容的上传包时不再重新打包
+        package_mtimes = {package.id: package.pkg_mtime for package in package_object_list}
+        package_object_list = upload_object.create_package_records(is_release=True)
+        self.assertEqual({package.id: package.pkg_mtime for package in package_object_list}, package_mtimes)
+        self.assertEqual(Packages.objects.filter(project="test_plugin").count(), 2)
 
-        shutil.copy("/tmp/test_plugin-1.0.1-windows-x86.tgz", windows_file_path)
-        shutil.copy("/tmp/test_plugin-1.0.1-linux-x86_64.tgz", linux_file_path)
+    def test_export_plugins(self):
+        """测试导出插件功能"""
+        UploadPackage.create_record(
+            module="gse_plugin",
+            file_path=self.tarfile_path,
+            md5="abcefg",
+            operator="haha_test",
+            source_app_code="bk_nodeman",
+            file_name="tarfile.tgz",
+        )
+        UploadPackage.objects.get(file_name=self.tarfile_name).create_package_records(is_release=True)
+
+        # 1. 导出包直接写入导出路径，且目录结构符合导入规范
+        export_file_path = Packages.export_plugins(project=self.plugin_name, version="1.0.1")["file_path"]
+        self.assertEqual(os.path.dirname(export_file_path), settings.EXPORT_PATH)
+        with tarfile.open(export_file_path) as export_tar:
+            for package_os, cpu_arch in (("linux", "x86_64"), ("windows", "x86")):
+                export_root_path = "external_plugins_{}_{}/{}".format(package_os, cpu_arch, self.plugin_name)
+                export_tar.getmember("%s/project.yaml" % export_root_path)
+                export_tar.getmember("%s/plugin" % export_root_path)
+
+        # 2. 插件包内容未变化时复用已有的导出包
+        export_mtime = os.path.getmtime(export_file_path)
+        self.assertEqual(
+            Packages.export_plugins(project=self.plugin_name, version="1.0.1")["file_path"], export_file_path
+        )
+        self.assertEqual(os.path.getmtime(export_file_path), export_mtime)
+        self.assertFalse([file_name for file_name in os.listdir(settings.EXPORT_PATH) if file_name.endswith(".tmp")])
 
     def test_upload_api(self):
         """测试上传文件接口"""
@@ -270,10 +363,13 @@ class TestPackageFunction(TestCase):
         )
 
         # 3. 验证打包的包目录结构符合预期
-        self.assertTrue(os.path.exists("/tmp/test_plugin-1.0.1-windows-x86.tgz"))
-        self.assertTrue(os.path.exists("/tmp/test_plugin-1.0.1-linux-x86_64.tgz"))
+        windows_file_path = os.path.join(settings.NGINX_DOWNLOAD_PATH, "windows", "x86", "test_plugin-1.0.1.tgz")
+        self.assertTrue(os.path.exists(windows_file_path))
+        self.assertTrue(
+            os.path.exists(os.path.join(settings.NGINX_DOWNLOAD_PATH, "linux", "x86_64", "test_plugin-1.0.1.tgz"))
+        )
 
-        linux_tar = tarfile.open("/tmp/test_plugin-1.0.1-windows-x86.tgz")
+        linux_tar = tarfile.open(windows_file_path)
         linux_tar.getmember("external_plugins/%s/project.yaml" % self.plugin_name)
         linux_tar.getmember("external_plugins/%s/plugin" % self.plugin_name)
 
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from django.test import TestCase
+
+from apps.node_man import constants
+from apps.node_man.models import SubscriptionInstanceStepStatus
+from pipeline.engine import states
+from pipeline.engine.models import Status
+from pipeline.engine.signals import pipeline_state_change
+
+
+class TestPipelineStateChangeHandler(TestCase):
+    NODE_IDS = ["instance", "step"]
+
+    def setUp(self):
+        SubscriptionInstanceStepStatus.objects.bulk_create(
+            [
+                SubscriptionInstanceStepStatus(
+                    subscription_id=1, task_id=1, instance_id="host|instance|host|1", step_id=step_id, node_id=node_id
+                )
+                for step_id, node_id in zip(["", "agent"], self.NODE_IDS)
+            ]
+        )
+
+    def assert_statuses(self, status):
+        self.assertEqual(
+            SubscriptionInstanceStepStatus.get_statuses(self.NODE_IDS), {node_id: status for node_id in self.NODE_IDS}
+        )
+
+    def test_state_change(self):
+        for state, status in [
+            (states.RUNNING, constants.JobStatusType.RUNNING),
+            (states.BLOCKED, constants.JobStatusType.FAILED),
+            (states.FINISHED, constants.JobStatusType.SUCCESS),
+        ]:
+            pipeline_state_change.send(sender=Status, pipeline_ids=self.NODE_IDS, to_state=state)
+            self.assert_statuses(status)
+
+    def test_batch_transit(self):
+        Status.objects.bulk_create([Status(id=node_id, state=states.RUNNING) for node_id in self.NODE_IDS])
+        Status.objects.batch_transit(id_list=self.NODE_IDS, state=states.BLOCKED, from_state=states.RUNNING)
+        self.assert_statuses(constants.JobStatusType.FAILED)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+import uuid
+
+import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.backend.subscription.constants import SUBSCRIPTION_PREFETCH_FINGERPRINT_TTL
+from apps.backend.subscription.errors import SubscriptionInstanceEmpty
+from apps.backend.subscription.tasks import UpdateResult, save_task_records, update_subscription_instances_chunk
+from apps.node_man import constants
+from apps.node_man.models import (
+    PipelineTree,
+    Subscription,
+    SubscriptionFingerprint,
+    SubscriptionInstanceInfo,
+    SubscriptionInstanceRecord,
+    SubscriptionInstanceStepStatus,
+    SubscriptionStep,
+)
+from apps.node_man.periodic_tasks.clean_subscription_record_info import update_subscription_instance_record
+
+INSTANCES = {"host|instance|host|1": {"host": {"bk_host_id": 1, "bk_host_innerip": "127.0.0.1"}}}
+
+
+class TestUpdateSubscriptionInstances(TestCase):
+    def setUp(self):
+        self.subscription = Subscription.objects.create(
+            bk_biz_id=2,
+            object_type=Subscription.ObjectType.HOST,
+            node_type=Subscription.NodeType.INSTANCE,
+            nodes=[{"bk_host_id": 1}],
+            creator="admin",
+        )
+        self.step = SubscriptionStep.objects.create(
+            subscription_id=self.subscription.id,
+            step_id="mysql_exporter",
+            type="PLUGIN",
+            config={"plugin_name": "mysql_exporter", "plugin_version": "2.3"},
+            params={"url": "xxx"},
+        )
+        self.get_instances_by_scope = mock.patch(
+            "apps.backend.subscription.tasks.get_instances_by_scope", return_value=dict(INSTANCES)
+        ).start()
+        self.create_subscription_task = mock.patch(
+            "apps.backend.subscription.tasks.create_subscription_task", side_effect=SubscriptionInstanceEmpty()
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def expire_prefetch(self):
+        SubscriptionFingerprint.objects.filter(subscription_id=self.subscription.id).update(
+            check_time=timezone.now() - timezone.timedelta(seconds=SUBSCRIPTION_PREFETCH_FINGERPRINT_TTL + 1)
+        )
+
+    def test_skip_unchanged_subscription(self):
+        results = update_subscription_instances_chunk([self.subscription.id])
+        self.assertEqual(results, {UpdateResult.NO_CHANGE: 1})
+        self.assertTrue(SubscriptionFingerprint.objects.filter(subscription_id=self.subscription.id).exists())
+
+        # 输入未变化，预检即跳过，不再查询CMDB及计算变更动作
+        results = update_subscription_instances_chunk([self.subscription.id])
+        self.assertEqual(results, {UpdateResult.SKIPPED: 1})
+        self.assertEqual(self.get_instances_by_scope.call_count, 1)
+        self.assertEqual(self.create_subscription_task.call_count, 1)
+
+        # 预检过期后重新查询CMDB，实例未变化时仍跳过
+        self.expire_prefetch()
+        results = update_subscription_instances_chunk([self.subscription.id])
+        self.assertEqual(results, {UpdateResult.SKIPPED: 1})
+        self.assertEqual(self.get_instances_by_scope.call_count, 2)
+        self.assertEqual(self.create_subscription_task.call_count, 1)
+
+        # 步骤配置变化后重新计算
+        self.step.params = {"url": "yyy"}
+        self.step.save()
+        results = update_subscription_instances_chunk([self.subscription.id])
+        self.assertEqual(results, {UpdateResult.NO_CHANGE: 1})
+
+        # 主机拓扑变化后重新计算
+        self.get_instances_by_scope.return_value = {
+            "host|instance|host|1": {"host": {"bk_host_id": 1, "bk_host_innerip": "127.0.0.1", "bk_module_id": 2}}
+        }
+        self.expire_prefetch()
+        results = update_subscription_instances_chunk([self.subscription.id])
+        self.assertEqual(results, {UpdateResult.NO_CHANGE: 1})
+        self.assertEqual(self.create_subscription_task.call_count, 3)
+
+    def test_failed_subscription_not_recorded(self):
+        self.create_subscription_task.side_effect = Exception("cmdb error")
+        results = update_subscription_instances_chunk([self.subscription.id])
+        self.assertEqual(results, {UpdateResult.FAILED: 1})
+        self.assertFalse(SubscriptionFingerprint.objects.filter(subscription_id=self.subscription.id).exists())
+
+
+class TestSaveTaskRecords(TestCase):
+    @staticmethod
+    def build_records(count):
+        records = []
+        pipeline_trees = []
+        for index in range(count):
+            pipeline_id = uuid.uuid4().hex
+            records.append(
+                SubscriptionInstanceRecord(
+                    task_id=1,
+                    subscription_id=1,
+                    instance_id=f"host|instance|host|{index}",
+                    instance_info={"host": {"bk_host_innerip": "127.0.0.1", "bk_cloud_id": index % 2}},
+                    steps=[],
+                    pipeline_id=pipeline_id,
+                )
+            )
+            pipeline_trees.append(PipelineTree(id=pipeline_id, tree={"id": pipeline_id}))
+        return records, pipeline_trees
+
+    def test_save_task_records(self):
+        records, pipeline_trees = self.build_records(1200)
+        # 实例记录、拓扑树及实例状态各分 3 批写入
+        with self.assertNumQueries(9):
+            save_task_records(records, pipeline_trees)
+        self.assertEqual(SubscriptionInstanceRecord.objects.filter(task_id=1).count(), 1200)
+        self.assertEqual(PipelineTree.objects.filter(id__in=[tree.id for tree in pipeline_trees]).count(), 1200)
+        self.assertEqual(
+            SubscriptionInstanceStepStatus.objects.filter(task_id=1, status=constants.JobStatusType.PENDING).count(),
+            1200,
+        )
+
+    @override_settings(SUBSCRIPTION_INSTANCE_INFO_DEDUP=True)
+    def test_save_task_records__dedup(self):
+        records, pipeline_trees = self.build_records(1200)
+        save_task_records(records, pipeline_trees)
+        self.assertEqual(SubscriptionInstanceInfo.objects.count(), 2)
+        self.assertFalse(SubscriptionInstanceRecord.objects.exclude(raw_instance_info={}).exists())
+
+        # 去重存储的实例信息随查询结果批量加载
+        with self.assertNumQueries(2):
+            instance_infos = [record.instance_info for record in SubscriptionInstanceRecord.objects.filter(task_id=1)]
+        self.assertEqual(instance_infos, [record.instance_info for record in records])
+
+        # 修改后的实例信息记录在实例记录上
+        record = SubscriptionInstanceRecord.objects.filter(task_id=1).first()
+        record.instance_info["host"]["bk_host_id"] = 1
+        record.save()
+        record = SubscriptionInstanceRecord.objects.get(id=record.id)
+        self.assertEqual(record.instance_info_hash, "")
+        self.assertEqual(record.instance_info["host"]["bk_host_id"], 1)
+
+    @override_settings(SUBSCRIPTION_INSTANCE_INFO_DEDUP=True)
+    def test_save_task_records__dedup_skip_need_clean(self):
+        records, pipeline_trees = self.build_records(2)
+        records[0].need_clean = True
+        records[0].instance_info["host"]["password"] = "password"
+        save_task_records(records, pipeline_trees)
+
+        # 需清洗的实例信息不进入去重存储
+        self.assertEqual(SubscriptionInstanceInfo.objects.count(), 1)
+        record = SubscriptionInstanceRecord.objects.get(instance_id=records[0].instance_id)
+        self.assertEqual(record.instance_info_hash, "")
+        self.assertEqual(record.raw_instance_info["host"]["password"], "password")
+
+
+class TestCleanSubscriptionRecordInfo(TestCase):
+    def test_clean_deduplicated_instance_info(self):
+        instance_info = {"host": {"bk_host_innerip": "127.0.0.1", "password": "password"}}
+        instance_info_hash = SubscriptionInstanceInfo.get_hash(instance_info)
+        SubscriptionInstanceInfo.objects.create(hash=instance_info_hash, instance_info=instance_info)
+        record = SubscriptionInstanceRecord.objects.create(
+            task_id=1,
+            subscription_id=1,
+            instance_id="host|instance|host|1",
+            raw_instance_info={},
+            instance_info_hash=instance_info_hash,
+            steps=[],
+            need_clean=True,
+        )
+        SubscriptionInstanceRecord.objects.filter(id=record.id).update(
+            update_time=timezone.now() - timezone.timedelta(days=2)
+        )
+
+        update_subscription_instance_record("task_id")
+
+        record = SubscriptionInstanceRecord.objects.get(id=record.id)
+        self.assertFalse(record.need_clean)
+        self.assertEqual(record.instance_info_hash, "")
+        self.assertEqual(record.instance_info["host"]["password"], "")
+        # 不再被引用的去重实例信息被删除
+        self.assertFalse(SubscriptionInstanceInfo.objects.filter(hash=instance_info_hash).exists())
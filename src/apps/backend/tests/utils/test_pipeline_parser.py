@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+import mock
+from django.test import TestCase
+
+from apps.backend.utils.pipeline_parser import PipelineParser, get_latest_instance_ids_by_status, get_node_statuses
+from apps.node_man.models import SubscriptionInstanceRecord, SubscriptionInstanceStepStatus
+from pipeline.engine import states
+from pipeline.engine.models import Data as PipelineData
+from pipeline.engine.models import Status
+from pipeline.log.models import LogEntry
+from pipeline.utils.uniqid import uniqid
+
+
+class TestPipelineParserNodeLog(TestCase):
+    NODE_ID = "c2bdb95bc72239eeade47419840923d7"
+
+    def setUp(self):
+        LogEntry.objects.bulk_create(
+            [
+                LogEntry(logger_name="pipeline.logging", level_name="INFO", message=f"line {index}", node_id=node_id)
+                for index in range(7)
+                for node_id in [self.NODE_ID, "other_node"]
+            ]
+        )
+        # 历史执行的日志不应被返回
+        LogEntry.objects.create(
+            logger_name="pipeline.logging", level_name="INFO", message="history", node_id=self.NODE_ID, history_id=1
+        )
+
+    def test_iter_node_log(self):
+        logs = [log for __, log in PipelineParser.iter_node_log(self.NODE_ID, chunk_size=3)]
+        self.assertEqual(len(logs), 7)
+        self.assertTrue(all(log.endswith(f"line {index}") for index, log in enumerate(logs)))
+
+    def test_get_node_log_slice(self):
+        lines = []
+        cursor = 0
+        pages = 0
+        while True:
+            node_log = PipelineParser.get_node_log_slice(self.NODE_ID, cursor, limit=3)
+            lines.extend(node_log["log"].split("\n"))
+            cursor = node_log["cursor"]
+            pages += 1
+            if not node_log["has_more"]:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual([line.split("] ")[-1] for line in lines], [f"line {index}" for index in range(7)])
+
+        node_log = PipelineParser.get_node_log_slice(self.NODE_ID, cursor, limit=3)
+        self.assertEqual(node_log, {"log": "", "cursor": cursor, "has_more": False, "ex_data": ""})
+
+    def test_get_node_log_slice__ex_data(self):
+        PipelineData.objects.create(id=self.NODE_ID, ex_data="error")
+
+        # 异常信息仅在最后一页返回
+        self.assertEqual(PipelineParser.get_node_log_slice(self.NODE_ID, limit=3)["ex_data"], "")
+        self.assertEqual(PipelineParser.get_node_log_slice(self.NODE_ID, limit=7)["ex_data"], "error")
+
+    def test_get_node_log_slice__not_started(self):
+        self.assertEqual(
+            PipelineParser.get_node_log_slice("not_started_node"),
+            {"log": "", "cursor": 0, "has_more": False, "ex_data": ""},
+        )
+
+    def test_get_tree_node_ids(self):
+        pipeline_parser = PipelineParser(["root"])
+        pipeline_parser._sorted_pipeline_tree = {
+            "root": {
+                "children": {
+                    "step": {"id": "step", "children": {"host": {"id": "host", "children": {"act": {"id": "act"}}}}}
+                }
+            }
+        }
+        self.assertEqual(pipeline_parser.get_tree_node_ids(), {"root", "step", "host", "act"})
+
+
+class TestPipelineParserState(TestCase):
+    ROOT_COUNT = 1000
+
+    def setUp(self):
+        self.pipeline_ids = []
+        self.act_ids = []
+        statuses = []
+        for index in range(self.ROOT_COUNT):
+            root_id, subprocess_id, act_id = uniqid(), uniqid(), uniqid()
+            # 阻塞的父节点状态由子节点推导
+            parent_state, act_state = (
+                (states.BLOCKED, states.RUNNING) if index % 2 else (states.RUNNING, states.FINISHED)
+            )
+            self.pipeline_ids.append(root_id)
+            self.act_ids.append(act_id)
+            statuses.extend(
+                [
+                    Status(id=root_id, state=parent_state, root_id=root_id, depth=0, path=f"{root_id}/"),
+                    Status(
+                        id=subprocess_id,
+                        state=parent_state,
+                        parent_id=root_id,
+                        root_id=root_id,
+                        depth=1,
+                        path=f"{root_id}/{subprocess_id}/",
+                    ),
+                    Status(
+                        id=act_id,
+                        state=act_state,
+                        parent_id=subprocess_id,
+                        root_id=root_id,
+                        depth=2,
+                        path=f"{root_id}/{subprocess_id}/{act_id}/",
+                    ),
+                ]
+            )
+        Status.objects.bulk_create(statuses)
+
+    def test_get_all_nodes_state(self):
+        with self.assertNumQueries(1):
+            nodes_state = PipelineParser(self.pipeline_ids).get_all_nodes_state()
+
+        self.assertEqual(len(nodes_state), self.ROOT_COUNT * 3)
+        self.assertEqual(nodes_state[self.act_ids[0]]["status"], "SUCCESS")
+        self.assertEqual(nodes_state[self.act_ids[1]]["status"], "RUNNING")
+        self.assertEqual(nodes_state[self.pipeline_ids[0]]["status"], "RUNNING")
+        self.assertEqual(nodes_state[self.pipeline_ids[1]]["status"], "RUNNING")
+
+
+class TestGetNodeStatuses(TestCase):
+    def setUp(self):
+        SubscriptionInstanceStepStatus.objects.bulk_create(
+            [
+                SubscriptionInstanceStepStatus(
+                    subscription_id=1,
+                    task_id=1,
+                    instance_id="host|instance|host|1",
+                    node_id="instance",
+                    status="RUNNING",
+                ),
+                SubscriptionInstanceStepStatus(
+                    subscription_id=1,
+                    task_id=1,
+                    instance_id="host|instance|host|1",
+                    step_id="agent",
+                    node_id="step",
+                    status="SUCCESS",
+                ),
+            ]
+        )
+
+    @mock.patch("apps.backend.utils.pipeline_parser.PipelineParser")
+    def test_get_node_statuses(self, pipeline_parser):
+        with self.assertNumQueries(1):
+            statuses = get_node_statuses(["instance", "step"])
+        self.assertEqual(statuses, {"instance": "RUNNING", "step": "SUCCESS"})
+        pipeline_parser.assert_not_called()
+
+    @mock.patch("apps.backend.utils.pipeline_parser.PipelineParser")
+    def test_get_node_statuses__legacy(self, pipeline_parser):
+        # 存量任务没有状态记录，回退到 pipeline 状态查询
+        pipeline_parser.return_value.get_node_state.return_value = {"status": "FAILED"}
+        statuses = get_node_statuses(["instance", "legacy"])
+        self.assertEqual(statuses, {"instance": "RUNNING", "legacy": "FAILED"})
+        pipeline_parser.assert_called_once_with(["legacy"])
+
+
+class TestGetLatestInstanceIdsByStatus(TestCase):
+    def setUp(self):
+        for index, (pipeline_id, is_latest) in enumerate(
+            [("running", True), ("failed", True), ("legacy", True), ("old", False)]
+        ):
+            SubscriptionInstanceRecord.objects.create(
+                task_id=1,
+                subscription_id=1,
+                instance_id=f"host|instance|host|{index}",
+                instance_info={"host": {"bk_host_id": index}},
+                steps=[],
+                pipeline_id=pipeline_id,
+                is_latest=is_latest,
+            )
+        SubscriptionInstanceStepStatus.objects.bulk_create(
+            [
+                SubscriptionInstanceStepStatus(
+                    subscription_id=1,
+                    task_id=1,
+                    instance_id="host|instance|host|0",
+                    node_id="running",
+                    status="RUNNING",
+                ),
+                SubscriptionInstanceStepStatus(
+                    subscription_id=1, task_id=1, instance_id="host|instance|host|1", node_id="failed", status="FAILED"
+                ),
+                SubscriptionInstanceStepStatus(
+                    subscription_id=1, task_id=1, instance_id="host|instance|host|3", node_id="old", status="RUNNING"
+                ),
+            ]
+        )
+
+    @mock.patch("apps.backend.utils.pipeline_parser.PipelineParser")
+    def test_get_latest_instance_ids_by_status(self, pipeline_parser):
+        # 存量任务没有状态记录，回退到 pipeline 状态查询
+        pipeline_parser.return_value.get_node_state.return_value = {"status": "PENDING"}
+
+        instance_ids = get_latest_instance_ids_by_status(1, ["RUNNING", "PENDING"])
+
+        self.assertEqual(sorted(instance_ids), ["host|instance|host|0", "host|instance|host|2"])
+        pipeline_parser.assert_called_once_with(["legacy"])
+
+    @mock.patch("apps.backend.utils.pipeline_parser.PipelineParser")
+    def test_get_latest_instance_ids_by_status__no_legacy_match(self, pipeline_parser):
+        pipeline_parser.return_value.get_node_state.return_value = {"status": "PENDING"}
+
+        self.assertEqual(get_latest_instance_ids_by_status(1, ["FAILED"]), ["host|instance|host|1"])
@@ -6,10 +6,14 @@
 import logging
 from collections import defaultdict
 
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
 from django.utils import timezone
 
-from apps.backend.subscription.constants import TASK_TIMEOUT
+from apps.backend.subscription.constants import NODE_LOG_CHUNK_SIZE, TASK_TIMEOUT
+from apps.node_man.models import SubscriptionInstanceRecord, SubscriptionInstanceStepStatus
 from apps.utils.time_tools import utc2biz_str
+from pipeline.engine import api as pipeline_engine_api
 from pipeline.engine.models import Data as PipelineData
 from pipeline.engine.models import LogEntry as PipelineLog
 from pipeline.engine.models import NodeRelationship
@@ -111,12 +115,11 @@ def check_running_records(records_queryset):
     :param records_queryset: SubscriptionInstanceRecord 的查询集
     :return: bool 是否存在
     """
-    records = records_queryset.values_list("pipeline_id", "update_time")
+    records = list(records_queryset.values_list("pipeline_id", "update_time"))
 
-    pipeline_parser = PipelineParser([record[0] for record in records])
+    statuses = get_node_statuses([record[0] for record in records])
     for pipeline_id, update_time in records:
-        state = pipeline_parser.get_node_state(pipeline_id)
-        if state["status"] in ["PENDING", "RUNNING"]:
+        if statuses[pipeline_id] in ["PENDING", "RUNNING"]:
             if timezone.now() - update_time >= timezone.timedelta(seconds=TASK_TIMEOUT):
                 # 任务超时则不算是运行中
                 continue
@@ -124,6 +127,58 @@ def check_running_records(records_queryset):
     return False
 
 
+def get_node_statuses(node_ids):
+    """
+    批量获取实例及步骤节点的执行状态
+    优先读取实例步骤状态表，表中没有记录的节点（如存量任务）回退到 pipeline 状态查询
+    :param node_ids: 实例或步骤的 pipeline_id 列表
+    :return: {node_id: "PENDING"}
+    """
+    statuses = SubscriptionInstanceStepStatus.get_statuses(node_ids)
+    legacy_node_ids = [node_id for node_id in node_ids if node_id not in statuses]
+    if legacy_node_ids:
+        pipeline_parser = PipelineParser(legacy_node_ids)
+        for node_id in legacy_node_ids:
+            statuses[node_id] = pipeline_parser.get_node_state(node_id)["status"]
+    return statuses
+
+
+def get_latest_instance_ids_by_status(subscription_id, statuses):
+    """
+    按实例整体执行状态筛选订阅下最新执行记录的实例ID
+    通过实例步骤状态表的 (subscription_id, step_id, status) 索引筛选
+    表中没有记录的节点（如存量任务）回退到 pipeline 状态查询
+    :param subscription_id: 订阅ID
+    :param statuses: 实例状态列表，如 ["RUNNING", "PENDING"]
+    :return: 实例ID列表
+    """
+    instance_ids_by_pipeline = dict(
+        SubscriptionInstanceRecord.objects.filter(subscription_id=subscription_id, is_latest=True)
+        .exclude(pipeline_id="")
+        .values_list("pipeline_id", "instance_id")
+    )
+    matched_node_ids = set(
+        SubscriptionInstanceStepStatus.objects.filter(
+            subscription_id=subscription_id,
+            step_id=SubscriptionInstanceStepStatus.INSTANCE_STEP_ID,
+            status__in=statuses,
+        ).values_list("node_id", flat=True)
+    )
+    matched_node_ids &= set(instance_ids_by_pipeline)
+
+    unmatched_node_ids = set(instance_ids_by_pipeline) - matched_node_ids
+    recorded_node_ids = set(
+        SubscriptionInstanceStepStatus.objects.filter(node_id__in=unmatched_node_ids).values_list("node_id", flat=True)
+    )
+    legacy_node_ids = list(unmatched_node_ids - recorded_node_ids)
+    if legacy_node_ids:
+        pipeline_parser = PipelineParser(legacy_node_ids)
+        matched_node_ids.update(
+            node_id for node_id in legacy_node_ids if pipeline_parser.get_node_state(node_id)["status"] in statuses
+        )
+    return [instance_ids_by_pipeline[node_id] for node_id in matched_node_ids]
+
+
 class PipelineParser(object):
     """
     pipeline 数据解析器
@@ -153,6 +208,22 @@ class PipelineParser(object):
         self._sorted_pipeline_tree = sorted_pipeline_tree
         return sorted_pipeline_tree
 
+    def get_tree_node_ids(self):
+        """
+        获取 pipeline 树中的全部节点ID，包括尚未开始执行的节点
+        """
+        node_ids = set()
+
+        def collect(children):
+            for node_id, child_tree in children.items():
+                node_ids.add(node_id)
+                collect(child_tree.get("children", {}))
+
+        for pipeline_id, pipeline_tree in self.sorted_pipeline_tree.items():
+            node_ids.add(pipeline_id)
+            collect(pipeline_tree["children"])
+        return node_ids
+
     @staticmethod
     def _collect_descendants(tree, descendants):
         # iterate children for tree
@@ -178,11 +249,28 @@ class PipelineParser(object):
             "skip": tree["skip"],
         }
 
+    @staticmethod
+    def _build_tree(node_id, brief_statuses):
+        """
+        根据精简状态中的 parent_id 还原状态树
+        :param node_id: 根节点ID
+        :param brief_statuses: {status_id: brief_status}
+        """
+        for status in brief_statuses.values():
+            status.setdefault("children", {})
+        for status_id, status in brief_statuses.items():
+            parent_id = status.pop("parent_id")
+            if status_id != node_id and parent_id in brief_statuses:
+                brief_statuses[parent_id]["children"][status_id] = status
+        return brief_statuses[node_id]
+
     @classmethod
     def get_state(cls, node_ids):
-        trees = cls.get_status_tree(node_ids, max_depth=100)
+        # 批量读取精简状态，查询次数与 pipeline 数量无关
+        all_brief_statuses = pipeline_engine_api.get_status_tree_bulk(node_ids, max_depth=100)
         states = []
-        for node_id, tree in trees.items():
+        for node_id, brief_statuses in all_brief_statuses.items():
+            tree = cls._build_tree(node_id, brief_statuses)
             res = PipelineParser._map(tree)
             # collect all atom
             descendants = {}
@@ -199,6 +287,15 @@ class PipelineParser(object):
         :param max_depth:
         :return:
         """
+        all_status_tree = PipelineNodeStatus.objects.status_trees(node_ids, max_depth=max_depth)
+        # 未记录物化路径的节点从闭包表中获取
+        legacy_node_ids = [node_id for node_id in node_ids if node_id not in all_status_tree]
+        if legacy_node_ids:
+            all_status_tree.update(cls.get_status_tree_by_relationship(legacy_node_ids, max_depth))
+        return all_status_tree
+
+    @classmethod
+    def get_status_tree_by_relationship(cls, node_ids, max_depth=1):
         all_rel_qs = NodeRelationship.objects.filter(ancestor_id__in=node_ids, distance__lte=max_depth)
 
         descendants_mapping = {}
@@ -211,8 +308,9 @@ class PipelineParser(object):
         all_rel_qs = NodeRelationship.objects.filter(descendant_id__in=list(descendants_mapping.keys()), distance=1)
         targets = [rel.descendant_id for rel in all_rel_qs]
 
-        all_root_status = list(PipelineNodeStatus.objects.filter(id__in=node_ids).values())
-        all_status_qs = list(PipelineNodeStatus.objects.filter(id__in=targets).values())
+        tree_fields = PipelineNodeStatus.objects.tree_fields()
+        all_root_status = list(PipelineNodeStatus.objects.filter(id__in=node_ids).values(*tree_fields))
+        all_status_qs = list(PipelineNodeStatus.objects.filter(id__in=targets).values(*tree_fields))
 
         rel_qs_mapping = defaultdict(list)
         for rel in all_rel_qs:
@@ -323,16 +421,96 @@ class PipelineParser(object):
 
         log_text_by_nodes = {}
         for node_id, node_logs in log_by_nodes.items():
-            plain_entries = []
-            for log in node_logs:
-                log_content = "[{} {}] {}".format(utc2biz_str(log.logged_at), log.level_name, log.message)
-                if log.exception:
-                    log_content += ", exception: %s" % log.exception
-                plain_entries.append(log_content)
-            log_text_by_nodes[node_id] = "\n".join(plain_entries)
+            log_text_by_nodes[node_id] = "\n".join(self.format_log(log) for log in node_logs)
         self._all_nodes_log = log_text_by_nodes
         return self._all_nodes_log
 
+    def get_all_nodes_log_size(self, refresh=False):
+        """
+        统计所有节点的日志条数及内容长度，不读取日志内容
+        :return: {
+            "c2bdb95bc72239eeade47419840923d7": {"log_count": 3, "log_size": 1024}
+        }
+        """
+        if hasattr(self, "_all_nodes_log_size") and not refresh:
+            return self._all_nodes_log_size
+
+        node_ids = list(self.get_all_nodes_state().keys())
+        log_sizes = (
+            PipelineLog.objects.filter(node_id__in=node_ids, history_id=-1)
+            .values("node_id")
+            .annotate(log_count=Count("id"), log_size=Sum(Length("message")))
+        )
+        self._all_nodes_log_size = {
+            log_size["node_id"]: {"log_count": log_size["log_count"], "log_size": log_size["log_size"] or 0}
+            for log_size in log_sizes
+        }
+        return self._all_nodes_log_size
+
+    def get_node_log_size(self, node_id):
+        """
+        获取单个节点的日志条数及内容长度
+        :param node_id:
+        :return:
+        """
+        return self.get_all_nodes_log_size().get(node_id, {"log_count": 0, "log_size": 0})
+
+    @staticmethod
+    def format_log(log):
+        log_content = "[{} {}] {}".format(utc2biz_str(log.logged_at), log.level_name, log.message)
+        if log.exception:
+            log_content += ", exception: %s" % log.exception
+        return log_content
+
+    @staticmethod
+    def iter_node_log(node_id, cursor=0, chunk_size=NODE_LOG_CHUNK_SIZE):
+        """
+        按日志ID顺序分块读取单个节点的日志，内存中至多保留一块
+        :param node_id: 节点ID
+        :param cursor: 从该日志ID之后开始读取
+        :param chunk_size: 每次查询的日志条数
+        :return: 生成器，(日志ID, 日志内容)
+        """
+        while True:
+            logs = list(
+                PipelineLog.objects.filter(node_id=node_id, history_id=-1, id__gt=cursor).order_by("id")[:chunk_size]
+            )
+            for log in logs:
+                yield log.id, PipelineParser.format_log(log)
+            if len(logs) < chunk_size:
+                return
+            cursor = logs[-1].id
+
+    @classmethod
+    def get_node_log_slice(cls, node_id, cursor=0, limit=NODE_LOG_CHUNK_SIZE):
+        """
+        获取单个节点从 cursor 之后的至多 limit 条日志
+        :param node_id: 节点ID
+        :param cursor: 上一次返回的游标，首次查询传 0
+        :param limit: 日志条数
+        :return: {
+            "log": "xxxx",
+            "cursor": 123,
+            "has_more": True,
+            "ex_data": "节点异常信息，仅在最后一页返回"
+        }
+        """
+        plain_entries = []
+        has_more = False
+        for log_id, log_content in cls.iter_node_log(node_id, cursor, chunk_size=limit + 1):
+            if len(plain_entries) == limit:
+                has_more = True
+                break
+            plain_entries.append(log_content)
+            cursor = log_id
+
+        # 完整日志会在末尾追加节点异常信息，分页时单独返回以免重复拉取最后一页时重复拼接
+        ex_data = ""
+        if not has_more:
+            node_data = PipelineData.objects.filter(id=node_id).only("id", "ex_data").first()
+            ex_data = (node_data.ex_data if node_data else "") or ""
+        return {"log": "\n".join(plain_entries), "cursor": cursor, "has_more": has_more, "ex_data": ex_data}
+
     def get_node_log(self, node_id):
         """
         获取单个节点的日志
@@ -25,7 +25,7 @@ from django.utils.translation import ugettext as _
 from apps.exceptions import BaseException
 
 import ujson as json
-from apps.utils.local import activate_request
+from apps.utils.local import RequestCache, activate_request
 
 
 class AccessorSignal(Signal):
@@ -99,6 +99,7 @@ class UserLocalMiddleware(MiddlewareMixin):
         if login_exempt:
             return None
         activate_request(request)
+        RequestCache.enable(request)
 
         # user = request.user.username
         # user_info = cache.get("{user}_user_info".format(user=user))
@@ -117,6 +118,10 @@ class UserLocalMiddleware(MiddlewareMixin):
         # timezone.activate(pytz.timezone(tzname))
         # request.session['bluking_timezone'] = tzname
 
+    def process_response(self, request, response):
+        RequestCache.disable(request)
+        return response
+
 
 def get_x_request_id():
     x_request_id = ""
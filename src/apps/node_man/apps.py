@@ -17,6 +17,8 @@ class ApiConfig(AppConfig):
     verbose_name = "NODE_MAN"
 
     def ready(self):
+        from apps.node_man import signals  # noqa
+
         self.fetch_esb_api_key()
         self.judge_use_tjj()
         return True
@@ -457,3 +457,20 @@ ResourceType = choices_to_namedtuple(RESOURCE_CHOICES)
 BKAPP_RUN_ENV_TUPLE = ("chuhai", "shangyun", "ee", "ce")
 BKAPP_RUN_ENV_CHOICES = tuple_choices(BKAPP_RUN_ENV_TUPLE)
 BkappRunEnvType = choices_to_namedtuple(BKAPP_RUN_ENV_CHOICES)
+
+# 主机搜索索引
+HOST_SEARCH_MATCH_TUPLE = ("PREFIX", "INFIX", "SEGMENT")
+HOST_SEARCH_MATCH_CHOICES = tuple_choices(HOST_SEARCH_MATCH_TUPLE)
+HostSearchMatchType = choices_to_namedtuple(HOST_SEARCH_MATCH_CHOICES)
+HOST_SEARCH_FIELDS = ("inner_ip", "outer_ip", "login_ip", "data_ip")
+# 主机列表关键字搜索额外索引的主机字段，Agent版本取自 ProcessStatus
+HOST_KEYWORD_SEARCH_FIELDS = ("os_type", "node_from")
+HOST_SEARCH_INDEX_FIELDS = HOST_SEARCH_FIELDS + HOST_KEYWORD_SEARCH_FIELDS
+HOST_SEARCH_BATCH_SIZE = 1000
+HOST_SEARCH_MAX_PAGESIZE = 500
+
+# 任务日志分页 - 单次返回的最大日志条数
+NODE_LOG_PAGESIZE = 500
+
+# 任务历史列表 - 总数统计上限，超过上限时返回上限值并标记 total_capped
+JOB_LIST_MAX_COUNT = 10000
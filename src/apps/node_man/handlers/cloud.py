@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 from django.conf import settings
-from django.db.models.aggregates import Count
 from django.utils.translation import ugettext_lazy as _
 from django.db.transaction import atomic
 
@@ -12,7 +11,7 @@ from apps.node_man import constants as const
 from apps.node_man.constants import IamActionType
 from apps.node_man.handlers.iam import IamHandler
 from apps.node_man.exceptions import CloudNotExistError, CloudUpdateHostError, CloudNotPermissionError
-from apps.node_man.models import Cloud, Host, AccessPoint, GlobalSettings, IdentityData, ProcessStatus
+from apps.node_man.models import Cloud, CloudProxyIndex, Host, AccessPoint, GlobalSettings
 
 
 class CloudHandler(APIModel):
@@ -119,17 +118,13 @@ class CloudHandler(APIModel):
         # 用户默认拥有直连区域使用权限
         view_perm.insert(0, 0)
 
-        # 获得相同bk_cloud_id的Host个数
-        hosts_count = dict(
-            Host.objects.filter(node_type=const.NodeType.PAGENT)
-            .values_list("bk_cloud_id")
-            .annotate(node_count=Count("bk_cloud_id"))
-            .order_by()
-        )
+        # 获得云区域的P-Agent数量、Proxy数量及异常状态
+        bk_cloud_ids = [cloud["bk_cloud_id"] for cloud in clouds]
+        proxy_indexes = CloudProxyIndex.fetch(bk_cloud_ids)
 
         # 获得同一云区域下的Proxy内网IP
         cloud_proxies = {}
-        proxies_cloud_ip = Host.objects.filter(node_type=const.NodeType.PROXY).values(
+        proxies_cloud_ip = Host.objects.filter(bk_cloud_id__in=bk_cloud_ids, node_type=const.NodeType.PROXY).values(
             "bk_cloud_id", "inner_ip", "outer_ip"
         )
         for proxy in proxies_cloud_ip:
@@ -147,43 +142,14 @@ class CloudHandler(APIModel):
         # 获得isp信息
         isps = GlobalSettings().fetch_isp()
 
-        # 获得云区域内异常的Proxy
-        cloud_exception = {}
-        proxies = dict(
-            Host.objects.filter(
-                bk_cloud_id__in=[cloud["bk_cloud_id"] for cloud in clouds], node_type=const.NodeType.PROXY
-            ).values_list("bk_host_id", "bk_cloud_id")
-        )
-        identities = {
-            identity["bk_host_id"]: {"password": identity["password"], "key": identity["key"]}
-            for identity in IdentityData.objects.filter(bk_host_id__in=list(proxies.keys())).values(
-                "bk_host_id", "password", "key"
-            )
-        }
-        process_status = dict(
-            ProcessStatus.objects.filter(
-                bk_host_id__in=list(proxies.keys()), proc_type=const.ProcType.AGENT
-            ).values_list("bk_host_id", "status")
-        )
-        for proxy in proxies:
-            # exception为status则说明有状态异常代理，为overdue则说明有过期代理，为空时说明正常
-            # 两者同时出现时，以状态异常为优先
-            if process_status.get(proxy, const.ProcStateType.UNKNOWN) != const.ProcStateType.RUNNING:
-                cloud_exception[proxies[proxy]] = "abnormal"
-            elif (
-                not identities.get(proxy, {}).get("password")
-                and not identities.get(proxy, {}).get("key")
-                and cloud_exception.get(proxies[proxy]) != "abnormal"
-            ):
-                cloud_exception[proxies[proxy]] = "overdue"
-
         for cloud in clouds:
-            cloud["node_count"] = hosts_count.get(cloud["bk_cloud_id"], 0)
-            cloud["proxy_count"] = len(cloud_proxies.get(cloud["bk_cloud_id"], []))
+            proxy_index = proxy_indexes[cloud["bk_cloud_id"]]
+            cloud["node_count"] = proxy_index.pagent_count
+            cloud["proxy_count"] = proxy_index.proxy_count
             cloud["ap_name"] = ap_name.get(cloud.get("ap_id"))
             cloud["isp_name"] = isps.get(cloud.get("isp"), {}).get("isp_name", cloud.get("isp"))
             cloud["isp_icon"] = isps.get(cloud.get("isp"), {}).get("isp_icon", "")
-            cloud["exception"] = cloud_exception.get(cloud["bk_cloud_id"], "")
+            cloud["exception"] = proxy_index.exception
             cloud["proxies"] = cloud_proxies.get(cloud["bk_cloud_id"])
             cloud["permissions"] = {
                 "view": cloud["bk_cloud_id"] in view_perm,
@@ -15,11 +15,14 @@ from apps.node_man.exceptions import (
 )
 from apps.node_man.constants import BIZ_CACHE_SUFFIX, IamActionType
 from apps.node_man.handlers.iam import IamHandler
-from apps.utils.local import get_request_username
+from apps.utils.local import RequestCache, get_request_username
 from apps.utils import APIModel
 from blueapps.account.models import User
 from common.log import logger
 
+# 用户有权限的业务列表，CMDB 业务查询已有用户级缓存，这里仅在请求内复用
+BIZ_PERMISSION_CACHE = RequestCache("biz_permission")
+
 
 class CmdbHandler(APIModel):
     """
@@ -60,12 +63,26 @@ class CmdbHandler(APIModel):
 
     def ret_biz_permission(self, param):
         """
-        处理业务权限
+        处理业务权限，同一请求内按操作复用计算结果
         :return: 用户有权限的业务列表
         """
 
         username = get_request_username()
-        all_biz = self.cmdb_or_cache_biz(username)["info"]
+        # 兼容未传入操作的调用方式（如直接传入用户名）
+        action = param.get("action") if isinstance(param, dict) else None
+        key = f"{username}:{action}"
+        user_biz = BIZ_PERMISSION_CACHE.get_many([key]).get(key)
+        if user_biz is None:
+            user_biz = self.ret_biz_permission_without_cache(username, param)
+            BIZ_PERMISSION_CACHE.set_many({key: user_biz})
+        # 返回副本，避免调用方修改缓存内容
+        return [dict(biz) for biz in user_biz]
+
+    def ret_biz_permission_without_cache(self, username, param):
+        """
+        计算用户有权限的业务列表
+        """
+        all_biz = list(self.cmdb_or_cache_biz(username)["info"])
 
         # 如果是超管，则返回所有权限
         if IamHandler.is_superuser(username):
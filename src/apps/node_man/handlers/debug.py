@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
 
 from apps.node_man.handlers.job import JobHandler
 from apps.node_man.models import Host, SubscriptionInstanceRecord, SubscriptionTask, Subscription, ProcessStatus
@@ -117,22 +118,18 @@ class DebugHandler(APIModel):
         except ObjectDoesNotExist:
             raise HostNotExists("主机ID不存在")
 
-        records_by_host_id = list(
-            SubscriptionInstanceRecord.objects.filter(instance_id=f"host|instance|host|{bk_host_id}")
-        )
-        records_by_ip = list(
-            SubscriptionInstanceRecord.objects.filter(
-                instance_id=f"host|instance|host|{host.inner_ip}-{host.bk_cloud_id}-0"
-            )
-        )
+        # 按主机ID或 IP + 云区域命中的执行记录
+        subscription_ids = SubscriptionInstanceRecord.objects.filter(
+            Q(bk_host_id=bk_host_id) | Q(ip=host.inner_ip, bk_cloud_id=host.bk_cloud_id)
+        ).values_list("subscription_id", flat=True)
 
         result = []
-        for record in records_by_ip + records_by_host_id:
+        for subscription_id in subscription_ids:
             result.append(
                 {
-                    "subscription_id": record.subscription_id,
+                    "subscription_id": subscription_id,
                     "subscription_detail": f"{settings.BK_NODEMAN_URL}/api/debug/fetch_subscription_details?"
-                    f"subscription_id={record.subscription_id}",
+                    f"subscription_id={subscription_id}",
                 }
             )
 
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from django.db import transaction
+from django.db.models import Q
 from django.utils.translation import ugettext_lazy as _
 from django.utils import timezone
 
@@ -8,7 +9,16 @@ from apps.utils.basic import filter_values
 from apps.utils.local import get_request_username
 from apps.node_man import constants as const
 from apps.node_man.constants import IamActionType
-from apps.node_man.models import Host, Cloud, IdentityData, ProcessStatus, JobTask, AccessPoint
+from apps.node_man.models import (
+    Host,
+    HostSearchIndex,
+    Cloud,
+    CloudProxyIndex,
+    IdentityData,
+    ProcessStatus,
+    JobTask,
+    AccessPoint,
+)
 from apps.node_man.handlers.cmdb import CmdbHandler
 from apps.node_man.handlers.cloud import CloudHandler
 from apps.node_man.handlers.iam import IamHandler
@@ -71,40 +81,57 @@ class HostHandler(APIModel):
 
         return permission_host_ids
 
+    @staticmethod
+    def keyword_fuzzy_cond(custom: str):
+        """
+        用于生成IP、操作系统、来源、Agent版本模糊搜索的条件
+        先通过主机搜索索引得到候选主机，再用 LIKE 校验，避免全表扫描
+        :param custom: 用户的输入
+        :return: where, sql_params
+        """
+        like_sql = (
+            f"({ProcessStatus._meta.db_table}.version like %s OR "
+            f"{Host._meta.db_table}.os_type like %s OR "
+            f"{Host._meta.db_table}.node_from like %s OR "
+            f"{Host._meta.db_table}.inner_ip like %s)"
+        )
+        like_params = [f"%{custom}%"] * 4
+
+        tokens = HostSearchIndex.query_tokens(custom, const.HostSearchMatchType.INFIX)
+        if not tokens:
+            # 输入过短无法命中索引
+            return like_sql, like_params
+
+        index_sql, index_params = HostSearchIndex.matched_host_ids(tokens).query.sql_with_params()
+        return f"({Host._meta.db_table}.bk_host_id in ({index_sql}) AND {like_sql})", [*index_params, *like_params]
+
     def fuzzy_cond(self, custom: str, wheres: list, sql_params: list):
         """
         用于生成模糊搜索的条件
+        状态、云区域按名称在内存中匹配为精确条件，其余字段以主机搜索索引作为候选集
         :param custom: 用户的输入
         :param wheres: Where 语句列表
         :param sql_params: escape 参数列表
         :return: where, sql_params
         """
 
+        # IP、操作系统、来源、Agent版本搜索
+        search_sql, search_params = self.keyword_fuzzy_cond(custom)
+        sql_params.extend(search_params)
+
         # 状态搜索
-        status = [status for status in const.PROC_STATUS_CHN if const.PROC_STATUS_CHN[status].find(custom) != -1]
-        statuses = ",".join(status)
+        statuses = [status for status in const.PROC_STATUS_CHN if const.PROC_STATUS_CHN[status].find(custom) != -1]
+        if statuses:
+            search_sql += f' OR {ProcessStatus._meta.db_table}.status in ({",".join(["%s"] * len(statuses))})'
+            sql_params.extend(statuses)
 
         # 云区域搜索
         bk_cloud_names = CloudHandler().list_cloud_name()
-        cloud_ids = [str(cloud) for cloud in bk_cloud_names if bk_cloud_names[cloud].find(custom) != -1]
-        cloud_ids = ",".join(cloud_ids)
-
-        search_sql = (
-            f"{ProcessStatus._meta.db_table}.status in (%s) OR "
-            f"{ProcessStatus._meta.db_table}.version like %s OR "
-            f"{Host._meta.db_table}.os_type like %s OR "
-            f"{Host._meta.db_table}.node_from like %s OR "
-            f"{Host._meta.db_table}.inner_ip like %s"
-        )
-
-        sql_params.extend([statuses, f"%{custom}%", f"%{custom}%", f"%{custom}%", f"%{custom}%"])
-
-        # 如果存在云区域结果
+        cloud_ids = [cloud for cloud in bk_cloud_names if bk_cloud_names[cloud].find(custom) != -1]
         if cloud_ids:
-            search_sql += f" OR {Host._meta.db_table}.bk_cloud_id in (%s)"
-            sql_params.append(cloud_ids)
+            search_sql += f' OR {Host._meta.db_table}.bk_cloud_id in ({",".join(["%s"] * len(cloud_ids))})'
+            sql_params.extend(cloud_ids)
 
-        # 四种搜索
         wheres.append("(" + search_sql + ")")
 
         return wheres, sql_params
@@ -408,6 +435,62 @@ class HostHandler(APIModel):
 
         return result
 
+    def quick_search(self, params: dict):
+        """
+        基于主机搜索索引的快速查询，按主机ID倒序游标分页
+        :param params: 经校验后的数据
+        :return: total 为估算总数，cursor 为下一页游标，为空时表示没有下一页
+        """
+
+        # 用户有权限获取的业务
+        user_biz = CmdbHandler().biz_id_name({"action": IamActionType.agent_view})
+        if params.get("bk_biz_id"):
+            biz_permission = [bk_biz_id for bk_biz_id in params["bk_biz_id"] if bk_biz_id in user_biz]
+        else:
+            biz_permission = list(user_biz.keys())
+
+        match_type = params["match_type"]
+        if match_type == const.HostSearchMatchType.INFIX and not HostSearchIndex.query_tokens(
+            params["query"], match_type
+        ):
+            # 输入过短无法进行中缀匹配，降级为前缀匹配
+            match_type = const.HostSearchMatchType.PREFIX
+
+        hosts, cursor, total = HostSearchIndex.search(
+            query=params["query"],
+            match_type=match_type,
+            host_queryset=Host.objects.filter(
+                bk_biz_id__in=biz_permission, node_type__in=params.get("node_type") or const.NODE_TUPLE
+            ),
+            fields=["bk_cloud_id", "bk_biz_id", "os_type", "node_type"],
+            limit=params["pagesize"],
+            last_bk_host_id=params.get("cursor"),
+        )
+
+        bk_host_ids = [host["bk_host_id"] for host in hosts]
+        cloud_name = dict(
+            Cloud.objects.filter(bk_cloud_id__in=[host["bk_cloud_id"] for host in hosts]).values_list(
+                "bk_cloud_id", "bk_cloud_name"
+            )
+        )
+        cloud_name[const.DEFAULT_CLOUD] = _("直连区域")
+        host_id_status = {
+            status["bk_host_id"]: status
+            for status in ProcessStatus.objects.filter(
+                bk_host_id__in=bk_host_ids, proc_type=const.ProcType.AGENT, source_type=ProcessStatus.SourceType.DEFAULT
+            ).values("bk_host_id", "status", "version")
+        }
+
+        for host in hosts:
+            status = host_id_status.get(host["bk_host_id"], {})
+            host["status"] = status.get("status", "")
+            host["version"] = status.get("version", "")
+            host["status_display"] = const.PROC_STATUS_CHN.get(host["status"], "")
+            host["bk_cloud_name"] = cloud_name.get(host["bk_cloud_id"])
+            host["bk_biz_name"] = user_biz.get(host["bk_biz_id"], "")
+
+        return {"total": total, "cursor": cursor, "list": hosts}
+
     def proxies(self, params: dict, username: str, is_superuser: bool):
         """
         查询云区域的proxy列表
@@ -521,7 +604,7 @@ class HostHandler(APIModel):
         bk_biz_id = params["bk_biz_id"]
 
         # 用户有权限的业务
-        user_biz = CmdbHandler().biz_id_name(username)
+        user_biz = CmdbHandler().biz_id_name({"action": IamActionType.agent_view})
         if bk_biz_id not in user_biz:
             raise BusinessNotPermissionError(_("不存在该业务权限"))
 
@@ -715,10 +798,13 @@ class HostHandler(APIModel):
             # 如果不是跨页全选模式
             bk_host_ids = permission_host_ids
 
+        proxy_cloud_ids = CloudProxyIndex.host_cloud_ids(bk_host_ids)
         with transaction.atomic():
             Host.objects.filter(bk_host_id__in=bk_host_ids).delete()
             IdentityData.objects.filter(bk_host_id__in=bk_host_ids).delete()
             ProcessStatus.objects.filter(bk_host_id__in=bk_host_ids).delete()
+            HostSearchIndex.refresh(bk_host_ids)
+            CloudProxyIndex.refresh(proxy_cloud_ids)
 
         return {}
 
@@ -736,51 +822,34 @@ class HostHandler(APIModel):
             }
         },
         """
-        inner_ip_info = {
-            f"{host['bk_cloud_id']}-{host['inner_ip']}": {
-                "outer_ip": host["outer_ip"],
-                "login_ip": host["login_ip"],
-                "bk_cloud_id": host["bk_cloud_id"],
-                "bk_biz_id": host["bk_biz_id"],
-                "node_type": host["node_type"],
-                "bk_host_id": host["bk_host_id"],
-            }
-            for host in Host.objects.filter(inner_ip__in=ips).values(
-                "inner_ip", "outer_ip", "login_ip", "bk_cloud_id", "bk_biz_id", "node_type", "bk_host_id"
-            )
-        }
-
-        outer_ip_info = {
-            f"{host['bk_cloud_id']}-{host['outer_ip']}": {
-                "inner_ip": host["inner_ip"],
-                "login_ip": host["login_ip"],
-                "bk_cloud_id": host["bk_cloud_id"],
-                "bk_biz_id": host["bk_biz_id"],
-                "node_type": host["node_type"],
-                "bk_host_id": host["bk_host_id"],
-            }
-            for host in Host.objects.filter(outer_ip__in=ips).values(
-                "inner_ip", "outer_ip", "login_ip", "bk_cloud_id", "bk_biz_id", "node_type", "bk_host_id"
-            )
-        }
+        return self.bulk_ip_list([ips])[0]
 
-        login_ip_info = {
-            f"{host['bk_cloud_id']}-{host['login_ip']}": {
-                "inner_ip": host["inner_ip"],
-                "outer_ip": host["outer_ip"],
-                "bk_cloud_id": host["bk_cloud_id"],
-                "bk_biz_id": host["bk_biz_id"],
-                "node_type": host["node_type"],
-                "bk_host_id": host["bk_host_id"],
-            }
-            for host in Host.objects.filter(login_ip__in=ips).values(
-                "inner_ip", "outer_ip", "login_ip", "bk_cloud_id", "bk_biz_id", "node_type", "bk_host_id"
+    def bulk_ip_list(self, ip_groups):
+        """
+        一次查询获得多组IP的 ip_list 结果
+        :param ip_groups: [ips, ...]
+        :return: [exists_ip_info, ...]，与 ip_groups 一一对应
+        """
+        ip_fields = ["inner_ip", "outer_ip", "login_ip"]
+        ip_groups = [set(ips) for ips in ip_groups]
+        all_ips = set().union(*ip_groups)
+        hosts = []
+        if all_ips:
+            hosts = list(
+                Host.objects.filter(Q(inner_ip__in=all_ips) | Q(outer_ip__in=all_ips) | Q(login_ip__in=all_ips)).values(
+                    *ip_fields, "bk_cloud_id", "bk_biz_id", "node_type", "bk_host_id"
+                )
             )
-        }
-
-        exists_ip_info = {}
-        exists_ip_info.update(inner_ip_info)
-        exists_ip_info.update(outer_ip_info)
-        exists_ip_info.update(login_ip_info)
 
-        return exists_ip_info
+        results = []
+        for ips in ip_groups:
+            exists_ip_info = {}
+            # 依次以内网、外网、登录IP匹配，后者覆盖前者
+            for ip_field in ip_fields:
+                for host in hosts:
+                    if host[ip_field] in ips:
+                        exists_ip_info[f"{host['bk_cloud_id']}-{host[ip_field]}"] = {
+                            key: value for key, value in host.items() if key != ip_field
+                        }
+            results.append(exists_ip_info)
+        return results
@@ -11,6 +11,12 @@ from apps.node_man.exceptions import IamRequestException
 from apps.node_man.constants import IamActionType
 from apps.node_man.models import Cloud, AccessPoint
 from apps.component.esbclient import client_v2
+from apps.utils.local import RequestCache
+from common.log import logger
+
+# 权限中心策略查询需经过 ESB，跨请求短时缓存；本地权限查询仅在请求内复用
+IAM_POLICY_CACHE = RequestCache("iam_policy", ttl=settings.IAM_POLICY_CACHE_TTL)
+LOCAL_POLICY_CACHE = RequestCache("local_policy")
 
 
 class IamHandler(APIModel):
@@ -131,6 +137,25 @@ class IamHandler(APIModel):
         return ret
 
     def fetch_policy(self, username, actions):
+        """
+        查询用户权限，同一请求内共享查询结果，使用权限中心时跨请求短时缓存
+        :param actions: 批量的操作ID
+        """
+        policy_cache = IAM_POLICY_CACHE if settings.USE_IAM else LOCAL_POLICY_CACHE
+        cached = policy_cache.get_many([f"{username}:{action}" for action in actions])
+        ret = {action: cached[f"{username}:{action}"] for action in actions if f"{username}:{action}" in cached}
+
+        missing_actions = [action for action in actions if action not in ret]
+        if missing_actions:
+            fetched = self.fetch_policy_without_cache(username, missing_actions)
+            policy_cache.set_many({f"{username}:{action}": perms for action, perms in fetched.items()})
+            ret.update(fetched)
+            logger.debug(f"[fetch_policy] {policy_cache.namespace} hit ratio: {policy_cache.hit_ratio:.2%}")
+
+        # 返回副本，避免调用方修改缓存内容
+        return {action: perms[:] if isinstance(perms, list) else perms for action, perms in ret.items()}
+
+    def fetch_policy_without_cache(self, username, actions):
         """
         向权限中心查询用户权限
         :param actions: 批量的操作ID
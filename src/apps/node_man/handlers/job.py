@@ -5,6 +5,7 @@ import re
 from django.conf import settings
 from django.core.paginator import Paginator
 from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django.utils.translation import get_language
@@ -23,7 +24,7 @@ from apps.node_man.handlers.cloud import CloudHandler
 from apps.node_man.handlers.cmdb import CmdbHandler
 from apps.node_man.handlers.host import HostHandler
 from apps.node_man.handlers.validator import bulk_update_validate, job_validate, operate_validator
-from apps.node_man.models import Host, IdentityData, Job, JobTask
+from apps.node_man.models import CloudProxyIndex, Host, HostSearchIndex, IdentityData, Job, JobBizRelation, JobTask
 from apps.utils import APIModel
 from apps.utils.basic import filter_values, suffix_slash
 from common.api import NodeApi
@@ -63,9 +64,10 @@ class JobHandler(APIModel):
         if diff != [] and self.data.created_by != username:
             raise JobNotPermissionError(_("用户无权限访问当前任务"))
 
-    def task_status_list(self):
+    def task_status_list(self, bk_host_ids=None):
         """
         返回任务执行的状态
+        :param bk_host_ids: 仅查询指定主机，为 None 时查询全部
         :return: 以Host ID为键，返回任务执行状态
         {
             bk_host_id: {
@@ -74,9 +76,12 @@ class JobHandler(APIModel):
             }
         }
         """
+        job_tasks = JobTask.objects.all()
+        if bk_host_ids is not None:
+            job_tasks = job_tasks.filter(bk_host_id__in=bk_host_ids)
         task_info = {
             task["bk_host_id"]: {"status": task["status"]}
-            for task in JobTask.objects.values("bk_host_id", "instance_id", "job_id", "status")
+            for task in job_tasks.values("bk_host_id", "instance_id", "job_id", "status")
         }
         return task_info
 
@@ -283,50 +288,73 @@ class JobHandler(APIModel):
             search_biz = [bk_biz_id for bk_biz_id in params["bk_biz_id"] if bk_biz_id in biz_info]
 
         # 筛选
-        job_result = Job.objects.filter(**filter_values(kwargs))
+        job_result = Job.objects.filter(**filter_values(kwargs)).annotate(
+            # 任务有业务范围
+            has_biz_scope=Exists(JobBizRelation.objects.filter(job_id=OuterRef("id"))),
+            # 任务业务范围中存在无权限的业务
+            has_no_permission_biz=Exists(
+                JobBizRelation.objects.filter(job_id=OuterRef("id")).exclude(bk_biz_id__in=biz_permission)
+            ),
+        )
 
-        if params.get("sort"):
+        # 判断权限：任务业务均有权限且包含搜索的业务，或创建者是自己（未搜索业务时）
+        permission_cond = Q(has_no_permission_biz=False)
+        if search_biz != biz_permission:
+            for bk_biz_id in search_biz:
+                permission_cond &= Q(id__in=JobBizRelation.objects.filter(bk_biz_id=bk_biz_id).values("job_id"))
+        if not params.get("bk_biz_id"):
+            permission_cond |= Q(created_by=username)
+
+        # 如果任务没有业务则不显示
+        job_result = job_result.filter(has_biz_scope=True).filter(permission_cond)
+
+        # 排序
+        sort_head = None
+        is_desc = True
+        if params.get("sort") and params["sort"]["head"] in const.HEAD_TUPLE:
             sort_head = params["sort"]["head"]
-            job_result = job_result.extra(select={sort_head: f"JSON_EXTRACT(statistics, '$.{sort_head}')"})
-            if params["sort"]["sort_type"] == const.SortType.DEC:
-                job_result = job_result.order_by(str("-") + sort_head)
-            else:
-                job_result = job_result.order_by(sort_head)
-
-        job_result = job_result.values()
+            is_desc = params["sort"]["sort_type"] == const.SortType.DEC
+        order_fields = [sort_head, "id"] if sort_head else ["id"]
+        job_result = job_result.order_by(*[f"-{field}" if is_desc else field for field in order_fields])
+
+        # 总数：游标翻页时不统计，由前端沿用首页返回的总数；页码翻页时最多统计 JOB_LIST_MAX_COUNT 条，避免全量 COUNT
+        cursor = params.get("cursor")
+        total = None
+        total_capped = False
+        if not cursor:
+            total = job_result.order_by()[: const.JOB_LIST_MAX_COUNT + 1].count()
+            total_capped = total > const.JOB_LIST_MAX_COUNT
+            total = min(total, const.JOB_LIST_MAX_COUNT)
+
+        # 分页：优先使用游标分页，避免大偏移量扫描
+        if cursor:
+            lookup = "lt" if is_desc else "gt"
+            cursor_cond = Q(**{f"id__{lookup}": cursor["id"]})
+            if sort_head:
+                cursor_cond = Q(**{f"{sort_head}__{lookup}": cursor[sort_head]}) | Q(
+                    cursor_cond, **{sort_head: cursor[sort_head]}
+                )
+            job_result = job_result.filter(cursor_cond)
+            begin = 0
+        else:
+            begin = (params["page"] - 1) * params["pagesize"]
 
-        job_list = []
-        for job in job_result:
+        job_list = list(job_result.values()[begin : begin + params["pagesize"]])
+        for job in job_list:
             if not job["end_time"]:
                 job["cost_time"] = f'{(timezone.now() - job["start_time"]).seconds}'
             else:
                 job["cost_time"] = f'{(job["end_time"] - job["start_time"]).seconds}'
             job["bk_biz_scope_display"] = [biz_info.get(biz) for biz in job["bk_biz_scope"]]
             job["job_type_display"] = const.JOB_TYPE_DICT.get(job["job_type"])
+            job.pop("has_biz_scope")
+            job.pop("has_no_permission_biz")
 
-            # 如果任务没有业务则不显示
-            if not job["bk_biz_scope"]:
-                continue
-
-            # 判断权限
-            if set(job["bk_biz_scope"]) - set(biz_permission) == set():
-                if set(search_biz) - set(job["bk_biz_scope"]) == set():
-                    job_list.append(job)
-                    continue
-                elif search_biz == biz_permission:
-                    job_list.append(job)
-                    continue
+        next_cursor = None
+        if len(job_list) == params["pagesize"]:
+            next_cursor = {field: job_list[-1][field] for field in order_fields}
 
-            # 创建者是自己
-            if job["created_by"] == username and not params.get("bk_biz_id"):
-                job_list.append(job)
-                continue
-
-        # 分页
-        paginator = Paginator(job_list, params["pagesize"])
-        ret_list = paginator.page(params["page"]).object_list
-
-        return {"total": len(job_list), "list": ret_list}
+        return {"total": total, "total_capped": total_capped, "list": job_list, "cursor": next_cursor}
 
     def job(self, params: dict, username: str, is_superuser: bool, ticket: str):
         """
@@ -343,6 +371,7 @@ class JobHandler(APIModel):
         outer_ips = set()
         login_ips = set()
         is_manual = set()
+        bk_host_ids = set()
 
         for host in params["hosts"]:
             bk_cloud_ids.add(host["bk_cloud_id"])
@@ -355,6 +384,8 @@ class JobHandler(APIModel):
                 outer_ips.add(host["outer_ip"])
             if host.get("login_ip"):
                 login_ips.add(host["login_ip"])
+            if host.get("bk_host_id"):
+                bk_host_ids.add(host["bk_host_id"])
 
         # 如果混合了【手动安装】，【自动安装】则不允许通过
         # 此处暂不和入job validator.
@@ -382,12 +413,10 @@ class JobHandler(APIModel):
 
         # 获得用户输入的ip是否存在于数据库中
         # 格式 { bk_cloud_id+ip: { 'bk_host_id': ..., 'bk_biz_id': ..., 'node_type': ...}}
-        inner_ip_info = HostHandler().ip_list(inner_ips)
-        outer_ip_info = HostHandler().ip_list(outer_ips)
-        login_ip_info = HostHandler().ip_list(login_ips)
+        inner_ip_info, outer_ip_info, login_ip_info = HostHandler().bulk_ip_list([inner_ips, outer_ips, login_ips])
 
-        # 获得正在执行的任务状态
-        task_info = self.task_status_list()
+        # 获得所操作主机正在执行的任务状态
+        task_info = self.task_status_list(bk_host_ids)
 
         # 对数据进行校验
         # 重装则校验IP是否存在，存在才可重装
@@ -643,6 +672,7 @@ class JobHandler(APIModel):
             )
             host_id_to_delete.append(host["bk_host_id"])
 
+        proxy_cloud_ids = CloudProxyIndex.host_cloud_ids(host_id_to_delete)
         with transaction.atomic():
             # 删除需要修改的原数据
             IdentityData.objects.filter(bk_host_id__in=identity_id_to_delete).delete()
@@ -650,6 +680,8 @@ class JobHandler(APIModel):
             # bulk_create创建新的信息
             IdentityData.objects.bulk_create(identity_to_create)
             Host.objects.bulk_create(host_to_create)
+            HostSearchIndex.refresh(host_id_to_delete)
+            CloudProxyIndex.refresh(proxy_cloud_ids | CloudProxyIndex.host_cloud_ids(host_id_to_delete))
 
         return update_data_info["subscription_host_ids"], ip_filter_list
 
@@ -660,9 +692,6 @@ class JobHandler(APIModel):
         :param is_superuser: 是否超管
         """
 
-        # 获得正在执行的任务状态
-        task_info = self.task_status_list()
-
         if params["node_type"] == const.NodeType.PROXY:
             # 是否为针对代理的操作，用户有权限获取的业务
             # 格式 { bk_biz_id: bk_biz_name , ...}
@@ -691,8 +720,13 @@ class JobHandler(APIModel):
                 bk_host_id__in=params["bk_host_id"], node_type__in=filter_node_types
             ).values("bk_host_id", "bk_biz_id", "bk_cloud_id", "inner_ip", "node_type", "os_type")
 
+        db_hosts = list(db_host_sql)
+
+        # 获得所操作主机正在执行的任务状态
+        task_info = self.task_status_list([host["bk_host_id"] for host in db_hosts])
+
         # 校验器进行校验
-        db_host_ids, host_biz_scope = operate_validator(list(db_host_sql), user_biz, username, task_info, is_superuser)
+        db_host_ids, host_biz_scope = operate_validator(db_hosts, user_biz, username, task_info, is_superuser)
         subscription = self.create_subscription(params["job_type"], db_host_ids)
 
         # 创建Job
@@ -970,14 +1004,15 @@ class JobHandler(APIModel):
         }
 
     @staticmethod
-    def get_log_base(subscription_id: int, instance_id: int) -> list:
+    def get_log_base(subscription_id: int, instance_id: int, need_log: bool = True) -> list:
         """
         根据订阅任务ID，实例ID，获取日志
         :param subscription_id: 订阅任务ID
         :param instance_id: 实例ID
+        :param need_log: 是否返回完整日志，为 False 时仅返回各步骤日志大小
         :return: 日志列表
         """
-        params = {"subscription_id": subscription_id, "instance_id": instance_id}
+        params = {"subscription_id": subscription_id, "instance_id": instance_id, "need_log": need_log}
         task_result_detail = NodeApi.get_subscription_task_detail(params)
         logs = []
         if task_result_detail.get("steps"):
@@ -986,19 +1021,23 @@ class JobHandler(APIModel):
                     logs.append(
                         {
                             "step": step["node_name"],
+                            "node_id": step.get("pipeline_id"),
                             "status": step["status"],
-                            "log": step["log"],
+                            "log": step.get("log", ""),
+                            "log_count": step.get("log_count"),
+                            "log_size": step.get("log_size"),
                             "start_time": step.get("start_time"),
                             "finish_time": step.get("finish_time"),
                         }
                     )
         return logs
 
-    def get_log(self, instance_id: int, username: str) -> list:
+    def get_log(self, instance_id: int, username: str, need_log: bool = True) -> list:
         """
         获得日志
         :param instance_id: 实例ID
         :param username: 用户名
+        :param need_log: 是否返回完整日志
         :return: 日志列表
         """
 
@@ -1006,7 +1045,28 @@ class JobHandler(APIModel):
         self.check_job_permission(username, self.data.bk_biz_scope)
 
         # 获得并返回日志
-        return JobHandler.get_log_base(self.data.subscription_id, instance_id)
+        return JobHandler.get_log_base(self.data.subscription_id, instance_id, need_log)
+
+    def get_node_log(self, params: dict, username: str) -> dict:
+        """
+        分页获取单个步骤的日志
+        :param params: 请求参数，包含 instance_id, node_id, cursor, limit
+        :param username: 用户名
+        :return: {"node_id": "xxx", "log": "xxx", "cursor": 123, "has_more": True, "ex_data": ""}
+        """
+
+        # 检测是否有权限
+        self.check_job_permission(username, self.data.bk_biz_scope)
+
+        return NodeApi.get_subscription_task_node_log(
+            {
+                "subscription_id": self.data.subscription_id,
+                "instance_id": params["instance_id"],
+                "node_id": params["node_id"],
+                "cursor": params["cursor"],
+                "limit": params["limit"],
+            }
+        )
 
     def collect_log(self, instance_id: int, username: str) -> list:
         self.check_job_permission(username, self.data.bk_biz_scope)
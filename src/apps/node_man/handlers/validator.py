@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-from django.db.models.aggregates import Count
 from django.utils.translation import ugettext_lazy as _
 from django.conf import settings
 
@@ -17,7 +16,7 @@ from apps.utils.local import get_request_username
 from apps.node_man.handlers.cloud import CloudHandler
 from apps.node_man.constants import IamActionType
 from apps.node_man.handlers.iam import IamHandler
-from apps.node_man.models import Host, IdentityData, ProcessStatus
+from apps.node_man.models import CloudProxyIndex, Host
 
 
 def check_available_proxy():
@@ -32,67 +31,33 @@ def check_available_proxy():
     }
     """
 
-    check_result = {}
-
-    # 获得所有代理的信息
-    proxies = Host.objects.filter(node_type=const.NodeType.PROXY).values(
-        "bk_host_id", "bk_biz_id", "bk_cloud_id", "is_manual"
-    )
-    proxies_info = {
-        proxy["bk_host_id"]: {
-            "bk_biz_id": proxy["bk_biz_id"],
-            "bk_cloud_id": proxy["bk_cloud_id"],
-            "is_manual": proxy["is_manual"],
-        }
-        for proxy in proxies
-    }
-
-    # 获得所有代理的状态
-    process_status = dict(
-        ProcessStatus.objects.filter(bk_host_id__in=list(proxies_info.keys()), name="gseagent").values_list(
-            "bk_host_id", "status"
-        )
+    # 获得所有代理所在云区域的索引
+    proxy_indexes = CloudProxyIndex.fetch(
+        Host.objects.filter(node_type=const.NodeType.PROXY).values_list("bk_cloud_id", flat=True).distinct()
     )
 
-    # 获得所有代理的认证信息
-    identity_info = {
-        identity["bk_host_id"]: {
-            "auth_type": identity["auth_type"],
-            "retention": identity["retention"],
-            "account": identity["account"],
-            "password": identity["password"],
-            "key": identity["key"],
-            "port": identity["port"],
-            "extra_data": identity["extra_data"],
-        }
-        for identity in IdentityData.objects.filter(bk_host_id__in=list(proxies_info.keys())).values(
-            "bk_host_id", "auth_type", "retention", "account", "password", "key", "port", "extra_data",
-        )
-    }
-
     # 标记云区域中是否有可用Proxy
-    for host_id in proxies_info:
-        proxy_cloud_id = proxies_info[host_id]["bk_cloud_id"]
-        if identity_info.get(host_id) and (proxy_cloud_id not in check_result or not check_result[proxy_cloud_id]):
-            if process_status.get(host_id) == "RUNNING" and (
-                identity_info[host_id].get("key")
-                or identity_info[host_id].get("password")
-                or proxies_info[host_id]["is_manual"]
-            ):
-                check_result[proxy_cloud_id] = True
+    check_result = {bk_cloud_id: True for bk_cloud_id, index in proxy_indexes.items() if index.is_available}
 
     # 每个云区域下的代理数量
-    # 获得相同bk_cloud_id的Proxy个数
-    proxies_count = dict(
-        Host.objects.filter(node_type=const.NodeType.PROXY)
-        .values_list("bk_cloud_id")
-        .annotate(node_count=Count("bk_cloud_id"))
-        .order_by()
-    )
+    proxies_count = {bk_cloud_id: index.proxy_count for bk_cloud_id, index in proxy_indexes.items()}
 
     return check_result, proxies_count
 
 
+def count_cloud_proxies(bk_cloud_ids):
+    """
+    获得指定云区域下的代理数量
+    :param bk_cloud_ids: 云区域ID列表
+    :return: {bk_cloud_id: 1}
+    """
+    return {
+        bk_cloud_id: index.proxy_count
+        for bk_cloud_id, index in CloudProxyIndex.fetch(bk_cloud_ids).items()
+        if index.proxy_count
+    }
+
+
 def bulk_update_validate(
     host_info: dict, accept_list: list, identity_info: dict, ip_filter_list: list, is_manual: bool = False,
 ):
@@ -285,8 +250,8 @@ def job_validate(
     else:
         cloud_view_permission = [cloud for cloud in cloud_info if username in cloud_info[cloud]["creator"]]
 
-    # 获得有可用代理的云区域
-    available_clouds, proxies_count = check_available_proxy()
+    # 获得所涉及云区域的代理数量
+    proxies_count = count_cloud_proxies({host["bk_cloud_id"] for host in data["hosts"]})
 
     # 检查：用户是否有操作这些业务的权限
     # TODO: 转移至权限中心
@@ -0,0 +1,11 @@
+# coding: utf-8
+
+
+from django.core.management.base import BaseCommand
+
+from apps.node_man.models import HostSearchIndex
+
+
+class Command(BaseCommand):
+    def handle(self, **kwargs):
+        HostSearchIndex.rebuild()
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("node_man", "0016_init_gse_port_config_20200923"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HostSearchIndex",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("token", models.CharField(max_length=8, verbose_name="检索词")),
+                ("bk_host_id", models.IntegerField(db_index=True, verbose_name="主机ID")),
+            ],
+            options={
+                "verbose_name": "主机搜索索引",
+                "verbose_name_plural": "主机搜索索引",
+                "unique_together": {("token", "bk_host_id")},
+            },
+        ),
+    ]
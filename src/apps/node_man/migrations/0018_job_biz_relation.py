@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+# 迁移不依赖业务代码，排序字段在此固化
+HEAD_TUPLE = ("total_count", "failed_count", "success_count")
+
+
+def init_job_biz_relation_and_statistics(apps, schema_editor):
+    # 存量任务的业务范围及统计排序字段
+    Job = apps.get_model("node_man", "Job")
+    JobBizRelation = apps.get_model("node_man", "JobBizRelation")
+
+    relation_to_create = []
+    jobs_to_update = []
+    for job in Job.objects.only("id", "bk_biz_scope", "statistics").iterator():
+        relation_to_create.extend(
+            JobBizRelation(job_id=job.id, bk_biz_id=bk_biz_id) for bk_biz_id in set(job.bk_biz_scope or [])
+        )
+        statistics = job.statistics or {}
+        for head in HEAD_TUPLE:
+            setattr(job, head, statistics.get(head) or 0)
+        jobs_to_update.append(job)
+
+        if len(jobs_to_update) >= 1000:
+            JobBizRelation.objects.bulk_create(relation_to_create)
+            Job.objects.bulk_update(jobs_to_update, fields=list(HEAD_TUPLE))
+            relation_to_create = []
+            jobs_to_update = []
+
+    JobBizRelation.objects.bulk_create(relation_to_create)
+    Job.objects.bulk_update(jobs_to_update, fields=list(HEAD_TUPLE))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("node_man", "0017_hostsearchindex"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="failed_count",
+            field=models.IntegerField(db_index=True, default=0, verbose_name="失败数"),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="success_count",
+            field=models.IntegerField(db_index=True, default=0, verbose_name="成功数"),
+        ),
+        migrations.AddField(
+            model_name="job",
+            name="total_count",
+            field=models.IntegerField(db_index=True, default=0, verbose_name="总数"),
+        ),
+        migrations.CreateModel(
+            name="JobBizRelation",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("job_id", models.IntegerField(db_index=True, verbose_name="作业ID")),
+                ("bk_biz_id", models.IntegerField(db_index=True, verbose_name="业务ID")),
+            ],
+            options={
+                "verbose_name": "任务业务关联",
+                "verbose_name_plural": "任务业务关联",
+                "unique_together": {("job_id", "bk_biz_id")},
+            },
+        ),
+        migrations.RunPython(init_job_biz_relation_and_statistics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("node_man", "0018_job_biz_relation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriptionFingerprint",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("subscription_id", models.IntegerField(unique=True, verbose_name="订阅ID")),
+                ("scope_hash", models.CharField(max_length=32, verbose_name="订阅范围哈希")),
+                ("instances_hash", models.CharField(max_length=32, verbose_name="实例及拓扑哈希")),
+                ("steps_hash", models.CharField(max_length=32, verbose_name="步骤配置哈希")),
+                ("status_hash", models.CharField(max_length=32, verbose_name="进程状态哈希")),
+                ("update_time", models.DateTimeField(auto_now=True, verbose_name="更新时间")),
+            ],
+            options={"verbose_name": "订阅输入指纹", "verbose_name_plural": "订阅输入指纹"},
+        ),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import django_mysql.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("node_man", "0019_subscriptionfingerprint")]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriptionInstanceInfo",
+            fields=[
+                ("hash", models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name="内容哈希")),
+                ("instance_info", django_mysql.models.JSONField(default=dict, verbose_name="实例信息")),
+            ],
+            options={"verbose_name": "订阅实例信息", "verbose_name_plural": "订阅实例信息"},
+        ),
+        # 仅修改模型字段名，数据库列名保持不变
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name="subscriptioninstancerecord", old_name="instance_info", new_name="raw_instance_info"
+                ),
+                migrations.AlterField(
+                    model_name="subscriptioninstancerecord",
+                    name="raw_instance_info",
+                    field=django_mysql.models.JSONField(db_column="instance_info", default=dict, verbose_name="实例信息"),
+                ),
+            ]
+        ),
+        migrations.AddField(
+            model_name="subscriptioninstancerecord",
+            name="instance_info_hash",
+            field=models.CharField(blank=True, default="", max_length=32, verbose_name="实例信息哈希"),
+        ),
+    ]
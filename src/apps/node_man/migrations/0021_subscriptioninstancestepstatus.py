@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("node_man", "0020_subscriptioninstanceinfo")]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubscriptionInstanceStepStatus",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("subscription_id", models.IntegerField(verbose_name="订阅ID")),
+                ("task_id", models.IntegerField(verbose_name="任务ID")),
+                ("instance_id", models.CharField(max_length=50, verbose_name="实例ID")),
+                ("step_id", models.CharField(blank=True, default="", max_length=64, verbose_name="步骤ID")),
+                ("node_id", models.CharField(max_length=50, unique=True, verbose_name="Pipeline节点ID")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "等待执行"),
+                            ("RUNNING", "正在执行"),
+                            ("SUCCESS", "执行成功"),
+                            ("FAILED", "执行失败"),
+                            ("PART_FAILED", "部分失败"),
+                            ("TERMINATED", "已终止"),
+                        ],
+                        default="PENDING",
+                        max_length=45,
+                        verbose_name="状态",
+                    ),
+                ),
+                ("update_time", models.DateTimeField(auto_now=True, verbose_name="更新时间")),
+            ],
+            options={
+                "verbose_name": "订阅实例步骤状态",
+                "verbose_name_plural": "订阅实例步骤状态",
+                "index_together": {("task_id", "step_id", "status"), ("subscription_id", "step_id", "status")},
+            },
+        )
+    ]
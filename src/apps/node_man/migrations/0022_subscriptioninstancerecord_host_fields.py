@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("node_man", "0021_subscriptioninstancestepstatus")]
+
+    # 存量记录数据量大，由 backfill_instance_record_host 命令分批回填
+    operations = [
+        migrations.AddField(
+            model_name="subscriptioninstancerecord",
+            name="bk_host_id",
+            field=models.IntegerField(blank=True, db_index=True, null=True, verbose_name="主机ID"),
+        ),
+        migrations.AddField(
+            model_name="subscriptioninstancerecord",
+            name="bk_cloud_id",
+            field=models.IntegerField(blank=True, null=True, verbose_name="云区域ID"),
+        ),
+        migrations.AddField(
+            model_name="subscriptioninstancerecord",
+            name="ip",
+            field=models.CharField(blank=True, default="", max_length=45, verbose_name="内网IP"),
+        ),
+        migrations.AlterIndexTogether(name="subscriptioninstancerecord", index_together={("ip", "bk_cloud_id")}),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+import django_mysql.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("node_man", "0022_subscriptioninstancerecord_host_fields")]
+
+    operations = [
+        migrations.CreateModel(
+            name="CloudProxyIndex",
+            fields=[
+                ("bk_cloud_id", models.IntegerField(primary_key=True, serialize=False, verbose_name="云区域ID")),
+                ("proxy_count", models.IntegerField(default=0, verbose_name="代理数量")),
+                ("pagent_count", models.IntegerField(default=0, verbose_name="P-Agent数量")),
+                ("alive_proxy_ids", django_mysql.models.JSONField(default=list, verbose_name="存活代理ID")),
+                ("is_available", models.BooleanField(default=False, verbose_name="是否有可用代理")),
+                ("exception", models.CharField(blank=True, default="", max_length=16, verbose_name="代理异常")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="更新时间")),
+            ],
+            options={"verbose_name": "云区域代理索引", "verbose_name_plural": "云区域代理索引"},
+        )
+    ]
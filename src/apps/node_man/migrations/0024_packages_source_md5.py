@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("node_man", "0023_cloudproxyindex")]
+
+    operations = [
+        migrations.AddField(
+            model_name="packages",
+            name="source_md5",
+            field=models.CharField(blank=True, db_index=True, default="", max_length=32, verbose_name="来源上传包md5值"),
+        )
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("node_man", "0024_packages_source_md5")]
+
+    operations = [
+        migrations.AddField(
+            model_name="subscriptionfingerprint",
+            name="prefetch_hash",
+            field=models.CharField(default="", max_length=32, verbose_name="预检指纹哈希"),
+        ),
+        migrations.AddField(
+            model_name="subscriptionfingerprint",
+            name="check_time",
+            field=models.DateTimeField(null=True, verbose_name="最近检查时间"),
+        ),
+    ]
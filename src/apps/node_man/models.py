@@ -9,6 +9,7 @@ import random
 import shutil
 import subprocess
 import tarfile
+import time
 import traceback
 import uuid
 from collections import defaultdict
@@ -22,7 +23,8 @@ from django.conf import settings
 from django.core.cache import cache
 from django.db import models
 from django.db import transaction
-from django.db.models import DateTimeField
+from django.db.models import Count, DateTimeField
+from django.db.models.query import ModelIterable
 from django.utils import timezone
 from django.utils.encoding import force_text
 from django.utils.functional import Promise
@@ -34,8 +36,8 @@ from apps.backend.subscription.errors import PipelineExecuteFailed
 from apps.backend.utils.data_renderer import nested_render_data
 from apps.node_man import constants as const, constants
 from apps.node_man.exceptions import AliveProxyNotExistsError, ApIDNotExistsError
-from apps.utils import env
-from apps.utils.basic import md5
+from apps.utils import env, ngram
+from apps.utils.basic import Md5Writer
 from common.log import logger
 from pipeline.parser import PipelineParser
 from pipeline.service import task_service
@@ -320,15 +322,12 @@ class Host(models.Model):
         """
         随机选一台可用的proxy
         """
-        proxy_ids = self.proxies.values_list("bk_host_id", flat=True)
-        alive_proxies = ProcessStatus.objects.filter(
-            bk_host_id__in=proxy_ids, name=ProcessStatus.GSE_AGENT_PROCESS_NAME, status=const.ProcStateType.RUNNING
-        )
+        # 索引可能滞后，需回表排除已删除或已变更节点类型的代理
+        alive_proxies = list(self.proxies.filter(bk_host_id__in=CloudProxyIndex.get(self.bk_cloud_id).alive_proxy_ids))
         if not alive_proxies:
             raise AliveProxyNotExistsError(_("主机所属云区域不存在可用Proxy"))
         else:
-            proxy_id = random.choice(alive_proxies).bk_host_id
-            return Host.objects.get(bk_host_id=proxy_id)
+            return random.choice(alive_proxies)
 
     @staticmethod
     def get_cpu_arch_by_os(os_type):
@@ -386,6 +385,162 @@ class Host(models.Model):
         ordering = ["-updated_at", "-bk_host_id"]
 
 
+class HostSearchIndex(models.Model):
+    """
+    主机搜索倒排索引
+    主机IP、操作系统、来源及Agent版本按 n-gram 切词后存储，以索引查询代替 LIKE '%x%' 的全表扫描
+    快速搜索仅匹配IP字段，支持前缀、中缀及IP段匹配；主机列表的关键字搜索以索引结果作为候选集
+    在主机、Agent进程状态保存及CMDB、Agent状态同步时刷新，检索结果需回表校验以排除切词误命中及索引滞后
+    """
+
+    token = models.CharField(_("检索词"), max_length=8)
+    bk_host_id = models.IntegerField(_("主机ID"), db_index=True)
+
+    MATCH_TOKENS_FUNC = {
+        const.HostSearchMatchType.PREFIX: ngram.prefix_tokens,
+        const.HostSearchMatchType.INFIX: ngram.infix_tokens,
+        const.HostSearchMatchType.SEGMENT: ngram.segment_tokens,
+    }
+    MATCH_FUNC = {
+        const.HostSearchMatchType.PREFIX: ngram.is_prefix_match,
+        const.HostSearchMatchType.INFIX: ngram.is_infix_match,
+        const.HostSearchMatchType.SEGMENT: ngram.is_segment_match,
+    }
+
+    @classmethod
+    def tokenize_host(cls, host_info: dict) -> set:
+        tokens = set()
+        for field in (*const.HOST_SEARCH_INDEX_FIELDS, "version"):
+            tokens.update(ngram.tokenize(host_info.get(field)))
+        return tokens
+
+    @classmethod
+    def query_tokens(cls, query: str, match_type: str) -> set:
+        return cls.MATCH_TOKENS_FUNC[match_type](query)
+
+    @classmethod
+    def is_match(cls, host_info: dict, query: str, match_type: str) -> bool:
+        match_func = cls.MATCH_FUNC[match_type]
+        return any(match_func(host_info.get(field), query) for field in const.HOST_SEARCH_FIELDS)
+
+    @classmethod
+    def refresh(cls, bk_host_ids):
+        """
+        按主机最新数据重建索引，已删除的主机会同时清理索引
+        :param bk_host_ids: 主机ID列表
+        """
+        bk_host_ids = list(set(bk_host_ids))
+        for begin in range(0, len(bk_host_ids), const.HOST_SEARCH_BATCH_SIZE):
+            batch_host_ids = bk_host_ids[begin : begin + const.HOST_SEARCH_BATCH_SIZE]
+            hosts = Host.objects.filter(bk_host_id__in=batch_host_ids).values(
+                "bk_host_id", *const.HOST_SEARCH_INDEX_FIELDS
+            )
+            agent_versions = dict(
+                ProcessStatus.objects.filter(
+                    bk_host_id__in=batch_host_ids,
+                    proc_type=const.ProcType.AGENT,
+                    source_type=ProcessStatus.SourceType.DEFAULT,
+                ).values_list("bk_host_id", "version")
+            )
+            index_to_create = [
+                cls(token=token, bk_host_id=host["bk_host_id"])
+                for host in hosts
+                for token in cls.tokenize_host({**host, "version": agent_versions.get(host["bk_host_id"])})
+            ]
+            with transaction.atomic():
+                cls.objects.filter(bk_host_id__in=batch_host_ids).delete()
+                cls.objects.bulk_create(index_to_create, batch_size=const.HOST_SEARCH_BATCH_SIZE)
+
+    @classmethod
+    def rebuild(cls):
+        # 逐批替换现有主机的索引后再清理已删除主机的残留，重建期间索引不会被清空
+        cls.refresh(Host.objects.values_list("bk_host_id", flat=True))
+        cls.objects.exclude(bk_host_id__in=Host.objects.values("bk_host_id")).delete()
+
+    @classmethod
+    def matched_host_ids(cls, tokens: set):
+        """
+        同时命中全部检索词的主机ID，返回 QuerySet 以便作为子查询使用
+        """
+        return (
+            cls.objects.filter(token__in=tokens)
+            .values("bk_host_id")
+            .annotate(hit_count=Count("token"))
+            .filter(hit_count=len(tokens))
+            .values("bk_host_id")
+        )
+
+    @classmethod
+    def search(cls, query: str, match_type: str, host_queryset, fields, limit: int, last_bk_host_id=None):
+        """
+        基于索引的主机检索，按 bk_host_id 倒序进行游标分页
+        - 以命中数最少的检索词作为驱动，分批取候选主机，再以其余检索词过滤并回表校验
+        - 总数为各检索词倒排列表长度的最小值，是未经权限过滤的估算值
+        :param query: 搜索内容
+        :param match_type: 匹配方式 HostSearchMatchType
+        :param host_queryset: 主机查询范围（如权限过滤后的 QuerySet）
+        :param fields: 返回的主机字段
+        :param limit: 返回数量
+        :param last_bk_host_id: 上一页最后一台主机ID
+        :return: hosts, next_cursor, estimated_count
+        """
+        tokens = cls.query_tokens(query, match_type)
+        if not tokens:
+            return [], None, 0
+
+        token_counts = dict(
+            cls.objects.filter(token__in=tokens)
+            .values("token")
+            .annotate(count=Count("id"))
+            .values_list("token", "count")
+        )
+        if len(token_counts) < len(tokens):
+            # 存在未命中的检索词，必然无结果
+            return [], None, 0
+
+        driving_token = min(token_counts, key=token_counts.get)
+        other_tokens = tokens - {driving_token}
+        fields = set(fields) | {"bk_host_id", *const.HOST_SEARCH_FIELDS}
+
+        hosts = []
+        cursor = last_bk_host_id
+        while True:
+            postings = cls.objects.filter(token=driving_token)
+            if cursor is not None:
+                postings = postings.filter(bk_host_id__lt=cursor)
+            candidate_host_ids = list(
+                postings.order_by("-bk_host_id").values_list("bk_host_id", flat=True)[: const.HOST_SEARCH_BATCH_SIZE]
+            )
+            if not candidate_host_ids:
+                cursor = None
+                break
+
+            if other_tokens:
+                matched_host_ids = cls.matched_host_ids(other_tokens).filter(bk_host_id__in=candidate_host_ids)
+            else:
+                matched_host_ids = candidate_host_ids
+
+            candidates = host_queryset.filter(bk_host_id__in=matched_host_ids).order_by("-bk_host_id").values(*fields)
+            for host in candidates:
+                if not cls.is_match(host, query, match_type):
+                    continue
+                hosts.append(host)
+                if len(hosts) >= limit:
+                    return hosts, host["bk_host_id"], min(token_counts.values())
+
+            cursor = candidate_host_ids[-1]
+            if len(candidate_host_ids) < const.HOST_SEARCH_BATCH_SIZE:
+                cursor = None
+                break
+
+        return hosts, cursor, min(token_counts.values())
+
+    class Meta:
+        verbose_name = _("主机搜索索引")
+        verbose_name_plural = _("主机搜索索引")
+        unique_together = (("token", "bk_host_id"),)
+
+
 class ProcessStatus(models.Model):
     class SourceType(object):
         DEFAULT = "default"
@@ -466,6 +621,137 @@ class ProcessStatus(models.Model):
         verbose_name_plural = _("主机进程状态")
 
 
+class CloudProxyIndex(models.Model):
+    """
+    云区域代理索引
+    按云区域汇总代理可用性及主机数量，以主键查询代替每次对 Host、IdentityData、ProcessStatus 的关联统计
+    在代理及P-Agent主机、代理进程状态、代理认证信息保存时刷新，Agent状态同步后全量重建，未命中的云区域按需计算
+    """
+
+    bk_cloud_id = models.IntegerField(_("云区域ID"), primary_key=True)
+    proxy_count = models.IntegerField(_("代理数量"), default=0)
+    pagent_count = models.IntegerField(_("P-Agent数量"), default=0)
+    alive_proxy_ids = JSONField(_("存活代理ID"), default=list)
+    is_available = models.BooleanField(_("是否有可用代理"), default=False)
+    exception = models.CharField(_("代理异常"), max_length=16, blank=True, default="")
+    updated_at = models.DateTimeField(_("更新时间"), auto_now=True)
+
+    @classmethod
+    def refresh(cls, bk_cloud_ids):
+        """
+        按最新数据重建云区域索引
+        :param bk_cloud_ids: 云区域ID列表
+        :return: {bk_cloud_id: CloudProxyIndex}
+        """
+        bk_cloud_ids = set(bk_cloud_ids)
+        indexes = {bk_cloud_id: cls(bk_cloud_id=bk_cloud_id) for bk_cloud_id in bk_cloud_ids}
+        if not indexes:
+            return indexes
+
+        pagent_count = (
+            Host.objects.filter(bk_cloud_id__in=bk_cloud_ids, node_type=const.NodeType.PAGENT)
+            .values_list("bk_cloud_id")
+            .annotate(node_count=Count("bk_cloud_id"))
+            .order_by()
+        )
+        for bk_cloud_id, node_count in pagent_count:
+            indexes[bk_cloud_id].pagent_count = node_count
+
+        proxies = list(
+            Host.objects.filter(bk_cloud_id__in=bk_cloud_ids, node_type=const.NodeType.PROXY).values(
+                "bk_host_id", "bk_cloud_id", "is_manual"
+            )
+        )
+        proxy_ids = [proxy["bk_host_id"] for proxy in proxies]
+        process_status = dict(
+            ProcessStatus.objects.filter(
+                bk_host_id__in=proxy_ids, name=ProcessStatus.GSE_AGENT_PROCESS_NAME
+            ).values_list("bk_host_id", "status")
+        )
+        identities = {
+            identity["bk_host_id"]: identity
+            for identity in IdentityData.objects.filter(bk_host_id__in=proxy_ids).values(
+                "bk_host_id", "password", "key"
+            )
+        }
+
+        for proxy in proxies:
+            index = indexes[proxy["bk_cloud_id"]]
+            index.proxy_count += 1
+            identity = identities.get(proxy["bk_host_id"])
+            has_auth = bool(identity and (identity["password"] or identity["key"]))
+            # exception为abnormal则说明有状态异常代理，为overdue则说明有认证信息过期的代理，两者同时出现时以状态异常为优先
+            if process_status.get(proxy["bk_host_id"]) != const.ProcStateType.RUNNING:
+                index.exception = "abnormal"
+                continue
+            index.alive_proxy_ids.append(proxy["bk_host_id"])
+            if identity and (has_auth or proxy["is_manual"]):
+                index.is_available = True
+            if not has_auth and index.exception != "abnormal":
+                index.exception = "overdue"
+
+        with transaction.atomic():
+            cls.objects.filter(bk_cloud_id__in=bk_cloud_ids).delete()
+            # 并发刷新同一云区域时数据一致，忽略主键冲突
+            cls.objects.bulk_create(indexes.values(), ignore_conflicts=True)
+        return indexes
+
+    @classmethod
+    def rebuild(cls):
+        # 重建期间查询方读到的仍是重建前的索引，不会出现索引为空的情况
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.refresh(
+                Host.objects.filter(node_type__in=[const.NodeType.PROXY, const.NodeType.PAGENT])
+                .values_list("bk_cloud_id", flat=True)
+                .distinct()
+            )
+
+    @classmethod
+    def fetch(cls, bk_cloud_ids):
+        """
+        查询云区域索引，未命中的云区域即时计算
+        :param bk_cloud_ids: 云区域ID列表
+        :return: {bk_cloud_id: CloudProxyIndex}
+        """
+        bk_cloud_ids = set(bk_cloud_ids)
+        indexes = {index.bk_cloud_id: index for index in cls.objects.filter(bk_cloud_id__in=bk_cloud_ids)}
+        missing_cloud_ids = bk_cloud_ids - set(indexes)
+        if missing_cloud_ids:
+            indexes.update(cls.refresh(missing_cloud_ids))
+        return indexes
+
+    @classmethod
+    def get(cls, bk_cloud_id):
+        return cls.fetch([bk_cloud_id])[bk_cloud_id]
+
+    @classmethod
+    def host_cloud_ids(cls, bk_host_ids) -> set:
+        """
+        代理及P-Agent主机所在的云区域ID，用于主机删除或批量写入前后刷新索引
+        """
+        return set(
+            Host.objects.filter(
+                bk_host_id__in=bk_host_ids, node_type__in=[const.NodeType.PROXY, const.NodeType.PAGENT]
+            ).values_list("bk_cloud_id", flat=True)
+        )
+
+    @classmethod
+    def refresh_by_host_ids(cls, bk_host_ids):
+        """
+        刷新代理主机所在云区域的索引，非代理主机忽略
+        """
+        cls.refresh(
+            Host.objects.filter(bk_host_id__in=bk_host_ids, node_type=const.NodeType.PROXY)
+            .values_list("bk_cloud_id", flat=True)
+            .distinct()
+        )
+
+    class Meta:
+        verbose_name = _("云区域代理索引")
+        verbose_name_plural = _("云区域代理索引")
+
+
 class AccessPoint(models.Model):
     name = models.CharField(_("接入点名称"), max_length=255)
     ap_type = models.CharField(_("接入点类型"), max_length=255, default="user")
@@ -603,12 +889,51 @@ class Job(models.Model):
     bk_biz_scope = JSONField(_("业务范围"))
     error_hosts = JSONField(_("发生错误的主机"))
 
+    # 由 statistics 同步的排序字段，避免排序时解析JSON
+    total_count = models.IntegerField(_("总数"), default=0, db_index=True)
+    failed_count = models.IntegerField(_("失败数"), default=0, db_index=True)
+    success_count = models.IntegerField(_("成功数"), default=0, db_index=True)
+
+    def save(self, *args, **kwargs):
+        statistics = self.statistics or {}
+        for head in const.HEAD_TUPLE:
+            setattr(self, head, statistics.get(head) or 0)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "statistics" in update_fields:
+            kwargs["update_fields"] = list(set(update_fields) | set(const.HEAD_TUPLE))
+        super(Job, self).save(*args, **kwargs)
+
+        if update_fields is None or "bk_biz_scope" in update_fields:
+            JobBizRelation.sync(self.id, self.bk_biz_scope)
+
     class Meta:
         verbose_name = _("任务信息")
         verbose_name_plural = _("任务信息")
         ordering = ["-id"]
 
 
+class JobBizRelation(models.Model):
+    """任务与业务的关联关系，由 Job.bk_biz_scope 同步，用于在数据库中完成任务的权限过滤"""
+
+    job_id = models.IntegerField(_("作业ID"), db_index=True)
+    bk_biz_id = models.IntegerField(_("业务ID"), db_index=True)
+
+    @classmethod
+    def sync(cls, job_id, bk_biz_scope):
+        bk_biz_scope = set(bk_biz_scope or [])
+        exist_biz_ids = set(cls.objects.filter(job_id=job_id).values_list("bk_biz_id", flat=True))
+        if exist_biz_ids == bk_biz_scope:
+            return
+        cls.objects.filter(job_id=job_id, bk_biz_id__in=exist_biz_ids - bk_biz_scope).delete()
+        cls.objects.bulk_create([cls(job_id=job_id, bk_biz_id=bk_biz_id) for bk_biz_id in bk_biz_scope - exist_biz_ids])
+
+    class Meta:
+        verbose_name = _("任务业务关联")
+        verbose_name_plural = _("任务业务关联")
+        unique_together = (("job_id", "bk_biz_id"),)
+
+
 class JobTask(models.Model):
     """主机和任务关联表，存储任务详情及结果"""
 
@@ -776,6 +1101,8 @@ class Packages(models.Model):
     is_release_version = models.BooleanField(_("是否已经发布版本"), default=True, db_index=True)
     # 由于创建记录时，文件可能仍然在传输过程中，因此需要标志位判断是否已经可用
     is_ready = models.BooleanField(_("插件是否可用"), default=True)
+    # 重复上传相同内容的文件包时，据此跳过已注册的插件包
+    source_md5 = models.CharField(_("来源上传包md5值"), max_length=32, blank=True, default="", db_index=True)
 
     @property
     def plugin_desc(self):
@@ -792,6 +1119,109 @@ class Packages(models.Model):
             self._proc_control = ProcControl.objects.get(plugin_package_id=self.id)
         return self._proc_control
 
+    @classmethod
+    def load_project_yaml(cls, dir_path):
+        """
+        读取插件路径下的project.yaml
+        :param dir_path: 插件路径
+        :return: project.yaml 配置内容 | raise Exception
+        """
+        # 1. 判断是否存在project.yaml文件
+        project_file_path = os.path.join(dir_path, "project.yaml")
+        if not os.path.exists(project_file_path):
+            logger.error("try to pack path->[%s] but is not [project.yaml] file under file path" % dir_path)
+            raise ValueError(_("找不到 {} project.yaml文件，打包失败".format(dir_path)))
+
+        # 2. 解析project.yaml文件(版本，插件名等信息)
+        try:
+            with open(project_file_path, "r", encoding="utf-8") as project_file:
+                return yaml.safe_load(project_file)
+
+        except (IOError, yaml.YAMLError) as error:
+            logger.error(
+                "failed to parse or read project_yaml->[{}] for->[{}]".format(project_file_path, traceback.format_exc())
+            )
+            six.raise_from(error, error)
+
+    @classmethod
+    def pack(cls, dir_path, package_name, version, package_os, cpu_arch, is_external, exclude_paths=None):
+        """
+        将插件路径打包到nginx下载目录下的暂存文件，写入的同时计算MD5及大小
+        暂存文件需在插件包记录提交后通过 publish 发布，记录未能提交时通过 discard 清理
+        不访问DB，可在多个线程中并发打包不同系统及CPU架构的插件包
+        :param dir_path: 需要进行打包的插件路径
+        :param package_name: 插件名
+        :param version: 插件版本
+        :param package_os: 插件包支持的系统
+        :param cpu_arch: 插件支持的CPU架构
+        :param is_external: 是否第三方插件
+        :param exclude_paths: 不需要打包的文件路径，如已导入DB的配置模板
+        :return: {"pkg_path": 包所在目录, "pkg_size": 包大小, "md5": 包MD5, "file_path": 包路径, "staging_path": 暂存路径}
+        """
+        file_name = "{}-{}.tgz".format(package_name, version)
+        nginx_path = os.path.join(settings.NGINX_DOWNLOAD_PATH, package_os, cpu_arch, file_name)
+
+        try:
+            # 尝试创建 Nginx download path，已存在则忽略
+            os.makedirs(os.path.dirname(nginx_path))
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise e
+
+        # 判断是否第三方插件的路径
+        arcname = "external_plugins/%s" % package_name if is_external else "plugins/"
+        exclude_names = {
+            os.path.normpath(os.path.join(arcname, os.path.relpath(path, dir_path))) for path in exclude_paths or []
+        }
+
+        # 注意：此处需要依赖 NGINX_DOWNLOAD_PATH 挂载到 NFS
+        # 写入nginx目录下的暂存文件，发布时原子替换，避免下载到不完整或未注册成功的包
+        staging_path = "{}.{}.tmp".format(nginx_path, uuid.uuid4().hex)
+        try:
+            with open(staging_path, "wb") as staging_file:
+                writer = Md5Writer(staging_file)
+                with tarfile.open(fileobj=writer, mode="w:gz") as tfile:
+                    tfile.add(
+                        dir_path,
+                        arcname=arcname,
+                        filter=lambda tarinfo: None if os.path.normpath(tarinfo.name) in exclude_names else tarinfo,
+                    )
+        except Exception:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+            raise
+
+        logger.info(
+            "package->[%s] version->[%s] os->[%s] cpu_arch->[%s] now is pack to staging_path->[%s]."
+            % (package_name, version, package_os, cpu_arch, staging_path)
+        )
+        return {
+            "pkg_path": os.path.dirname(nginx_path),
+            "pkg_size": writer.size,
+            "md5": writer.hexdigest(),
+            "file_path": nginx_path,
+            "staging_path": staging_path,
+        }
+
+    @staticmethod
+    def publish(pack_info):
+        """
+        将暂存的插件包发布到nginx下载路径
+        :param pack_info: 打包结果(见 pack)
+        """
+        os.replace(pack_info["staging_path"], pack_info["file_path"])
+        logger.info("package->[{}] now is published to nginx.".format(pack_info["file_path"]))
+
+    @staticmethod
+    def discard(pack_info):
+        """
+        清理未发布的暂存插件包
+        :param pack_info: 打包结果(见 pack)
+        """
+        if os.path.exists(pack_info["staging_path"]):
+            os.remove(pack_info["staging_path"])
+            logger.info("staging package->[{}] is discarded.".format(pack_info["staging_path"]))
+
     @classmethod
     @transaction.atomic
     def create_record(
@@ -803,6 +1233,8 @@ class Packages(models.Model):
         is_release=True,
         is_template_load=False,
         is_template_overwrite=False,
+        pack_info=None,
+        source_md5="",
     ):
         """
         给定一个插件的路径，分析路径下的project.yaml，生成压缩包到nginx(多台)目录下
@@ -814,24 +1246,13 @@ class Packages(models.Model):
         :param is_release: 是否发布的版本
         :param is_template_load: 是否需要读取插件包中的配置模板
         :param is_template_overwrite: 是否可以覆盖已经存在的配置模板
+        :param pack_info: 已完成打包的结果(见 pack)，为空时在此打包，包文件在事务提交后发布
+        :param source_md5: 来源上传包的MD5
         :return: True | raise Exception
         """
-        # 1. 判断是否存在project.yaml文件
+        # 1-2. 解析project.yaml文件(版本，插件名等信息)
+        yaml_config = cls.load_project_yaml(dir_path)
         project_file_path = os.path.join(dir_path, "project.yaml")
-        if not os.path.exists(project_file_path):
-            logger.error("try to pack path->[%s] but is not [project.yaml] file under file path" % dir_path)
-            raise ValueError(_("找不到 {} project.yaml文件，打包失败".format(dir_path)))
-
-        # 2. 解析project.yaml文件(版本，插件名等信息)
-        try:
-            with open(project_file_path, "r", encoding="utf-8") as project_file:
-                yaml_config = yaml.safe_load(project_file)
-
-        except (IOError, yaml.YAMLError) as error:
-            logger.error(
-                "failed to parse or read project_yaml->[{}] for->[{}]".format(project_file_path, traceback.format_exc())
-            )
-            six.raise_from(error, error)
 
         try:
             package_name = yaml_config["name"]
@@ -1008,44 +1429,25 @@ class Packages(models.Model):
             % (proc_control.id, package_name, version, package_os)
         )
 
-        # 4. 打包创建新的tar包
-        file_name = "{}-{}.tgz".format(package_name, version)
-        temp_file_path = "/tmp/{}-{}-{}-{}.tgz".format(package_name, version, package_os, cpu_arch)
-        nginx_path = os.path.join(settings.NGINX_DOWNLOAD_PATH, record.os, record.cpu_arch, file_name)
-
-        try:
-            # 尝试创建 Nginx download path，已存在则忽略
-            os.makedirs(os.path.dirname(nginx_path))
-        except OSError as e:
-            if e.errno != errno.EEXIST:
-                raise e
-
-        with tarfile.open(temp_file_path, "w:gz") as tfile:
-            tfile.add(
-                dir_path,
-                # 判断是否第三方插件的路径
-                arcname="external_plugins/%s" % package_name if is_external else "plugins/",
-            )
-            logger.info(
-                "package->[%s] version->[%s] now is pack to temp_path->[%s], ready to send to nginx."
-                % (package_name, version, file_name)
-            )
-
-        # 4. 文件SCP转移到nginx路径下
-        # 注意：此处需要依赖 NGINX_DOWNLOAD_PATH 挂载到 NFS
-        shutil.copy(temp_file_path, nginx_path)
+        # 4. 打包创建新的tar包到nginx路径下
+        if pack_info is None:
+            pack_info = cls.pack(dir_path, package_name, version, package_os, cpu_arch, is_external)
 
         # 5. 标记已经完成同步及其他信息
         record.is_ready = True
         record.pkg_ctime = record.pkg_mtime = str(timezone.now())
-        record.pkg_size = os.path.getsize(temp_file_path)
-        record.pkg_path = os.path.dirname(nginx_path)
-        record.md5 = md5(temp_file_path)
+        record.pkg_size = pack_info["pkg_size"]
+        record.pkg_path = pack_info["pkg_path"]
+        record.md5 = pack_info["md5"]
+        record.source_md5 = source_md5
         # 这里没有加上包名，是因为原本脚本(bkee/bkce)中就没有加上，为了防止已有逻辑异常，保持一致
         # 后面有哪位发现这里不适用了，可以一并修改
         record.location = "http://{}/download/{}/{}".format(os.getenv("LAN_IP"), package_os, cpu_arch)
 
         record.save()
+
+        # 记录提交后再发布包文件，避免校验失败或回滚时覆盖正在使用的包，导致包文件与记录的MD5不一致
+        transaction.on_commit(lambda: cls.publish(pack_info))
         logger.info(
             "plugin->[{}] version->[{}] now is sync to nginx ready to use.".format(record.project, record.version)
         )
@@ -1074,48 +1476,60 @@ class Packages(models.Model):
             )
             raise ValueError(_("找不到可导出插件，请确认后重试"))
 
-        # 临时的解压目录
-        temp_path = "/tmp/%s" % uuid.uuid4().hex
-        # 临时的压缩包路径
-        temp_file_path = "/tmp/%s.tgz" % uuid.uuid4().hex
-
-        # 2. 各个插件解压到指定的目录
-        for plugin in plugin_list:
-            plugin.unzip(temp_path)
+        # 2. 以各个插件包的MD5作为导出内容的标识，内容未变化时直接复用已生成的导出包
+        content_key = hashlib.md5(
+            ",".join(
+                sorted("{}-{}-{}".format(plugin.os, plugin.cpu_arch, plugin.md5) for plugin in plugin_list)
+            ).encode()
+        ).hexdigest()
+        file_name = "{}-{}-{}.tgz".format(project, version, content_key)
+        download_file_path = os.path.join(settings.EXPORT_PATH, file_name)
+        if os.path.exists(download_file_path):
             logger.info(
-                "plugin->[{}] os->[{}] cpu->[{}] unzip success.".format(plugin.pkg_name, plugin.os, plugin.cpu_arch)
+                "plugin->[{}] version->[{}] export file->[{}] already exists, reuse it.".format(
+                    project, version, download_file_path
+                )
             )
+            return {"file_path": download_file_path}
 
-        # 3. 解压的指定目录打包
-        with tarfile.open(temp_file_path, "w:gz") as tar_file:
-            # temp_path下的内容由于是从plugin处解压获得，所以应该已经符合external_plugins或者plugins的目录规范
-            # 此处则不再指定
-            tar_file.add(temp_path, ".")
-
-        logger.debug(
-            "export plugin->[%s] version->[%s] create temp_file->[%s] from path->[%s] success, "
-            "ready to trans to nginx." % (project, version, temp_file_path, temp_path)
-        )
-
-        # 4. 同步到nginx指定目录
-        file_name = "{}-{}-{}.tgz".format(project, version, md5(temp_file_path))
-
-        if not os.path.exists(settings.EXPORT_PATH):
+        try:
             os.makedirs(settings.EXPORT_PATH)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise e
+
+        # 3. 各个插件包的内容直接转写到导出目录下的临时文件，写入的同时计算MD5，完成后原子替换
+        # temp_file_path 下的内容按 external_plugins_${os}_${cpu_arch} 或 plugins_${os}_${cpu_arch} 的目录规范组织
+        temp_file_path = "{}.{}.tmp".format(download_file_path, uuid.uuid4().hex)
+        try:
+            with open(temp_file_path, "wb") as temp_file:
+                writer = Md5Writer(temp_file)
+                with tarfile.open(fileobj=writer, mode="w|gz") as tar_file:
+                    for plugin in plugin_list:
+                        plugin.export_to(tar_file)
+                        logger.info(
+                            "plugin->[{}] os->[{}] cpu->[{}] export success.".format(
+                                plugin.pkg_name, plugin.os, plugin.cpu_arch
+                            )
+                        )
+            os.replace(temp_file_path, download_file_path)
+        except Exception:
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
+            raise
 
-        download_file_path = os.path.join(settings.EXPORT_PATH, file_name)
-        shutil.copy(temp_file_path, download_file_path)
         logger.info(
-            "plugin->[{}] version->[{}] export file->[{}] is ready".format(project, version, download_file_path)
+            "plugin->[%s] version->[%s] export file->[%s] size->[%s] md5->[%s] is ready"
+            % (project, version, download_file_path, writer.size, writer.hexdigest())
         )
 
         logger.info("plugin->[{}] version->[{}] export job success.".format(project, version))
         return {"file_path": download_file_path}
 
-    def unzip(self, target_path):
+    def export_to(self, export_tar):
         """
-        将一个指定的插件解压到指定的目录下
-        :param target_path: 指定的解压目录
+        将插件包的内容逐个转写到导出包中，不经过磁盘解压
+        :param export_tar: 导出包 TarFile 对象
         :return: True | raise Exception
         """
 
@@ -1124,78 +1538,48 @@ class Packages(models.Model):
         # 1. 获取文件
         if not os.path.exists(file_path):
             logger.error(
-                "try to unzip package->[{}] but file_path->[{}] is not exists, nothing will do.".format(
+                "try to export package->[{}] but file_path->[{}] is not exists, nothing will do.".format(
                     self.pkg_name, file_path
                 )
             )
             raise ValueError(_("插件文件不存在，请联系管理员处理"))
 
-        # 2. 解压到指定的目录
+        # 2. 转写到导出包的指定目录下
         with tarfile.open(file_path) as tar_file:
 
             file_members = tar_file.getmembers()
 
-            # 判断获取需要解压到的目标位置
+            # 判断获取需要转写到的目标位置
             if "external_plugins" in file_members[0].name:
                 # 第三方插件的导出
-                # 目标路径变更为：${target_path}/external_plugins_linux_x86/${project_name}/
-                target_path = os.path.join(
-                    target_path, "external_plugins_{}_{}".format(self.os, self.cpu_arch), self.project
-                )
-                logger.info(
-                    "project->[%s] version->[%s] is external_plugins so set target_path->[%s]"
-                    % (self.project, self.version, target_path)
-                )
+                # 目标路径变更为：external_plugins_linux_x86/${project_name}/
+                export_root_path = "external_plugins_{}_{}/{}".format(self.os, self.cpu_arch, self.project)
                 plugin_root_path = "external_plugins/%s/" % self.project
                 type_root_path = "external_plugins/"
 
             else:
-                # 目标路径变更为：${target_path}/plugins_linux_x86/${project_name}/
-                target_path = os.path.join(target_path, "plugins_{}_{}".format(self.os, self.cpu_arch), self.project)
-                logger.info(
-                    "project->[%s] version->[%s] is offical plugins so set target_path->[%s]"
-                    % (self.project, self.version, target_path)
-                )
+                # 目标路径变更为：plugins_linux_x86/${project_name}/
+                export_root_path = "plugins_{}_{}/{}".format(self.os, self.cpu_arch, self.project)
                 plugin_root_path = "plugins/%s/" % self.project
                 type_root_path = "plugins/"
 
-            if not os.path.exists(target_path):
-                os.makedirs(target_path)
-                logger.info("temp path->[{}] for package->[{}] is created".format(target_path, self.pkg_name))
-
-            # 对所有的内容进行遍历，然后找到是文件的内容，解压到我们的目标路径上
+            # 对所有的内容进行遍历，写入到导出包的目标路径上
             for member in file_members:
 
                 # 如果是类型的层级文件夹，跳过
                 if member.name == plugin_root_path[:-1] or member.name == type_root_path[:-1]:
-                    logger.info(
-                        "path->[{}] plugin_root_path->[{}] type_root_path->[{}] jump it".format(
-                            member.name, plugin_root_path, type_root_path
-                        )
-                    )
                     continue
 
-                # 解压时，只关注最底层的文件名及文件夹
-                # 上层的external_plugins/project_name废弃
-                file_name = member.name.replace(plugin_root_path, "")
-                logger.info(
-                    "path->[{}] is extract to->[{}] with replace_root->[{}]".format(
-                        member.name, file_name, plugin_root_path
-                    )
-                )
-                current_target_path = os.path.join(target_path, file_name)
-
-                # 此处使用私有方法，是因为改名没有其他方式了
-                # 如果其他大锅有更好的方案，欢迎修改。。。囧
-                tar_file._extract_member(member, current_target_path)
-                logger.info(
-                    "project->[%s] version->[%s] file->[%s] is extract to->[%s]"
-                    % (self.project, self.version, member.name, current_target_path)
-                )
+                # 只关注最底层的文件名及文件夹，上层的external_plugins/project_name废弃
+                export_member = copy.copy(member)
+                export_member.name = "/".join([export_root_path, member.name.replace(plugin_root_path, "")])
+                # 原路径可能记录在pax头中，需一并清理，否则会覆盖新的路径
+                export_member.pax_headers = {}
+                export_tar.addfile(export_member, tar_file.extractfile(member) if member.isreg() else None)
 
         logger.info(
-            "package->[{}] os->[{}] cpu->[{}] unzip to path->[{}] success.".format(
-                self.pkg_name, self.os, self.cpu_arch, target_path
+            "package->[{}] os->[{}] cpu->[{}] export to path->[{}] success.".format(
+                self.pkg_name, self.os, self.cpu_arch, export_root_path
             )
         )
 
@@ -1406,6 +1790,7 @@ class UploadPackage(models.Model):
         :return: [package_object, ...]
         """
         # 1. 解压压缩文件
+        begin_time = time.time()
         package_result = []
         temp_path = "/tmp/%s" % uuid.uuid4().hex
 
@@ -1442,46 +1827,152 @@ class UploadPackage(models.Model):
             
             safe_extract(tfile, path=temp_path)
 
-        # 2. 遍历第一层的内容，得知当前的操作系统和cpu架构信息
-        with transaction.atomic():
-            for first_path in os.listdir(temp_path):
-                re_match = const.PACKAGE_PATH_RE.match(first_path)
-                if re_match is None:
-                    logger.info("path->[%s] is not match re, jump it." % first_path)
-                    continue
+        phase_timings = {"extract": time.time() - begin_time}
 
-                path_dict = re_match.groupdict()
-                current_os = path_dict["os"]
-                cpu_arch = path_dict["cpu_arch"]
-                logger.info("path->[{}] is match for os->[{}] cpu->[{}]".format(first_path, current_os, cpu_arch))
-
-                # 遍历第二层的内容，得知当前的插件名
-                abs_first_path = os.path.join(temp_path, first_path)
-                for second_path in os.listdir(abs_first_path):
-                    # 注册新的内容，并触发同步
-                    abs_path = os.path.join(abs_first_path, second_path)
-
-                    if not os.path.isdir(abs_path):
-                        logger.info("found file path->[%s] jump it" % abs_path)
-                        continue
-
-                    record = Packages.create_record(
-                        dir_path=abs_path,
-                        package_os=current_os,
-                        cpu_arch=cpu_arch,
-                        is_release=is_release,
-                        is_external=path_dict["is_external"] is not None,
-                        is_template_load=is_template_load,
-                        is_template_overwrite=is_template_overwrite,
+        try:
+            # 2. 遍历第一层的内容，得知当前的操作系统和cpu架构信息，跳过已由相同内容的上传包注册的插件包
+            begin_time = time.time()
+            variants = self.list_package_variants(temp_path)
+            registered_packages = {
+                (package.project, package.version, package.os, package.cpu_arch): package
+                for package in Packages.objects.filter(
+                    source_md5=self.md5,
+                    is_ready=True,
+                    project__in=[variant["yaml_config"]["name"] for variant in variants],
+                )
+            }
+            variants_to_register = []
+            for variant in variants:
+                package = registered_packages.get(
+                    (
+                        variant["yaml_config"]["name"],
+                        str(variant["yaml_config"]["version"]),
+                        variant["package_os"],
+                        variant["cpu_arch"],
+                    )
+                )
+                if package and os.path.exists(os.path.join(package.pkg_path, package.pkg_name)):
+                    logger.info(
+                        "package->[{}] record->[{}] is registered by the same content, jump it.".format(
+                            self.file_name, package.id
+                        )
                     )
+                    package_result.append(package)
+                else:
+                    variants_to_register.append(variant)
+            phase_timings["parse"] = time.time() - begin_time
+
+            # 3. 并发打包各个系统及CPU架构的插件包
+            begin_time = time.time()
+
+            def pack_variant(variant):
+                exclude_paths = []
+                if is_template_load:
+                    # 配置模板导入DB后不再打包
+                    exclude_paths = [
+                        os.path.join(variant["dir_path"], templates_info["source_path"])
+                        for templates_info in variant["yaml_config"].get("config_templates", [])
+                    ]
+                return Packages.pack(
+                    dir_path=variant["dir_path"],
+                    package_name=variant["yaml_config"]["name"],
+                    version=variant["yaml_config"]["version"],
+                    package_os=variant["package_os"],
+                    cpu_arch=variant["cpu_arch"],
+                    is_external=variant["is_external"],
+                    exclude_paths=exclude_paths,
+                )
+
+            pack_futures = []
+            try:
+                if variants_to_register:
+                    max_workers = min(settings.CONCURRENT_NUMBER, len(variants_to_register))
+                    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+                        pack_futures = [ex.submit(pack_variant, variant) for variant in variants_to_register]
+                pack_infos = [future.result() for future in pack_futures]
+                phase_timings["pack"] = time.time() - begin_time
+
+                # 4. 注册新的内容，事务提交后发布包文件
+                begin_time = time.time()
+                with transaction.atomic():
+                    for variant, pack_info in zip(variants_to_register, pack_infos):
+                        record = Packages.create_record(
+                            dir_path=variant["dir_path"],
+                            package_os=variant["package_os"],
+                            cpu_arch=variant["cpu_arch"],
+                            is_release=is_release,
+                            is_external=variant["is_external"],
+                            is_template_load=is_template_load,
+                            is_template_overwrite=is_template_overwrite,
+                            pack_info=pack_info,
+                            source_md5=self.md5,
+                        )
 
-                    logger.info("package->[{}] now add record->[{}] success.".format(self.file_name, record.id))
-                    package_result.append(record)
+                        logger.info("package->[{}] now add record->[{}] success.".format(self.file_name, record.id))
+                        package_result.append(record)
+                phase_timings["register"] = time.time() - begin_time
+            except Exception:
+                # 打包或注册失败时清理未发布的暂存包，nginx下载路径中已有的包保持不变
+                for future in pack_futures:
+                    if future.exception() is None:
+                        Packages.discard(future.result())
+                raise
+        finally:
+            shutil.rmtree(temp_path, ignore_errors=True)
 
-        # 3. 完成
-        logger.info("now package->[%s] is all add done." % self.file_name)
+        # 5. 完成
+        logger.info(
+            "now package->[%s] is all add done, phase timings->[%s]."
+            % (self.file_name, ", ".join("{}: {:.3f}s".format(phase, cost) for phase, cost in phase_timings.items()))
+        )
         return package_result
 
+    @staticmethod
+    def list_package_variants(temp_path):
+        """
+        遍历解压后的上传包，获得各个系统及CPU架构下的插件
+        :param temp_path: 解压路径
+        :return: [{"dir_path": 插件路径, "package_os": 系统, "cpu_arch": CPU架构, "is_external": 是否第三方插件,
+                   "yaml_config": project.yaml 配置内容}, ...]
+        """
+        variants = []
+        for first_path in os.listdir(temp_path):
+            re_match = const.PACKAGE_PATH_RE.match(first_path)
+            if re_match is None:
+                logger.info("path->[%s] is not match re, jump it." % first_path)
+                continue
+
+            path_dict = re_match.groupdict()
+            current_os = path_dict["os"]
+            cpu_arch = path_dict["cpu_arch"]
+            logger.info("path->[{}] is match for os->[{}] cpu->[{}]".format(first_path, current_os, cpu_arch))
+
+            # 遍历第二层的内容，得知当前的插件名
+            abs_first_path = os.path.join(temp_path, first_path)
+            for second_path in os.listdir(abs_first_path):
+                abs_path = os.path.join(abs_first_path, second_path)
+
+                if not os.path.isdir(abs_path):
+                    logger.info("found file path->[%s] jump it" % abs_path)
+                    continue
+
+                # 打包前校验插件名及版本，避免生成无效的包文件
+                yaml_config = Packages.load_project_yaml(abs_path) or {}
+                for key in ["name", "version"]:
+                    if key not in yaml_config:
+                        raise ValueError(_("配置文件{}信息缺失，请确认后重试, 缺失字段: {}".format(abs_path, key)))
+
+                variants.append(
+                    {
+                        "dir_path": abs_path,
+                        "package_os": current_os,
+                        "cpu_arch": cpu_arch,
+                        "is_external": path_dict["is_external"] is not None,
+                        "yaml_config": yaml_config,
+                    }
+                )
+        return variants
+
 
 class DownloadRecord(models.Model):
     """
@@ -1863,6 +2354,55 @@ class SubscriptionTask(models.Model):
         ordering = ["-create_time"]
 
 
+class SubscriptionInstanceInfo(models.Model):
+    """ 按内容哈希去重存储的订阅实例信息，多次执行记录的相同实例信息仅保存一份 """
+
+    hash = models.CharField(_("内容哈希"), primary_key=True, max_length=32)
+    instance_info = JSONField(_("实例信息"))
+
+    @staticmethod
+    def get_hash(instance_info):
+        return hashlib.md5(json.dumps(instance_info, sort_keys=True, default=str).encode()).hexdigest()
+
+    @classmethod
+    def attach(cls, instance_records):
+        """
+        批量为实例记录加载去重存储的实例信息
+        """
+        records = [record for record in instance_records if record.need_load_instance_info()]
+        if not records:
+            return
+
+        instance_infos = dict(
+            cls.objects.filter(hash__in={record.instance_info_hash for record in records}).values_list(
+                "hash", "instance_info"
+            )
+        )
+        attached_hashes = set()
+        for record in records:
+            if record.instance_info_hash not in instance_infos:
+                continue
+            instance_info = instance_infos[record.instance_info_hash]
+            # 相同内容的记录各自持有副本，避免修改时相互影响
+            if record.instance_info_hash in attached_hashes:
+                instance_info = copy.deepcopy(instance_info)
+            attached_hashes.add(record.instance_info_hash)
+            record._instance_info = instance_info
+
+    class Meta:
+        verbose_name = _("订阅实例信息")
+        verbose_name_plural = _("订阅实例信息")
+
+
+class SubscriptionInstanceRecordQuerySet(models.QuerySet):
+    def _fetch_all(self):
+        is_fetched = self._result_cache is not None
+        super(SubscriptionInstanceRecordQuerySet, self)._fetch_all()
+        # 查询结果中去重存储的实例信息统一批量加载，避免逐条查询
+        if not is_fetched and self._iterable_class is ModelIterable:
+            SubscriptionInstanceInfo.attach(self._result_cache)
+
+
 class SubscriptionInstanceRecord(models.Model):
     """ 订阅任务的实例执行记录 """
 
@@ -1870,13 +2410,87 @@ class SubscriptionInstanceRecord(models.Model):
     task_id = models.IntegerField(_("任务ID"), db_index=True)
     subscription_id = models.IntegerField(_("订阅ID"), db_index=True)
     instance_id = models.CharField(_("实例ID"), max_length=50, db_index=True)
-    instance_info = JSONField(_("实例信息"))
+    # 实例信息去重存储时为空，通过 instance_info 属性读写
+    raw_instance_info = JSONField(_("实例信息"), db_column="instance_info")
+    instance_info_hash = models.CharField(_("实例信息哈希"), max_length=32, default="", blank=True)
     steps = JSONField(_("步骤信息"))
     pipeline_id = models.CharField(_("Pipeline ID"), max_length=50, default="", blank=True, db_index=True)
     update_time = models.DateTimeField(_("更新时间"), auto_now=True, db_index=True)
     create_time = models.DateTimeField(_("创建时间"), auto_now_add=True, db_index=True)
     need_clean = models.BooleanField(_("是否需要清洗临时信息"), default=False)
     is_latest = models.BooleanField(_("是否为实例最新记录"), default=True, db_index=True)
+    # 实例所属主机的标识，由实例ID及实例信息解析，用于按主机查询执行记录
+    bk_host_id = models.IntegerField(_("主机ID"), null=True, blank=True, db_index=True)
+    bk_cloud_id = models.IntegerField(_("云区域ID"), null=True, blank=True)
+    ip = models.CharField(_("内网IP"), max_length=45, default="", blank=True)
+
+    objects = SubscriptionInstanceRecordQuerySet.as_manager()
+
+    class Meta:
+        index_together = [("ip", "bk_cloud_id")]
+
+    def need_load_instance_info(self):
+        return bool(self.instance_info_hash) and not self.raw_instance_info and not hasattr(self, "_instance_info")
+
+    @property
+    def instance_info(self):
+        if self.need_load_instance_info():
+            SubscriptionInstanceInfo.attach([self])
+        return getattr(self, "_instance_info", self.raw_instance_info)
+
+    @instance_info.setter
+    def instance_info(self, value):
+        self.raw_instance_info = value
+        self.instance_info_hash = ""
+        if hasattr(self, "_instance_info"):
+            del self._instance_info
+
+    def deduplicate_instance_info(self):
+        """
+        实例信息改为按内容哈希去重存储，返回待保存的 SubscriptionInstanceInfo
+        """
+        instance_info = self.instance_info
+        self.instance_info_hash = SubscriptionInstanceInfo.get_hash(instance_info)
+        self.raw_instance_info = {}
+        self._instance_info = instance_info
+        return SubscriptionInstanceInfo(hash=self.instance_info_hash, instance_info=instance_info)
+
+    def fill_host_fields(self):
+        """
+        解析实例所属主机的 bk_host_id, bk_cloud_id, ip
+        优先取实例信息中的主机信息，缺失时从主机实例ID解析
+        """
+        host_info = (self.instance_info or {}).get("host") or {}
+        bk_host_id = host_info.get("bk_host_id")
+        bk_cloud_id = host_info.get("bk_cloud_id")
+        ip = host_info.get("bk_host_innerip") or host_info.get("ip") or ""
+
+        # 主机实例ID的最后一段为 bk_host_id 或 ip-bk_cloud_id-bk_supplier_id
+        if self.instance_id.startswith("host|instance|host|"):
+            host_key = self.instance_id.split("|")[-1]
+            if "-" in host_key:
+                key_ip, key_cloud_id = host_key.split("-")[:2]
+                ip = ip or key_ip
+                bk_cloud_id = key_cloud_id if bk_cloud_id is None else bk_cloud_id
+            elif not bk_host_id and host_key.isdigit():
+                bk_host_id = host_key
+
+        if isinstance(bk_cloud_id, list):
+            bk_cloud_id = bk_cloud_id[0]["bk_inst_id"] if bk_cloud_id else const.DEFAULT_CLOUD
+
+        self.bk_host_id = int(bk_host_id) if bk_host_id else None
+        self.bk_cloud_id = None if bk_cloud_id in [None, ""] else int(bk_cloud_id)
+        # 多 IP 主机取第一个
+        self.ip = ip.split(",")[0]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.fill_host_fields()
+        # 去重存储的实例信息被修改后，改为记录在实例记录上
+        instance_info = getattr(self, "_instance_info", None)
+        if instance_info is not None and SubscriptionInstanceInfo.get_hash(instance_info) != self.instance_info_hash:
+            self.instance_info = instance_info
+        super(SubscriptionInstanceRecord, self).save(*args, **kwargs)
 
     @property
     def subscription_task(self):
@@ -1987,6 +2601,126 @@ class SubscriptionInstanceRecord(models.Model):
         }
 
 
+class SubscriptionInstanceStepStatus(models.Model):
+    """ 订阅实例及其各步骤的执行状态，随 pipeline 状态变更同步写入，用于按状态筛选实例 """
+
+    # 实例整体状态的步骤ID
+    INSTANCE_STEP_ID = ""
+
+    subscription_id = models.IntegerField(_("订阅ID"))
+    task_id = models.IntegerField(_("任务ID"))
+    instance_id = models.CharField(_("实例ID"), max_length=50)
+    step_id = models.CharField(_("步骤ID"), max_length=64, default="", blank=True)
+    node_id = models.CharField(_("Pipeline节点ID"), max_length=50, unique=True)
+    status = models.CharField(
+        _("状态"), max_length=45, choices=const.JobStatusType.get_choices(), default=const.JobStatusType.PENDING
+    )
+    update_time = models.DateTimeField(_("更新时间"), auto_now=True)
+
+    @classmethod
+    def build_for_record(cls, instance_record):
+        """
+        生成实例执行记录的整体状态及各步骤状态
+        """
+        step_statuses = [
+            cls(
+                subscription_id=instance_record.subscription_id,
+                task_id=instance_record.task_id,
+                instance_id=instance_record.instance_id,
+                step_id=cls.INSTANCE_STEP_ID,
+                node_id=instance_record.pipeline_id,
+            )
+        ]
+        step_statuses.extend(
+            cls(
+                subscription_id=instance_record.subscription_id,
+                task_id=instance_record.task_id,
+                instance_id=instance_record.instance_id,
+                step_id=step["id"],
+                node_id=step["pipeline_id"],
+            )
+            for step in instance_record.steps
+            if step["pipeline_id"]
+        )
+        return step_statuses
+
+    @classmethod
+    def get_statuses(cls, node_ids):
+        """
+        :return: {node_id: status}，不包含未记录状态的节点
+        """
+        return dict(cls.objects.filter(node_id__in=node_ids).values_list("node_id", "status"))
+
+    @classmethod
+    def update_statuses(cls, node_ids, status):
+        cls.objects.filter(node_id__in=node_ids).update(status=status, update_time=timezone.now())
+
+    class Meta:
+        verbose_name = _("订阅实例步骤状态")
+        verbose_name_plural = _("订阅实例步骤状态")
+        index_together = [("task_id", "step_id", "status"), ("subscription_id", "step_id", "status")]
+
+
+class SubscriptionFingerprint(models.Model):
+    """ 订阅自动下发的输入指纹，输入未变化的订阅无需重新计算变更动作 """
+
+    subscription_id = models.IntegerField(_("订阅ID"), unique=True)
+    scope_hash = models.CharField(_("订阅范围哈希"), max_length=32)
+    instances_hash = models.CharField(_("实例及拓扑哈希"), max_length=32)
+    steps_hash = models.CharField(_("步骤配置哈希"), max_length=32)
+    status_hash = models.CharField(_("进程状态哈希"), max_length=32)
+    prefetch_hash = models.CharField(_("预检指纹哈希"), max_length=32, default="")
+    check_time = models.DateTimeField(_("最近检查时间"), null=True)
+    update_time = models.DateTimeField(_("更新时间"), auto_now=True)
+
+    FINGERPRINT_FIELDS = ("scope_hash", "instances_hash", "steps_hash", "status_hash", "prefetch_hash")
+
+    @classmethod
+    def is_unchanged(cls, subscription_id, fingerprint, ttl):
+        """
+        指纹与上次一致且未超过有效期时，认为订阅输入未发生变化
+        :param subscription_id: 订阅ID
+        :param fingerprint: {"scope_hash": "xxx", ...}
+        :param ttl: 指纹有效期(s)，超过有效期强制重新计算，兜底指纹未覆盖的变更（如配置模板）
+        """
+        return cls.objects.filter(
+            subscription_id=subscription_id,
+            update_time__gte=timezone.now() - timezone.timedelta(seconds=ttl),
+            **{field: fingerprint[field] for field in cls.FINGERPRINT_FIELDS},
+        ).exists()
+
+    @classmethod
+    def is_prefetch_unchanged(cls, subscription_id, prefetch_hash, ttl):
+        """
+        无需查询CMDB的预检指纹与上次检查时一致且未超过有效期时，跳过本次检查
+        :param subscription_id: 订阅ID
+        :param prefetch_hash: 订阅范围、步骤配置、进程状态及订阅更新时间的哈希
+        :param ttl: 预检有效期(s)，超过有效期需重新查询CMDB，以感知主机及拓扑的变化
+        """
+        return cls.objects.filter(
+            subscription_id=subscription_id,
+            prefetch_hash=prefetch_hash,
+            check_time__gte=timezone.now() - timezone.timedelta(seconds=ttl),
+        ).exists()
+
+    @classmethod
+    def mark_checked(cls, subscription_id, prefetch_hash):
+        # 查询CMDB后指纹未变化，仅刷新检查时间，不影响指纹有效期
+        cls.objects.filter(subscription_id=subscription_id).update(
+            prefetch_hash=prefetch_hash, check_time=timezone.now()
+        )
+
+    @classmethod
+    def record(cls, subscription_id, fingerprint):
+        defaults = {field: fingerprint[field] for field in cls.FINGERPRINT_FIELDS}
+        defaults["check_time"] = timezone.now()
+        cls.objects.update_or_create(subscription_id=subscription_id, defaults=defaults)
+
+    class Meta:
+        verbose_name = _("订阅输入指纹")
+        verbose_name_plural = _("订阅输入指纹")
+
+
 class CmdbEventRecord(models.Model):
     """ 记录CMDB事件回调 """
 
@@ -4,7 +4,7 @@ from celery.task import periodic_task
 from django.utils import timezone
 
 from apps.node_man import constants as const
-from apps.node_man.models import IdentityData
+from apps.node_man.models import CloudProxyIndex, IdentityData
 from common.log import logger
 
 
@@ -22,9 +22,10 @@ def clean_identity_data(task_id, start, end):
         f"{task_id} | "
         f"Clean up the host authentication information with a retention period of one day.[{start}-{end}]"
     )
-    IdentityData.objects.filter(bk_host_id__in=list(identity_bk_host_ids)).update(
-        key=None, password=None, extra_data=None
-    )
+    identity_bk_host_ids = list(identity_bk_host_ids)
+    IdentityData.objects.filter(bk_host_id__in=identity_bk_host_ids).update(key=None, password=None, extra_data=None)
+    # 代理认证信息过期后刷新所在云区域的代理索引
+    CloudProxyIndex.refresh_by_host_ids(identity_bk_host_ids)
     clean_identity_data(task_id, end, end + const.QUERY_EXPIRED_INFO_LENS)
 
 
@@ -4,7 +4,7 @@ from celery.task import periodic_task
 from django.utils import timezone
 
 from apps.node_man import constants as const
-from apps.node_man.models import SubscriptionInstanceRecord
+from apps.node_man.models import SubscriptionInstanceInfo, SubscriptionInstanceRecord
 from common.log import logger
 
 
@@ -18,7 +18,10 @@ def update_subscription_instance_record(task_id, count=1):
     if not record_query_set:
         return
 
+    instance_info_hashes = set()
     for record in record_query_set:
+        if record.instance_info_hash:
+            instance_info_hashes.add(record.instance_info_hash)
         if isinstance(record.instance_info, dict):
             try:
                 if record.instance_info["host"].get("password"):
@@ -30,6 +33,15 @@ def update_subscription_instance_record(task_id, count=1):
             record.need_clean = False
             record.save()
 
+    # 清洗后的实例信息已记录在实例记录上，删除不再被引用的去重实例信息
+    if instance_info_hashes:
+        referenced_hashes = set(
+            SubscriptionInstanceRecord.objects.filter(instance_info_hash__in=instance_info_hashes).values_list(
+                "instance_info_hash", flat=True
+            )
+        )
+        SubscriptionInstanceInfo.objects.filter(hash__in=instance_info_hashes - referenced_hashes).delete()
+
     update_subscription_instance_record(task_id, count + 1)
 
 
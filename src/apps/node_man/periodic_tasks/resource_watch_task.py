@@ -11,7 +11,16 @@ from apps.node_man.periodic_tasks.sync_cmdb_host import (
     _generate_host,
 )
 from apps.node_man import constants as const
-from apps.node_man.models import IdentityData, Host, ProcessStatus, ResourceWatchEvent, AccessPoint, GlobalSettings
+from apps.node_man.models import (
+    IdentityData,
+    Host,
+    ProcessStatus,
+    ResourceWatchEvent,
+    AccessPoint,
+    GlobalSettings,
+    CloudProxyIndex,
+    HostSearchIndex,
+)
 
 
 RESOURCE_WATCH_HOST_CURSOR_KEY = "resource_watch_host_cursor"
@@ -133,9 +142,12 @@ def sync_resource_watch_host_relation_event():
 
 
 def delete_host(bk_host_id):
+    proxy_cloud_ids = CloudProxyIndex.host_cloud_ids([bk_host_id])
     Host.objects.filter(bk_host_id=bk_host_id).delete()
     IdentityData.objects.filter(bk_host_id=bk_host_id).delete()
     ProcessStatus.objects.filter(bk_host_id=bk_host_id).delete()
+    HostSearchIndex.refresh([bk_host_id])
+    CloudProxyIndex.refresh(proxy_cloud_ids)
 
 
 def list_biz_host(bk_biz_id, bk_host_id):
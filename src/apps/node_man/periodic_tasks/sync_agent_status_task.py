@@ -5,7 +5,9 @@ from celery.task import periodic_task
 from apps.component.esbclient import client_v2
 from apps.node_man import constants as const
 from apps.node_man.models import (
+    CloudProxyIndex,
     Host,
+    HostSearchIndex,
     ProcessStatus,
 )
 from common.log import logger
@@ -37,17 +39,23 @@ def update_or_create_host_agent_status(task_id, start, end):
     # 查询需要更新主机的ProcessStatus对象
     process_status_objs = ProcessStatus.objects.filter(
         name="gseagent", bk_host_id__in=bk_host_id_map.values(), source_type=ProcessStatus.SourceType.DEFAULT
-    ).values("bk_host_id", "id", "status")
+    ).values("bk_host_id", "id", "status", "version")
 
     # 生成bk_host_id与ProcessStatus对象的映射
     process_status_id_map = {}
     for item in process_status_objs:
-        process_status_id_map[item["bk_host_id"]] = {"id": item["id"], "status": item["status"]}
+        process_status_id_map[item["bk_host_id"]] = {
+            "id": item["id"],
+            "status": item["status"],
+            "version": item["version"],
+        }
 
     # 对查询回来的数据进行分类
     process_objs = []
     need_update_node_from_host = []
     to_be_created_status = []
+    # 版本或来源变化的主机需刷新搜索索引
+    need_refresh_index_host_ids = []
     for key, host_info in agent_status_data.items():
         process_status_id = process_status_id_map.get(bk_host_id_map[key], {}).get("id")
         is_running = host_info["bk_agent_alive"] == 1
@@ -55,6 +63,7 @@ def update_or_create_host_agent_status(task_id, start, end):
 
         if not process_status_id:
             # 如果不存在ProcessStatus对象需要创建
+            need_refresh_index_host_ids.append(bk_host_id_map[key])
             to_be_created_status.append(
                 ProcessStatus(
                     bk_host_id=bk_host_id_map[key],
@@ -78,11 +87,10 @@ def update_or_create_host_agent_status(task_id, start, end):
                     # TERMINATED
                     status = const.PROC_STATUS_DICT[2]
 
-            process_objs.append(
-                ProcessStatus(
-                    id=process_status_id, status=status, version=version.group() if (version and is_running) else ""
-                )
-            )
+            agent_version = version.group() if (version and is_running) else ""
+            if agent_version != process_status_id_map[bk_host_id_map[key]]["version"]:
+                need_refresh_index_host_ids.append(bk_host_id_map[key])
+            process_objs.append(ProcessStatus(id=process_status_id, status=status, version=agent_version))
 
     # 批量更新状态&版本
     ProcessStatus.objects.bulk_update(process_objs, fields=["status", "version"])
@@ -90,6 +98,8 @@ def update_or_create_host_agent_status(task_id, start, end):
         Host.objects.bulk_update(need_update_node_from_host, fields=["node_from"])
     if to_be_created_status:
         ProcessStatus.objects.bulk_create(to_be_created_status)
+    # 批量写入不会触发 post_save，需手动刷新搜索索引
+    HostSearchIndex.refresh(need_refresh_index_host_ids + [host.bk_host_id for host in need_update_node_from_host])
 
     # 递归
     update_or_create_host_agent_status(task_id, end, end + const.QUERY_AGENT_STATUS_HOST_LENS)
@@ -107,4 +117,6 @@ def sync_agent_status_task():
     task_id = sync_agent_status_task.request.id
     logger.info(f"{task_id} | sync_agent_status_task: Start syncing host status.")
     update_or_create_host_agent_status(task_id, 0, const.QUERY_AGENT_STATUS_HOST_LENS)
+    # 批量更新不会触发信号，同步完成后重建云区域代理索引
+    CloudProxyIndex.rebuild()
     logger.info(f"{task_id} | sync_agent_status_task: Sync agent status complete.")
@@ -14,6 +14,8 @@ from apps.node_man.models import (
     AccessPoint,
     ProcessStatus,
     GlobalSettings,
+    CloudProxyIndex,
+    HostSearchIndex,
 )
 from common.log import logger
 
@@ -129,6 +131,12 @@ def update_or_create_host_base(biz_id, task_id, cmdb_host_data):
     exist_agent_host_ids = (
         Host.objects.filter(bk_host_id__in=bk_host_ids).exclude(node_type="PROXY").values_list("bk_host_id", flat=True)
     )
+    exist_host_search_fields = {
+        host["bk_host_id"]: host
+        for host in Host.objects.filter(bk_host_id__in=bk_host_ids).values(
+            "bk_host_id", *const.HOST_SEARCH_INDEX_FIELDS
+        )
+    }
 
     need_update_hosts = []
     need_update_hosts_without_biz = []
@@ -240,6 +248,29 @@ def update_or_create_host_base(biz_id, task_id, cmdb_host_data):
         IdentityData.objects.bulk_create(host_identity_objs)
         ProcessStatus.objects.bulk_create(process_status_objs)
 
+    # 批量写入不会触发 post_save，仅对新建及任一检索字段变化的主机刷新搜索索引
+    written_host_ids = [
+        host.bk_host_id
+        for host in (
+            need_update_hosts
+            + need_update_hosts_without_biz
+            + need_update_hosts_without_os
+            + need_update_hosts_without_biz_os
+            + need_create_hosts
+        )
+    ]
+    HostSearchIndex.refresh(
+        [
+            host["bk_host_id"]
+            for host in Host.objects.filter(bk_host_id__in=written_host_ids).values(
+                "bk_host_id", *const.HOST_SEARCH_INDEX_FIELDS
+            )
+            if exist_host_search_fields.get(host["bk_host_id"]) != host
+        ]
+    )
+    # 批量写入不会触发 post_save，刷新所涉及云区域的代理索引，主机迁出的云区域在Agent状态同步后重建
+    CloudProxyIndex.refresh(CloudProxyIndex.host_cloud_ids(written_host_ids))
+
     return bk_host_ids, list(need_delete_host_ids)
 
 
@@ -296,9 +327,12 @@ def sync_cmdb_host():
     # 节点管理需要删除的host_id
     need_delete_host_ids = set(node_man_host_ids) - set(cc_bk_host_ids)
     if need_delete_host_ids:
+        proxy_cloud_ids = CloudProxyIndex.host_cloud_ids(need_delete_host_ids)
         Host.objects.filter(bk_host_id__in=need_delete_host_ids).delete()
         IdentityData.objects.filter(bk_host_id__in=need_delete_host_ids).delete()
         ProcessStatus.objects.filter(bk_host_id__in=need_delete_host_ids).delete()
+        HostSearchIndex.refresh(need_delete_host_ids)
+        CloudProxyIndex.refresh(proxy_cloud_ids)
         logger.info(f"{task_id} | Delete host ids {need_delete_host_ids}")
 
     logger.info(f"{task_id} | Sync cmdb host complete.")
@@ -19,6 +19,21 @@ class HostSerializer(serializers.Serializer):
     running_count = serializers.BooleanField(label=_("正在运行机器数"), required=False, default=False)
 
 
+class HostQuickSearchSerializer(serializers.Serializer):
+    query = serializers.CharField(label=_("搜索内容"), max_length=45)
+    match_type = serializers.ChoiceField(
+        label=_("匹配方式"), choices=const.HOST_SEARCH_MATCH_CHOICES, default=const.HostSearchMatchType.INFIX
+    )
+    bk_biz_id = serializers.ListField(label=_("业务ID"), child=serializers.IntegerField(), required=False)
+    node_type = serializers.ListField(
+        label=_("节点类型"), child=serializers.ChoiceField(choices=const.NODE_CHOICES), required=False
+    )
+    cursor = serializers.IntegerField(label=_("分页游标"), required=False)
+    pagesize = serializers.IntegerField(
+        label=_("分页大小"), required=False, default=10, min_value=1, max_value=const.HOST_SEARCH_MAX_PAGESIZE
+    )
+
+
 class ProxySerializer(serializers.Serializer):
     bk_cloud_id = serializers.IntegerField(label=_("云区域ID"), required=True)
 
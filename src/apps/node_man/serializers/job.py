@@ -20,6 +20,15 @@ class ListSerializer(serializers.Serializer):
     page = serializers.IntegerField(label=_("当前页数"), required=False, default=1)
     pagesize = serializers.IntegerField(label=_("分页大小"), required=False, default=10)
     sort = SortSerializer(label=_("排序"), required=False)
+    cursor = serializers.DictField(label=_("分页游标"), required=False)
+
+    def validate(self, attrs):
+        cursor = attrs.get("cursor")
+        if cursor:
+            cursor_fields = ["id"] + ([attrs["sort"]["head"]] if attrs.get("sort") else [])
+            if set(cursor_fields) - set(cursor):
+                raise ValidationError(_("分页游标需包含字段: {fields}").format(fields=cursor_fields))
+        return attrs
 
 
 class HostSerializer(serializers.Serializer):
@@ -144,5 +153,14 @@ class RetrieveSerializer(serializers.Serializer):
     pagesize = serializers.IntegerField(label=_("分页大小"), required=False, default=10)
 
 
+class NodeLogSerializer(serializers.Serializer):
+    instance_id = serializers.CharField(label=_("实例ID"))
+    node_id = serializers.CharField(label=_("步骤节点ID"))
+    cursor = serializers.IntegerField(label=_("日志游标"), required=False, default=0, min_value=0)
+    limit = serializers.IntegerField(
+        label=_("日志条数"), required=False, default=const.NODE_LOG_PAGESIZE, min_value=1, max_value=const.NODE_LOG_PAGESIZE
+    )
+
+
 class FetchCommandSerializer(serializers.Serializer):
     bk_host_id = serializers.IntegerField(label=_("主机ID"), required=True)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from django.db.models.signals import post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.node_man import constants as const
+from apps.node_man.models import CloudProxyIndex, Host, HostSearchIndex, IdentityData, ProcessStatus
+
+# 影响索引的字段，保存时仅在这些字段变化后刷新索引
+HOST_PROXY_INDEX_FIELDS = ("bk_cloud_id", "node_type", "is_manual")
+HOST_INDEX_FIELDS = ("bk_host_id",) + const.HOST_SEARCH_INDEX_FIELDS + HOST_PROXY_INDEX_FIELDS
+PROCESS_STATUS_PROXY_INDEX_FIELDS = ("bk_host_id", "name", "status")
+PROCESS_STATUS_INDEX_FIELDS = PROCESS_STATUS_PROXY_INDEX_FIELDS + ("version",)
+IDENTITY_DATA_INDEX_FIELDS = ("bk_host_id", "password", "key")
+INDEX_FIELDS = {
+    Host: HOST_INDEX_FIELDS,
+    ProcessStatus: PROCESS_STATUS_INDEX_FIELDS,
+    IdentityData: IDENTITY_DATA_INDEX_FIELDS,
+}
+
+
+def snapshot_index_fields(instance, fields):
+    # 延迟加载的字段不在 __dict__ 中，不读取以免触发查询，保存时视为已变化
+    instance._index_field_values = {field: instance.__dict__[field] for field in fields if field in instance.__dict__}
+
+
+def get_changed_index_fields(instance, fields, created):
+    """
+    获取自加载或上次保存以来发生变化的索引字段，并记录本次保存后的值
+    :return: 变化的字段集合, 变化前的字段值
+    """
+    old_values = getattr(instance, "_index_field_values", {})
+    if created:
+        changed_fields = set(fields)
+    else:
+        changed_fields = {
+            field for field in fields if field not in old_values or old_values[field] != getattr(instance, field)
+        }
+    snapshot_index_fields(instance, fields)
+    return changed_fields, old_values
+
+
+@receiver(post_init, sender=Host)
+@receiver(post_init, sender=ProcessStatus)
+@receiver(post_init, sender=IdentityData)
+def index_model_post_init_handler(sender, instance, **kwargs):
+    snapshot_index_fields(instance, INDEX_FIELDS[sender])
+
+
+@receiver(pre_save, sender=Host)
+@receiver(pre_save, sender=ProcessStatus)
+@receiver(pre_save, sender=IdentityData)
+def index_model_pre_save_handler(sender, instance, **kwargs):
+    # 未从数据库加载的实例（如直接构造后保存）无法得知保存前的值，视为全部字段变化
+    if instance._state.adding:
+        instance._index_field_values = {}
+
+
+@receiver(post_save, sender=Host)
+def host_post_save_handler(sender, instance, created, **kwargs):
+    # 批量写入(bulk_create/bulk_update)不会触发该信号，需调用方自行刷新索引
+    changed_fields, old_values = get_changed_index_fields(instance, HOST_INDEX_FIELDS, created)
+    if not changed_fields:
+        return
+
+    if changed_fields & {"bk_host_id", *const.HOST_SEARCH_INDEX_FIELDS}:
+        HostSearchIndex.refresh([instance.bk_host_id])
+
+    # 代理及P-Agent的云区域、类型变化时刷新变化前后的云区域，其余变更在Agent状态同步后重建
+    if changed_fields & set(HOST_PROXY_INDEX_FIELDS):
+        node_types = {instance.node_type, old_values.get("node_type")}
+        if node_types & {const.NodeType.PROXY, const.NodeType.PAGENT}:
+            bk_cloud_ids = {instance.bk_cloud_id, old_values.get("bk_cloud_id", instance.bk_cloud_id)}
+            CloudProxyIndex.refresh(bk_cloud_ids)
+
+
+@receiver(post_save, sender=ProcessStatus)
+def process_status_post_save_handler(sender, instance, created, **kwargs):
+    # 仅Agent进程的版本影响主机搜索索引，仅代理的Agent进程状态影响云区域代理索引
+    if instance.name != ProcessStatus.GSE_AGENT_PROCESS_NAME:
+        return
+    changed_fields, __ = get_changed_index_fields(instance, PROCESS_STATUS_INDEX_FIELDS, created)
+    if changed_fields & {"bk_host_id", "version"}:
+        HostSearchIndex.refresh([instance.bk_host_id])
+    if changed_fields & set(PROCESS_STATUS_PROXY_INDEX_FIELDS):
+        CloudProxyIndex.refresh_by_host_ids([instance.bk_host_id])
+
+
+@receiver(post_save, sender=IdentityData)
+def identity_data_post_save_handler(sender, instance, created, **kwargs):
+    changed_fields, __ = get_changed_index_fields(instance, IDENTITY_DATA_INDEX_FIELDS, created)
+    if changed_fields:
+        CloudProxyIndex.refresh_by_host_ids([instance.bk_host_id])
@@ -0,0 +1,104 @@
+import mock
+from django.test import TestCase
+
+from apps.node_man import constants as const
+from apps.node_man.exceptions import AliveProxyNotExistsError
+from apps.node_man.models import CloudProxyIndex, Host, IdentityData, ProcessStatus
+from apps.node_man.tests.utils import create_host
+
+
+class TestCloudProxyIndex(TestCase):
+    def setUp(self):
+        # 云区域1：正常代理、异常代理各一台，P-Agent两台
+        create_host(1, bk_host_id=1, bk_cloud_id=1, node_type=const.NodeType.PROXY)
+        create_host(1, bk_host_id=2, bk_cloud_id=1, node_type=const.NodeType.PROXY, proc_type="UNKNOWN")
+        create_host(1, bk_host_id=3, bk_cloud_id=1, node_type=const.NodeType.PAGENT)
+        create_host(1, bk_host_id=4, bk_cloud_id=1, node_type=const.NodeType.PAGENT)
+        # 云区域2：认证信息过期的代理
+        create_host(1, bk_host_id=5, bk_cloud_id=2, node_type=const.NodeType.PROXY)
+        IdentityData.objects.filter(bk_host_id=5).update(password=None, key=None)
+
+    def test_refresh(self):
+        indexes = CloudProxyIndex.refresh([1, 2, 3])
+
+        self.assertEqual(indexes[1].proxy_count, 2)
+        self.assertEqual(indexes[1].pagent_count, 2)
+        self.assertEqual(indexes[1].alive_proxy_ids, [1])
+        self.assertTrue(indexes[1].is_available)
+        self.assertEqual(indexes[1].exception, "abnormal")
+
+        self.assertEqual(indexes[2].alive_proxy_ids, [5])
+        self.assertFalse(indexes[2].is_available)
+        self.assertEqual(indexes[2].exception, "overdue")
+
+        # 无代理的云区域同样建立索引
+        self.assertEqual(indexes[3].proxy_count, 0)
+        self.assertEqual(CloudProxyIndex.objects.count(), 3)
+
+    def test_fetch(self):
+        CloudProxyIndex.fetch([1, 2])
+
+        # 已命中的云区域按主键查询
+        with self.assertNumQueries(1):
+            self.assertEqual(CloudProxyIndex.get(1).proxy_count, 2)
+
+        # 未命中的云区域即时计算
+        self.assertEqual(CloudProxyIndex.fetch([1, 3])[3].proxy_count, 0)
+        self.assertTrue(CloudProxyIndex.objects.filter(bk_cloud_id=3).exists())
+
+    def test_signals(self):
+        CloudProxyIndex.fetch([1])
+
+        process_status = ProcessStatus.objects.get(bk_host_id=2, name=ProcessStatus.GSE_AGENT_PROCESS_NAME)
+        process_status.status = const.ProcStateType.RUNNING
+        process_status.save()
+        self.assertEqual(sorted(CloudProxyIndex.get(1).alive_proxy_ids), [1, 2])
+        self.assertEqual(CloudProxyIndex.get(1).exception, "")
+
+        Host.objects.create(
+            bk_host_id=6, bk_biz_id=1, bk_cloud_id=1, inner_ip="1.1.1.1", node_type=const.NodeType.PAGENT
+        )
+        self.assertEqual(CloudProxyIndex.get(1).pagent_count, 3)
+
+    def test_signals__skip_unchanged(self):
+        CloudProxyIndex.fetch([1, 2])
+
+        with mock.patch("apps.node_man.signals.CloudProxyIndex.refresh") as refresh, mock.patch(
+            "apps.node_man.signals.HostSearchIndex.refresh"
+        ) as search_refresh:
+            # 索引字段未变化时不刷新
+            host = Host.objects.get(bk_host_id=1)
+            host.extra_data = {"peer_exchange_switch_for_agent": 0}
+            host.save()
+            ProcessStatus.objects.get(bk_host_id=1, name=ProcessStatus.GSE_AGENT_PROCESS_NAME).save()
+            IdentityData.objects.get(bk_host_id=1).save()
+            refresh.assert_not_called()
+            search_refresh.assert_not_called()
+
+            # 代理迁移云区域时刷新迁移前后的云区域
+            host.bk_cloud_id = 2
+            host.save()
+            refresh.assert_called_once_with({1, 2})
+            search_refresh.assert_not_called()
+
+            # 主机来源变化时仅刷新搜索索引
+            host.node_from = const.NodeFrom.CMDB
+            host.save()
+            refresh.assert_called_once_with({1, 2})
+            search_refresh.assert_called_once_with([1])
+
+    def test_rebuild(self):
+        CloudProxyIndex.fetch([1, 2, 3])
+        Host.objects.filter(bk_cloud_id=2).delete()
+
+        CloudProxyIndex.rebuild()
+
+        self.assertEqual(sorted(CloudProxyIndex.objects.values_list("bk_cloud_id", flat=True)), [1])
+
+    def test_get_random_alive_proxy(self):
+        pagent = Host.objects.get(bk_host_id=3)
+        self.assertEqual(pagent.get_random_alive_proxy().bk_host_id, 1)
+
+        # 索引滞后时排除已删除的代理
+        Host.objects.filter(bk_host_id=1).delete()
+        self.assertRaises(AliveProxyNotExistsError, pagent.get_random_alive_proxy)
@@ -0,0 +1,47 @@
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.node_man.handlers.debug import DebugHandler
+from apps.node_man.models import SubscriptionInstanceRecord
+from apps.node_man.tests.utils import create_host
+
+
+class TestDebug(TestCase):
+    def create_record(self, subscription_id, instance_id, instance_info):
+        return SubscriptionInstanceRecord.objects.create(
+            task_id=1, subscription_id=subscription_id, instance_id=instance_id, instance_info=instance_info, steps=[]
+        )
+
+    def test_fill_host_fields(self):
+        record = self.create_record(
+            1, "host|instance|host|1", {"host": {"bk_host_id": 1, "bk_host_innerip": "127.0.0.1", "bk_cloud_id": 0}}
+        )
+        self.assertEqual((record.bk_host_id, record.bk_cloud_id, record.ip), (1, 0, "127.0.0.1"))
+
+        # 实例信息缺失时从实例ID解析
+        record = self.create_record(2, "host|instance|host|127.0.0.2-1-0", {})
+        self.assertEqual((record.bk_host_id, record.bk_cloud_id, record.ip), (None, 1, "127.0.0.2"))
+
+        record = self.create_record(
+            3, "service|instance|service|1", {"host": {"bk_host_id": 2, "bk_cloud_id": [{"bk_inst_id": 1}]}}
+        )
+        self.assertEqual((record.bk_host_id, record.bk_cloud_id, record.ip), (2, 1, ""))
+
+    def test_fetch_subscriptions_by_host(self):
+        create_host(number=1, bk_host_id=1, ip="127.0.0.1", bk_cloud_id=0)
+        self.create_record(1, "host|instance|host|1", {"host": {"bk_host_id": 1}})
+        self.create_record(2, "host|instance|host|127.0.0.1-0-0", {})
+        self.create_record(3, "host|instance|host|127.0.0.1-1-0", {})
+        self.create_record(4, "host|instance|host|2", {"host": {"bk_host_id": 2}})
+
+        with self.assertNumQueries(2):
+            subscriptions = DebugHandler().fetch_subscriptions_by_host(1)
+        self.assertEqual(sorted(subscription["subscription_id"] for subscription in subscriptions), [1, 2])
+
+    def test_backfill_instance_record_host(self):
+        record = self.create_record(1, "host|instance|host|1", {"host": {"bk_host_id": 1}})
+        # 模拟存量记录
+        SubscriptionInstanceRecord.objects.filter(id=record.id).update(bk_host_id=None)
+
+        call_command("backfill_instance_record_host", batch_size=1)
+        self.assertEqual(SubscriptionInstanceRecord.objects.get(id=record.id).bk_host_id, 1)
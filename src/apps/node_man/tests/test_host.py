@@ -15,7 +15,7 @@ from apps.node_man.exceptions import (
     HostNotExists,
 )
 from apps.node_man.handlers.host import HostHandler
-from apps.node_man.models import Host
+from apps.node_man.models import Host, HostSearchIndex, ProcessStatus
 from apps.node_man.tests.utils import (
     MockClient,
     IP_REG,
@@ -135,6 +135,86 @@ class TestHost(TestCase):
             self.assertRegex(host, IP_REG)
         self.assertLessEqual(len(hosts["list"]), page_size)
 
+    # 测试索引快速搜索
+    @patch("apps.node_man.handlers.cmdb.CmdbHandler.cmdb_or_cache_biz", cmdb_or_cache_biz)
+    @patch("apps.node_man.handlers.cmdb.client_v2", MockClient)
+    def test_host_quick_search(self):
+        number = 500
+        page_size = 7
+        host_to_create, _, _ = create_host(number)
+        HostSearchIndex.refresh([host.bk_host_id for host in host_to_create])
+        sample_ip = host_to_create[random.randint(0, number - 1)].inner_ip
+
+        for match_type, query in [
+            (const.HostSearchMatchType.PREFIX, sample_ip.split(".")[0] + "."),
+            (const.HostSearchMatchType.INFIX, sample_ip[1:6]),
+            (const.HostSearchMatchType.SEGMENT, ".".join(sample_ip.split(".")[1:3])),
+        ]:
+            expected_host_ids = {
+                host["bk_host_id"]
+                for host in Host.objects.values()
+                if HostSearchIndex.is_match(host, query, match_type)
+            }
+
+            # 游标翻页取完所有结果
+            searched_host_ids = []
+            cursor = None
+            while True:
+                result = HostHandler().quick_search(
+                    {"query": query, "match_type": match_type, "pagesize": page_size, "cursor": cursor}
+                )
+                self.assertLessEqual(len(result["list"]), page_size)
+                searched_host_ids.extend(host["bk_host_id"] for host in result["list"])
+                cursor = result["cursor"]
+                if cursor is None:
+                    break
+
+            self.assertTrue(expected_host_ids)
+            self.assertEqual(searched_host_ids, sorted(expected_host_ids, reverse=True))
+            self.assertGreaterEqual(result["total"], len(expected_host_ids))
+
+        # 主机IP变更后索引随之刷新
+        host = Host.objects.get(bk_host_id=host_to_create[0].bk_host_id)
+        host.inner_ip = "255.254.253.252"
+        host.save()
+        result = HostHandler().quick_search(
+            {"query": "255.254.253.252", "match_type": const.HostSearchMatchType.INFIX, "pagesize": page_size}
+        )
+        self.assertEqual([host["bk_host_id"] for host in result["list"]], [host.bk_host_id])
+
+    # 测试关键字搜索以索引为候选集
+    @patch("apps.node_man.handlers.cmdb.CmdbHandler.cmdb_or_cache_biz", cmdb_or_cache_biz)
+    @patch("apps.node_man.handlers.cmdb.client_v2", MockClient)
+    def test_host_list_keyword_search(self):
+        number = 500
+        host_to_create, _, _ = create_host(number, node_type=const.NodeType.AGENT)
+        HostSearchIndex.refresh([host.bk_host_id for host in host_to_create])
+        sample_ip = host_to_create[random.randint(0, number - 1)].inner_ip
+
+        for custom in [sample_ip, "linu"]:
+            expected_ips = [
+                host.inner_ip
+                for host in Host.objects.all()
+                if custom in host.inner_ip or custom in host.os_type.lower()
+            ]
+            hosts = HostHandler().list(
+                {"pagesize": number, "page": 1, "only_ip": True, "conditions": [{"key": "query", "value": custom}]},
+                "admin",
+            )
+            self.assertTrue(expected_ips)
+            self.assertEqual(hosts["total"], len(expected_ips))
+            self.assertEqual(sorted(hosts["list"]), sorted(expected_ips))
+
+        # Agent版本变更后索引随之刷新
+        process_status = ProcessStatus.objects.get(bk_host_id=host_to_create[0].bk_host_id)
+        process_status.version = "9.8.7-keyword"
+        process_status.save()
+        hosts = HostHandler().list(
+            {"pagesize": number, "page": 1, "only_ip": True, "conditions": [{"key": "query", "value": "7-keyword"}]},
+            "admin",
+        )
+        self.assertEqual(hosts["list"], [host_to_create[0].inner_ip])
+
     # 测试running count
     @patch("apps.node_man.handlers.cmdb.CmdbHandler.cmdb_or_cache_biz", cmdb_or_cache_biz)
     @patch("apps.node_man.handlers.cmdb.client_v2", MockClient)
@@ -410,3 +490,29 @@ class TestHost(TestCase):
         result = HostHandler().ip_list([host.inner_ip for host in host_to_create])
 
         self.assertEqual(len(result), number)
+
+    @patch("apps.node_man.handlers.cmdb.client_v2", MockClient)
+    def test_bulk_ip_list(self):
+        number = 10
+
+        create_cloud_area(number)
+        host_to_create, _, _ = create_host(number)
+        inner_ips = [host.inner_ip for host in host_to_create[:5]]
+        outer_ips = [host.outer_ip for host in host_to_create[3:8]]
+        login_ips = [host.login_ip for host in host_to_create[6:]] + [host.inner_ip for host in host_to_create[:2]]
+
+        # 多组IP仅需一次查询，结果与逐组查询一致
+        with self.assertNumQueries(1):
+            result = HostHandler().bulk_ip_list([inner_ips, outer_ips, login_ips])
+        inner_ip_info, outer_ip_info, login_ip_info = result
+        for host in host_to_create[:5]:
+            self.assertEqual(inner_ip_info[f"{host.bk_cloud_id}-{host.inner_ip}"]["outer_ip"], host.outer_ip)
+        for host in host_to_create[3:8]:
+            self.assertEqual(outer_ip_info[f"{host.bk_cloud_id}-{host.outer_ip}"]["inner_ip"], host.inner_ip)
+        # 登录IP组中的内网IP同样按内网IP匹配
+        for host in host_to_create[:2]:
+            self.assertIn(f"{host.bk_cloud_id}-{host.inner_ip}", login_ip_info)
+        self.assertEqual(HostHandler().ip_list(inner_ips), inner_ip_info)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(HostHandler().bulk_ip_list([[], []]), [{}, {}])
@@ -25,6 +25,7 @@ from apps.node_man.tests.utils import (
     gen_job_data,
     gen_update_accept_list,
 )
+from pipeline.log.models import LogEntry
 
 
 class TestJob(TestCase):
@@ -67,6 +68,19 @@ class TestJob(TestCase):
             {"page": 1, "pagesize": 10, "bk_biz_id": [biz["bk_biz_id"] for biz in SEARCH_BUSINESS]}, "admin"
         )
 
+    @patch("apps.node_man.handlers.cmdb.client_v2", MockClient)
+    @patch("apps.node_man.constants.JOB_LIST_MAX_COUNT", 10)
+    def test_job_list_total_capped(self):
+        create_job(15)
+
+        result = JobHandler().list({"page": 1, "pagesize": 5}, "admin")
+        self.assertEqual(result["total"], 10)
+        self.assertTrue(result["total_capped"])
+
+        result = JobHandler().list({"page": 1, "pagesize": 5, "job_id": [result["list"][0]["id"]]}, "admin")
+        self.assertEqual(result["total"], 1)
+        self.assertFalse(result["total_capped"])
+
     def test_job_list_no_biz_scope(self):
         number = 10
 
@@ -77,6 +91,38 @@ class TestJob(TestCase):
         result = JobHandler().list({"page": 1, "pagesize": 10}, "admin")
         self.assertEqual(result["total"], 0)
 
+    def test_job_list_cursor(self):
+        number = 35
+        page_size = 10
+        for job_id in create_job(number):
+            # 通过 save 同步统计排序字段
+            job = Job.objects.get(id=job_id)
+            job.statistics["success_count"] = job_id % 7
+            job.save(update_fields=["statistics"])
+
+        sort = {"sort_type": const.SortType.DEC, "head": "success_count"}
+        expected_job_ids = list(Job.objects.order_by("-success_count", "-id").values_list("id", flat=True))
+
+        # 游标翻页与页码翻页结果一致
+        cursor_job_ids = []
+        cursor = None
+        while True:
+            result = JobHandler().list({"page": 1, "pagesize": page_size, "sort": sort, "cursor": cursor}, "admin")
+            # 游标翻页不统计总数
+            self.assertEqual(result["total"], None if cursor else number)
+            cursor_job_ids.extend(job["id"] for job in result["list"])
+            cursor = result["cursor"]
+            if not cursor:
+                break
+
+        page_job_ids = []
+        for page in range(1, number // page_size + 2):
+            result = JobHandler().list({"page": page, "pagesize": page_size, "sort": sort}, "admin")
+            page_job_ids.extend(job["id"] for job in result["list"])
+
+        self.assertEqual(cursor_job_ids, expected_job_ids)
+        self.assertEqual(page_job_ids, expected_job_ids)
+
     @patch("apps.node_man.handlers.cmdb.client_v2", MockClient)
     def test_host_install(self):
         # 测试AGENT/P-AGENT/PROXY的job安装任务
@@ -410,6 +456,48 @@ class TestJob(TestCase):
         job_id = result["job_id"]
         self.assertIsInstance(JobHandler(job_id=job_id).get_log(instance_id=1, username="admin"), list)
 
+    @patch("apps.node_man.handlers.cmdb.client_v2", MockClient)
+    @patch("apps.node_man.handlers.job.JobHandler.create_subscription", Subscription.create_subscription)
+    @patch("common.api.NodeApi.get_subscription_task_node_log", NodeApi.get_subscription_task_node_log)
+    def test_get_node_log(self):
+        # 测试分页获取步骤日志
+        number = 1
+        host_to_create, process_to_create, identity_to_create = create_host(number)
+        create_cloud_area(number)
+        data = gen_job_data(
+            "INSTALL_AGENT", number, host_to_create, identity_to_create, bk_cloud_id=const.DEFAULT_CLOUD
+        )
+        result = JobHandler().job(data, "admin", True, "ticket")
+        job_id = result["job_id"]
+        node_id = "c2bdb95bc72239eeade47419840923d7"
+        LogEntry.objects.bulk_create(
+            [
+                LogEntry(logger_name="pipeline.logging", level_name="INFO", message=f"line {index}", node_id=node_id)
+                for index in range(5)
+            ]
+        )
+        log_ids = list(LogEntry.objects.filter(node_id=node_id).order_by("id").values_list("id", flat=True))
+
+        # 第一页：至多返回 limit 条，游标停在最后一条返回的日志
+        params = {"instance_id": "1", "node_id": node_id, "cursor": 0, "limit": 3}
+        node_log = JobHandler(job_id=job_id).get_node_log(params, "admin")
+        self.assertEqual(node_log["node_id"], node_id)
+        self.assertEqual([line.split("] ")[-1] for line in node_log["log"].split("\n")], ["line 0", "line 1", "line 2"])
+        self.assertEqual(node_log["cursor"], log_ids[2])
+        self.assertTrue(node_log["has_more"])
+
+        # 第二页：返回剩余日志
+        params["cursor"] = node_log["cursor"]
+        node_log = JobHandler(job_id=job_id).get_node_log(params, "admin")
+        self.assertEqual([line.split("] ")[-1] for line in node_log["log"].split("\n")], ["line 3", "line 4"])
+        self.assertEqual(node_log["cursor"], log_ids[4])
+        self.assertFalse(node_log["has_more"])
+
+        # 已读完：返回空日志，游标不变
+        params["cursor"] = node_log["cursor"]
+        node_log = JobHandler(job_id=job_id).get_node_log(params, "admin")
+        self.assertEqual((node_log["log"], node_log["cursor"], node_log["has_more"]), ("", log_ids[4], False))
+
     @patch("apps.node_man.handlers.cmdb.client_v2", MockClient)
     @patch("apps.node_man.handlers.job.JobHandler.create_subscription", Subscription.create_subscription)
     @patch("common.api.NodeApi.collect_subscription_task_detail", NodeApi.collect_subscription_task_detail)
@@ -0,0 +1,114 @@
+import time
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+
+from blueapps.account import get_user_model
+from blueapps.account.components.bk_token.backends import TokenBackend
+from blueapps.account.components.bk_token.middlewares import LoginRequiredMiddleware
+
+BK_TOKEN = "KH7P4-VSFi_nOEoV3kj0ytcs0uZnGOegIBLV-eM3rw8"
+USER_INFO = {
+    "qq": "",
+    "language": "zh-cn",
+    "time_zone": "Etc/GMT-8",
+    "role": 2,
+    "phone": "11111111111",
+    "email": "admin@example.com",
+    "wx_userid": "",
+    "chname": "admin",
+}
+# 桩登录服务的响应耗时(s)
+LOGIN_SERVICE_LATENCY = 0.05
+
+
+def mock_verify_bk_token(bk_token):
+    time.sleep(LOGIN_SERVICE_LATENCY)
+    return (True, "admin") if bk_token == BK_TOKEN else (False, None)
+
+
+def mock_get_user_info(bk_token):
+    time.sleep(LOGIN_SERVICE_LATENCY)
+    return True, dict(USER_INFO)
+
+
+def view():
+    pass
+
+
+@override_settings(BK_TOKEN_VERIFY_CACHE_ALIAS="locmem", BK_TOKEN_VERIFY_CACHE_TTL=60)
+@patch("blueapps.account.components.bk_token.middlewares.auth.login", MagicMock())
+class TestLoginRequiredMiddleware(TestCase):
+    def setUp(self):
+        caches["locmem"].clear()
+        self.verify_patcher = patch.object(TokenBackend, "verify_bk_token", MagicMock(side_effect=mock_verify_bk_token))
+        self.user_info_patcher = patch.object(TokenBackend, "get_user_info", MagicMock(side_effect=mock_get_user_info))
+        self.verify_bk_token = self.verify_patcher.start()
+        self.get_user_info = self.user_info_patcher.start()
+
+    def tearDown(self):
+        self.verify_patcher.stop()
+        self.user_info_patcher.stop()
+
+    def request(self, bk_token=BK_TOKEN, user=None):
+        request = RequestFactory().get("/")
+        request.COOKIES["bk_token"] = bk_token
+        request.user = user or AnonymousUser()
+        begin = time.perf_counter()
+        response = LoginRequiredMiddleware().process_view(request, view, (), {})
+        return response, time.perf_counter() - begin
+
+    def test_verify_cache(self):
+        response, first_cost = self.request()
+        self.assertIsNone(response)
+        self.assertGreaterEqual(first_cost, LOGIN_SERVICE_LATENCY * 2)
+
+        # 缓存有效期内不再请求登录服务
+        total_cost = 0
+        for __ in range(10):
+            response, cost = self.request()
+            self.assertIsNone(response)
+            total_cost += cost
+        self.assertEqual(self.verify_bk_token.call_count, 1)
+        self.assertEqual(self.get_user_info.call_count, 1)
+        self.assertLess(total_cost, LOGIN_SERVICE_LATENCY)
+
+    def test_negative_cache(self):
+        for __ in range(3):
+            response, __ = self.request(bk_token="invalid_token")
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.verify_bk_token.call_count, 1)
+        self.assertFalse(self.get_user_info.called)
+
+    @override_settings(BK_TOKEN_VERIFY_CACHE_TTL=0)
+    def test_cache_disabled(self):
+        self.request()
+        self.request()
+        self.assertEqual(self.verify_bk_token.call_count, 2)
+
+    def test_query_count(self):
+        self.request()
+        user = get_user_model().objects.get(username="admin")
+        self.assertEqual({p.key: p.value for p in user.properties.all()}, {k: str(v) for k, v in USER_INFO.items()})
+
+        # 已登录的同一用户命中缓存：无查询
+        with self.assertNumQueries(0):
+            self.request(user=user)
+
+        # 匿名会话命中缓存：仅查询用户
+        with self.assertNumQueries(1):
+            self.request()
+
+        # 缓存失效且用户属性未变化：查询用户及属性，无写入
+        caches["locmem"].clear()
+        with self.assertNumQueries(2):
+            self.request()
+
+        # 仅写入变化的属性
+        caches["locmem"].clear()
+        self.get_user_info.side_effect = lambda bk_token: (True, dict(USER_INFO, chname="administrator"))
+        with self.assertNumQueries(3):
+            self.request()
+        self.assertEqual(user.get_property("chname"), "administrator")
@@ -0,0 +1,82 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from apps.node_man.constants import IamActionType
+from apps.node_man.handlers.cmdb import BIZ_PERMISSION_CACHE, CmdbHandler
+from apps.node_man.handlers.iam import IAM_POLICY_CACHE, IamHandler
+from apps.node_man.tests.utils import SEARCH_BUSINESS
+from apps.utils.local import RequestCache, activate_request
+
+USERNAME = "test_user"
+
+
+def nodeman_policy_query(request_data):
+    # 有全部业务的权限
+    policy = {"op": "in", "field": "biz.id", "value": [biz["bk_biz_id"] for biz in SEARCH_BUSINESS]}
+    return True, "", policy, request_data["action"]["id"]
+
+
+@override_settings(USE_IAM=True)
+class TestPermissionCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        for request_cache in [BIZ_PERMISSION_CACHE, IAM_POLICY_CACHE]:
+            request_cache.hits = request_cache.misses = 0
+
+        self.cmdb_or_cache_biz = MagicMock(side_effect=lambda username: {"info": list(SEARCH_BUSINESS)})
+        self.policy_query = MagicMock(side_effect=nodeman_policy_query)
+        self.patchers = [
+            patch.object(CmdbHandler, "cmdb_or_cache_biz", self.cmdb_or_cache_biz),
+            patch.object(IamHandler, "nodeman_policy_query", self.policy_query),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def start_request(self):
+        request = RequestFactory().get("/")
+        request.user = MagicMock(username=USERNAME)
+        activate_request(request)
+        RequestCache.enable(request)
+        return request
+
+    def load_page(self):
+        # 模拟一次页面加载中多个处理器分别查询业务权限
+        for __ in range(3):
+            CmdbHandler().biz_id_name({"action": IamActionType.agent_view})
+        CmdbHandler().biz_id_name({"action": IamActionType.agent_operate})
+        return IamHandler().fetch_policy(USERNAME, [IamActionType.agent_view, IamActionType.agent_operate])
+
+    def test_request_scope(self):
+        request = self.start_request()
+        perms = self.load_page()
+        self.assertEqual(perms[IamActionType.agent_view], [biz["bk_biz_id"] for biz in SEARCH_BUSINESS])
+        # 每个操作只查询一次 CMDB 业务及权限中心策略
+        self.assertEqual(self.cmdb_or_cache_biz.call_count, 2)
+        self.assertEqual(self.policy_query.call_count, 2)
+        self.assertEqual(BIZ_PERMISSION_CACHE.hit_ratio, 0.5)
+
+        # 修改返回结果不影响缓存
+        perms[IamActionType.agent_view].clear()
+        self.assertTrue(IamHandler().fetch_policy(USERNAME, [IamActionType.agent_view])[IamActionType.agent_view])
+
+        # 新请求：权限中心策略命中用户级缓存，业务列表重新计算
+        RequestCache.disable(request)
+        self.start_request()
+        self.load_page()
+        self.assertEqual(self.cmdb_or_cache_biz.call_count, 4)
+        self.assertEqual(self.policy_query.call_count, 2)
+
+    def test_without_request(self):
+        request = self.start_request()
+        RequestCache.disable(request)
+        with patch.object(IAM_POLICY_CACHE, "ttl", 0):
+            self.load_page()
+        # 请求已结束，不做请求级缓存
+        self.assertEqual(self.cmdb_or_cache_biz.call_count, 4)
+        self.assertEqual(self.policy_query.call_count, 6)
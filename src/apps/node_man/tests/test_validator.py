@@ -13,7 +13,13 @@ from apps.node_man.exceptions import (
     CloudNotPermissionError,
 )
 from apps.node_man.handlers.cmdb import CmdbHandler
-from apps.node_man.handlers.validator import job_validate, update_pwd_validate, bulk_update_validate, operate_validator
+from apps.node_man.handlers.validator import (
+    job_validate,
+    update_pwd_validate,
+    bulk_update_validate,
+    operate_validator,
+    count_cloud_proxies,
+)
 from apps.node_man.models import IdentityData, Host
 from apps.node_man.tests.utils import (
     MockClient,
@@ -672,3 +678,13 @@ class TestValidator(TestCase):
         self.assertRaises(
             IpRunningJob, operate_validator, db_host_sql, user_biz, "admin", {bk_host_id: {"status": "RUNNING"}}, True
         )
+
+    def test_count_cloud_proxies(self):
+        create_host(3, bk_cloud_id=1, node_type=const.NodeType.PROXY)
+        Host.objects.filter(bk_host_id=2).update(bk_cloud_id=2)
+        create_host(1, bk_host_id=10, bk_cloud_id=1, node_type=const.NodeType.AGENT)
+
+        # 仅统计所涉及云区域下的代理
+        self.assertEqual(count_cloud_proxies({1, 2}), {1: 2, 2: 1})
+        self.assertEqual(count_cloud_proxies({1}), {1: 2})
+        self.assertEqual(count_cloud_proxies({3}), {})
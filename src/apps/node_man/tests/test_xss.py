@@ -0,0 +1,52 @@
+import json
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from blueapps.middleware.xss.decorators import escape_exempt, escape_exempt_param, escape_url
+from blueapps.middleware.xss.middlewares import CheckXssMiddleware
+from blueapps.middleware.xss.utils import is_json_string
+
+
+def view(request):
+    return HttpResponse()
+
+
+class TestCheckXssMiddleware(TestCase):
+    def process(self, view_func, data, method="post", path=None):
+        request = getattr(RequestFactory(), method)(path or f"{settings.SITE_URL}api/", data)
+        CheckXssMiddleware(lambda request: HttpResponse()).process_view(request, view_func, (), {})
+        return getattr(request, method.upper())
+
+    def test_escape(self):
+        json_value = json.dumps({"ip": "<10.0.0.1>", "alias": "a b"})
+        result = self.process(view, {"plain": "it's <b>&", "number": "1", "json": json_value, "multi": ["a b", "c"]})
+        self.assertEqual(result["plain"], "it&#39;s&nbsp;&lt;b&gt;&amp;")
+        self.assertEqual(result["number"], "1")
+        # json串仅转义<>
+        self.assertEqual(result["json"], json_value.replace("<", "&lt;").replace(">", "&gt;"))
+        self.assertEqual(result.getlist("multi"), ["a&nbsp;b", "c"])
+        self.assertTrue(result._mutable)
+
+    def test_view_rules(self):
+        data = {"name": "<a b>", "other": "<a b>"}
+        self.assertEqual(self.process(escape_exempt(view), data)["name"], "<a b>")
+        self.assertEqual(self.process(escape_url(view), data, method="get")["other"], "ab")
+
+        result = self.process(escape_exempt_param("name")(view), data)
+        self.assertEqual(result["name"], "<a b>")
+        self.assertEqual(result["other"], "&lt;a&nbsp;b&gt;")
+
+    def test_path_rules(self):
+        data = {"next": "/a b", "url": "<u>", "other": "<u>"}
+        result = self.process(view, data, method="get", path=f"{settings.SITE_URL}accounts/login/")
+        self.assertEqual(result["next"], "/ab")
+        self.assertEqual(result["url"], "u")
+        self.assertEqual(result["other"], "&lt;u&gt;")
+
+    def test_is_json_string(self):
+        for value in ["1", " -1.5 ", "true", "null", '"a b"', '{"a": [1, 2]}', "[]", "NaN"]:
+            self.assertTrue(is_json_string(value), value)
+        for value in ["", " ", "a b", "{a}", '{"a": 1', '"', "[1, 2] x", "10.0.0.1"]:
+            self.assertFalse(is_json_string(value), value)
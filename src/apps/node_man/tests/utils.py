@@ -5,13 +5,23 @@ from unittest.mock import patch
 
 from django.utils import timezone
 
+from apps.backend.utils.pipeline_parser import PipelineParser
 from apps.exceptions import ComponentCallError
 from apps.node_man import constants as const
 from apps.node_man.handlers.ap import APHandler
 from apps.node_man.handlers.cloud import CloudHandler
 from apps.node_man.handlers.cmdb import CmdbHandler
 from apps.node_man.handlers.host import HostHandler
-from apps.node_man.models import Host, ProcessStatus, IdentityData, Cloud, Job, AccessPoint
+from apps.node_man.models import (
+    Host,
+    ProcessStatus,
+    IdentityData,
+    Cloud,
+    CloudProxyIndex,
+    Job,
+    JobBizRelation,
+    AccessPoint,
+)
 from apps.utils.basic import filter_values
 
 CONST_IP_LEN = 2234
@@ -161,6 +171,8 @@ def create_host_from_a_to_b(
     ProcessStatus.objects.bulk_create(process_to_create)
     # bulk_create创建认证信息
     IdentityData.objects.bulk_create(identity_to_create)
+    # 批量写入不会触发信号，需刷新云区域代理索引
+    CloudProxyIndex.refresh(CloudProxyIndex.host_cloud_ids([host.bk_host_id for host in host_to_create]))
 
     return host_to_create, process_to_create, identity_to_create
 
@@ -379,6 +391,12 @@ class NodeApi:
             "steps": [{"target_hosts": [{"sub_steps": [{"status": "SUCCESS", "node_name": "1", "log": "1"}]}]}],
         }
 
+    @staticmethod
+    def get_subscription_task_node_log(param):
+        node_log = PipelineParser.get_node_log_slice(param["node_id"], param["cursor"], param["limit"])
+        node_log["node_id"] = param["node_id"]
+        return node_log
+
     @staticmethod
     def collect_subscription_task_detail(param):
         return "SUCCESS"
@@ -516,6 +534,9 @@ def create_job(number, id=None, end_time=None, bk_biz_scope=None):
         )
         jobs.append(job)
     jobs = Job.objects.bulk_create(jobs)
+    JobBizRelation.objects.bulk_create(
+        [JobBizRelation(job_id=job.id, bk_biz_id=bk_biz_id) for job in jobs for bk_biz_id in job.bk_biz_scope]
+    )
     job_ids = [job.id for job in jobs]
     return job_ids
 
@@ -971,8 +992,6 @@ def ret_to_validate_data(data):
 
     # 获得请求里所有在数据库中的IP的相关信息
     # 格式 { inner_ip: {'bk_biz_id': bk_biz_id, 'node_type': node_type, 'bk_cloud_id': bk_cloud_id}, ...}
-    inner_ip_info = HostHandler().ip_list(inner_ips)
-    outer_ip_info = HostHandler().ip_list(outer_ips)
-    login_ip_info = HostHandler().ip_list(login_ips)
+    inner_ip_info, outer_ip_info, login_ip_info = HostHandler().bulk_ip_list([inner_ips, outer_ips, login_ips])
 
     return biz_info, data, cloud_info, ap_id_name, inner_ip_info, outer_ip_info, login_ip_info, bk_biz_scope
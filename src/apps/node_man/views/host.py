@@ -7,6 +7,7 @@ from apps.node_man.handlers.host import HostHandler
 from apps.utils.local import get_request_username
 from apps.node_man.serializers.host import (
     HostSerializer,
+    HostQuickSearchSerializer,
     ProxySerializer,
     HostUpdateSerializer,
     RemoveSerializer,
@@ -70,6 +71,53 @@ class HostViewSet(ModelViewSet):
         hosts = HostHandler().list(data, get_request_username())
         return Response(hosts)
 
+    @action(detail=False, methods=["POST"])
+    def quick_search(self, request):
+        """
+        @api {POST} /host/quick_search/ 基于索引快速搜索主机
+        @apiDescription
+        通过主机搜索索引匹配内网、外网、登录及数据IP，按主机ID倒序游标分页。<br>
+        total 为估算总数；返回的 cursor 作为下一页请求参数，为 null 时表示没有下一页。
+        @apiName quick_search_host
+        @apiGroup Host
+        @apiParam {String} query 搜索内容
+        @apiParam {String} [match_type] 匹配方式, PREFIX 前缀, INFIX 中缀(默认), SEGMENT IP段
+        @apiParam {Int[]} [bk_biz_id] 业务ID
+        @apiParam {String[]} [node_type] 节点类型
+        @apiParam {Int} [cursor] 分页游标
+        @apiParam {Int} [pagesize] 分页大小
+        @apiSuccessExample {json} 成功返回:
+        {
+            "total": 20,
+            "cursor": 1001,
+            "list": [
+                {
+                    "bk_host_id": 1002,
+                    "bk_cloud_id": 0,
+                    "bk_cloud_name": "直连区域",
+                    "bk_biz_id": 2,
+                    "bk_biz_name": "业务名称",
+                    "os_type": "LINUX",
+                    "node_type": "AGENT",
+                    "inner_ip": "10.0.0.1",
+                    "outer_ip": "",
+                    "login_ip": "",
+                    "data_ip": "",
+                    "status": "RUNNING",
+                    "status_display": "正常",
+                    "version": "1.1.0"
+                }
+            ]
+        }
+        """
+
+        # 校验
+        self.serializer_class = HostQuickSearchSerializer
+        data = self.validated_data
+
+        # 处理
+        return Response(HostHandler().quick_search(data))
+
     @action(detail=False)
     def proxies(self, request, *args, **kwargs):
         """
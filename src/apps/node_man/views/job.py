@@ -10,6 +10,7 @@ from apps.node_man.models import Job
 from apps.node_man.serializers.job import (
     InstallSerializer,
     ListSerializer,
+    NodeLogSerializer,
     OperateSerializer,
     RetrieveSerializer,
     FetchCommandSerializer,
@@ -35,6 +36,9 @@ class JobViewSet(ModelViewSet):
         @apiParam {object} [sort] 排序
         @apiParam {String=["total_count", "failed_count","success_count"]} [sort.head] 排序字段
         @apiParam {String=["ASC", "DEC"]} [sort.sort_type] 排序类型
+        @apiParam {object} [cursor] 分页游标，取上一页返回的 cursor，传入时忽略 page
+        @apiSuccess {Int} total 总数，最多统计 10000 条；传入 cursor 时不统计，返回 null，沿用首页的总数
+        @apiSuccess {Boolean} total_capped 总数是否达到统计上限，为 true 时实际总数大于 total
         @apiParamExample {Json} 请求例子:
         {
             "page": 1,
@@ -44,6 +48,8 @@ class JobViewSet(ModelViewSet):
         @apiSuccessExample {json} 成功返回:
         {
             "total": 100,
+            "total_capped": false,
+            "cursor": {"id": 1},
             "list": [
                 {
                     "id": 1,
@@ -251,6 +257,7 @@ class JobViewSet(ModelViewSet):
         @apiGroup Job
         @apiParam {Number} job_id 任务ID
         @apiParam {Number} instance_id 实例ID
+        @apiParam {Boolean} [need_log] 是否返回完整日志，传 false 时仅返回各步骤日志大小，日志通过 node_log 分页获取
         @apiParamExample {Json} 重装、升级等请求参数
         {
             "bk_host_id": 1
@@ -259,20 +266,51 @@ class JobViewSet(ModelViewSet):
         [
             {
                 "step": "检查网络连通性",
+                "node_id": "c2bdb95bc72239eeade47419840923d7",
                 "status": "success",
-                "log": "checking network……\nok"
+                "log": "checking network……\nok",
+                "log_count": 2,
+                "log_size": 22
             },
             {
                 "step": "检查用户",
+                "node_id": "a2bdb95bc72239eeade47419840923d8",
                 "status": "success",
-                "log": "checking user……\nusername is root\nok"
+                "log": "checking user……\nusername is root\nok",
+                "log_count": 3,
+                "log_size": 38
             }
         ]
         """
+        need_log = request.query_params.get("need_log", "true").lower() != "false"
         return Response(
-            JobHandler(job_id=kwargs["pk"]).get_log(request.query_params["instance_id"], get_request_username())
+            JobHandler(job_id=kwargs["pk"]).get_log(
+                request.query_params["instance_id"], get_request_username(), need_log
+            )
         )
 
+    @action(detail=True, methods=["GET"], serializer_class=NodeLogSerializer)
+    def node_log(self, request, *args, **kwargs):
+        """
+        @api {GET} /job/{{pk}}/node_log/ 分页查询步骤日志
+        @apiName get_job_node_log
+        @apiGroup Job
+        @apiParam {Number} job_id 任务ID
+        @apiParam {String} instance_id 实例ID
+        @apiParam {String} node_id 步骤节点ID，取自日志接口返回的 node_id
+        @apiParam {Number} [cursor] 日志游标，首次查询传 0，之后取上一次返回的 cursor
+        @apiParam {Number} [limit] 日志条数
+        @apiSuccessExample {json} 成功返回:
+        {
+            "node_id": "c2bdb95bc72239eeade47419840923d7",
+            "log": "checking network……\nok",
+            "cursor": 123,
+            "has_more": false,
+            "ex_data": ""
+        }
+        """
+        return Response(JobHandler(job_id=kwargs["pk"]).get_node_log(self.validated_data, get_request_username()))
+
     @action(detail=True, methods=["POST"])
     def collect_log(self, request, *args, **kwargs):
         """
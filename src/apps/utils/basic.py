@@ -73,6 +73,26 @@ def md5(file_name):
     return hash.hexdigest()
 
 
+class Md5Writer(object):
+    """写入文件对象的同时计算MD5及大小，避免写入完成后重新读取文件"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.hash = hashlib.md5()
+        self.size = 0
+
+    def write(self, data):
+        self.hash.update(data)
+        self.size += len(data)
+        return self.fileobj.write(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
 def chunk_lists(lst, n):
     """Yield successive n-sized chunks from lst."""
     for i in range(0, len(lst), n):
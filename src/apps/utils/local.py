@@ -5,6 +5,8 @@
 import uuid
 from threading import local
 
+from django.core.cache import cache
+
 from apps.exceptions import BaseException
 
 _local = local()
@@ -81,3 +83,80 @@ def get_local_param(key, default=None):
     获取线程变量
     """
     return getattr(_local, key, default)
+
+
+class RequestCache(object):
+    """
+    请求级缓存：数据挂载在当前线程的请求对象上，同一请求内的多次调用共享结果
+    ttl 大于 0 时同时写入 Django 缓存，作为跨请求的短时缓存，key 需自行区分用户
+    """
+
+    @staticmethod
+    def enable(request):
+        """
+        为请求开启请求级缓存，由中间件在请求开始时调用
+        """
+        request._request_cache = {}
+
+    @staticmethod
+    def disable(request):
+        """
+        请求结束时释放缓存，线程上残留的请求对象不再提供缓存
+        """
+        if hasattr(request, "_request_cache"):
+            del request._request_cache
+
+    def __init__(self, namespace, ttl=0):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+    def _request_store(self):
+        try:
+            request_cache = get_request()._request_cache
+        except (BaseException, AttributeError):
+            # 非请求上下文（如后台任务）或请求已结束，不做请求级缓存
+            return None
+        return request_cache.setdefault(self.namespace, {})
+
+    def _cache_key(self, key):
+        return f"{self.namespace}:{key}"
+
+    def get_many(self, keys):
+        """
+        :param keys: 缓存键列表
+        :return: {key: value}，仅包含命中的键
+        """
+        result = {}
+        store = self._request_store()
+        if store is not None:
+            result.update({key: store[key] for key in keys if key in store})
+
+        missing_keys = [key for key in keys if key not in result]
+        if missing_keys and self.ttl > 0:
+            cached = cache.get_many([self._cache_key(key) for key in missing_keys])
+            for key in missing_keys:
+                if self._cache_key(key) in cached:
+                    result[key] = cached[self._cache_key(key)]
+            if store is not None:
+                store.update({key: result[key] for key in missing_keys if key in result})
+
+        self.hits += len(result)
+        self.misses += len(keys) - len(result)
+        return result
+
+    def set_many(self, data):
+        """
+        :param data: {key: value}
+        """
+        store = self._request_store()
+        if store is not None:
+            store.update(data)
+        if self.ttl > 0:
+            cache.set_many({self._cache_key(key): value for key, value in data.items()}, self.ttl)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+n-gram 切词工具，用于构建 IP 等短文本的倒排索引
+- 中缀/前缀检索词：对 "^value$" 切词，前缀查询对 "^query" 切词
+- 分段检索词：把 IP 的分隔符统一为 "." 并在首尾补齐，对 ".value." 切词，查询 ".query." 即可整段匹配
+不同类型的检索词以前缀区分，避免相互命中
+"""
+
+NGRAM_SIZES = (2, 3)
+
+GRAM_TOKEN_PREFIX = "g:"
+SEGMENT_TOKEN_PREFIX = "s:"
+
+
+def ngrams(text: str, sizes=NGRAM_SIZES) -> set:
+    return {text[index : index + size] for size in sizes for index in range(len(text) - size + 1)}
+
+
+def _normalize(value: str) -> str:
+    return (value or "").strip().lower()
+
+
+def _segment_text(value: str) -> str:
+    # IPv6 以 : 分段，与 IPv4 统一为 .
+    return "." + value.replace(":", ".") + "."
+
+
+def _longest_grams(text: str, sizes=NGRAM_SIZES) -> set:
+    """
+    查询时只需要最长的切词，较短的切词必然被其包含
+    """
+    for size in sorted(sizes, reverse=True):
+        grams = ngrams(text, (size,))
+        if grams:
+            return grams
+    return set()
+
+
+def tokenize(value: str, sizes=NGRAM_SIZES) -> set:
+    """
+    生成单个字段值的全部索引检索词
+    """
+    value = _normalize(value)
+    if not value:
+        return set()
+    tokens = {GRAM_TOKEN_PREFIX + gram for gram in ngrams(f"^{value}$", sizes)}
+    tokens.update(SEGMENT_TOKEN_PREFIX + gram for gram in ngrams(_segment_text(value), sizes))
+    return tokens
+
+
+def prefix_tokens(query: str, sizes=NGRAM_SIZES) -> set:
+    query = _normalize(query)
+    if not query:
+        return set()
+    return {GRAM_TOKEN_PREFIX + gram for gram in _longest_grams(f"^{query}", sizes)}
+
+
+def infix_tokens(query: str, sizes=NGRAM_SIZES) -> set:
+    """
+    中缀查询长度小于最小切词长度时无法命中索引，返回空集合由调用方降级处理
+    """
+    query = _normalize(query)
+    return {GRAM_TOKEN_PREFIX + gram for gram in _longest_grams(query, sizes)}
+
+
+def segment_tokens(query: str, sizes=NGRAM_SIZES) -> set:
+    query = _normalize(query)
+    if not query:
+        return set()
+    return {SEGMENT_TOKEN_PREFIX + gram for gram in _longest_grams(_segment_text(query), sizes)}
+
+
+def is_prefix_match(value: str, query: str) -> bool:
+    return _normalize(value).startswith(_normalize(query))
+
+
+def is_infix_match(value: str, query: str) -> bool:
+    return _normalize(query) in _normalize(value)
+
+
+def is_segment_match(value: str, query: str) -> bool:
+    value = _normalize(value)
+    return bool(value) and _segment_text(_normalize(query)) in _segment_text(value)
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import logging
 import traceback
 
 from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
 from django.db import IntegrityError
 
 from blueapps.account import get_user_model
@@ -15,6 +17,9 @@ logger = logging.getLogger("component")
 
 ROLE_TYPE_ADMIN = "1"
 
+# 同步到 UserProperty 的用户信息字段
+USER_PROPERTY_KEYS = ("qq", "language", "time_zone", "role", "phone", "email", "wx_userid", "chname")
+
 
 class TokenBackend(ModelBackend):
     def authenticate(self, request=None, bk_token=None):
@@ -23,9 +28,21 @@ class TokenBackend(ModelBackend):
         if not bk_token:
             return None
 
+        cache = self.get_verify_cache()
+        cache_key = self.get_verify_cache_key(bk_token)
+        cached_username = cache.get(cache_key)
+        if cached_username is not None:
+            # 空字符串为验证失败的负缓存
+            if not cached_username:
+                return None
+            user = self.get_cached_user(request, cached_username)
+            if user:
+                return user
+
         verify_result, username = self.verify_bk_token(bk_token)
         # 判断bk_token是否验证通过,不通过则返回None
         if not verify_result:
+            self.set_verify_cache(cache, cache_key, "", getattr(settings, "BK_TOKEN_VERIFY_NEGATIVE_CACHE_TTL", 5))
             return None
 
         user_model = get_user_model()
@@ -35,23 +52,16 @@ class TokenBackend(ModelBackend):
             # 判断是否获取到用户信息,获取不到则返回None
             if not get_user_info_result:
                 return None
-            user.set_property(key="qq", value=user_info.get("qq", ""))
-            user.set_property(key="language", value=user_info.get("language", ""))
-            user.set_property(key="time_zone", value=user_info.get("time_zone", ""))
-            user.set_property(key="role", value=user_info.get("role", ""))
-            user.set_property(key="phone", value=user_info.get("phone", ""))
-            user.set_property(key="email", value=user_info.get("email", ""))
-            user.set_property(key="wx_userid", value=user_info.get("wx_userid", ""))
-            user.set_property(key="chname", value=user_info.get("chname", ""))
+            # 仅写入发生变化的用户属性
+            user.sync_properties({key: user_info.get(key, "") for key in USER_PROPERTY_KEYS})
 
             # 用户如果不是管理员，则需要判断是否存在平台权限，如果有则需要加上
-            if not user.is_superuser and not user.is_staff:
-                role = user_info.get("role", "")
-                is_admin = True if str(role) == ROLE_TYPE_ADMIN else False
-                user.is_superuser = is_admin
-                user.is_staff = is_admin
+            if not user.is_superuser and not user.is_staff and str(user_info.get("role", "")) == ROLE_TYPE_ADMIN:
+                user.is_superuser = True
+                user.is_staff = True
                 user.save()
 
+            self.set_verify_cache(cache, cache_key, username, getattr(settings, "BK_TOKEN_VERIFY_CACHE_TTL", 60))
             return user
 
         except IntegrityError:
@@ -63,6 +73,36 @@ class TokenBackend(ModelBackend):
             logger.exception("Auto create & update UserModel fail")
             return None
 
+    @staticmethod
+    def get_verify_cache():
+        return caches[getattr(settings, "BK_TOKEN_VERIFY_CACHE_ALIAS", "default")]
+
+    @staticmethod
+    def get_verify_cache_key(bk_token):
+        # 缓存键不直接使用 bk_token，避免凭证明文落入缓存
+        return "bk_token_verify:{}".format(hashlib.sha256(bk_token.encode()).hexdigest())
+
+    @staticmethod
+    def set_verify_cache(cache, cache_key, username, timeout):
+        # 缓存时间为 0 表示不缓存
+        if timeout:
+            cache.set(cache_key, username, timeout)
+
+    @staticmethod
+    def get_cached_user(request, username):
+        """
+        bk_token 验证结果命中缓存时获取用户，会话中已登录的同一用户直接复用
+        """
+        session_user = getattr(request, "user", None)
+        if session_user is not None and session_user.is_authenticated and session_user.username == username:
+            return session_user
+
+        user_model = get_user_model()
+        try:
+            return user_model.objects.get(username=username)
+        except user_model.DoesNotExist:
+            return None
+
     @staticmethod
     def get_user_info(bk_token):
         """
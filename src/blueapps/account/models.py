@@ -123,6 +123,33 @@ class User(AbstractBaseUser, PermissionsMixin):
         key_property.value = value
         key_property.save()
 
+    def sync_properties(self, properties):
+        """
+        批量同步用户属性，仅写入发生变化的属性
+        @param properties: {key: value}
+        """
+        properties = {key: str(value) for key, value in properties.items()}
+        existing = {
+            key_property.key: key_property
+            for key_property in self.properties.filter(key__in=list(properties))
+        }
+
+        to_create = []
+        to_update = []
+        for key, value in properties.items():
+            key_property = existing.get(key)
+            if key_property is None:
+                to_create.append(UserProperty(user=self, key=key, value=value))
+            elif key_property.value != value:
+                key_property.value = value
+                to_update.append(key_property)
+
+        if to_create:
+            # 并发登录时可能已被其他请求创建
+            UserProperty.objects.bulk_create(to_create, ignore_conflicts=True)
+        if to_update:
+            UserProperty.objects.bulk_update(to_update, fields=['value'])
+
     @property
     def avatar_url(self):
         return self.get_property('avatar_url')
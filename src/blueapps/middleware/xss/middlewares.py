@@ -1,137 +1,103 @@
 # -*- coding: utf-8 -*-
 import re
-import json
 import logging
 
 from django.conf import settings
+from django.http import QueryDict
 from django.utils.deprecation import MiddlewareMixin
-from .utils import html_escape, url_escape, html_escape_name, check_script
+from .utils import escape_param
 
 
 SITE_URL = settings.SITE_URL
 logger = logging.getLogger("app")
 
+# 特殊path注册，按 name、url、script 的优先级匹配
+ESCAPE_PATH_RULES = (
+    ('name', {}),
+    ('url', {
+        '%saccounts/login' % SITE_URL: ['next'],
+        '%saccounts/login_page' % SITE_URL: ['req_url'],
+        '%saccounts/login_success' % SITE_URL: ['req_url'],
+        '%s' % SITE_URL: ['url'],
+    }),
+    ('script', {}),
+)
+
+# 预编译的特殊path规则：[(转义类型, 路径正则, 参数列表), ...]，低优先级在前
+COMPILED_ESCAPE_PATH_RULES = [
+    (escape_type, re.compile(r'^%s' % path), params)
+    for escape_type, path_params in reversed(ESCAPE_PATH_RULES)
+    for path, params in path_params.items()
+]
+
 
 class CheckXssMiddleware(MiddlewareMixin):
 
     def __init__(self, *args, **kwargs):
-        self.__escape_param_list = []
+        # 视图转义规则表，在视图首次被解析时生成：{view: (是否豁免, 转义类型, 豁免参数)}
+        self.__view_rules = {}
         super(CheckXssMiddleware, self).__init__(*args, **kwargs)
 
     def process_view(self, request, view, args, kwargs):
         try:
+            escape_exempt, escape_type, escape_params = self.__get_view_rule(view)
             # 判断豁免权
-            if getattr(view, 'escape_exempt', False):
+            if escape_exempt:
                 return None
 
-            # 获取豁免参数名
-            self.__escape_param_list = getattr(view, 'escape_exempt_param', []) if getattr(
-                view, 'escape_exempt_param', False) else []
-
-            escapeType = None
-            if getattr(view, 'escape_script', False):
-                escapeType = "script"
-            elif getattr(view, 'escape_url', False):
-                escapeType = "url"
+            # 视图未指定转义类型时，按特殊path确定各参数的转义类型
+            param_types = {} if escape_type else self.__filter_path(request.path)
             # get参数转换
-            request.GET = self.__escape_data(request.path, request.GET, escapeType)
+            request.GET = self.__escape_data(request.GET, escape_type, param_types, escape_params)
             # post参数转换
-            request.POST = self.__escape_data(request.path, request.POST, escapeType)
+            request.POST = self.__escape_data(request.POST, escape_type, param_types, escape_params)
         except Exception as e:
             logger.error("CheckXssMiddleware 转换失败！%s" % e)
         return None
 
-    def __escape_data(self, path, query_dict, escape_type=None):
+    def __get_view_rule(self, view):
+        try:
+            return self.__view_rules[view]
+        except KeyError:
+            pass
+
+        escape_type = None
+        if getattr(view, 'escape_script', False):
+            escape_type = "script"
+        elif getattr(view, 'escape_url', False):
+            escape_type = "url"
+        # 获取豁免参数名
+        escape_params = frozenset(getattr(view, 'escape_exempt_param', None) or [])
+        rule = (getattr(view, 'escape_exempt', False), escape_type, escape_params)
+        self.__view_rules[view] = rule
+        return rule
+
+    @staticmethod
+    def __escape_data(query_dict, escape_type, param_types, escape_params):
         """
-        GET/POST参数转义
+        GET/POST参数转义，单次遍历生成新的参数字典
         """
-        data_copy = query_dict.copy()
-        for _get_key, _get_value_list in data_copy.lists():
-            new_value_list = []
-            for _get_value in _get_value_list:
-                new_value = _get_value
-                # json串不进行转义
-                try:
-                    json.loads(_get_value)
-                    is_json = True
-                except Exception:
-                    is_json = False
-                # 转义新数据
-                if not is_json:
-                    try:
-                        if escape_type is None:
-                            use_type = self.__filter_param(path, _get_key)
-                        else:
-                            use_type = escape_type
-
-                        if use_type == 'url':
-                            new_value = url_escape(_get_value)
-                        elif use_type == 'script':
-                            new_value = check_script(_get_value, 1)
-                        elif use_type == 'name':
-                            new_value = html_escape_name(_get_value)
-                        elif _get_key in self.__escape_param_list:
-                            new_value = _get_value
-                        else:
-                            new_value = html_escape(_get_value, 1)
-                    except Exception as e:
-                        logger.error("CheckXssMiddleware GET/POST参数 转换失败！%s" % e)
-                        new_value = _get_value
-                else:
-                    try:
-                        new_value = html_escape(_get_value, 1, True)
-                    except Exception as e:
-                        logger.error("CheckXssMiddleware GET/POST参数 转换失败！%s" % e)
-                        new_value = _get_value
-                new_value_list.append(new_value)
-            data_copy.setlist(_get_key, new_value_list)
-        return data_copy
+        data = QueryDict(mutable=True, encoding=query_dict.encoding)
+        for key, value_list in query_dict.lists():
+            use_type = escape_type or param_types.get(key, 'html')
+            if use_type == 'html' and key in escape_params:
+                use_type = 'exempt'
+            data.setlist(key, [escape_param(value, use_type) for value in value_list])
+        return data
 
-    def __filter_param(self, path, param):
+    @staticmethod
+    def __filter_path(path):
         """
         特殊path处理
         @param path: 路径
-        @param param: 参数
-        @return: 'html/name/url/script/exempt'
+        @return: {参数: 'name/url/script'}
         """
-        use_name, use_url, use_script = self.__filter_path_list()
+        param_types = {}
         try:
-            result = 'html'
-            # name过滤
-            for name_path, name_v in list(use_name.items()):
-                is_path = re.match(r'^%s' % name_path, path)
-                if is_path and param in name_v:
-                    result = 'name'
-                    break
-            # url过滤
-            if result == 'html':
-                for url_path, url_v in list(use_url.items()):
-                    is_path = re.match(r'^%s' % url_path, path)
-                    if is_path and param in url_v:
-                        result = 'url'
-                        break
-            # script过滤
-            if result == 'html':
-                for script_path, script_v in list(use_script.items()):
-                    is_path = re.match(r'^%s' % script_path, path)
-                    if is_path and param in script_v:
-                        result = 'script'
-                        break
+            for escape_type, path_pattern, params in COMPILED_ESCAPE_PATH_RULES:
+                if path_pattern.match(path):
+                    param_types.update(dict.fromkeys(params, escape_type))
         except Exception as e:
             logger.error("CheckXssMiddleware 特殊path处理失败！%s" % e)
-            result = 'html'
-        return result
-
-    def __filter_path_list(self):
-        """
-        特殊path注册
-        """
-        use_name = {}
-        use_url = {
-            '%saccounts/login' % SITE_URL: ['next'],
-            '%saccounts/login_page' % SITE_URL: ['req_url'],
-            '%saccounts/login_success' % SITE_URL: ['req_url'],
-            '%s' % SITE_URL: ['url'],
-        }
-        use_script = {}
-        return (use_name, use_url, use_script)
+            param_types = {}
+        return param_types
@@ -13,8 +13,28 @@ from common.utils import html_escape, url_escape
  url_content = url_escape(input_content)
 #===============================================================================
 """
+import json
+import re
+
 from .pxfilter import XssHtml
 
+# 所有转义方式仅处理以下字符，不含这些字符的参数无需转义
+ESCAPE_CHARS_PATTERN = re.compile(r"[&<> \"']")
+
+# 单次遍历的转义表，与逐个 replace 的结果一致
+HTML_ESCAPE_TABLE = str.maketrans({"<": "&lt;", ">": "&gt;", " ": "&nbsp;", '"': "&quot;", "'": "&#39;"})
+HTML_ESCAPE_AMP_TABLE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", " ": "&nbsp;", '"': "&quot;", "'": "&#39;"}
+)
+HTML_ESCAPE_JSON_TABLE = str.maketrans({"<": "&lt;", ">": "&gt;"})
+URL_ESCAPE_TABLE = str.maketrans("", "", "<> \"'")
+NAME_ESCAPE_TABLE = str.maketrans("", "", "&<> \"'")
+
+# json.loads 允许的首尾空白字符及标量的首字符
+JSON_WHITESPACE = " \t\n\r"
+JSON_SCALAR_FIRST_CHARS = frozenset("-0123456789tfnNI")
+JSON_CONTAINER_PAIRS = {"{": "}", "[": "]", '"': '"'}
+
 
 def html_escape(str_escape, fromtype=0, is_json=False):
     """
@@ -55,12 +75,7 @@ def html_escape_name(str_escape):
 
 
 def escape_url(s):
-    s = s.replace("<", "")
-    s = s.replace(">", "")
-    s = s.replace(' ', "")
-    s = s.replace('"', "")
-    s = s.replace("'", "")
-    return s
+    return s.translate(URL_ESCAPE_TABLE)
 
 
 def escape_name(s):
@@ -69,13 +84,7 @@ def escape_name(s):
     is also translated.
     rewrite the cgi method
     '''
-    s = s.replace("&", "")  # Must be done first!
-    s = s.replace("<", "")
-    s = s.replace(">", "")
-    s = s.replace(' ', "")
-    s = s.replace('"', "")
-    s = s.replace("'", "")
-    return s
+    return s.translate(NAME_ESCAPE_TABLE)
 
 
 def check_script(str_escape):
@@ -101,15 +110,52 @@ def escape_new(s, fromtype, is_json):
     @param fromtype: 来源，0：views函数，1：middleware（对&做转换），默认是0
     @param is_json: 是否为json串（True/False
     '''
-    # &转换
-    if fromtype == 1 and not is_json:
-        s = s.replace("&", "&amp;")
-    # <>转换
-    s = s.replace("<", "&lt;")
-    s = s.replace(">", "&gt;")
-    # 单双引号转换
-    if not is_json:
-        s = s.replace(' ', "&nbsp;")
-        s = s.replace('"', "&quot;")
-        s = s.replace("'", "&#39;")
-    return s
+    if is_json:
+        return s.translate(HTML_ESCAPE_JSON_TABLE)
+    # 中间件调用时对&做转换
+    return s.translate(HTML_ESCAPE_AMP_TABLE if fromtype == 1 else HTML_ESCAPE_TABLE)
+
+
+def is_json_string(s):
+    """
+    判断字符串是否为json串，与 json.loads 的判断结果一致
+    先按首尾字符排除不可能为json的字符串，避免对大部分参数做完整解析
+    """
+    stripped = s.strip(JSON_WHITESPACE)
+    if not stripped:
+        return False
+    first_char = stripped[0]
+    if first_char in JSON_CONTAINER_PAIRS:
+        if stripped[-1] != JSON_CONTAINER_PAIRS[first_char]:
+            return False
+    elif first_char not in JSON_SCALAR_FIRST_CHARS:
+        return False
+
+    try:
+        json.loads(s)
+    except Exception:
+        return False
+    return True
+
+
+def escape_param(s, escape_type):
+    """
+    中间件的GET/POST参数转义
+    @param escape_type: html/name/url/script/exempt
+    """
+    # script 由 html 解析器处理，其余方式不含转义字符时结果不变
+    if escape_type != "script" and not ESCAPE_CHARS_PATTERN.search(s):
+        return s
+    # json串仅转义<>
+    if is_json_string(s):
+        return html_escape(s, 1, True)
+
+    if escape_type == "url":
+        return url_escape(s)
+    if escape_type == "script":
+        return check_script(s)
+    if escape_type == "name":
+        return html_escape_name(s)
+    if escape_type == "exempt":
+        return s
+    return html_escape(s, 1)
@@ -39,6 +39,13 @@ class _BKNodeApi(object):
             description=u"查询订阅任务中实例的详细状态",
             before_request=add_esb_info_before_request,
         )
+        self.get_subscription_task_node_log = DataAPI(
+            method="POST",
+            url=BK_NODE_APIGATEWAY_ROOT + "backend/api/subscription/task_result_node_log/",
+            module=self.MODULE,
+            description=u"分页查询订阅任务节点日志",
+            before_request=add_esb_info_before_request,
+        )
         self.run_subscription_task = DataAPI(
             method="POST",
             url=BK_NODE_APIGATEWAY_ROOT + "backend/api/subscription/run/",
@@ -59,6 +59,8 @@ MIDDLEWARE = (
 if "test" in sys.argv:
     index = MIDDLEWARE.index("blueapps.account.middlewares.LoginRequiredMiddleware")
     MIDDLEWARE = MIDDLEWARE[:index] + MIDDLEWARE[index + 1 :]
+    # 流程统计模块默认不启用，单元测试时注册以覆盖统计任务
+    INSTALLED_APPS += ("pipeline.contrib.statistics",)
 
 # 供应商账户，默认为0，内部为tencent
 DEFAULT_SUPPLIER_ACCOUNT = os.getenv("DEFAULT_SUPPLIER_ACCOUNT", "0")
@@ -157,6 +159,8 @@ SHOW_EXCEPTION_DETAIL = False
 
 # 使用权限中心
 USE_IAM = bool(os.getenv("BKAPP_USE_IAM", False))
+# 权限中心策略查询结果的缓存时间(s)
+IAM_POLICY_CACHE_TTL = 30
 
 # 并发数
 CONCURRENT_NUMBER = int(os.getenv("CONCURRENT_NUMBER", 50) or 50)
@@ -245,10 +249,21 @@ CACHES = {
     "db": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "django_cache"},
     "dummy": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
     "locmem": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    # bk_token 验证结果缓存在进程内存中，避免每次请求读写数据库缓存表
+    "bk_token_verify": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bk_token_verify",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
 }
 
 CACHES["default"] = CACHES["db"]
 
+# bk_token 验证结果缓存时间(s)，验证失败的结果缓存较短时间，0 表示不缓存
+BK_TOKEN_VERIFY_CACHE_TTL = 60
+BK_TOKEN_VERIFY_NEGATIVE_CACHE_TTL = 5
+BK_TOKEN_VERIFY_CACHE_ALIAS = "bk_token_verify"
+
 # ==============================================================================
 # 后台配置
 # ==============================================================================
@@ -262,6 +277,14 @@ ENGINE_ZOMBIE_PROCESS_DOCTORS = [
     }
 ]
 ENGINE_ZOMBIE_PROCESS_HEAL_CRON = {"minute": "*/10"}
+# 僵尸进程按进程 ID 分片并发扫描
+ENGINE_ZOMBIE_PROCESS_HEAL_SHARDS = 4
+# 轮询型调度由时间轮批量唤醒，不再为每次轮询投递 celery 延时消息
+ENGINE_SCHEDULE_TIMER_ENABLED = True
+# 节点层级由 Status 物化路径记录，不再写入闭包表
+ENGINE_NODE_RELATIONSHIP_CLOSURE_ENABLED = False
+# 启动流程时批量预创建节点状态，节点状态转换走条件 UPDATE 快速路径，默认关闭
+ENGINE_STATUS_PRECREATE_ENABLED = False
 
 # API 执行者
 BACKEND_JOB_OPERATOR = os.getenv("BKAPP_BACKEND_JOB_OPERATOR", "admin")
@@ -271,6 +294,9 @@ BACKEND_SOPS_OPERATOR = os.getenv("BKAPP_BACKEND_SOPS_OPERATOR", "admin")
 # Windows的作业执行账户
 BACKEND_WINDOWS_ACCOUNT = os.getenv("BKAPP_BACKEND_WINDOWS_ACCOUNT", "system")
 
+# 订阅实例执行记录的实例信息按内容哈希去重存储
+SUBSCRIPTION_INSTANCE_INFO_DEDUP = os.getenv("BKAPP_SUBSCRIPTION_INSTANCE_INFO_DEDUP", "false").lower() == "true"
+
 CELERY_ROUTES = {
     "apps.backend.subscription.tasks.*": {"queue": "backend"},
     "apps.backend.plugin.tasks.*": {"queue": "backend"},
@@ -60,7 +60,9 @@ CELERY_ROUTES = {
     "pipeline.log.tasks.clean_expired_log": PIPELINE_ADDITIONAL_PRIORITY_ROUTING,
     "pipeline.engine.tasks.node_timeout_check": PIPELINE_ADDITIONAL_PRIORITY_ROUTING,
     "pipeline.contrib.periodic_task.tasks.periodic_task_start": PIPELINE_ADDITIONAL_PRIORITY_ROUTING,
+    "pipeline.contrib.statistics.tasks.collect_statistics": PIPELINE_ADDITIONAL_PRIORITY_ROUTING,
     "pipeline.engine.tasks.heal_zombie_process": PIPELINE_ADDITIONAL_PRIORITY_ROUTING,
+    "pipeline.engine.tasks.heal_zombie_process_shard": PIPELINE_ADDITIONAL_PRIORITY_ROUTING,
 }
 
 
@@ -34,7 +34,9 @@ PIPELINE_ENGINE_ADAPTER_API = getattr(
 PIPELINE_DATA_BACKEND = getattr(
     settings, "PIPELINE_DATA_BACKEND", "pipeline.engine.core.data.mysql_backend.MySQLDataBackend"
 )
-PIPELINE_DATA_CANDIDATE_BACKEND = getattr(settings, "PIPELINE_DATA_BACKEND", None)
+PIPELINE_DATA_CANDIDATE_BACKEND = getattr(settings, "PIPELINE_DATA_CANDIDATE_BACKEND", None)
+# 主存储写入成功后，在后台线程中异步写入候选存储
+PIPELINE_DATA_CANDIDATE_WRITE_BEHIND = getattr(settings, "PIPELINE_DATA_CANDIDATE_WRITE_BEHIND", False)
 PIPELINE_END_HANDLER = getattr(
     settings, "PIPELINE_END_HANDLER", "pipeline.engine.signals.handlers.pipeline_end_handler"
 )
@@ -66,6 +68,51 @@ PIPELINE_LOG_LEVEL = getattr(settings, "PIPELINE_LOG_LEVEL", "INFO")
 EXTERNAL_PLUGINS_SOURCE_PROXY = getattr(settings, "EXTERNAL_PLUGINS_SOURCE_PROXY", None)
 EXTERNAL_PLUGINS_SOURCE_SECURE_RESTRICT = getattr(settings, "EXTERNAL_PLUGINS_SOURCE_SECURE_RESTRICT", True)
 
+# 实例统计数据异步采集配置
+# 采集间隔(s)
+PIPELINE_STATISTICS_COLLECT_INTERVAL = getattr(settings, "PIPELINE_STATISTICS_COLLECT_INTERVAL", 10)
+# 每批采集的实例数
+PIPELINE_STATISTICS_COLLECT_BATCH_SIZE = getattr(settings, "PIPELINE_STATISTICS_COLLECT_BATCH_SIZE", 100)
+# 单次采集最多处理的批次数
+PIPELINE_STATISTICS_COLLECT_MAX_BATCHES = getattr(settings, "PIPELINE_STATISTICS_COLLECT_MAX_BATCHES", 50)
+# 已领取未确认的实例，超过该时间(s)后重新统计
+PIPELINE_STATISTICS_COLLECT_CLAIM_TIMEOUT = getattr(settings, "PIPELINE_STATISTICS_COLLECT_CLAIM_TIMEOUT", 300)
+
 # 僵尸进程扫描配置
 ENGINE_ZOMBIE_PROCESS_DOCTORS = getattr(settings, "ENGINE_ZOMBIE_PROCESS_DOCTORS", None)
 ENGINE_ZOMBIE_PROCESS_HEAL_CRON = getattr(settings, "ENGINE_ZOMBIE_PROCESS_HEAL_CRON", {"minute": "*/10"})
+# 按进程 ID 分片并发扫描的 worker 数
+ENGINE_ZOMBIE_PROCESS_HEAL_SHARDS = getattr(settings, "ENGINE_ZOMBIE_PROCESS_HEAL_SHARDS", 1)
+# 每批确诊的进程数
+ENGINE_ZOMBIE_PROCESS_HEAL_BATCH_SIZE = getattr(settings, "ENGINE_ZOMBIE_PROCESS_HEAL_BATCH_SIZE", 1000)
+
+# 轮询型调度时间轮配置
+ENGINE_SCHEDULE_TIMER_ENABLED = getattr(settings, "ENGINE_SCHEDULE_TIMER_ENABLED", False)
+# tick 间隔(s)，即时间轮槽位宽度
+ENGINE_SCHEDULE_TIMER_TICK = getattr(settings, "ENGINE_SCHEDULE_TIMER_TICK", 2)
+# 单次 tick 最多唤醒的调度数
+ENGINE_SCHEDULE_TIMER_TICK_LIMIT = getattr(settings, "ENGINE_SCHEDULE_TIMER_TICK_LIMIT", 5000)
+# 单个 celery 任务批量执行的调度数
+ENGINE_SCHEDULE_TIMER_BATCH_SIZE = getattr(settings, "ENGINE_SCHEDULE_TIMER_BATCH_SIZE", 100)
+# 已领取但未确认投递的调度，超过该时间(s)后会被再次唤醒
+ENGINE_SCHEDULE_TIMER_CLAIM_TIMEOUT = getattr(settings, "ENGINE_SCHEDULE_TIMER_CLAIM_TIMEOUT", 60)
+
+# 启动流程时批量预创建所有节点的 READY 状态，节点状态转换走条件 UPDATE 快速路径
+ENGINE_STATUS_PRECREATE_ENABLED = getattr(settings, "ENGINE_STATUS_PRECREATE_ENABLED", False)
+# 预创建状态时单次批量写入的行数
+ENGINE_STATUS_PRECREATE_BATCH_SIZE = getattr(settings, "ENGINE_STATUS_PRECREATE_BATCH_SIZE", 1000)
+
+# IOField 编解码配置
+# 压缩算法：zlib / lz4 / zstd，lz4 及 zstd 需安装对应的依赖包
+ENGINE_IOFIELD_CODEC = getattr(settings, "ENGINE_IOFIELD_CODEC", "zlib")
+# 压缩级别，为 None 时使用字段定义的压缩级别
+ENGINE_IOFIELD_COMPRESS_LEVEL = getattr(settings, "ENGINE_IOFIELD_COMPRESS_LEVEL", None)
+# 序列化结果小于该字节数时不压缩
+ENGINE_IOFIELD_COMPRESS_THRESHOLD = getattr(settings, "ENGINE_IOFIELD_COMPRESS_THRESHOLD", 256)
+
+# Redis 数据存储压缩配置，序列化结果不小于阈值时按 ENGINE_IOFIELD_CODEC 压缩，阈值为 None 时不压缩
+ENGINE_REDIS_DATA_COMPRESS_THRESHOLD = getattr(settings, "ENGINE_REDIS_DATA_COMPRESS_THRESHOLD", None)
+ENGINE_REDIS_DATA_COMPRESS_LEVEL = getattr(settings, "ENGINE_REDIS_DATA_COMPRESS_LEVEL", 1)
+
+# 是否继续写入节点关系闭包表，节点层级已记录为 Status 上的物化路径，关闭后仅升级前已开始执行的流程写入闭包表
+ENGINE_NODE_RELATIONSHIP_CLOSURE_ENABLED = getattr(settings, "ENGINE_NODE_RELATIONSHIP_CLOSURE_ENABLED", True)
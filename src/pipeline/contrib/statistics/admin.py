@@ -13,7 +13,13 @@ specific language governing permissions and limitations under the License.
 
 from django.contrib import admin
 
-from .models import ComponentExecuteData, ComponentInTemplate, InstanceInPipeline, TemplateInPipeline
+from .models import (
+    ComponentExecuteData,
+    ComponentInTemplate,
+    InstanceInPipeline,
+    StatisticsCollectQueue,
+    TemplateInPipeline,
+)
 
 
 @admin.register(ComponentInTemplate)
@@ -68,3 +74,11 @@ class InstanceInPipelineAdmin(admin.ModelAdmin):
 
     search_fields = ("instance_id",)
     list_filter = ("instance_id", "atom_total", "subprocess_total", "gateways_total")
+
+
+@admin.register(StatisticsCollectQueue)
+class StatisticsCollectQueueAdmin(admin.ModelAdmin):
+    list_display = ("instance_id", "enqueued_at", "claimed_at")
+
+    search_fields = ("instance_id",)
+    list_filter = ("claimed_at",)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("statistics", "0011_auto_20200217_0822"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatisticsCollectQueue",
+            fields=[
+                (
+                    "instance_id",
+                    models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name="实例ID"),
+                ),
+                ("enqueued_at", models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="入队时间")),
+            ],
+            options={"verbose_name": "Pipeline实例统计队列", "verbose_name_plural": "Pipeline实例统计队列"},
+        ),
+    ]
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("statistics", "0012_statisticscollectqueue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="statisticscollectqueue",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="领取时间"),
+        ),
+    ]
@@ -11,7 +11,10 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -80,3 +83,66 @@ class InstanceInPipeline(models.Model):
 
     def __unicode__(self):
         return "{}_{}_{}_{}".format(self.instance_id, self.atom_total, self.subprocess_total, self.gateways_total)
+
+
+class StatisticsCollectQueueManager(models.Manager):
+    def push(self, instance_ids):
+        """
+        实例加入统计队列，已在队列中的实例不重复加入
+        已被领取正在统计的实例重新置为待统计，确认时不会被删除，保证统计期间的新变更会被再次采集
+        :param instance_ids: 实例 ID 列表
+        """
+        self.bulk_create([self.model(instance_id=instance_id) for instance_id in instance_ids], ignore_conflicts=True)
+        self.filter(instance_id__in=instance_ids, claimed_at__isnull=False).update(claimed_at=None)
+
+    def pop(self, limit, claim_timeout):
+        """
+        按入队顺序领取至多 limit 个待统计的实例，领取超时未确认的实例会被再次领取
+        领取的实例需在统计成功后调用 ack 移出队列
+        :param limit: 最大数量
+        :param claim_timeout: 领取超时时间(s)
+        :return: 实例 ID 列表
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            instance_ids = list(
+                self.select_for_update()
+                .filter(
+                    models.Q(claimed_at__isnull=True) | models.Q(claimed_at__lt=now - timedelta(seconds=claim_timeout))
+                )
+                .order_by("enqueued_at")
+                .values_list("instance_id", flat=True)[:limit]
+            )
+            if instance_ids:
+                self.filter(instance_id__in=instance_ids).update(claimed_at=now)
+        return instance_ids
+
+    def ack(self, instance_ids):
+        """
+        统计成功的实例移出队列，领取后又重新入队的实例保留
+        :param instance_ids: 实例 ID 列表
+        """
+        self.filter(instance_id__in=instance_ids, claimed_at__isnull=False).delete()
+
+    def depth(self):
+        """
+        队列深度
+        :return: {"pending": 待统计实例数, "claimed": 已领取未确认的实例数}
+        """
+        claimed = self.filter(claimed_at__isnull=False).count()
+        return {"pending": self.count() - claimed, "claimed": claimed}
+
+
+class StatisticsCollectQueue(models.Model):
+    instance_id = models.CharField(_("实例ID"), max_length=32, primary_key=True)
+    enqueued_at = models.DateTimeField(_("入队时间"), auto_now_add=True, db_index=True)
+    claimed_at = models.DateTimeField(_("领取时间"), null=True, blank=True)
+
+    objects = StatisticsCollectQueueManager()
+
+    class Meta:
+        verbose_name = _("Pipeline实例统计队列")
+        verbose_name_plural = _("Pipeline实例统计队列")
+
+    def __unicode__(self):
+        return self.instance_id
@@ -22,12 +22,12 @@ from pipeline.component_framework.constants import LEGACY_PLUGINS_VERSION
 from pipeline.contrib.statistics.models import (
     ComponentExecuteData,
     ComponentInTemplate,
-    InstanceInPipeline,
+    StatisticsCollectQueue,
     TemplateInPipeline,
 )
 from pipeline.core.constants import PE
 from pipeline.engine import states
-from pipeline.engine.api import get_activity_histories, get_status_tree
+from pipeline.engine.api import get_activity_histories
 from pipeline.models import PipelineInstance, PipelineTemplate
 
 logger = logging.getLogger("root")
@@ -163,36 +163,6 @@ def recursive_collect_components(activities, status_tree, instance_id, stack=Non
 
 @receiver(post_save, sender=PipelineInstance)
 def pipeline_post_save_handler(sender, instance, created, **kwargs):
-    instance_id = instance.instance_id
-    # 任务必须是执行完成，由 celery 触发
-    if not created and (instance.is_finished or instance.is_revoked):
-        # 获得任务实例的执行树
-        status_tree = get_status_tree(instance_id, 99)
-        # 删除原有标准插件数据
-        ComponentExecuteData.objects.filter(instance_id=instance_id).delete()
-        # 获得任务实例的执行数据
-        data = instance.execution_data
-        try:
-            component_list = recursive_collect_components(data[PE.activities], status_tree["children"], instance_id)
-            ComponentExecuteData.objects.bulk_create(component_list)
-        except Exception as e:
-            logger.error(
-                (
-                    "pipeline_post_save_handler save ComponentExecuteData[instance_id={instance_id}] "
-                    "raise error: {error}"
-                ).format(instance_id=instance_id, error=e)
-            )
-
-    # 统计流程标准插件个数，子流程个数，网关个数
-    try:
-        atom_total, subprocess_total, gateways_total = count_pipeline_tree_nodes(instance.execution_data)
-        InstanceInPipeline.objects.update_or_create(
-            instance_id=instance_id,
-            defaults={"atom_total": atom_total, "subprocess_total": subprocess_total, "gateways_total": gateways_total},
-        )
-    except Exception as e:
-        logger.error(
-            (
-                "pipeline_post_save_handler save InstanceInPipeline[instance_id={instance_id}] " "raise error: {error}"
-            ).format(instance_id=instance_id, error=e)
-        )
+    # 创建及执行完成（由 celery 触发）的任务加入统计队列，由 collect_statistics 异步批量统计
+    if created or instance.is_finished or instance.is_revoked:
+        StatisticsCollectQueue.objects.push([instance.instance_id])
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from celery.decorators import periodic_task
+from django.db import transaction
+
+from pipeline.conf import default_settings
+from pipeline.contrib.statistics.models import ComponentExecuteData, InstanceInPipeline, StatisticsCollectQueue
+from pipeline.contrib.statistics.signals.handlers import count_pipeline_tree_nodes, recursive_collect_components
+from pipeline.core.constants import PE
+from pipeline.engine.api import get_status_tree
+from pipeline.engine.models import Status
+from pipeline.models import PipelineInstance
+
+logger = logging.getLogger("celery")
+
+
+def collect_instances_statistics(instance_ids):
+    """
+    批量统计实例的节点数及已完成实例的标准插件执行数据
+    :param instance_ids: 实例 ID 列表
+    """
+    instances = list(PipelineInstance.objects.filter(instance_id__in=instance_ids).select_related("execution_snapshot"))
+    archived_instances = [instance for instance in instances if instance.is_finished or instance.is_revoked]
+
+    status_trees = Status.objects.status_trees([instance.instance_id for instance in archived_instances], max_depth=99)
+    component_list = []
+    for instance in archived_instances:
+        instance_id = instance.instance_id
+        try:
+            # 未记录物化路径的实例逐个获取执行树
+            status_tree = status_trees.get(instance_id) or get_status_tree(instance_id, 99)
+            component_list.extend(
+                recursive_collect_components(
+                    instance.execution_data[PE.activities], status_tree["children"], instance_id
+                )
+            )
+        except Exception as e:
+            logger.error(
+                "collect ComponentExecuteData[instance_id={instance_id}] raise error: {error}".format(
+                    instance_id=instance_id, error=e
+                )
+            )
+
+    # 统计流程标准插件个数，子流程个数，网关个数
+    existing = {
+        instance_in_pipeline.instance_id: instance_in_pipeline
+        for instance_in_pipeline in InstanceInPipeline.objects.filter(instance_id__in=instance_ids)
+    }
+    instance_in_pipeline_to_create = []
+    for instance in instances:
+        try:
+            atom_total, subprocess_total, gateways_total = count_pipeline_tree_nodes(instance.execution_data)
+        except Exception as e:
+            logger.error(
+                "collect InstanceInPipeline[instance_id={instance_id}] raise error: {error}".format(
+                    instance_id=instance.instance_id, error=e
+                )
+            )
+            continue
+        instance_in_pipeline = existing.get(instance.instance_id)
+        if instance_in_pipeline is None:
+            instance_in_pipeline = InstanceInPipeline(instance_id=instance.instance_id)
+            instance_in_pipeline_to_create.append(instance_in_pipeline)
+        instance_in_pipeline.atom_total = atom_total
+        instance_in_pipeline.subprocess_total = subprocess_total
+        instance_in_pipeline.gateways_total = gateways_total
+
+    # 删除原有标准插件数据后批量写入，失败时整批回滚，实例留在队列中重新统计
+    with transaction.atomic():
+        ComponentExecuteData.objects.filter(
+            instance_id__in=[instance.instance_id for instance in archived_instances]
+        ).delete()
+        ComponentExecuteData.objects.bulk_create(
+            component_list, batch_size=default_settings.PIPELINE_STATISTICS_COLLECT_BATCH_SIZE
+        )
+        InstanceInPipeline.objects.bulk_create(instance_in_pipeline_to_create)
+        InstanceInPipeline.objects.bulk_update(
+            list(existing.values()), fields=["atom_total", "subprocess_total", "gateways_total"]
+        )
+    return len(component_list)
+
+
+@periodic_task(run_every=timedelta(seconds=default_settings.PIPELINE_STATISTICS_COLLECT_INTERVAL), ignore_result=True)
+def collect_statistics():
+    begin = time.perf_counter()
+    collected = 0
+    failed = 0
+    component_count = 0
+    for __ in range(default_settings.PIPELINE_STATISTICS_COLLECT_MAX_BATCHES):
+        instance_ids = StatisticsCollectQueue.objects.pop(
+            default_settings.PIPELINE_STATISTICS_COLLECT_BATCH_SIZE,
+            claim_timeout=default_settings.PIPELINE_STATISTICS_COLLECT_CLAIM_TIMEOUT,
+        )
+        if not instance_ids:
+            break
+        try:
+            component_count += collect_instances_statistics(instance_ids)
+            StatisticsCollectQueue.objects.ack(instance_ids)
+            collected += len(instance_ids)
+            continue
+        except Exception:
+            logger.exception("collect statistics for instances({}) failed, retry one by one".format(instance_ids))
+
+        # 逐个统计，避免个别实例异常导致整批无法统计；失败的实例保持领取状态，领取超时后重新统计
+        for instance_id in instance_ids:
+            try:
+                component_count += collect_instances_statistics([instance_id])
+            except Exception:
+                logger.exception("collect statistics for instance({}) failed".format(instance_id))
+                failed += 1
+                continue
+            StatisticsCollectQueue.objects.ack([instance_id])
+            collected += 1
+
+    if collected or failed:
+        depth = StatisticsCollectQueue.objects.depth()
+        logger.info(
+            "[statistics] collect {} instances, {} failed, {} components, cost: {:.3f}s, "
+            "queue depth: {} pending, {} claimed".format(
+                collected, failed, component_count, time.perf_counter() - begin, depth["pending"], depth["claimed"]
+            )
+        )
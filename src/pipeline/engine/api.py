@@ -366,6 +366,26 @@ def get_status_tree(node_id, max_depth=1):
     :param max_depth:
     :return:
     """
+    status_trees = Status.objects.status_trees([node_id], max_depth=max_depth)
+    if node_id in status_trees:
+        return status_trees[node_id]
+
+    # 未记录物化路径的节点从闭包表中获取
+    return _get_status_tree_by_relationship(node_id, max_depth)
+
+
+def get_status_tree_bulk(root_ids, max_depth=1):
+    """
+    get brief states of nodes and their descendants in bulk, query count does not grow with len(root_ids)
+    :param root_ids: node id list, usually root pipelines
+    :param max_depth:
+    :return: {root_id: {node_id: brief_status}}, brief_status contains parent_id for rebuilding tree,
+        nodes which have not been executed are not in result
+    """
+    return dict(Status.objects.brief_statuses(root_ids, max_depth=max_depth))
+
+
+def _get_status_tree_by_relationship(node_id, max_depth):
     rel_qs = NodeRelationship.objects.filter(ancestor_id=node_id, distance__lte=max_depth)
     if not rel_qs.exists():
         raise exceptions.InvalidOperationException("node(%s) does not exist, may have not by executed" % node_id)
@@ -376,10 +396,10 @@ def get_status_tree(node_id, max_depth=1):
     rel_qs = NodeRelationship.objects.filter(descendant_id__in=descendants, distance=1)
     targets = [rel.descendant_id for rel in rel_qs]
 
-    root_status = Status.objects.filter(id=node_id).values().first()
+    root_status = Status.objects.filter(id=node_id).values(*Status.objects.tree_fields()).first()
     root_status["elapsed_time"] = calculate_elapsed_time(root_status["started_time"], root_status["archived_time"])
     status_map = {node_id: root_status}
-    status_qs = Status.objects.filter(id__in=targets).values()
+    status_qs = Status.objects.filter(id__in=targets).values(*Status.objects.tree_fields())
     for status in status_qs:
         status["elapsed_time"] = calculate_elapsed_time(status["started_time"], status["archived_time"])
         status_map[status["id"]] = status
@@ -11,10 +11,16 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import atexit
 import contextlib
 import logging
+import os
+import pickle
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.db import close_old_connections
 from django.utils.module_loading import import_string
 
 from pipeline.conf import settings
@@ -24,6 +30,8 @@ logger = logging.getLogger("celery")
 
 _backend = None
 _candidate_backend = None
+_write_behind_executor = None
+_write_behind_pid = None
 
 
 def _import_backend(backend_cls_path):
@@ -56,6 +64,45 @@ if not _candidate_backend and settings.PIPELINE_DATA_CANDIDATE_BACKEND:
     _candidate_backend = _import_backend(settings.PIPELINE_DATA_CANDIDATE_BACKEND)
 
 
+def _candidate_write_behind(method, payload):
+    # 线程中的数据库连接不会随请求周期回收，执行前清理失效连接
+    close_old_connections()
+    with _candidate_exc_ensure(propagate=False):
+        args, kwargs = pickle.loads(payload)
+        getattr(_candidate_backend, method)(*args, **kwargs)
+
+
+def _submit_write_behind(method, *args, **kwargs):
+    global _write_behind_executor, _write_behind_pid
+
+    # celery worker 进程 fork 后线程不会被继承，需在当前进程中重新创建；单线程保证同一 key 的写入顺序
+    if _write_behind_executor is None or _write_behind_pid != os.getpid():
+        _write_behind_executor = ThreadPoolExecutor(max_workers=1)
+        _write_behind_pid = os.getpid()
+
+    # 提交前序列化参数，避免调用方后续修改对象影响写入内容
+    _write_behind_executor.submit(_candidate_write_behind, method, pickle.dumps((args, kwargs)))
+
+
+def flush_write_behind(**kwargs):
+    """
+    等待当前进程中已提交的候选存储写入全部完成，在 worker 及进程退出时调用，避免排队中的写入丢失
+    """
+    global _write_behind_executor
+
+    if _write_behind_executor is None or _write_behind_pid != os.getpid():
+        return
+
+    executor, _write_behind_executor = _write_behind_executor, None
+    executor.shutdown(wait=True)
+
+
+# prefork 子进程退出时不会执行 atexit，需同时监听 celery 的进程退出信号
+worker_process_shutdown.connect(flush_write_behind)
+worker_shutdown.connect(flush_write_behind)
+atexit.register(flush_write_behind)
+
+
 def _write_operation(method, *args, **kwargs):
     propagate = False
 
@@ -70,6 +117,11 @@ def _write_operation(method, *args, **kwargs):
         propagate = True
 
     if _candidate_backend:
+        # 主存储写入失败时候选存储是唯一的副本，必须同步写入
+        if not propagate and settings.PIPELINE_DATA_CANDIDATE_WRITE_BEHIND:
+            _submit_write_behind(method, *args, **kwargs)
+            return
+
         with _candidate_exc_ensure(propagate):
             getattr(_candidate_backend, method)(*args, **kwargs)
 
@@ -95,6 +147,28 @@ def _read_operation(method, *args, **kwargs):
     return result
 
 
+def _read_many_operation(method, keys):
+    result = {}
+    propagate = False
+
+    try:
+        result = getattr(_backend, method)(keys)
+    except Exception:
+        logger.error("data backend operate error: {}".format(traceback.format_exc()))
+
+        if not _candidate_backend:
+            raise
+
+        propagate = True
+
+    missing_keys = [key for key in keys if result.get(key) is None]
+    if missing_keys and _candidate_backend:
+        with _candidate_exc_ensure(propagate):
+            result.update(getattr(_candidate_backend, method)(missing_keys))
+
+    return result
+
+
 def set_object(key, obj):
     _write_operation("set_object", key, obj)
 
@@ -115,13 +189,38 @@ def cache_for(key):
     return _read_operation("cache_for", key)
 
 
+def set_objects(objs):
+    _write_operation("set_objects", objs)
+
+
+def get_objects(keys):
+    return _read_many_operation("get_objects", list(keys))
+
+
+def del_objects(keys):
+    _write_operation("del_objects", list(keys))
+
+
+def _schedule_parent_data_key(schedule_id):
+    return "%s_schedule_parent_data" % schedule_id
+
+
 def set_schedule_data(schedule_id, parent_data):
-    return set_object("%s_schedule_parent_data" % schedule_id, parent_data)
+    return set_object(_schedule_parent_data_key(schedule_id), parent_data)
 
 
 def get_schedule_parent_data(schedule_id):
-    return get_object("%s_schedule_parent_data" % schedule_id)
+    return get_object(_schedule_parent_data_key(schedule_id))
+
+
+def get_schedule_parent_data_bulk(schedule_ids):
+    """
+    批量获取调度的父流程数据
+    :return: {schedule_id: parent_data}
+    """
+    objs = get_objects([_schedule_parent_data_key(schedule_id) for schedule_id in schedule_ids])
+    return {schedule_id: objs.get(_schedule_parent_data_key(schedule_id)) for schedule_id in schedule_ids}
 
 
 def delete_parent_data(schedule_id):
-    return del_object("%s_schedule_parent_data" % schedule_id)
+    return del_object(_schedule_parent_data_key(schedule_id))
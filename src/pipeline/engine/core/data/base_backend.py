@@ -34,3 +34,22 @@ class BaseDataBackend(object, metaclass=ABCMeta):
     @abstractmethod
     def cache_for(self, key):
         raise NotImplementedError()
+
+    def set_objects(self, objs):
+        """
+        :param objs: {key: obj}
+        """
+        for key, obj in objs.items():
+            self.set_object(key, obj)
+        return True
+
+    def get_objects(self, keys):
+        """
+        :return: {key: obj}，不存在的 key 对应 None
+        """
+        return {key: self.get_object(key) for key in keys}
+
+    def del_objects(self, keys):
+        for key in keys:
+            self.del_object(key)
+        return True
@@ -27,6 +27,12 @@ class MySQLDataBackend(BaseDataBackend):
     def del_object(self, key):
         return DataSnapshot.objects.del_object(key)
 
+    def get_objects(self, keys):
+        return DataSnapshot.objects.get_objects(keys)
+
+    def del_objects(self, keys):
+        return DataSnapshot.objects.del_objects(keys)
+
     def expire_cache(self, key, value, expires):
         return cache.set(key, value, expires)
 
@@ -15,26 +15,67 @@ import pickle
 
 from pipeline.conf import settings
 from pipeline.engine.core.data.base_backend import BaseDataBackend
+from pipeline.engine.models.fields import IOFIELD_MAGIC, decode, encode
 
 
 class RedisDataBackend(BaseDataBackend):
+    @staticmethod
+    def _dumps(obj):
+        threshold = settings.ENGINE_REDIS_DATA_COMPRESS_THRESHOLD
+        if threshold is None:
+            return pickle.dumps(obj)
+        return encode(
+            obj,
+            codec_name=settings.ENGINE_IOFIELD_CODEC,
+            level=settings.ENGINE_REDIS_DATA_COMPRESS_LEVEL,
+            threshold=threshold,
+        )
+
+    @staticmethod
+    def _loads(data):
+        # 带编码头的数据由 IOField 编解码器解码，否则为未压缩的 pickle 数据
+        if data.startswith(IOFIELD_MAGIC):
+            return decode(data)
+        return pickle.loads(data)
+
     def set_object(self, key, obj):
-        return settings.redis_inst.set(key, pickle.dumps(obj))
+        return settings.redis_inst.set(key, self._dumps(obj))
 
     def get_object(self, key):
         pickle_str = settings.redis_inst.get(key)
         if not pickle_str:
             return None
-        return pickle.loads(pickle_str)
+        return self._loads(pickle_str)
 
     def del_object(self, key):
         return settings.redis_inst.delete(key)
 
     def expire_cache(self, key, value, expires):
-        settings.redis_inst.set(key, pickle.dumps(value))
-        settings.redis_inst.expire(key, expires)
+        settings.redis_inst.set(key, self._dumps(value), ex=expires)
         return True
 
     def cache_for(self, key):
         cache = settings.redis_inst.get(key)
-        return pickle.loads(cache) if cache else cache
+        return self._loads(cache) if cache else cache
+
+    def set_objects(self, objs):
+        # 使用 pipeline 在一次往返中完成全部写入，不依赖 MSET 以兼容集群模式
+        pipe = settings.redis_inst.pipeline(transaction=False)
+        for key, obj in objs.items():
+            pipe.set(key, self._dumps(obj))
+        pipe.execute()
+        return True
+
+    def get_objects(self, keys):
+        keys = list(keys)
+        pipe = settings.redis_inst.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+        return {key: self._loads(pickle_str) if pickle_str else None for key, pickle_str in zip(keys, pipe.execute())}
+
+    def del_objects(self, keys):
+        pipe = settings.redis_inst.pipeline(transaction=False)
+        for key in keys:
+            pipe.delete(key)
+        pipe.execute()
+        return True
@@ -14,7 +14,7 @@ specific language governing permissions and limitations under the License.
 import logging
 
 from pipeline.core.flow import activity
-from pipeline.engine import states
+from pipeline.engine import signals, states
 from pipeline.engine.models import Data, Status
 
 from ..base import FlowElementHandler
@@ -35,6 +35,9 @@ class EndEventHandler(FlowElementHandler):
             Status.objects.finish(element)
             sub_process_node = process.top_pipeline.node(pipeline.id)
             Status.objects.finish(sub_process_node)
+            signals.pipeline_state_change.send(
+                sender=Status, pipeline_ids=[sub_process_node.id], to_state=states.FINISHED
+            )
             # extract subprocess output
             process.top_pipeline.context.extract_output(sub_process_node)
             return self.HandleResult(next_node=sub_process_node.next(), should_return=False, should_sleep=False)
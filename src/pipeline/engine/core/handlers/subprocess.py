@@ -16,6 +16,8 @@ import logging
 from pipeline.conf import default_settings
 from pipeline.core.data.hydration import hydrate_data, hydrate_node_data
 from pipeline.core.flow.activity import SubProcess
+from pipeline.engine import signals, states
+from pipeline.engine.models import Status
 
 from .base import FlowElementHandler
 
@@ -56,5 +58,6 @@ class SubprocessHandler(FlowElementHandler):
 
         sub_pipeline = element.pipeline
         process.push_pipeline(sub_pipeline, is_subprocess=True)
+        signals.pipeline_state_change.send(sender=Status, pipeline_ids=[element.id], to_state=states.RUNNING)
         process.take_snapshot()
         return self.HandleResult(next_node=sub_pipeline.start_event, should_return=False, should_sleep=False)
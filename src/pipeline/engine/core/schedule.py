@@ -50,12 +50,13 @@ def auto_release_schedule_lock(schedule_id):
     logger.warning("schedule({}) unlock success.".format(schedule_id))
 
 
-def schedule(process_id, schedule_id, data_id=None):
+def schedule(process_id, schedule_id, data_id=None, parent_data=None):
     """
     调度服务主函数
     :param process_id: 被调度的节点所属的 PipelineProcess
     :param schedule_id: 调度 ID
     :param data_id: 回调数据ID
+    :param parent_data: 批量预取的父流程数据，为 None 时从数据存储中获取
     :return:
     """
     with schedule_exception_handler(process_id, schedule_id):
@@ -103,7 +104,8 @@ def schedule(process_id, schedule_id, data_id=None):
                 return
 
             # get data
-            parent_data = get_schedule_parent_data(sched_service.id)
+            if parent_data is None:
+                parent_data = get_schedule_parent_data(sched_service.id)
             if parent_data is None:
                 raise exceptions.DataRetrieveError(
                     "child process({}) retrieve parent_data error, sched_id: {}".format(process_id, schedule_id)
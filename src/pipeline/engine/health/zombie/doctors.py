@@ -32,6 +32,12 @@ class ZombieProcDoctor(metaclass=abc.ABCMeta):
     def cure(self, proc):
         raise NotImplementedError()
 
+    def confirm_bulk(self, procs):
+        """
+        批量确诊，返回确诊为僵尸进程的进程列表
+        """
+        return [proc for proc in procs if self.confirm(proc)]
+
 
 class RunningNodeZombieDoctor(ZombieProcDoctor):
     def __init__(self, max_stuck_time: float, detect_wait_callback_proc: bool = False):
@@ -77,7 +83,41 @@ class RunningNodeZombieDoctor(ZombieProcDoctor):
             if schedule.wait_callback and not self.detect_wait_callback_proc:
                 return False
 
-        stuck_time = (timezone.now() - status.state_refresh_at).total_seconds()
+        return self._exceed_max_stuck_time(proc, status.state_refresh_at, timezone.now())
+
+    def confirm_bulk(self, procs):
+        procs = [proc for proc in procs if proc.current_node_id]
+        if not procs:
+            return []
+
+        statuses = {
+            status["id"]: status
+            for status in Status.objects.filter(
+                id__in={proc.current_node_id for proc in procs}, state=states.RUNNING, state_refresh_at__isnull=False
+            ).values("id", "version", "state_refresh_at")
+        }
+
+        wait_callback_schedule_ids = set()
+        if statuses and not self.detect_wait_callback_proc:
+            wait_callback_schedule_ids = set(
+                ScheduleService.objects.filter(
+                    id__in=["{}{}".format(status["id"], status["version"]) for status in statuses.values()],
+                    wait_callback=True,
+                ).values_list("id", flat=True)
+            )
+
+        now = timezone.now()
+        confirmed_procs = []
+        for proc in procs:
+            status = statuses.get(proc.current_node_id)
+            if not status or "{}{}".format(status["id"], status["version"]) in wait_callback_schedule_ids:
+                continue
+            if self._exceed_max_stuck_time(proc, status["state_refresh_at"], now):
+                confirmed_procs.append(proc)
+        return confirmed_procs
+
+    def _exceed_max_stuck_time(self, proc, state_refresh_at, now):
+        stuck_time = (now - state_refresh_at).total_seconds()
         if float(stuck_time) > float(self.max_stuck_time):
             logger.info(
                 "Process({}) with current_node({}) stuck_time({}) exceed max_stuck_time({}), "
@@ -12,6 +12,7 @@ specific language governing permissions and limitations under the License.
 """
 
 import logging
+import time
 
 from django.utils.module_loading import import_string
 
@@ -20,6 +21,9 @@ from pipeline.engine.models import PipelineProcess
 
 logger = logging.getLogger("celery")
 
+# 进程 ID 为 32 位十六进制字符串
+PROCESS_ID_LENGTH = 32
+
 
 def get_healer():
     if not default_settings.ENGINE_ZOMBIE_PROCESS_DOCTORS:
@@ -41,34 +45,75 @@ def get_healer():
     return ZombieProcHealer(doctors=doctors)
 
 
+def shard_id_range(shard, shard_count):
+    """
+    将进程 ID 空间按字典序均分，返回分片的 ID 区间 [lower, upper)，首尾分片不设边界以覆盖非十六进制的 ID
+    """
+    space = 16 ** PROCESS_ID_LENGTH
+    lower = "{:0{}x}".format(space * shard // shard_count, PROCESS_ID_LENGTH) if shard > 0 else None
+    upper = "{:0{}x}".format(space * (shard + 1) // shard_count, PROCESS_ID_LENGTH) if shard < shard_count - 1 else None
+    return lower, upper
+
+
 class DummyZombieProcHealer(object):
-    def heal(self):
+    def heal(self, shard=0, shard_count=1):
         pass
 
 
 class ZombieProcHealer(object):
-    def __init__(self, doctors):
+    def __init__(self, doctors, batch_size=None):
         self.doctors = doctors
+        self.batch_size = batch_size or default_settings.ENGINE_ZOMBIE_PROCESS_HEAL_BATCH_SIZE
 
-    def heal(self):
+    def heal(self, shard=0, shard_count=1):
+        """
+        扫描分片内的存活进程，按批次交由 doctor 批量确诊及治疗
+        :param shard: 分片序号
+        :param shard_count: 分片总数
+        :return: {"shard": 分片序号, "scanned": 扫描进程数, "cured": 治疗进程数, "duration": 扫描耗时(s)}
+        """
+        report = {"shard": shard, "scanned": 0, "cured": 0, "duration": 0}
 
         if not self.doctors:
-            return
+            return report
 
-        proc_ids = self._get_process_ids()
+        begin = time.perf_counter()
+        proc_ids = list(self._get_process_ids(shard, shard_count))
 
-        for proc_id in proc_ids:
+        for index in range(0, len(proc_ids), self.batch_size):
 
             # get proc every time for latest state
-            proc = PipelineProcess.objects.get(id=proc_id)
-
-            if not proc.is_alive or proc.is_frozen:
-                continue
+            procs = self._get_processes(proc_ids[index : index + self.batch_size])
+            report["scanned"] += len(procs)
 
             for dr in self.doctors:
-                if dr.confirm(proc):
-                    dr.cure(proc)
+                if not procs:
                     break
 
-    def _get_process_ids(self):
-        return PipelineProcess.objects.filter(is_alive=True, is_frozen=False).values_list("id", flat=True)
+                confirmed_procs = dr.confirm_bulk(procs)
+                for proc in confirmed_procs:
+                    dr.cure(proc)
+                report["cured"] += len(confirmed_procs)
+
+                confirmed_ids = {proc.id for proc in confirmed_procs}
+                procs = [proc for proc in procs if proc.id not in confirmed_ids]
+
+        report["duration"] = time.perf_counter() - begin
+        logger.info(
+            "Zombie process heal shard({}/{}) scanned: {}, cured: {}, duration: {:.3f}s".format(
+                shard, shard_count, report["scanned"], report["cured"], report["duration"]
+            )
+        )
+        return report
+
+    def _get_process_ids(self, shard=0, shard_count=1):
+        qs = PipelineProcess.objects.filter(is_alive=True, is_frozen=False)
+        lower, upper = shard_id_range(shard, shard_count)
+        if lower is not None:
+            qs = qs.filter(id__gte=lower)
+        if upper is not None:
+            qs = qs.filter(id__lt=upper)
+        return qs.order_by().values_list("id", flat=True)
+
+    def _get_processes(self, proc_ids):
+        return list(PipelineProcess.objects.filter(id__in=proc_ids, is_alive=True, is_frozen=False))
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("engine", "0026_auto_20200610_1442"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleTimer",
+            fields=[
+                (
+                    "schedule_id",
+                    models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name="schedule ID"),
+                ),
+                ("process_id", models.CharField(max_length=32, verbose_name="Pipeline 进程 ID")),
+                ("slot", models.BigIntegerField(db_index=True, verbose_name="唤醒时间槽位")),
+            ],
+        ),
+    ]
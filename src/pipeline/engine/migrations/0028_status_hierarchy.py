@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("engine", "0027_scheduletimer"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="status",
+            name="depth",
+            field=models.IntegerField(default=0, verbose_name="节点深度"),
+        ),
+        migrations.AddField(
+            model_name="status",
+            name="parent_id",
+            field=models.CharField(default="", max_length=32, verbose_name="父节点 ID"),
+        ),
+        migrations.AddField(
+            model_name="status",
+            name="path",
+            field=models.CharField(default="", max_length=2048, verbose_name="物化路径"),
+        ),
+        migrations.AddField(
+            model_name="status",
+            name="root_id",
+            field=models.CharField(default="", max_length=32, verbose_name="根流程 ID"),
+        ),
+        migrations.AlterIndexTogether(
+            name="status",
+            index_together={("root_id", "depth")},
+        ),
+    ]
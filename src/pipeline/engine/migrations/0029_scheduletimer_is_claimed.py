@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("engine", "0028_status_hierarchy"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scheduletimer",
+            name="is_claimed",
+            field=models.BooleanField(default=False, verbose_name="是否已领取"),
+        ),
+    ]
@@ -13,22 +13,26 @@ specific language governing permissions and limitations under the License.
 
 import contextlib
 import logging
+import math
+import time
 import traceback
+from collections import defaultdict
 
 from celery.task.control import revoke
-from django.db import models, transaction
+from django.db import IntegrityError, connections, models, transaction
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 from pipeline.conf import settings as pipeline_settings
 from pipeline.constants import PIPELINE_DEFAULT_PRIORITY
 from pipeline.core.data.base import DataObject
+from pipeline.core.flow.activity import SubProcess
 from pipeline.core.pipeline import Pipeline
 from pipeline.django_signal_valve import valve
 from pipeline.engine import exceptions, signals, states, utils
 from pipeline.engine.core import data as data_service
-from pipeline.engine.models.fields import IOField
-from pipeline.engine.utils import ActionResult, Stack, calculate_elapsed_time
+from pipeline.engine.models.fields import IOField, LazyIOFieldManager
+from pipeline.engine.utils import ActionResult, LRUCache, Stack, calculate_elapsed_time
 from pipeline.log.models import LogEntry
 from pipeline.utils.uniqid import node_uniqid, uniqid
 
@@ -36,9 +40,16 @@ logger = logging.getLogger("celery")
 
 RERUN_MAX_LIMIT = pipeline_settings.PIPELINE_RERUN_MAX_TIMES
 NAME_MAX_LENGTH = 64
+STATUS_PATH_MAX_LENGTH = 2048
 
 
-class ProcessSnapshotManager(models.Manager):
+# 进程所属的根流程、根流程的优先级及队列在创建后不会再变化，进程内缓存以免每次派发 celery 任务都查询数据库
+TASK_ARGS_CACHE_SIZE = 10000
+process_root_pipeline_cache = LRUCache(maxsize=TASK_ARGS_CACHE_SIZE)
+pipeline_task_args_cache = LRUCache(maxsize=TASK_ARGS_CACHE_SIZE)
+
+
+class ProcessSnapshotManager(LazyIOFieldManager):
     def create_snapshot(self, pipeline_stack, children, root_pipeline, subprocess_stack):
         data = {
             "_pipeline_stack": pipeline_stack,
@@ -51,7 +62,7 @@ class ProcessSnapshotManager(models.Manager):
 
 class ProcessSnapshot(models.Model):
     id = models.BigAutoField(_("ID"), primary_key=True)
-    data = IOField(verbose_name=_("pipeline 运行时数据"))
+    data = IOField(verbose_name=_("pipeline 运行时数据"), lazy=True)
 
     objects = ProcessSnapshotManager()
 
@@ -92,6 +103,7 @@ class ProcessManager(models.Manager):
         process = self.create(
             id=node_uniqid(), root_pipeline_id=pipeline.id, current_node_id=pipeline.start_event.id, snapshot=snapshot
         )
+        process_root_pipeline_cache.set(process.id, process.root_pipeline_id)
         process.push_pipeline(pipeline)
         process.save()
         return process
@@ -130,6 +142,7 @@ class ProcessManager(models.Manager):
             parent_id=parent.id,
             snapshot=snapshot,
         )
+        process_root_pipeline_cache.set(child.id, child.root_pipeline_id)
         for subproc_id in parent.subprocess_stack:
             SubProcessRelationship.objects.add_relation(subproc_id, child.id)
 
@@ -181,7 +194,7 @@ class ProcessManager(models.Manager):
         :param process_id: 进程 ID
         :return:
         """
-        return PipelineModel.objects.get(id=self.get(id=process_id).root_pipeline_id).priority
+        return self.task_args_for_process(process_id)["priority"]
 
     def queue_for_process(self, process_id):
         """
@@ -189,12 +202,17 @@ class ProcessManager(models.Manager):
         :param process_id: 进程 ID
         :return:
         """
-        return PipelineModel.objects.get(id=self.get(id=process_id).root_pipeline_id).queue
+        return self.task_args_for_process(process_id)["queue"]
 
-    def task_args_for_process(self, process_id):
-        pipeline_model = PipelineModel.objects.get(id=self.get(id=process_id).root_pipeline_id)
+    def root_pipeline_id_for_process(self, process_id):
+        root_pipeline_id = process_root_pipeline_cache.get(process_id)
+        if root_pipeline_id is None:
+            root_pipeline_id = self.filter(id=process_id).values_list("root_pipeline_id", flat=True).get()
+            process_root_pipeline_cache.set(process_id, root_pipeline_id)
+        return root_pipeline_id
 
-        return {"priority": pipeline_model.priority, "queue": pipeline_model.queue}
+    def task_args_for_process(self, process_id):
+        return PipelineModel.objects.task_args_for_pipeline(self.root_pipeline_id_for_process(process_id))
 
 
 class PipelineProcess(models.Model):
@@ -574,18 +592,25 @@ def _destroy_recursively(process):
 
 class PipelineModelManager(models.Manager):
     def prepare_for_pipeline(self, pipeline, process, priority, queue=""):
-        return self.create(id=pipeline.id, process=process, priority=priority, queue=queue)
+        model = self.create(id=pipeline.id, process=process, priority=priority, queue=queue)
+        pipeline_task_args_cache.set(model.id, {"priority": model.priority, "queue": model.queue})
+        return model
 
     def pipeline_ready(self, process_id):
         valve.send(signals, "pipeline_ready", sender=Pipeline, process_id=process_id)
 
     def priority_for_pipeline(self, pipeline_id):
-        return self.get(id=pipeline_id).priority
+        return self.task_args_for_pipeline(pipeline_id)["priority"]
 
     def task_args_for_pipeline(self, pipeline_id):
-        model = self.get(id=pipeline_id)
+        task_args = pipeline_task_args_cache.get(pipeline_id)
+        if task_args is None:
+            priority, queue = self.filter(id=pipeline_id).values_list("priority", "queue").get()
+            task_args = {"priority": priority, "queue": queue}
+            pipeline_task_args_cache.set(pipeline_id, task_args)
 
-        return {"priority": model.priority, "queue": model.queue}
+        # 返回副本，避免调用方修改缓存内容
+        return dict(task_args)
 
 
 class PipelineModel(models.Model):
@@ -599,6 +624,15 @@ class PipelineModel(models.Model):
 
 class RelationshipManager(models.Manager):
     def build_relationship(self, ancestor_id, descendant_id):
+        # 节点层级优先记录为 Status 上的物化路径，无法记录时（如升级前已开始执行的流程）仍写入闭包表
+        if (
+            Status.objects.build_hierarchy(ancestor_id, descendant_id)
+            and not pipeline_settings.ENGINE_NODE_RELATIONSHIP_CLOSURE_ENABLED
+        ):
+            return
+        self.build_closure(ancestor_id, descendant_id)
+
+    def build_closure(self, ancestor_id, descendant_id):
         if self.filter(ancestor_id=ancestor_id, descendant_id=descendant_id).exists():
             # already build
             return
@@ -640,6 +674,11 @@ class StatusManager(models.Manager):
         :param unchanged_pass: 当 to_state 与当前节点状态相同时则视为操作成功
         :return:
         """
+        if pipeline_settings.ENGINE_STATUS_PRECREATE_ENABLED and not is_pipeline:
+            status = self._fast_transit(id, to_state, appoint=appoint, start=start, name=name, version=version)
+            if status is not None:
+                return ActionResult(result=True, message="success", extra=status)
+
         defaults = {
             "name": name,
             "state": to_state,
@@ -653,6 +692,8 @@ class StatusManager(models.Manager):
 
         # reservation or first creation
         if created:
+            if is_pipeline:
+                signals.pipeline_state_change.send(sender=Status, pipeline_ids=[id], to_state=to_state)
             return ActionResult(result=True, message="success", extra=status)
 
         with transaction.atomic():
@@ -703,6 +744,8 @@ class StatusManager(models.Manager):
                 status.state = to_state
                 status.state_refresh_at = timezone.now()
                 status.save()
+                if is_pipeline:
+                    signals.pipeline_state_change.send(sender=Status, pipeline_ids=[id], to_state=to_state)
                 return ActionResult(result=True, message="success", extra=status)
             else:
                 return ActionResult(
@@ -711,6 +754,36 @@ class StatusManager(models.Manager):
                     extra=status,
                 )
 
+    def _fast_transit(self, id, to_state, appoint=False, start=False, name="", version=None):
+        """
+        节点状态已预创建时的快速路径：以条件 UPDATE 完成状态转换
+        节点不存在、重入等不满足条件的情况返回 None，由常规路径处理
+        """
+        transition = states.TRANSITION_MAP[False][appoint]
+        from_states = [
+            from_state
+            for from_state, to_states in transition.items()
+            if to_state in to_states and not states.is_rerunning(from_state, to_state)
+        ]
+        if not from_states:
+            return None
+
+        now = timezone.now()
+        fields = {"state": to_state, "state_refresh_at": now}
+        if name:
+            fields["name"] = name
+        if start:
+            fields["started_time"] = now
+        if to_state in states.ARCHIVED_STATES:
+            fields["archived_time"] = now
+
+        kwargs = {"id": id, "state__in": from_states}
+        if version:
+            kwargs["version"] = version
+        if not self.filter(**kwargs).update(**fields):
+            return None
+        return self.get(id=id)
+
     def batch_transit(self, id_list, state, from_state=None, exclude=None):
         """
         批量改变节点状态，仅用于子流程的状态修改
@@ -731,7 +804,9 @@ class StatusManager(models.Manager):
         if from_state:
             kwargs["state"] = from_state
         with transaction.atomic():
-            self.select_for_update().filter(**kwargs).update(state=state)
+            id_list = list(self.select_for_update().filter(**kwargs).values_list("id", flat=True))
+            self.filter(id__in=id_list).update(state=state)
+        signals.pipeline_state_change.send(sender=Status, pipeline_ids=id_list, to_state=state)
 
     def state_for(self, id, may_not_exist=False, version=None):
         """
@@ -760,7 +835,45 @@ class StatusManager(models.Manager):
     def prepare_for_pipeline(self, pipeline):
         cls_str = str(pipeline.__class__)
         cls_name = pipeline.__class__.__name__[:NAME_MAX_LENGTH]
-        self.create(id=pipeline.id, state=states.READY, name=cls_str if len(cls_str) <= NAME_MAX_LENGTH else cls_name)
+        name = cls_str if len(cls_str) <= NAME_MAX_LENGTH else cls_name
+        if not pipeline_settings.ENGINE_STATUS_PRECREATE_ENABLED:
+            self.create(id=pipeline.id, state=states.READY, name=name)
+            return
+
+        # 批量预创建流程树中所有节点的 READY 状态及物化路径，节点执行时由 transit 快速路径推进
+        path = "{}/".format(pipeline.id)
+        statuses = [self.model(id=pipeline.id, state=states.READY, name=name, root_id=pipeline.id, depth=0, path=path)]
+        statuses.extend(self._precreated_statuses(pipeline, pipeline.id, path, 1))
+        self.bulk_create(statuses, batch_size=pipeline_settings.ENGINE_STATUS_PRECREATE_BATCH_SIZE)
+
+    def _precreated_statuses(self, pipeline, root_id, path, depth, hierarchy=True):
+        """
+        生成 pipeline 内所有节点（含子流程内节点）的 READY 状态
+        :param hierarchy: 是否记录物化路径，子流程 ID 与其节点 ID 不一致时无法记录，交由 build_hierarchy 处理
+        """
+        nodes = [pipeline.start_event, pipeline.end_event]
+        nodes.extend(pipeline.spec.activities)
+        nodes.extend(pipeline.spec.gateways)
+        for node in nodes:
+            node_path = "{}{}/".format(path, node.id)
+            node_hierarchy = hierarchy and len(node_path) <= STATUS_PATH_MAX_LENGTH
+            status = self.model(
+                id=node.id,
+                state=states.READY,
+                name=(node.name or str(node.__class__))[:NAME_MAX_LENGTH],
+                version=uniqid(),
+            )
+            if node_hierarchy:
+                status.parent_id = pipeline.id
+                status.root_id = root_id
+                status.depth = depth
+                status.path = node_path
+            yield status
+
+            if isinstance(node, SubProcess):
+                yield from self._precreated_statuses(
+                    node.pipeline, root_id, node_path, depth + 1, node_hierarchy and node.pipeline.id == node.id
+                )
 
     def fail(self, node, ex_data):
         action_res = self.transit(node.id, states.FAILED)
@@ -870,6 +983,159 @@ class StatusManager(models.Manager):
             self.select_for_update().get(id=id)
             yield
 
+    def build_hierarchy(self, parent_id, node_id):
+        """
+        记录节点在流程树中的物化路径，parent_id 与 node_id 相同时节点为根流程
+        :param parent_id: 父节点 ID
+        :param node_id: 节点 ID
+        :return: 节点的物化路径是否已记录
+        """
+        nodes = {
+            node["id"]: node
+            for node in self.filter(id__in={parent_id, node_id})
+            .order_by()
+            .values("id", "parent_id", "root_id", "depth", "path")
+        }
+        node = nodes.get(node_id)
+        if node is None:
+            return False
+
+        if parent_id == node_id:
+            if not node["path"]:
+                self.filter(id=node_id).update(root_id=node_id, parent_id="", depth=0, path="{}/".format(node_id))
+            return True
+
+        # already build
+        if node["parent_id"]:
+            return True
+
+        parent = nodes.get(parent_id)
+        if parent is None or not parent["path"]:
+            return False
+        path = "{}{}/".format(parent["path"], node_id)
+        if len(path) > STATUS_PATH_MAX_LENGTH:
+            return False
+        self.filter(id=node_id).update(
+            root_id=parent["root_id"], parent_id=parent_id, depth=parent["depth"] + 1, path=path
+        )
+        return True
+
+    def tree_fields(self):
+        return [field.attname for field in self.model._meta.concrete_fields if field.attname not in HIERARCHY_FIELDS]
+
+    def status_trees(self, node_ids, max_depth=1):
+        """
+        通过物化路径一次查询出多个节点的状态树，未记录物化路径的节点不在结果中
+        :param node_ids: 节点 ID 列表
+        :param max_depth: 最大深度
+        :return: {node_id: status_tree}
+        """
+        nodes = {
+            node["id"]: node
+            for node in self.filter(id__in=node_ids)
+            .exclude(path="")
+            .order_by()
+            .values("id", "root_id", "depth", "path")
+        }
+        if not nodes:
+            return {}
+
+        # 根流程按 root_id 直接取整棵树，其余节点按路径前缀取子树
+        condition = models.Q(
+            root_id__in=[node_id for node_id, node in nodes.items() if node["depth"] == 0], depth__lte=max_depth
+        )
+        for node in nodes.values():
+            if node["depth"]:
+                condition |= models.Q(
+                    root_id=node["root_id"], path__startswith=node["path"], depth__lte=node["depth"] + max_depth
+                )
+
+        status_maps = defaultdict(dict)
+        for status in self.filter(condition).order_by().values(*self.tree_fields(), "parent_id", "depth", "path"):
+            status["elapsed_time"] = calculate_elapsed_time(status["started_time"], status["archived_time"])
+            depth = status.pop("depth")
+            for ancestor_id in status.pop("path").split("/")[:-1]:
+                ancestor = nodes.get(ancestor_id)
+                if ancestor and depth - ancestor["depth"] <= max_depth:
+                    status_maps[ancestor_id][status["id"]] = dict(status)
+
+        status_trees = {}
+        for node_id, status_map in status_maps.items():
+            for status_id, status in status_map.items():
+                parent_id = status.pop("parent_id")
+                if status_id == node_id:
+                    continue
+                status.setdefault("children", {})
+                if parent_id in status_map:
+                    status_map[parent_id].setdefault("children", {})[status_id] = status
+            status_trees[node_id] = status_map[node_id]
+        return status_trees
+
+    def brief_statuses(self, node_ids, max_depth=1):
+        """
+        批量获取节点及其 max_depth 层以内后代的精简状态，查询次数与节点数量无关
+        :param node_ids: 节点 ID 列表，通常为根流程
+        :param max_depth: 最大深度
+        :return: {node_id: {status_id: {"parent_id": ..., "state": ..., ...}}}，包含节点自身，不存在的节点不在结果中
+        """
+        node_ids = set(node_ids)
+        brief_statuses = defaultdict(dict)
+
+        # 根流程：按 root_id 一次取出所有树
+        roots = self.filter(root_id__in=node_ids, depth__lte=max_depth).order_by().values(*BRIEF_FIELDS, "root_id")
+        for status in roots:
+            brief_statuses[status.pop("root_id")][status["id"]] = status
+
+        missing_ids = node_ids - set(brief_statuses)
+        if not missing_ids:
+            return brief_statuses
+
+        # 非根节点：按路径前缀取子树
+        nodes = {
+            node["id"]: node
+            for node in self.filter(id__in=missing_ids)
+            .exclude(path="")
+            .order_by()
+            .values("id", "root_id", "depth", "path")
+        }
+        if nodes:
+            condition = models.Q()
+            for node in nodes.values():
+                condition |= models.Q(
+                    root_id=node["root_id"], path__startswith=node["path"], depth__lte=node["depth"] + max_depth
+                )
+            for status in self.filter(condition).order_by().values(*BRIEF_FIELDS, "depth", "path"):
+                depth = status.pop("depth")
+                for ancestor_id in status.pop("path").split("/")[:-1]:
+                    if ancestor_id in nodes and depth - nodes[ancestor_id]["depth"] <= max_depth:
+                        brief_statuses[ancestor_id][status["id"]] = dict(status)
+
+        # 未记录物化路径的节点从闭包表中获取
+        legacy_ids = missing_ids - set(nodes)
+        if legacy_ids:
+            ancestors = defaultdict(list)
+            for ancestor_id, descendant_id in NodeRelationship.objects.filter(
+                ancestor_id__in=legacy_ids, distance__lte=max_depth
+            ).values_list("ancestor_id", "descendant_id"):
+                ancestors[descendant_id].append(ancestor_id)
+            parents = dict(
+                NodeRelationship.objects.filter(descendant_id__in=list(ancestors), distance=1).values_list(
+                    "descendant_id", "ancestor_id"
+                )
+            )
+            for status in self.filter(id__in=list(ancestors)).order_by().values(*BRIEF_FIELDS):
+                status["parent_id"] = parents.get(status["id"], "")
+                for ancestor_id in ancestors[status["id"]]:
+                    brief_statuses[ancestor_id][status["id"]] = dict(status)
+
+        return brief_statuses
+
+
+# 节点层级字段，仅由 StatusManager.build_hierarchy 维护
+HIERARCHY_FIELDS = ("parent_id", "root_id", "depth", "path")
+# 精简状态字段
+BRIEF_FIELDS = ("id", "parent_id", "state", "loop", "retry", "skip", "created_time", "started_time", "archived_time")
+
 
 class Status(models.Model):
     id = models.CharField(_("节点 ID"), unique=True, primary_key=True, max_length=32)
@@ -884,17 +1150,32 @@ class Status(models.Model):
     archived_time = models.DateTimeField(_("归档时间"), null=True)
     version = models.CharField(_("版本"), max_length=32)
     state_refresh_at = models.DateTimeField(_("上次状态更新的时间"), null=True)
+    parent_id = models.CharField(_("父节点 ID"), max_length=32, default="")
+    root_id = models.CharField(_("根流程 ID"), max_length=32, default="")
+    depth = models.IntegerField(_("节点深度"), default=0)
+    path = models.CharField(_("物化路径"), max_length=STATUS_PATH_MAX_LENGTH, default="")
 
     objects = StatusManager()
 
     class Meta:
         ordering = ["-created_time"]
+        index_together = [("root_id", "depth")]
+
+    def save(self, *args, **kwargs):
+        # 整行保存时不写入层级字段，避免覆盖 build_hierarchy 并发写入的物化路径
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in HIERARCHY_FIELDS
+            ]
+        return super(Status, self).save(*args, **kwargs)
 
     def is_state_for_subproc(self):
         return self.name.endswith("SubProcess")
 
 
-class DataManager(models.Manager):
+class DataManager(LazyIOFieldManager):
     def write_node_data(self, node, ex_data=None):
         data, created = self.get_or_create(id=node.id)
         if hasattr(node, "data") and node.data:
@@ -921,18 +1202,18 @@ class DataManager(models.Manager):
 
 class Data(models.Model):
     id = models.CharField(_("节点 ID"), unique=True, primary_key=True, max_length=32)
-    inputs = IOField(verbose_name=_("输入数据"), default=None)
-    outputs = IOField(verbose_name=_("输出数据"), default=None)
-    ex_data = IOField(verbose_name=_("异常数据"), default=None)
+    inputs = IOField(verbose_name=_("输入数据"), default=None, lazy=True)
+    outputs = IOField(verbose_name=_("输出数据"), default=None, lazy=True)
+    ex_data = IOField(verbose_name=_("异常数据"), default=None, lazy=True)
 
     objects = DataManager()
 
 
 class HistoryData(models.Model):
     id = models.BigAutoField(_("ID"), primary_key=True)
-    inputs = IOField(verbose_name=_("输入数据"), default=None)
-    outputs = IOField(verbose_name=_("输出数据"), default=None)
-    ex_data = IOField(verbose_name=_("异常数据"), default=None)
+    inputs = IOField(verbose_name=_("输入数据"), default=None, lazy=True)
+    outputs = IOField(verbose_name=_("输出数据"), default=None, lazy=True)
+    ex_data = IOField(verbose_name=_("异常数据"), default=None, lazy=True)
 
     objects = DataManager()
 
@@ -997,7 +1278,7 @@ class History(models.Model):
     objects = HistoryManager()
 
 
-class ScheduleServiceManager(models.Manager):
+class ScheduleServiceManager(LazyIOFieldManager):
     def set_schedule(self, activity_id, service_act, process_id, version, parent_data):
         wait_callback = service_act.service.interval is None
         multi_callback_enabled = service_act.service.multi_callback_enabled()
@@ -1049,7 +1330,7 @@ class ScheduleService(models.Model):
     schedule_times = models.IntegerField(_("被调度次数"), default=0)
     wait_callback = models.BooleanField(_("是否是回调型调度"), default=False)
     multi_callback_enabled = models.BooleanField(_("是否支持多次回调"), default=False)
-    callback_data = IOField(verbose_name=_("回调数据"), default=None)
+    callback_data = IOField(verbose_name=_("回调数据"), default=None, lazy=True)
     service_act = IOField(verbose_name=_("待调度服务"))
     is_finished = models.BooleanField(_("是否已完成"), default=False)
     version = models.CharField(_("Activity 的版本"), max_length=32, db_index=True)
@@ -1079,6 +1360,7 @@ class ScheduleService(models.Model):
         self.delete()
         data_service.delete_parent_data(schedule_id)
         ScheduleCeleryTask.objects.destroy(schedule_id)
+        ScheduleTimer.objects.disarm(schedule_id)
 
     def finish(self):
         self.is_finished = True
@@ -1086,6 +1368,7 @@ class ScheduleService(models.Model):
         self.is_scheduling = False
         self.save()
         ScheduleCeleryTask.objects.destroy(self.id)
+        ScheduleTimer.objects.disarm(self.id)
 
     def callback(self, callback_data, process_id):
         if not self.wait_callback:
@@ -1118,6 +1401,80 @@ class ScheduleService(models.Model):
         return self.wait_callback and not self.multi_callback_enabled
 
 
+class ScheduleTimerManager(models.Manager):
+    """
+    轮询型调度的时间轮：到期时间向上对齐到 tick 刻度形成槽位，同一槽位内到期的调度由同一次 tick 批量唤醒，
+    槽位上的索引承担高层时间轮的溢出桶，避免为每次轮询投递一条 celery 延时消息
+    """
+
+    @staticmethod
+    def current_slot(now=None):
+        return int((now or time.time()) // pipeline_settings.ENGINE_SCHEDULE_TIMER_TICK)
+
+    def arm(self, process_id, schedule_id, countdown):
+        """
+        登记调度的下次唤醒时间，已登记的调度覆盖为新的唤醒时间
+        :param process_id: 被调度的节点所属的 PipelineProcess
+        :param schedule_id: 调度 ID
+        :param countdown: 距离下次唤醒的秒数
+        """
+        slot = int(math.ceil((time.time() + countdown) / pipeline_settings.ENGINE_SCHEDULE_TIMER_TICK))
+        if self.filter(schedule_id=schedule_id).update(process_id=process_id, slot=slot, is_claimed=False):
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(schedule_id=schedule_id, process_id=process_id, slot=slot)
+        except IntegrityError:
+            # 并发登记时记录可能已被创建
+            self.filter(schedule_id=schedule_id).update(process_id=process_id, slot=slot, is_claimed=False)
+
+    def disarm(self, schedule_id):
+        self.filter(schedule_id=schedule_id).delete()
+
+    def claim_due(self, limit, now=None):
+        """
+        领取已到期的调度：记录不会立即删除，而是标记为已领取并将唤醒时间推迟 ENGINE_SCHEDULE_TIMER_CLAIM_TIMEOUT，
+        投递成功后再通过 ack 删除，投递失败或投递前进程退出的调度在领取超时后会被再次唤醒
+        :param limit: 单次最多领取的数量
+        :param now: 当前时间戳
+        :return: [(schedule_id, process_id, slot), ...]
+        """
+        current_slot = self.current_slot(now)
+        claim_slots = int(
+            math.ceil(
+                pipeline_settings.ENGINE_SCHEDULE_TIMER_CLAIM_TIMEOUT / pipeline_settings.ENGINE_SCHEDULE_TIMER_TICK
+            )
+        )
+        with transaction.atomic(using=self.db):
+            timers = list(
+                self.select_for_update()
+                .filter(slot__lte=current_slot)
+                .order_by("slot")
+                .values_list("schedule_id", "process_id", "slot")[:limit]
+            )
+            if timers:
+                self.filter(schedule_id__in=[schedule_id for schedule_id, __, __ in timers]).update(
+                    is_claimed=True, slot=current_slot + claim_slots
+                )
+        return timers
+
+    def ack(self, schedule_ids):
+        """
+        确认已投递的调度，领取后又被重新登记的调度保留
+        :param schedule_ids: 调度 ID 列表
+        """
+        self.filter(schedule_id__in=schedule_ids, is_claimed=True).delete()
+
+
+class ScheduleTimer(models.Model):
+    schedule_id = models.CharField(_("schedule ID"), max_length=NAME_MAX_LENGTH, primary_key=True)
+    process_id = models.CharField(_("Pipeline 进程 ID"), max_length=32)
+    slot = models.BigIntegerField(_("唤醒时间槽位"), db_index=True)
+    is_claimed = models.BooleanField(_("是否已领取"), default=False)
+
+    objects = ScheduleTimerManager()
+
+
 class SubProcessRelationshipManager(models.Manager):
     def add_relation(self, subprocess_id, process_id):
         return self.create(subprocess_id=subprocess_id, process_id=process_id)
@@ -1144,12 +1501,68 @@ class SubProcessRelationship(models.Model):
     objects = SubProcessRelationshipManager()
 
 
-class ProcessCeleryTaskManager(models.Manager):
+class CeleryTaskBindManager(models.Manager):
+    """
+    维护 bind_field -> celery_task_id 的绑定关系，bind_field 需为唯一键
+    """
+
+    bind_field = None
+
+    def bind(self, key, celery_task_id):
+        self.bulk_bind({key: celery_task_id})
+
+    def bulk_bind(self, bindings):
+        """
+        批量写入绑定关系，已存在的记录更新 celery_task_id
+        :param bindings: {key: celery_task_id}
+        :return:
+        """
+        if not bindings:
+            return
+        bindings = {key: str(celery_task_id) for key, celery_task_id in bindings.items()}
+
+        connection = connections[self.db]
+        if connection.vendor == "mysql":
+            # 一条 INSERT ... ON DUPLICATE KEY UPDATE 完成全部绑定
+            quote_name = connection.ops.quote_name
+            sql = (
+                "INSERT INTO {table} ({key_column}, {task_column}) VALUES {values} "
+                "ON DUPLICATE KEY UPDATE {task_column} = VALUES({task_column})"
+            ).format(
+                table=quote_name(self.model._meta.db_table),
+                key_column=quote_name(self.model._meta.get_field(self.bind_field).column),
+                task_column=quote_name(self.model._meta.get_field("celery_task_id").column),
+                values=", ".join(["(%s, %s)"] * len(bindings)),
+            )
+            params = [param for binding in bindings.items() for param in binding]
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+            return
+
+        # 其他数据库先更新，更新不到的记录再批量创建
+        to_be_created = [
+            key
+            for key, celery_task_id in bindings.items()
+            if not self.filter(**{self.bind_field: key}).update(celery_task_id=celery_task_id)
+        ]
+        if not to_be_created:
+            return
+        try:
+            with transaction.atomic(using=self.db):
+                self.bulk_create(
+                    [self.model(**{self.bind_field: key, "celery_task_id": bindings[key]}) for key in to_be_created]
+                )
+        except IntegrityError:
+            # 并发写入时记录可能已被创建
+            for key in to_be_created:
+                self.update_or_create(**{self.bind_field: key}, defaults={"celery_task_id": bindings[key]})
+
+
+class ProcessCeleryTaskManager(CeleryTaskBindManager):
+    bind_field = "process_id"
+
     def bind(self, process_id, celery_task_id):
-        rel, created = self.get_or_create(process_id=process_id, defaults={"celery_task_id": celery_task_id})
-        if not created:
-            rel.celery_task_id = celery_task_id
-            rel.save()
+        super(ProcessCeleryTaskManager, self).bind(process_id, celery_task_id)
 
     def unbind(self, process_id):
         self.filter(process_id=process_id).update(celery_task_id="")
@@ -1176,12 +1589,11 @@ class ProcessCeleryTask(models.Model):
     objects = ProcessCeleryTaskManager()
 
 
-class ScheduleCeleryTaskManager(models.Manager):
+class ScheduleCeleryTaskManager(CeleryTaskBindManager):
+    bind_field = "schedule_id"
+
     def bind(self, schedule_id, celery_task_id):
-        rel, created = self.get_or_create(schedule_id=schedule_id, defaults={"celery_task_id": celery_task_id})
-        if not created:
-            rel.celery_task_id = celery_task_id
-            rel.save()
+        super(ScheduleCeleryTaskManager, self).bind(schedule_id, celery_task_id)
 
     def unbind(self, schedule_id):
         self.filter(schedule_id=schedule_id).update(celery_task_id="")
@@ -1202,12 +1614,11 @@ class ScheduleCeleryTask(models.Model):
     objects = ScheduleCeleryTaskManager()
 
 
-class NodeCeleryTaskManager(models.Manager):
+class NodeCeleryTaskManager(CeleryTaskBindManager):
+    bind_field = "node_id"
+
     def bind(self, node_id, celery_task_id):
-        rel, created = self.update_or_create(node_id=node_id, defaults={"celery_task_id": celery_task_id})
-        if not created:
-            rel.celery_task_id = celery_task_id
-            rel.save()
+        super(NodeCeleryTaskManager, self).bind(node_id, celery_task_id)
 
     def unbind(self, node_id):
         self.filter(node_id=node_id).update(celery_task_id="")
@@ -40,6 +40,14 @@ class DataSnapshotManager(models.Manager):
         except DataSnapshot.DoesNotExist:
             return False
 
+    def get_objects(self, keys):
+        objs = dict(self.filter(key__in=keys).values_list("key", "obj"))
+        return {key: objs.get(key) for key in keys}
+
+    def del_objects(self, keys):
+        self.filter(key__in=keys).delete()
+        return True
+
 
 class DataSnapshot(models.Model):
     key = models.CharField(_("对象唯一键"), max_length=255, primary_key=True)
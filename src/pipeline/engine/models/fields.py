@@ -11,33 +11,263 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import contextlib
 import pickle
+import threading
 import traceback
 import zlib
 
 from django.db import models
+from django.db.models.query import ModelIterable
 
+from pipeline.conf import settings
 from pipeline.utils.utils import convert_bytes_to_str
 
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 带版本头的编码格式：魔数 + 格式版本 + 编解码器 ID
+# 旧数据为裸 zlib 流，首字节低 4 位恒为 8，不会与魔数冲突
+IOFIELD_MAGIC = b"\xa5"
+IOFIELD_FORMAT_VERSION = 1
+IOFIELD_HEADER = IOFIELD_MAGIC + bytes([IOFIELD_FORMAT_VERSION])
+IOFIELD_HEADER_LENGTH = len(IOFIELD_HEADER) + 1
+PICKLE_PROTOCOL = 4
+
+
+class Codec(object):
+    """
+    IOField 压缩编解码器，codec_id 写入数据头，已写入数据库的 ID 不可变更
+    """
+
+    codec_id = None
+    name = None
+
+    def compress(self, data, level):
+        raise NotImplementedError()
+
+    def decompress(self, data):
+        raise NotImplementedError()
+
+
+class RawCodec(Codec):
+    codec_id = 0
+    name = "raw"
+
+    def compress(self, data, level):
+        return data
+
+    def decompress(self, data):
+        return data
+
+
+class ZlibCodec(Codec):
+    codec_id = 1
+    name = "zlib"
+
+    def compress(self, data, level):
+        return zlib.compress(data, level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class Lz4Codec(Codec):
+    codec_id = 2
+    name = "lz4"
+
+    def compress(self, data, level):
+        return lz4_frame.compress(data, compression_level=level)
+
+    def decompress(self, data):
+        return lz4_frame.decompress(data)
+
+
+class ZstdCodec(Codec):
+    codec_id = 3
+    name = "zstd"
+
+    def compress(self, data, level):
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+    def decompress(self, data):
+        return zstandard.ZstdDecompressor().decompress(data)
+
+
+codecs_by_id = {}
+codecs_by_name = {}
+
+
+def register_codec(codec):
+    if codec.codec_id in codecs_by_id:
+        raise ValueError("IOField codec id({}) already registered".format(codec.codec_id))
+    codecs_by_id[codec.codec_id] = codec
+    codecs_by_name[codec.name] = codec
+
+
+register_codec(RawCodec())
+register_codec(ZlibCodec())
+# 可选依赖未安装时不注册对应的编解码器，配置为该编解码器时回退到 zlib
+if lz4_frame:
+    register_codec(Lz4Codec())
+if zstandard:
+    register_codec(ZstdCodec())
+
+
+def encode(value, codec_name="zlib", level=6, threshold=0):
+    """
+    序列化并压缩，序列化结果小于 threshold 字节时不压缩
+    """
+    data = pickle.dumps(value, PICKLE_PROTOCOL)
+    if len(data) < threshold:
+        codec = codecs_by_name["raw"]
+    else:
+        codec = codecs_by_name.get(codec_name) or codecs_by_name["zlib"]
+    return IOFIELD_HEADER + bytes([codec.codec_id]) + codec.compress(data, level)
+
+
+def decode(data):
+    data = bytes(data)
+    if not data.startswith(IOFIELD_MAGIC):
+        # 无版本头的旧数据
+        try:
+            return pickle.loads(zlib.decompress(data))
+        except UnicodeDecodeError:
+            # py2 pickle data process
+            return convert_bytes_to_str(pickle.loads(zlib.decompress(data), encoding="bytes"))
+
+    version = data[len(IOFIELD_MAGIC)]
+    if version != IOFIELD_FORMAT_VERSION:
+        raise ValueError("unsupported IOField format version: {}".format(version))
+    codec_id = data[len(IOFIELD_HEADER)]
+    if codec_id not in codecs_by_id:
+        raise ValueError("IOField codec({}) not registered".format(codec_id))
+    return pickle.loads(codecs_by_id[codec_id].decompress(data[IOFIELD_HEADER_LENGTH:]))
+
+
+class EncodedValue(object):
+    """
+    尚未解码的字段值，未被访问就保存时直接写回原始数据，省去一次编码
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def defer_decoding():
+    """
+    加载模型实例期间惰性字段不解码，交由 LazyIOFieldDescriptor 在首次访问时解码
+    """
+    depth = getattr(_local, "defer_decoding_depth", 0)
+    _local.defer_decoding_depth = depth + 1
+    try:
+        yield
+    finally:
+        _local.defer_decoding_depth = depth
+
+
+def is_decoding_deferred():
+    return getattr(_local, "defer_decoding_depth", 0) > 0
+
+
+class LazyIOFieldModelIterable(ModelIterable):
+    """
+    仅在逐行构造模型实例时推迟解码，values()、values_list() 及聚合等直接取值的查询仍返回解码后的数据
+    """
+
+    def __iter__(self):
+        iterator = super(LazyIOFieldModelIterable, self).__iter__()
+        while True:
+            with defer_decoding():
+                obj = next(iterator, None)
+            if obj is None:
+                return
+            yield obj
+
+
+class LazyIOFieldQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super(LazyIOFieldQuerySet, self).__init__(*args, **kwargs)
+        self._iterable_class = LazyIOFieldModelIterable
+
+
+LazyIOFieldManager = models.Manager.from_queryset(LazyIOFieldQuerySet)
+
+
+class LazyIOFieldDescriptor(object):
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        attname = self.field.attname
+        data = instance.__dict__
+        if attname not in data:
+            # 被 defer 的字段
+            instance.refresh_from_db(fields=[attname])
+        value = data[attname]
+        if isinstance(value, EncodedValue):
+            value = data[attname] = self.field.decode(value.raw)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
 
 class IOField(models.BinaryField):
-    def __init__(self, compress_level=6, *args, **kwargs):
+    """
+    :param compress_level: 压缩级别，ENGINE_IOFIELD_COMPRESS_LEVEL 不为 None 时以配置为准
+    :param lazy: 通过 LazyIOFieldManager 加载模型实例时不解码，首次访问字段时再解码
+    """
+
+    def __init__(self, compress_level=6, lazy=False, *args, **kwargs):
         super(IOField, self).__init__(*args, **kwargs)
         self.compress_level = compress_level
+        self.lazy = lazy
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super(IOField, self).contribute_to_class(cls, name, *args, **kwargs)
+        if self.lazy:
+            setattr(cls, self.attname, LazyIOFieldDescriptor(self))
 
     def get_prep_value(self, value):
+        if isinstance(value, EncodedValue):
+            return value.raw
         value = super(IOField, self).get_prep_value(value)
-        return zlib.compress(pickle.dumps(value), self.compress_level)
+        level = settings.ENGINE_IOFIELD_COMPRESS_LEVEL
+        return encode(
+            value,
+            codec_name=settings.ENGINE_IOFIELD_CODEC,
+            level=self.compress_level if level is None else level,
+            threshold=settings.ENGINE_IOFIELD_COMPRESS_THRESHOLD,
+        )
 
-    def to_python(self, value):
+    def decode(self, value):
         try:
-            value = super(IOField, self).to_python(value)
-            return pickle.loads(zlib.decompress(value))
-        except UnicodeDecodeError:
-            # py2 pickle data process
-            return convert_bytes_to_str(pickle.loads(zlib.decompress(value), encoding="bytes"))
+            return decode(value)
         except Exception:
             return "IOField to_python raise error: {}".format(traceback.format_exc())
 
+    def to_python(self, value):
+        if isinstance(value, EncodedValue):
+            return self.decode(value.raw)
+        return self.decode(super(IOField, self).to_python(value))
+
     def from_db_value(self, value, expression, connection, context):
+        if self.lazy and value is not None and is_decoding_deferred():
+            return EncodedValue(value)
         return self.to_python(value)
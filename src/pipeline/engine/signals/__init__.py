@@ -21,6 +21,7 @@ process_ready = Signal(providing_args=["parent_id", "current_node_id", "call_fro
 batch_process_ready = Signal(providing_args=["process_id_list", "pipeline_id"])
 wake_from_schedule = Signal(providing_args=["process_id, activity_id"])
 schedule_ready = Signal(providing_args=["schedule_id", "countdown", "process_id", "data_id"])
+batch_schedule_ready = Signal(providing_args=["schedules"])
 process_unfreeze = Signal(providing_args=["process_id"])
 # activity failed signal
 activity_failed = Signal(providing_args=["pipeline_id", "pipeline_activity_id", "subprocess_id_stack"])
@@ -30,6 +31,8 @@ service_schedule_fail = Signal(providing_args=["activity_shell", "schedule_servi
 service_schedule_success = Signal(providing_args=["activity_shell", "schedule_service"])
 node_skip_call = Signal(providing_args=["process", "node"])
 node_retry_ready = Signal(providing_args=["process", "node"])
+# pipeline and subprocess state change
+pipeline_state_change = Signal(providing_args=["pipeline_ids", "to_state"])
 
 service_activity_timeout_monitor_start = Signal(providing_args=["node_id", "version", "root_pipeline_id", "countdown"])
 service_activity_timeout_monitor_end = Signal(providing_args=["node_id", "version"])
@@ -11,9 +11,24 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import logging
+from collections import defaultdict
+
+from django.core.exceptions import ObjectDoesNotExist
+
 from pipeline.celery.settings import QueueResolver
+from pipeline.conf import settings
 from pipeline.engine import tasks
-from pipeline.engine.models import NodeCeleryTask, PipelineModel, PipelineProcess, ProcessCeleryTask, ScheduleCeleryTask
+from pipeline.engine.models import (
+    NodeCeleryTask,
+    PipelineModel,
+    PipelineProcess,
+    ProcessCeleryTask,
+    ScheduleCeleryTask,
+    ScheduleTimer,
+)
+
+logger = logging.getLogger("celery")
 
 
 class CeleryTaskArgsResolver(object):
@@ -108,6 +123,11 @@ def process_unfreeze_handler(sender, process_id, **kwargs):
 
 
 def schedule_ready_handler(sender, process_id, schedule_id, countdown, data_id=None, **kwargs):
+    # 轮询型调度登记到时间轮，回调数据需立即投递，仍走 celery 任务
+    if settings.ENGINE_SCHEDULE_TIMER_ENABLED and countdown and data_id is None:
+        ScheduleTimer.objects.arm(process_id=process_id, schedule_id=schedule_id, countdown=countdown)
+        return
+
     task = tasks.service_schedule
     args_resolver = CeleryTaskArgsResolver(process_id)
 
@@ -118,6 +138,50 @@ def schedule_ready_handler(sender, process_id, schedule_id, countdown, data_id=N
     )
 
 
+def batch_schedule_ready_handler(sender, schedules, **kwargs):
+    """
+    按队列及优先级对到期调度分组，每组切分为多个批次，每个批次由一个 worker 顺序执行
+    :param schedules: [(process_id, schedule_id), ...]
+    """
+    task = tasks.batch_service_schedule
+    groups = defaultdict(list)
+    for process_id, schedule_id in schedules:
+        try:
+            args = CeleryTaskArgsResolver(process_id).resolve_args(task)
+        except ObjectDoesNotExist:
+            # 流程已被删除，没有可唤醒的进程
+            logger.warning(
+                "[schedule_timer] process({}) of schedule({}) not exist, drop it".format(process_id, schedule_id)
+            )
+            ScheduleTimer.objects.ack([schedule_id])
+            continue
+        except Exception:
+            # 未确认的调度在领取超时后会被再次唤醒
+            logger.exception("[schedule_timer] resolve args for schedule({}) failed".format(schedule_id))
+            continue
+        groups[tuple(sorted(args.items()))].append([process_id, schedule_id])
+
+    batch_size = settings.ENGINE_SCHEDULE_TIMER_BATCH_SIZE
+    bindings = {}
+    batch_sizes = []
+    for args, group in groups.items():
+        for index in range(0, len(group), batch_size):
+            batch = group[index : index + batch_size]
+            try:
+                task_id = task.apply_async(args=[batch], **dict(args)).id
+            except Exception:
+                logger.exception("[schedule_timer] dispatch batch of {} schedules failed".format(len(batch)))
+                continue
+            batch_schedule_ids = [schedule_id for __, schedule_id in batch]
+            ScheduleTimer.objects.ack(batch_schedule_ids)
+            bindings.update({schedule_id: task_id for schedule_id in batch_schedule_ids})
+            batch_sizes.append(len(batch))
+
+    ScheduleCeleryTask.objects.bulk_bind(bindings)
+    logger.info("[schedule_timer] dispatch {} schedules in batches: {}".format(len(schedules), batch_sizes))
+    return batch_sizes
+
+
 def service_activity_timeout_monitor_start_handler(sender, node_id, version, root_pipeline_id, countdown, **kwargs):
     NodeCeleryTask.objects.start_task(
         node_id=node_id,
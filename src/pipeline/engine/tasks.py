@@ -12,6 +12,8 @@ specific language governing permissions and limitations under the License.
 """
 
 import logging
+import time
+from datetime import timedelta
 
 from celery import task
 from celery.decorators import periodic_task
@@ -19,10 +21,19 @@ from celery.schedules import crontab
 
 from pipeline.conf import default_settings
 from pipeline.core.pipeline import Pipeline
+from pipeline.django_signal_valve import valve
 from pipeline.engine import api, signals, states
 from pipeline.engine.core import runtime, schedule
+from pipeline.engine.core.data import get_schedule_parent_data_bulk
 from pipeline.engine.health import zombie
-from pipeline.engine.models import NodeCeleryTask, NodeRelationship, PipelineProcess, ProcessCeleryTask, Status
+from pipeline.engine.models import (
+    NodeCeleryTask,
+    NodeRelationship,
+    PipelineProcess,
+    ProcessCeleryTask,
+    ScheduleTimer,
+    Status,
+)
 
 logger = logging.getLogger("celery")
 
@@ -109,9 +120,9 @@ def batch_wake_up(process_id_list, pipeline_id):
     if not action_result.result:
         logger.warning("can not start pipeline({}), message: {}".format(pipeline_id, action_result.message))
         return
-    for process_id in process_id_list:
-        task_id = wake_up.apply_async(args=[process_id]).id
-        ProcessCeleryTask.objects.bind(process_id, task_id)
+    ProcessCeleryTask.objects.bulk_bind(
+        {process_id: wake_up.apply_async(args=[process_id]).id for process_id in process_id_list}
+    )
 
 
 @task(ignore_result=True)
@@ -129,6 +140,52 @@ def service_schedule(process_id, schedule_id, data_id=None):
     schedule.schedule(process_id, schedule_id, data_id)
 
 
+@task(ignore_result=True)
+def batch_service_schedule(schedules):
+    """
+    顺序执行一批到期的轮询调度，单个调度异常不影响同批次的其他调度
+    :param schedules: [(process_id, schedule_id), ...]
+    """
+    # 一次往返取回整批调度的父流程数据
+    parent_data = get_schedule_parent_data_bulk([schedule_id for __, schedule_id in schedules])
+    for process_id, schedule_id in schedules:
+        try:
+            schedule.schedule(process_id, schedule_id, parent_data=parent_data.get(schedule_id))
+        except Exception:
+            logger.exception("schedule({}) of process({}) failed in batch".format(schedule_id, process_id))
+
+
+@periodic_task(run_every=timedelta(seconds=default_settings.ENGINE_SCHEDULE_TIMER_TICK), ignore_result=True)
+def schedule_timer_tick():
+    if not default_settings.ENGINE_SCHEDULE_TIMER_ENABLED:
+        return
+
+    now = time.time()
+    timers = ScheduleTimer.objects.claim_due(limit=default_settings.ENGINE_SCHEDULE_TIMER_TICK_LIMIT, now=now)
+    if not timers:
+        return
+
+    # 延迟：实际唤醒时间与槽位到期时间之差
+    lateness = [now - slot * default_settings.ENGINE_SCHEDULE_TIMER_TICK for __, __, slot in timers]
+    logger.info(
+        "[schedule_timer] tick wake up {} schedules, lateness avg: {:.3f}s, max: {:.3f}s, limit reached: {}".format(
+            len(timers),
+            sum(lateness) / len(lateness),
+            max(lateness),
+            len(timers) >= default_settings.ENGINE_SCHEDULE_TIMER_TICK_LIMIT,
+        )
+    )
+    responses = valve.send(
+        signals,
+        "batch_schedule_ready",
+        sender=ScheduleTimer,
+        schedules=[[process_id, schedule_id] for schedule_id, process_id, __ in timers],
+    )
+    # 阀门关闭时信号已持久化，待阀门打开后重新投递，无需再由时间轮唤醒
+    if responses is None:
+        ScheduleTimer.objects.ack([schedule_id for schedule_id, __, __ in timers])
+
+
 @task(ignore_result=True)
 def node_timeout_check(node_id, version, root_pipeline_id):
     NodeCeleryTask.objects.destroy(node_id)
@@ -146,13 +203,26 @@ def node_timeout_check(node_id, version, root_pipeline_id):
 
 @periodic_task(run_every=(crontab(**default_settings.ENGINE_ZOMBIE_PROCESS_HEAL_CRON)), ignore_result=True)
 def heal_zombie_process():
-    logger.info("Zombie process heal start")
+    shard_count = default_settings.ENGINE_ZOMBIE_PROCESS_HEAL_SHARDS
+    if shard_count <= 1:
+        heal_zombie_process_shard(0, 1)
+        return
+
+    # 按进程 ID 分片，由多个 worker 并发扫描
+    for shard in range(shard_count):
+        heal_zombie_process_shard.apply_async(args=(shard, shard_count))
+    logger.info("Zombie process heal dispatched to {} shards".format(shard_count))
+
+
+@task(ignore_result=True)
+def heal_zombie_process_shard(shard, shard_count):
+    logger.info("Zombie process heal shard({}/{}) start".format(shard, shard_count))
 
     healer = zombie.get_healer()
 
     try:
-        healer.heal()
+        healer.heal(shard=shard, shard_count=shard_count)
     except Exception:
         logger.exception("An error occurred when healing zombies")
 
-    logger.info("Zombie process heal finish")
+    logger.info("Zombie process heal shard({}/{}) finish".format(shard, shard_count))
@@ -11,6 +11,9 @@ an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express o
 specific language governing permissions and limitations under the License.
 """
 
+import threading
+from collections import OrderedDict
+
 from django.utils import timezone
 
 
@@ -37,6 +40,40 @@ class ConstantDict(dict):
         raise TypeError("'%s' object does not support item assignment" % self.__class__.__name__)
 
 
+class LRUCache(object):
+    """进程内的线程安全 LRU 缓存，只适用于写入后不再变化的数据
+
+    >>> cache = LRUCache(maxsize=1)
+    >>> cache.set('a', 1)
+    >>> cache.set('b', 2)
+    >>> cache.get('a') is None
+    True
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
 def calculate_elapsed_time(started_time, archived_time):
     """
     @summary: 计算节点耗时
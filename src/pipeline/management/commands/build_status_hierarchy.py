@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pipeline.engine.models import NodeRelationship, PipelineModel, Status
+from pipeline.engine.models.core import STATUS_PATH_MAX_LENGTH
+
+
+class Command(BaseCommand):
+    help = "Build Status materialized paths from the node relationship closure table for already executed pipelines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=100, help="number of root pipelines per batch")
+        parser.add_argument(
+            "--clean", action="store_true", default=False, help="delete closure rows of the migrated pipelines"
+        )
+
+    def build(self, root_ids, clean):
+        distances = {}
+        for root_id, descendant_id, distance in NodeRelationship.objects.filter(ancestor_id__in=root_ids).values_list(
+            "ancestor_id", "descendant_id", "distance"
+        ):
+            distances[descendant_id] = (root_id, distance)
+        parents = dict(
+            NodeRelationship.objects.filter(descendant_id__in=list(distances), distance=1).values_list(
+                "descendant_id", "ancestor_id"
+            )
+        )
+
+        # 按深度从浅到深拼接路径，父节点的路径总是先于子节点生成
+        paths = {}
+        to_be_updated = []
+        for node_id, (root_id, depth) in sorted(distances.items(), key=lambda item: item[1][1]):
+            parent_id = parents.get(node_id, "") if depth else ""
+            if depth and parent_id not in paths:
+                continue
+            path = "{}{}/".format(paths.get(parent_id, ""), node_id)
+            if len(path) > STATUS_PATH_MAX_LENGTH:
+                continue
+            paths[node_id] = path
+            to_be_updated.append(Status(id=node_id, parent_id=parent_id, root_id=root_id, depth=depth, path=path))
+
+        with transaction.atomic():
+            Status.objects.bulk_update(to_be_updated, fields=["parent_id", "root_id", "depth", "path"])
+            if clean:
+                NodeRelationship.objects.filter(descendant_id__in=list(paths)).delete()
+        return len(to_be_updated)
+
+    def handle(self, **options):
+        batch = options["batch"]
+        # 已记录物化路径的根流程无需处理
+        root_ids = list(
+            Status.objects.filter(id__in=PipelineModel.objects.values("id"), path="")
+            .order_by()
+            .values_list("id", flat=True)
+        )
+        total = 0
+        for index in range(0, len(root_ids), batch):
+            total += self.build(root_ids[index : index + batch], options["clean"])
+            self.stdout.write(
+                "{}/{} pipelines processed, {} nodes built".format(
+                    min(index + batch, len(root_ids)), len(root_ids), total
+                )
+            )
@@ -70,10 +70,15 @@ def classify_inputs(pipeline_inputs, params, is_subprocess, root_pipeline_params
     return result
 
 
+def format_to_list(ids):
+    return ids if isinstance(ids, list) else [ids]
+
+
 class PipelineParser(object):
     def __init__(self, pipeline_tree, cycle_tolerate=False):
         validate_pipeline_tree(pipeline_tree, cycle_tolerate=cycle_tolerate)
-        self.pipeline_tree = deepcopy(pipeline_tree)
+        # 解析过程只读取流程树，不再修改，因此无需深拷贝，子流程直接引用所在流程树的子树
+        self.pipeline_tree = pipeline_tree
         self.cycle_tolerate = cycle_tolerate
 
     def parse(self, root_pipeline_data=None, root_pipeline_context=None):
@@ -114,7 +119,10 @@ class PipelineParser(object):
             var = get_variable(key, info, context, root_pipeline_data)
             context.set_global_var(key, var)
 
-        pipeline_data = deepcopy(root_pipeline_data)
+        # 写时复制：仅在子流程需要写入参数时复制根流程数据
+        pipeline_data = root_pipeline_data
+        if is_subprocess and classification["subprocess_params"]:
+            pipeline_data = deepcopy(root_pipeline_data)
         if is_subprocess:
             if parent_context is None:
                 raise exceptions.DataTypeErrorException("parent context of subprocess cannot be none")
@@ -191,38 +199,27 @@ class PipelineParser(object):
             else:
                 raise exceptions.FlowTypeError("Unknown Gateway type: %s" % gw[PE.type])
 
+        # 按 ID 索引节点，连线时直接查找
+        flow_nodes = {node.id: node for node in act_objs}
+        flow_nodes.update({node.id: node for node in gateway_objs})
+        flow_nodes[start[PE.id]] = start_event
+        flow_nodes[end[PE.id]] = end_event
+
         flow_objs_dict = {}
         for fl in list(flows.values()):
-            flow_nodes = act_objs + gateway_objs
-            if fl[PE.source] == start[PE.id]:
-                source = start_event
-            else:
-                source = [x for x in flow_nodes if x.id == fl[PE.source]][0]
-            if fl[PE.target] == end[PE.id]:
-                target = end_event
-            else:
-                target = [x for x in flow_nodes if x.id == fl[PE.target]][0]
-            flow_objs_dict[fl[PE.id]] = SequenceFlow(fl[PE.id], source, target)
+            flow_objs_dict[fl[PE.id]] = SequenceFlow(fl[PE.id], flow_nodes[fl[PE.source]], flow_nodes[fl[PE.target]])
         flow_objs = list(flow_objs_dict.values())
 
         # add incoming and outgoing flow to acts
-        if not isinstance(start[PE.outgoing], list):
-            start[PE.outgoing] = [start[PE.outgoing]]
-        for outgoing_id in start[PE.outgoing]:
+        for outgoing_id in format_to_list(start[PE.outgoing]):
             start_event.outgoing.add_flow(flow_objs_dict[outgoing_id])
 
-        if not isinstance(end[PE.incoming], list):
-            end[PE.incoming] = [end[PE.incoming]]
-        for incoming_id in end[PE.incoming]:
+        for incoming_id in format_to_list(end[PE.incoming]):
             end_event.incoming.add_flow(flow_objs_dict[incoming_id])
 
         for act in act_objs:
-            incoming = acts[act.id][PE.incoming]
-            if isinstance(incoming, list):
-                for s in incoming:
-                    act.incoming.add_flow(flow_objs_dict[s])
-            else:
-                act.incoming.add_flow(flow_objs_dict[incoming])
+            for incoming_id in format_to_list(acts[act.id][PE.incoming]):
+                act.incoming.add_flow(flow_objs_dict[incoming_id])
 
             act.outgoing.add_flow(flow_objs_dict[acts[act.id][PE.outgoing]])
 
@@ -232,21 +229,15 @@ class PipelineParser(object):
                     con_obj = Condition(con[PE.evaluate], flow_objs_dict[flow_id])
                     gw.add_condition(con_obj)
 
-                if isinstance(gateways[gw.id][PE.incoming], list):
-                    for incoming_id in gateways[gw.id][PE.incoming]:
-                        gw.incoming.add_flow(flow_objs_dict[incoming_id])
-                else:
-                    gw.incoming.add_flow(flow_objs_dict[gateways[gw.id][PE.incoming]])
+                for incoming_id in format_to_list(gateways[gw.id][PE.incoming]):
+                    gw.incoming.add_flow(flow_objs_dict[incoming_id])
 
                 for outgoing_id in gateways[gw.id][PE.outgoing]:
                     gw.outgoing.add_flow(flow_objs_dict[outgoing_id])
 
             elif isinstance(gw, ParallelGateway):
-                if isinstance(gateways[gw.id][PE.incoming], list):
-                    for incoming_id in gateways[gw.id][PE.incoming]:
-                        gw.incoming.add_flow(flow_objs_dict[incoming_id])
-                else:
-                    gw.incoming.add_flow(flow_objs_dict[gateways[gw.id][PE.incoming]])
+                for incoming_id in format_to_list(gateways[gw.id][PE.incoming]):
+                    gw.incoming.add_flow(flow_objs_dict[incoming_id])
 
                 for outgoing_id in gateways[gw.id][PE.outgoing]:
                     gw.outgoing.add_flow(flow_objs_dict[outgoing_id])
@@ -269,11 +260,17 @@ class PipelineParser(object):
             subprocess_stack = []
         subprocess = self.parse(root_pipeline_data, root_pipeline_context)
         for sub_id in subprocess_stack:
-            subprocess_act = [x for x in subprocess.spec.activities if x.id == sub_id][0]
+            subprocess_act = self._find_act(subprocess, sub_id)
             hydrate_subprocess_context(subprocess_act)
             subprocess = subprocess_act.pipeline
-        act = [x for x in subprocess.spec.activities if x.id == act_id][0]
-        return act
+        return self._find_act(subprocess, act_id)
+
+    @staticmethod
+    def _find_act(pipeline, act_id):
+        for act in pipeline.spec.activities:
+            if act.id == act_id:
+                return act
+        raise IndexError("activity(%s) not found in pipeline(%s)" % (act_id, pipeline.id))
 
     def get_act_inputs(self, act_id, subprocess_stack=None, root_pipeline_data=None, root_pipeline_context=None):
         act = self.get_act(act_id, subprocess_stack, root_pipeline_data, root_pipeline_context)
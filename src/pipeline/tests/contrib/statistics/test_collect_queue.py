@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from pipeline.contrib.statistics.models import StatisticsCollectQueue
+from pipeline.contrib.statistics.signals.handlers import pipeline_post_save_handler
+from pipeline.tests.mock import *  # noqa
+from pipeline.tests.mock_settings import *  # noqa
+
+CLAIM_TIMEOUT = 300
+
+
+class StatisticsCollectQueueTestCase(TestCase):
+    def test_push__deduplicate(self):
+        StatisticsCollectQueue.objects.push(["1", "2"])
+        StatisticsCollectQueue.objects.push(["2", "3"])
+
+        self.assertEqual(StatisticsCollectQueue.objects.count(), 3)
+
+    def test_pop__in_order_and_claimed(self):
+        StatisticsCollectQueue.objects.push(["1"])
+        StatisticsCollectQueue.objects.push(["2"])
+        StatisticsCollectQueue.objects.push(["3"])
+
+        self.assertEqual(StatisticsCollectQueue.objects.pop(2, CLAIM_TIMEOUT), ["1", "2"])
+        self.assertEqual(StatisticsCollectQueue.objects.pop(2, CLAIM_TIMEOUT), ["3"])
+        self.assertEqual(StatisticsCollectQueue.objects.pop(2, CLAIM_TIMEOUT), [])
+        # 领取后未确认的实例仍在队列中
+        self.assertEqual(StatisticsCollectQueue.objects.count(), 3)
+
+    def test_pop__claim_timeout(self):
+        StatisticsCollectQueue.objects.push(["1"])
+        StatisticsCollectQueue.objects.pop(1, CLAIM_TIMEOUT)
+        StatisticsCollectQueue.objects.filter(instance_id="1").update(
+            claimed_at=timezone.now() - timedelta(seconds=CLAIM_TIMEOUT + 1)
+        )
+
+        self.assertEqual(StatisticsCollectQueue.objects.pop(1, CLAIM_TIMEOUT), ["1"])
+
+    def test_ack(self):
+        StatisticsCollectQueue.objects.push(["1", "2"])
+        StatisticsCollectQueue.objects.pop(1, CLAIM_TIMEOUT)
+
+        StatisticsCollectQueue.objects.ack(["1", "2"])
+
+        # 未领取的实例不会被确认
+        self.assertEqual(list(StatisticsCollectQueue.objects.values_list("instance_id", flat=True)), ["2"])
+
+    def test_ack__push_after_claimed(self):
+        StatisticsCollectQueue.objects.push(["1"])
+        StatisticsCollectQueue.objects.pop(1, CLAIM_TIMEOUT)
+        # 统计期间实例再次变更
+        StatisticsCollectQueue.objects.push(["1"])
+
+        StatisticsCollectQueue.objects.ack(["1"])
+
+        self.assertEqual(StatisticsCollectQueue.objects.pop(1, CLAIM_TIMEOUT), ["1"])
+
+    def test_depth(self):
+        StatisticsCollectQueue.objects.push(["1", "2", "3"])
+        StatisticsCollectQueue.objects.pop(1, CLAIM_TIMEOUT)
+
+        self.assertEqual(StatisticsCollectQueue.objects.depth(), {"pending": 2, "claimed": 1})
+
+
+class PipelinePostSaveHandlerTestCase(TestCase):
+    def test_push_created_or_archived_instance(self):
+        for created, is_finished, is_revoked in ((True, False, False), (False, True, False), (False, False, True)):
+            instance = MagicMock(instance_id="created", is_finished=is_finished, is_revoked=is_revoked)
+            push = MagicMock()
+            with patch(STATISTICS_COLLECT_QUEUE_PUSH, push):
+                pipeline_post_save_handler(sender=None, instance=instance, created=created)
+            push.assert_called_once_with([instance.instance_id])
+
+    def test_not_push_running_instance(self):
+        instance = MagicMock(instance_id="running", is_finished=False, is_revoked=False)
+        push = MagicMock()
+        with patch(STATISTICS_COLLECT_QUEUE_PUSH, push):
+            pipeline_post_save_handler(sender=None, instance=instance, created=False)
+        push.assert_not_called()
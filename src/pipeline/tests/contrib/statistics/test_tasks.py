@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import json
+
+from django.test import TestCase
+from django.utils import timezone
+
+from pipeline.contrib.statistics import tasks
+from pipeline.contrib.statistics.models import ComponentExecuteData, InstanceInPipeline, StatisticsCollectQueue
+from pipeline.core.constants import PE
+from pipeline.engine import states
+from pipeline.engine.models import Status
+from pipeline.models import PipelineInstance, Snapshot
+from pipeline.utils.uniqid import uniqid
+from pipeline.tests.mock import *  # noqa
+from pipeline.tests.mock_settings import *  # noqa
+
+
+class CollectStatisticsTestCase(TestCase):
+    def queued_ids(self):
+        return set(StatisticsCollectQueue.objects.values_list("instance_id", flat=True))
+
+    @patch(STATISTICS_COLLECT_MAX_BATCHES, 2)
+    def test_collect_statistics__success(self):
+        StatisticsCollectQueue.objects.push(["1", "2"])
+        collect = MagicMock(return_value=0)
+
+        with patch(STATISTICS_COLLECT_INSTANCES_STATISTICS, collect):
+            tasks.collect_statistics()
+
+        collect.assert_called_once_with(["1", "2"])
+        self.assertEqual(self.queued_ids(), set())
+
+    @patch(STATISTICS_COLLECT_MAX_BATCHES, 2)
+    def test_collect_statistics__fail_one_by_one(self):
+        StatisticsCollectQueue.objects.push(["1", "2"])
+
+        def collect_instances_statistics(instance_ids):
+            if "2" in instance_ids:
+                raise Exception()
+            return 0
+
+        with patch(STATISTICS_COLLECT_INSTANCES_STATISTICS, MagicMock(side_effect=collect_instances_statistics)):
+            tasks.collect_statistics()
+
+        # 统计失败的实例保持领取状态，不会在本轮重复统计，领取超时后重新统计
+        self.assertEqual(self.queued_ids(), {"2"})
+        self.assertEqual(StatisticsCollectQueue.objects.depth(), {"pending": 0, "claimed": 1})
+
+    @patch(STATISTICS_COLLECT_MAX_BATCHES, 2)
+    def test_collect_statistics__push_during_collect(self):
+        StatisticsCollectQueue.objects.push(["1"])
+
+        def collect_instances_statistics(instance_ids):
+            StatisticsCollectQueue.objects.push(instance_ids)
+            return 0
+
+        with patch(STATISTICS_COLLECT_INSTANCES_STATISTICS, MagicMock(side_effect=collect_instances_statistics)):
+            tasks.collect_statistics()
+
+        # 统计期间重新入队的实例不会被确认，下一批次继续统计
+        self.assertEqual(self.queued_ids(), {"1"})
+
+
+class CollectInstancesStatisticsTestCase(TestCase):
+    def setUp(self):
+        self.instance_id, self.subprocess_id, self.act_1, self.act_2 = uniqid(), uniqid(), uniqid(), uniqid()
+        execution_data = {
+            "id": self.instance_id,
+            PE.activities: {
+                self.act_1: {PE.type: PE.ServiceActivity, "component": {"code": "code_1", "version": "1.0"}},
+                self.subprocess_id: {
+                    PE.type: PE.SubProcess,
+                    PE.pipeline: {
+                        PE.activities: {self.act_2: {PE.type: PE.ServiceActivity, "component": {"code": "code_2"}}}
+                    },
+                },
+            },
+            PE.gateways: {uniqid(): {}},
+        }
+        snapshot, __ = Snapshot.objects.create_or_get_snapshot(execution_data)
+        PipelineInstance.objects.create(instance_id=self.instance_id, execution_snapshot=snapshot, is_finished=True)
+
+        now = timezone.now()
+        for node_id in [self.instance_id, self.subprocess_id, self.act_1, self.act_2]:
+            Status.objects.create(id=node_id, state=states.FINISHED, started_time=now, archived_time=now)
+        edges = [
+            (self.instance_id, self.instance_id),
+            (self.instance_id, self.subprocess_id),
+            (self.instance_id, self.act_1),
+            (self.subprocess_id, self.act_2),
+        ]
+        for parent_id, node_id in edges:
+            Status.objects.build_hierarchy(parent_id, node_id)
+
+    def test_collect_instances_statistics(self):
+        # 重复统计时覆盖原有数据
+        for __ in range(2):
+            self.assertEqual(tasks.collect_instances_statistics([self.instance_id]), 2)
+
+        components = {
+            (data.component_code, data.node_id, data.is_sub, tuple(json.loads(data.subprocess_stack)), data.status)
+            for data in ComponentExecuteData.objects.filter(instance_id=self.instance_id)
+        }
+        self.assertEqual(
+            components,
+            {("code_1", self.act_1, False, (), True), ("code_2", self.act_2, True, (self.subprocess_id,), True)},
+        )
+
+        instance_in_pipeline = InstanceInPipeline.objects.get(instance_id=self.instance_id)
+        self.assertEqual(instance_in_pipeline.atom_total, 1)
+        self.assertEqual(instance_in_pipeline.subprocess_total, 1)
+        self.assertEqual(instance_in_pipeline.gateways_total, 1)
@@ -29,6 +29,7 @@ class EngineDataAPITestCase(TestCase):
         cls.import_backend_patch.start()
 
         cls.api = import_string("pipeline.engine.core.data.api")
+        cls.api.settings.PIPELINE_DATA_CANDIDATE_WRITE_BEHIND = False
         cls.write_methods = ["set_object", "del_object", "expire_cache"]
         cls.read_methods = ["get_object", "cache_for"]
         cls.method_params = {
@@ -238,3 +239,64 @@ class EngineDataAPITestCase(TestCase):
                 self.assertIsNotNone(data)
                 self.backend.get_object.assert_called_once_with("key_schedule_parent_data")
                 self.candidate_backend.get_object.assert_not_called()
+
+    @patch(ENGINE_DATA_API_SETTINGS_WRITE_BEHIND, True)
+    @patch(ENGINE_DATA_API_CLOSE_OLD_CONNECTIONS, MagicMock())
+    def test_write__with_candidate_write_behind(self):
+        executor = MagicMock()
+        executor.submit = MagicMock(side_effect=lambda func, *args: func(*args))
+
+        with patch(ENGINE_DATA_API_BACKEND, self.backend):
+            with patch(ENGINE_DATA_API_CANDIDATE_BACKEND, self.candidate_backend):
+                with patch(ENGINE_DATA_API_WRITE_BEHIND_EXECUTOR, executor):
+                    with patch(ENGINE_DATA_API_WRITE_BEHIND_PID, self.api.os.getpid()):
+                        self.api.set_object("key", {"a": 1})
+                        executor.submit.assert_called_once()
+                        self.backend.set_object.assert_called_once_with("key", {"a": 1})
+                        self.candidate_backend.set_object.assert_called_once_with("key", {"a": 1})
+
+                        # 主存储写入失败时同步写入候选存储
+                        self.backend.del_object = MagicMock(side_effect=Exception)
+                        self.api.del_object("key")
+                        executor.submit.assert_called_once()
+                        self.candidate_backend.del_object.assert_called_once_with("key")
+
+    def test_flush_write_behind(self):
+        executor = MagicMock()
+
+        # 其他进程创建的线程池不在当前进程中等待
+        with patch(ENGINE_DATA_API_WRITE_BEHIND_EXECUTOR, executor):
+            with patch(ENGINE_DATA_API_WRITE_BEHIND_PID, -1):
+                self.api.flush_write_behind()
+                executor.shutdown.assert_not_called()
+
+        with patch(ENGINE_DATA_API_WRITE_BEHIND_EXECUTOR, executor):
+            with patch(ENGINE_DATA_API_WRITE_BEHIND_PID, self.api.os.getpid()):
+                self.api.flush_write_behind()
+                executor.shutdown.assert_called_once_with(wait=True)
+                self.assertIsNone(self.api._write_behind_executor)
+
+    def test_get_objects(self):
+        self.backend.get_objects = MagicMock(return_value={"key1": "obj1", "key2": None})
+        self.candidate_backend.get_objects = MagicMock(return_value={"key2": "obj2"})
+
+        with patch(ENGINE_DATA_API_BACKEND, self.backend):
+            with patch(ENGINE_DATA_API_CANDIDATE_BACKEND, self.candidate_backend):
+                data = self.api.get_objects(["key1", "key2"])
+                self.assertEqual(data, {"key1": "obj1", "key2": "obj2"})
+                self.backend.get_objects.assert_called_once_with(["key1", "key2"])
+                self.candidate_backend.get_objects.assert_called_once_with(["key2"])
+
+    def test_get_schedule_parent_data_bulk(self):
+        self.backend.get_objects = MagicMock(
+            return_value={"key1_schedule_parent_data": "data1", "key2_schedule_parent_data": "data2"}
+        )
+
+        with patch(ENGINE_DATA_API_BACKEND, self.backend):
+            with patch(ENGINE_DATA_API_CANDIDATE_BACKEND, self.candidate_backend):
+                data = self.api.get_schedule_parent_data_bulk(["key1", "key2"])
+                self.assertEqual(data, {"key1": "data1", "key2": "data2"})
+                self.backend.get_objects.assert_called_once_with(
+                    ["key1_schedule_parent_data", "key2_schedule_parent_data"]
+                )
+                self.candidate_backend.get_objects.assert_not_called()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import pickle
+
+from django.test import TestCase, override_settings
+
+from pipeline.engine.core.data.redis_backend import RedisDataBackend
+from pipeline.engine.models.fields import IOFIELD_MAGIC
+
+
+class InMemoryRedis(object):
+    """
+    进程内的 Redis 替身，记录每次往返以校验 pipeline 的批量效果
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.round_trips = 0
+
+    def set(self, key, value, ex=None):
+        self.round_trips += 1
+        self.data[key] = value
+        if ex is None:
+            self.expires.pop(key, None)
+        else:
+            self.expires[key] = ex
+        return True
+
+    def get(self, key):
+        self.round_trips += 1
+        return self.data.get(key)
+
+    def delete(self, *keys):
+        self.round_trips += 1
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    def pipeline(self, transaction=True):
+        return InMemoryRedisPipeline(self)
+
+
+class InMemoryRedisPipeline(object):
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return command
+
+    def execute(self):
+        results = [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+        # 整个 pipeline 只算一次往返
+        self.redis.round_trips -= len(self.commands) - 1
+        self.commands = []
+        return results
+
+
+class RedisBackendTestCase(TestCase):
+    def setUp(self):
+        self.redis = InMemoryRedis()
+        self.settings_override = override_settings(redis_inst=self.redis, ENGINE_REDIS_DATA_COMPRESS_THRESHOLD=None)
+        self.settings_override.enable()
+        self.backend = RedisDataBackend()
+        self.key = "test_key"
+        self.obj = {"a": "a", 1: "1", 2: "2", "list": [4, 5, 6]}
+
+    def tearDown(self):
+        self.settings_override.disable()
+
+    def test_set_and_get_object(self):
+        self.backend.set_object(self.key, self.obj)
+        self.assertEqual(pickle.loads(self.redis.data[self.key]), self.obj)
+        self.assertEqual(self.backend.get_object(self.key), self.obj)
+        self.assertIsNone(self.backend.get_object("not_exist"))
+
+    def test_del_object(self):
+        self.backend.set_object(self.key, self.obj)
+        self.backend.del_object(self.key)
+        self.assertIsNone(self.backend.get_object(self.key))
+
+    def test_expire_cache(self):
+        self.backend.expire_cache(self.key, self.obj, 5)
+        self.assertEqual(self.redis.round_trips, 1)
+        self.assertEqual(self.redis.expires[self.key], 5)
+        self.assertEqual(self.backend.cache_for(self.key), self.obj)
+
+    def test_multi_key_operations(self):
+        objs = {"key{}".format(index): {"index": index} for index in range(10)}
+
+        self.backend.set_objects(objs)
+        self.assertEqual(self.redis.round_trips, 1)
+
+        result = self.backend.get_objects(list(objs) + ["not_exist"])
+        self.assertEqual(self.redis.round_trips, 2)
+        self.assertEqual(result, dict(objs, not_exist=None))
+
+        self.backend.del_objects(list(objs))
+        self.assertEqual(self.redis.round_trips, 3)
+        self.assertEqual(self.redis.data, {})
+
+    def test_compress(self):
+        large_obj = {"list": list(range(1000))}
+        with override_settings(ENGINE_REDIS_DATA_COMPRESS_THRESHOLD=256):
+            self.backend.set_objects({"small": self.obj, "large": large_obj})
+            self.assertTrue(self.redis.data["large"].startswith(IOFIELD_MAGIC))
+            self.assertLess(len(self.redis.data["large"]), len(pickle.dumps(large_obj)))
+            self.assertEqual(self.backend.get_objects(["small", "large"]), {"small": self.obj, "large": large_obj})
+
+        # 关闭压缩后仍可读取已压缩的数据
+        self.assertEqual(self.backend.get_object("large"), large_obj)
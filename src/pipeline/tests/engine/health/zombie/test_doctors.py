@@ -19,7 +19,7 @@ from django.utils import timezone
 from pipeline.core.pipeline import Pipeline
 from pipeline.engine import signals
 from pipeline.engine.health.zombie.doctors import RunningNodeZombieDoctor
-from pipeline.engine.models import Status
+from pipeline.engine.models import ScheduleService, Status
 from pipeline.tests.engine.mock import *  # noqa
 from pipeline.tests.mock_settings import *  # noqa
 
@@ -116,6 +116,43 @@ class RunningNodeZombieDoctorTestCase(TestCase):
             with patch(PIPELINE_SCHEDULE_SCHEDULE_FOR, MagicMock(return_value=schedule)):
                 self.assertFalse(doctor.confirm(proc))
 
+    def test_confirm_bulk(self):
+        now = timezone.now()
+        stuck_id, fresh_id, finished_id, wait_callback_id, legacy_id = [uniqid() for __ in range(5)]
+        Status.objects.create(id=stuck_id, state="RUNNING", version="v1", state_refresh_at=now - timedelta(seconds=10))
+        Status.objects.create(id=fresh_id, state="RUNNING", version="v1", state_refresh_at=now)
+        Status.objects.create(
+            id=finished_id, state="FINISHED", version="v1", state_refresh_at=now - timedelta(seconds=10)
+        )
+        Status.objects.create(
+            id=wait_callback_id, state="RUNNING", version="v1", state_refresh_at=now - timedelta(seconds=10)
+        )
+        Status.objects.create(id=legacy_id, state="RUNNING", version="v1")
+        ScheduleService.objects.create(
+            id="{}v1".format(wait_callback_id),
+            activity_id=wait_callback_id,
+            process_id="p",
+            version="v1",
+            wait_callback=True,
+            service_act=None,
+        )
+
+        procs = {}
+        for node_id in [stuck_id, fresh_id, finished_id, wait_callback_id, legacy_id, uniqid(), None]:
+            procs[node_id] = MagicMock()
+            procs[node_id].id = uniqid()
+            procs[node_id].current_node_id = node_id
+
+        doctor = RunningNodeZombieDoctor(5)
+        with self.assertNumQueries(2):
+            self.assertEqual(doctor.confirm_bulk(list(procs.values())), [procs[stuck_id]])
+
+        doctor = RunningNodeZombieDoctor(5, True)
+        with self.assertNumQueries(1):
+            self.assertEqual(doctor.confirm_bulk(list(procs.values())), [procs[stuck_id], procs[wait_callback_id]])
+
+        self.assertEqual(doctor.confirm_bulk([procs[None]]), [])
+
     @patch(PIPELINE_STATUS_RAW_FAIL, MagicMock(side_effect=Exception))
     def test_cure__raw_fail_raise(self):
         doctor = RunningNodeZombieDoctor(1)
@@ -15,8 +15,10 @@ from django.test import TestCase
 from mock import MagicMock, patch
 
 from pipeline.engine.health.zombie.doctors import ZombieProcDoctor
-from pipeline.engine.health.zombie.heal import DummyZombieProcHealer, ZombieProcHealer, get_healer
+from pipeline.engine.health.zombie.heal import DummyZombieProcHealer, ZombieProcHealer, get_healer, shard_id_range
+from pipeline.engine.models import PipelineProcess
 from pipeline.tests.mock_settings import *  # noqa
+from pipeline.utils.uniqid import uniqid
 
 
 class HealTestCase(TestCase):
@@ -64,98 +66,81 @@ class ZombieProcHealerTestCase(TestCase):
     def test_heal__emptry_doctors(self):
         healer = ZombieProcHealer([])
         healer._get_process_ids = MagicMock(return_value=[1, 2, 3])
-        healer.heal()
+        report = healer.heal()
+
+        healer._get_process_ids.assert_not_called()
+        self.assertEqual(report["scanned"], 0)
 
     def test_heal__process_state_not_fit(self):
         doctor_1 = MagicMock()
         healer = ZombieProcHealer([doctor_1])
         healer._get_process_ids = MagicMock(return_value=[1, 2, 3])
+        healer._get_processes = MagicMock(return_value=[])
 
-        proc_1 = MagicMock()
-        proc_1.id = 1
-        proc_1.is_alive = False
-        proc_1.is_frozen = False
-
-        proc_2 = MagicMock()
-        proc_2.id = 2
-        proc_2.is_alive = True
-        proc_2.is_frozen = True
-
-        proc_3 = MagicMock()
-        proc_3.id = 3
-        proc_3.is_alive = False
-        proc_3.is_frozen = True
-
-        processes = {1: proc_1, 2: proc_2, 3: proc_3}
-
-        def get(id):
-            return processes[id]
-
-        with patch(PIPELINE_PROCESS_GET, get):
-            self.assertFalse(not healer.doctors)
-            healer.heal()
-            doctor_1.confirm.assert_not_called()
-            doctor_1.cure.assert_not_called()
+        self.assertFalse(not healer.doctors)
+        report = healer.heal()
+        doctor_1.confirm_bulk.assert_not_called()
+        doctor_1.cure.assert_not_called()
+        self.assertEqual(report["scanned"], 0)
+        self.assertEqual(report["cured"], 0)
 
     def test_heal(self):
-
-        doctor_1 = MagicMock()
-        doctor_1_confirm_count = {"count": 0}
-
-        def doctor_1_confirm(proc, count=doctor_1_confirm_count):
-            count["count"] += 1
-            return proc.id == 1
-
-        doctor_1.confirm = doctor_1_confirm
-
-        doctor_2 = MagicMock()
-        doctor_2_confirm_count = {"count": 0}
-
-        def doctor_2_confirm(proc, count=doctor_2_confirm_count):
-            count["count"] += 1
-            return proc.id == 2
-
-        doctor_2.confirm = doctor_2_confirm
-
-        doctor_3 = MagicMock()
-        doctor_3_confirm_count = {"count": 0}
-
-        def doctor_3_confirm(proc, count=doctor_3_confirm_count):
-            count["count"] += 1
-            return proc.id == 3
-
-        doctor_3.confirm = doctor_3_confirm
-
-        healer = ZombieProcHealer([doctor_1, doctor_2, doctor_3])
-        healer._get_process_ids = MagicMock(return_value=[1, 2, 3])
-
-        proc_1 = MagicMock()
-        proc_1.id = 1
-        proc_1.is_alive = True
-        proc_1.is_frozen = False
-
-        proc_2 = MagicMock()
-        proc_2.id = 2
-        proc_2.is_alive = True
-        proc_2.is_frozen = False
-
-        proc_3 = MagicMock()
-        proc_3.id = 3
-        proc_3.is_alive = True
-        proc_3.is_frozen = False
-
-        processes = {1: proc_1, 2: proc_2, 3: proc_3}
-
-        def get(id):
-            return processes[id]
-
-        with patch(PIPELINE_PROCESS_GET, get):
-            healer.heal()
-
-            self.assertEqual(doctor_1_confirm_count["count"], 3)
-            self.assertEqual(doctor_2_confirm_count["count"], 2)
-            self.assertEqual(doctor_3_confirm_count["count"], 1)
-
-            doctor_1.cure.assert_called_once_with(proc_1)
-            doctor_2.cure.assert_called_once_with(proc_2)
-            doctor_3.cure.assert_called_once_with(proc_3)
+        procs = {}
+        for proc_id in [1, 2, 3, 4]:
+            procs[proc_id] = MagicMock()
+            procs[proc_id].id = proc_id
+
+        def make_doctor(confirm_id, confirm_count):
+            def confirm_bulk(procs):
+                confirm_count.append(len(procs))
+                return [proc for proc in procs if proc.id == confirm_id]
+
+            doctor = MagicMock()
+            doctor.confirm_bulk = confirm_bulk
+            return doctor
+
+        doctor_1_confirm_count = []
+        doctor_2_confirm_count = []
+        doctor_3_confirm_count = []
+        doctor_1 = make_doctor(1, doctor_1_confirm_count)
+        doctor_2 = make_doctor(2, doctor_2_confirm_count)
+        doctor_3 = make_doctor(3, doctor_3_confirm_count)
+
+        healer = ZombieProcHealer([doctor_1, doctor_2, doctor_3], batch_size=3)
+        healer._get_process_ids = MagicMock(return_value=[1, 2, 3, 4])
+        healer._get_processes = MagicMock(side_effect=lambda proc_ids: [procs[proc_id] for proc_id in proc_ids])
+
+        report = healer.heal(shard=1, shard_count=2)
+
+        healer._get_process_ids.assert_called_once_with(1, 2)
+        self.assertEqual(healer._get_processes.call_count, 2)
+        # 每批次内，已确诊的进程不再交由后续 doctor 确诊
+        self.assertEqual(doctor_1_confirm_count, [3, 1])
+        self.assertEqual(doctor_2_confirm_count, [2, 1])
+        self.assertEqual(doctor_3_confirm_count, [1, 1])
+
+        doctor_1.cure.assert_called_once_with(procs[1])
+        doctor_2.cure.assert_called_once_with(procs[2])
+        doctor_3.cure.assert_called_once_with(procs[3])
+        self.assertEqual(report["shard"], 1)
+        self.assertEqual(report["scanned"], 4)
+        self.assertEqual(report["cured"], 3)
+
+    def test_get_process_ids__shard(self):
+        proc_ids = [uniqid() for __ in range(20)] + ["0" * 32, "f" * 32, "not_hex_id"]
+        for proc_id in proc_ids:
+            PipelineProcess.objects.create(id=proc_id, root_pipeline_id=uniqid(), is_alive=True)
+        PipelineProcess.objects.create(id=uniqid(), root_pipeline_id=uniqid(), is_alive=True, is_frozen=True)
+        PipelineProcess.objects.create(id=uniqid(), root_pipeline_id=uniqid(), is_alive=False)
+
+        healer = ZombieProcHealer([MagicMock()])
+        sharded_ids = [set(healer._get_process_ids(shard, 3)) for shard in range(3)]
+
+        self.assertEqual(set.union(*sharded_ids), set(proc_ids))
+        self.assertEqual(sum(len(ids) for ids in sharded_ids), len(proc_ids))
+        self.assertEqual(set(healer._get_process_ids()), set(proc_ids))
+
+    def test_shard_id_range(self):
+        self.assertEqual(shard_id_range(0, 1), (None, None))
+        self.assertEqual(shard_id_range(0, 2), (None, "8" + "0" * 31))
+        self.assertEqual(shard_id_range(1, 2), ("8" + "0" * 31, None))
@@ -13,7 +13,10 @@ specific language governing permissions and limitations under the License.
 
 from django.test import TestCase
 
-from pipeline.engine.models import NodeRelationship
+from pipeline.engine import states
+from pipeline.engine.models import NodeRelationship, Status
+from pipeline.tests.mock import *  # noqa
+from pipeline.tests.mock_settings import *  # noqa
 
 
 class TestNodeRelationship(TestCase):
@@ -63,3 +66,17 @@ class TestNodeRelationship(TestCase):
         self.assertRaises(NodeRelationship.DoesNotExist, get, "2", "6")
         self.assertRaises(NodeRelationship.DoesNotExist, get, "3", "4")
         self.assertRaises(NodeRelationship.DoesNotExist, get, "3", "5")
+
+    def test_build_relationship__closure_disabled(self):
+        Status.objects.create(id="1", state=states.RUNNING)
+        Status.objects.create(id="2", state=states.RUNNING)
+
+        with patch(ENGINE_NODE_RELATIONSHIP_CLOSURE_ENABLED, False):
+            NodeRelationship.objects.build_relationship("1", "1")
+            NodeRelationship.objects.build_relationship("1", "2")
+            # 父节点未记录物化路径时仍写入闭包表
+            NodeRelationship.objects.build_relationship("3", "4")
+
+        self.assertFalse(NodeRelationship.objects.filter(descendant_id__in=["1", "2"]).exists())
+        self.assertEqual(Status.objects.get(id="2").path, "1/2/")
+        self.assertTrue(NodeRelationship.objects.filter(ancestor_id="4", descendant_id="4").exists())
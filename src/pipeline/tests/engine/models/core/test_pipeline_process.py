@@ -877,3 +877,25 @@ class TestPipelineProcess(TestCase):
         PipelineModel.objects.prepare_for_pipeline(pipeline=pipeline, process=process, priority=priority)
 
         self.assertEqual(PipelineProcess.objects.priority_for_process(process.id), priority)
+
+    def test_task_args_for_process(self):
+        from pipeline.engine.models.core import pipeline_task_args_cache, process_root_pipeline_cache
+
+        pipeline = PipelineObject()
+        process = PipelineProcess.objects.prepare_for_pipeline(pipeline)
+        PipelineModel.objects.prepare_for_pipeline(pipeline=pipeline, process=process, priority=5, queue="api")
+
+        # 创建时已写入缓存
+        with self.assertNumQueries(0):
+            task_args = PipelineProcess.objects.task_args_for_process(process.id)
+        self.assertEqual(task_args, {"priority": 5, "queue": "api"})
+
+        # 其他 worker 进程中缓存未命中，查询后写入缓存
+        process_root_pipeline_cache.clear()
+        pipeline_task_args_cache.clear()
+        with self.assertNumQueries(2):
+            self.assertEqual(PipelineProcess.objects.task_args_for_process(process.id), task_args)
+        with self.assertNumQueries(0):
+            self.assertEqual(PipelineProcess.objects.task_args_for_process(process.id), task_args)
+
+        self.assertRaises(PipelineProcess.DoesNotExist, PipelineProcess.objects.task_args_for_process, "not_exist")
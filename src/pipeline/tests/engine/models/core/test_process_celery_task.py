@@ -35,6 +35,19 @@ class TestProcessCeleryTask(TestCase):
         self.assertEqual(task.process_id, process_id)
         self.assertEqual(task.celery_task_id, celery_task_id)
 
+    def test_bulk_bind(self):
+        process_ids = [uniqid() for _ in range(5)]
+        ProcessCeleryTask.objects.bind(process_id=process_ids[0], celery_task_id="old_task_id")
+
+        bindings = {process_id: "{}{}".format(uniqid(), uniqid())[:40] for process_id in process_ids}
+        ProcessCeleryTask.objects.bulk_bind(bindings)
+        self.assertEqual(
+            dict(
+                ProcessCeleryTask.objects.filter(process_id__in=process_ids).values_list("process_id", "celery_task_id")
+            ),
+            bindings,
+        )
+
     def test_unbind(self):
         process_id = uniqid()
         celery_task_id = "{}{}".format(uniqid(), uniqid())[:40]
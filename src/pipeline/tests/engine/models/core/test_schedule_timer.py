@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import mock
+from django.test import TestCase
+
+from pipeline.engine.models import PipelineProcess, ScheduleTimer
+from pipeline.engine.signals import handlers
+from pipeline.engine.signals.handlers import CeleryTaskArgsResolver
+
+from ..mock import *  # noqa
+
+TICK = 2
+CLAIM_TIMEOUT = 10
+
+
+@mock.patch("pipeline.engine.models.core.pipeline_settings.ENGINE_SCHEDULE_TIMER_TICK", TICK)
+@mock.patch("pipeline.engine.models.core.pipeline_settings.ENGINE_SCHEDULE_TIMER_CLAIM_TIMEOUT", CLAIM_TIMEOUT)
+class TestScheduleTimer(TestCase):
+    def test_arm(self):
+        schedule_id = "{}{}".format(uniqid(), uniqid())
+        process_id = uniqid()
+
+        with mock.patch("pipeline.engine.models.core.time.time", mock.MagicMock(return_value=100.5)):
+            ScheduleTimer.objects.arm(process_id=process_id, schedule_id=schedule_id, countdown=5)
+        timer = ScheduleTimer.objects.get(schedule_id=schedule_id)
+        self.assertEqual(timer.process_id, process_id)
+        # 唤醒时间向上对齐到槽位
+        self.assertEqual(timer.slot, 53)
+
+        with mock.patch("pipeline.engine.models.core.time.time", mock.MagicMock(return_value=200)):
+            ScheduleTimer.objects.arm(process_id=process_id, schedule_id=schedule_id, countdown=4)
+        timer.refresh_from_db()
+        self.assertEqual(timer.slot, 102)
+        self.assertEqual(ScheduleTimer.objects.filter(schedule_id=schedule_id).count(), 1)
+
+    def test_disarm(self):
+        schedule_id = "{}{}".format(uniqid(), uniqid())
+        ScheduleTimer.objects.arm(process_id=uniqid(), schedule_id=schedule_id, countdown=1)
+        ScheduleTimer.objects.disarm(schedule_id)
+        self.assertFalse(ScheduleTimer.objects.filter(schedule_id=schedule_id).exists())
+
+    def test_claim_due(self):
+        process_id = uniqid()
+        for index, slot in enumerate([10, 11, 12, 20]):
+            ScheduleTimer.objects.create(schedule_id="schedule_{}".format(index), process_id=process_id, slot=slot)
+
+        self.assertEqual(ScheduleTimer.objects.claim_due(limit=10, now=9 * TICK), [])
+
+        timers = ScheduleTimer.objects.claim_due(limit=2, now=12 * TICK + 1)
+        self.assertEqual(timers, [("schedule_0", process_id, 10), ("schedule_1", process_id, 11)])
+
+        # 已领取未确认的调度在领取超时前不会被再次唤醒
+        timers = ScheduleTimer.objects.claim_due(limit=10, now=12 * TICK + 1)
+        self.assertEqual(timers, [("schedule_2", process_id, 12)])
+        self.assertEqual(ScheduleTimer.objects.filter(is_claimed=True).count(), 3)
+
+        # 确认投递后删除
+        ScheduleTimer.objects.ack(["schedule_0", "schedule_2"])
+        self.assertEqual(
+            list(ScheduleTimer.objects.order_by("schedule_id").values_list("schedule_id", flat=True)),
+            ["schedule_1", "schedule_3"],
+        )
+
+        # 未确认的调度在领取超时后被再次唤醒
+        claim_slots = CLAIM_TIMEOUT // TICK
+        self.assertEqual(ScheduleTimer.objects.claim_due(limit=10, now=(11 + claim_slots) * TICK), [])
+        self.assertEqual(
+            ScheduleTimer.objects.claim_due(limit=10, now=(12 + claim_slots) * TICK),
+            [("schedule_1", process_id, 12 + claim_slots)],
+        )
+
+    def test_ack__rearmed(self):
+        schedule_id = "{}{}".format(uniqid(), uniqid())
+        ScheduleTimer.objects.create(schedule_id=schedule_id, process_id=uniqid(), slot=1)
+        ScheduleTimer.objects.claim_due(limit=10, now=TICK)
+
+        # 领取后已被重新登记的调度不会因确认而删除
+        ScheduleTimer.objects.arm(process_id=uniqid(), schedule_id=schedule_id, countdown=5)
+        ScheduleTimer.objects.ack([schedule_id])
+        self.assertFalse(ScheduleTimer.objects.get(schedule_id=schedule_id).is_claimed)
+
+
+@mock.patch("pipeline.engine.models.core.pipeline_settings.ENGINE_SCHEDULE_TIMER_TICK", TICK)
+@mock.patch("pipeline.engine.signals.handlers.ScheduleCeleryTask.objects.bulk_bind", mock.MagicMock())
+class TestBatchScheduleReadyHandler(TestCase):
+    def setUp(self):
+        self.schedules = [["process_ok", "schedule_ok"], ["process_missing", "schedule_missing"]]
+        self.schedules.append(["process_error", "schedule_error"])
+        for process_id, schedule_id in self.schedules:
+            ScheduleTimer.objects.create(schedule_id=schedule_id, process_id=process_id, slot=1)
+        ScheduleTimer.objects.claim_due(limit=10, now=TICK)
+
+    @staticmethod
+    def resolve_args(resolver, task):
+        if resolver.process_id == "process_missing":
+            raise PipelineProcess.DoesNotExist()
+        if resolver.process_id == "process_error":
+            raise Exception()
+        return {"priority": 1}
+
+    def test_handler(self):
+        with mock.patch.object(CeleryTaskArgsResolver, "resolve_args", self.resolve_args), mock.patch(
+            "pipeline.engine.tasks.batch_service_schedule.apply_async", mock.MagicMock(return_value=mock.MagicMock())
+        ):
+            batch_sizes = handlers.batch_schedule_ready_handler(sender=ScheduleTimer, schedules=self.schedules)
+
+        # 已投递及流程不存在的调度被确认，其余调度保留待领取超时后重试
+        self.assertEqual(batch_sizes, [1])
+        self.assertEqual(list(ScheduleTimer.objects.values_list("schedule_id", flat=True)), ["schedule_error"])
+
+    def test_handler__dispatch_failed(self):
+        with mock.patch.object(CeleryTaskArgsResolver, "resolve_args", self.resolve_args), mock.patch(
+            "pipeline.engine.tasks.batch_service_schedule.apply_async", mock.MagicMock(side_effect=Exception())
+        ):
+            batch_sizes = handlers.batch_schedule_ready_handler(sender=ScheduleTimer, schedules=self.schedules)
+
+        self.assertEqual(batch_sizes, [])
+        self.assertEqual(
+            list(ScheduleTimer.objects.order_by("schedule_id").values_list("schedule_id", flat=True)),
+            ["schedule_error", "schedule_ok"],
+        )
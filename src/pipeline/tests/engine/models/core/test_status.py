@@ -15,8 +15,14 @@ import copy
 
 from django.test import TestCase
 
+from pipeline.core.data.base import DataObject
+from pipeline.core.event import EmptyEndEvent, EmptyStartEvent
+from pipeline.core.flow.activity import ServiceActivity, SubProcess
+from pipeline.core.flow.gateway import ParallelGateway
+from pipeline.core.pipeline import Pipeline, PipelineSpec
 from pipeline.engine import states
-from pipeline.engine.models import Data, LogEntry, Status, SubProcessRelationship
+from pipeline.engine.models import Data, LogEntry, NodeRelationship, Status, SubProcessRelationship
+from pipeline.engine.models.core import BRIEF_FIELDS
 from pipeline.tests.mock_settings import *  # noqa
 
 from ..mock import *  # noqa
@@ -247,6 +253,82 @@ class TestStatus(TestCase):
         cls_name = pipeline.__class__.__name__[:64]
         self.assertEqual(status.name, cls_str if len(cls_str) <= 64 else cls_name)
 
+    @staticmethod
+    def _build_pipeline(pipeline_id, activities, gateways=None):
+        spec = PipelineSpec(
+            start_event=EmptyStartEvent(id=uniqid()),
+            end_event=EmptyEndEvent(id=uniqid()),
+            flows=[],
+            activities=activities,
+            gateways=gateways or [],
+            data=DataObject({}),
+            context=None,
+        )
+        return Pipeline(pipeline_id, spec)
+
+    def _build_precreate_pipeline(self):
+        sub_act = ServiceActivity(id=uniqid(), service=MagicMock(), name="sub_act")
+        subprocess_id = uniqid()
+        subprocess = SubProcess(id=subprocess_id, pipeline=self._build_pipeline(subprocess_id, [sub_act]))
+        act = ServiceActivity(id=uniqid(), service=MagicMock(), name="act")
+        gateway = ParallelGateway(id=uniqid(), converge_gateway_id=uniqid())
+        pipeline = self._build_pipeline(uniqid(), [act, subprocess], [gateway])
+        return pipeline, act, subprocess, sub_act
+
+    @patch(ENGINE_STATUS_PRECREATE_ENABLED, True)
+    def test_prepare_for_pipeline__precreate(self):
+        pipeline, act, subprocess, sub_act = self._build_precreate_pipeline()
+
+        with self.assertNumQueries(1):
+            Status.objects.prepare_for_pipeline(pipeline)
+
+        # 根流程、开始/结束事件、原子、子流程、网关及子流程内的开始/结束事件、原子
+        statuses = Status.objects.filter(root_id=pipeline.id)
+        self.assertEqual(statuses.count(), 9)
+        self.assertTrue(all(status.state == states.READY for status in statuses))
+
+        act_status = Status.objects.get(id=act.id)
+        self.assertEqual(act_status.name, "act")
+        self.assertEqual(act_status.parent_id, pipeline.id)
+        self.assertEqual(act_status.depth, 1)
+
+        sub_act_status = Status.objects.get(id=sub_act.id)
+        self.assertEqual(sub_act_status.parent_id, subprocess.id)
+        self.assertEqual(sub_act_status.depth, 2)
+        self.assertEqual(sub_act_status.path, "{}/{}/{}/".format(pipeline.id, subprocess.id, sub_act.id))
+
+    @patch(ENGINE_STATUS_PRECREATE_ENABLED, True)
+    def test_transit__fast_path(self):
+        pipeline, act, subprocess, sub_act = self._build_precreate_pipeline()
+        Status.objects.prepare_for_pipeline(pipeline)
+
+        # 条件 UPDATE + 读取最新状态
+        with self.assertNumQueries(2):
+            result = Status.objects.transit(id=act.id, to_state=states.RUNNING, start=True, name="act")
+        self.assertTrue(result.result)
+        self.assertEqual(result.extra.state, states.RUNNING)
+        self.assertIsNotNone(result.extra.started_time)
+
+        # 不合法的状态转换
+        result = Status.objects.transit(id=act.id, to_state=states.READY)
+        self.assertFalse(result.result)
+        self.assertEqual(Status.objects.get(id=act.id).state, states.RUNNING)
+
+        result = Status.objects.transit(id=act.id, to_state=states.FINISHED)
+        self.assertTrue(result.result)
+        self.assertIsNotNone(result.extra.archived_time)
+
+        # 重入走常规路径
+        result = Status.objects.transit(id=act.id, to_state=states.RUNNING, start=True, name="act")
+        self.assertTrue(result.result)
+        self.assertEqual(result.extra.loop, 2)
+
+        # 未预创建的节点走常规路径
+        node_id = uniqid()
+        result = Status.objects.transit(id=node_id, to_state=states.RUNNING, start=True, name=node_id)
+        self.assertTrue(result.result)
+        self.assertEqual(Status.objects.get(id=node_id).state, states.RUNNING)
+
     @patch(PIPELINE_DATA_WRITE_NODE_DATA, MagicMock())
     def test_fail(self):
 
@@ -516,3 +598,96 @@ class TestStatus(TestCase):
             id_list=subprocess_stack, state=states.RUNNING, from_state=states.BLOCKED
         )
         Status.objects.transit.assert_called_with(id=root_pipeline_id, to_state=states.READY, is_pipeline=True)
+
+    def test_build_hierarchy(self):
+        root_id, subprocess_id, act_id, legacy_id = uniqid(), uniqid(), uniqid(), uniqid()
+        for node_id in [root_id, subprocess_id, act_id, legacy_id]:
+            Status.objects.create(id=node_id, state=states.RUNNING)
+
+        self.assertTrue(Status.objects.build_hierarchy(root_id, root_id))
+        self.assertTrue(Status.objects.build_hierarchy(root_id, subprocess_id))
+        self.assertTrue(Status.objects.build_hierarchy(subprocess_id, act_id))
+        # rebuild check
+        self.assertTrue(Status.objects.build_hierarchy(root_id, act_id))
+        # parent without hierarchy
+        self.assertFalse(Status.objects.build_hierarchy(uniqid(), legacy_id))
+        self.assertFalse(Status.objects.build_hierarchy(root_id, uniqid()))
+
+        act = Status.objects.get(id=act_id)
+        self.assertEqual(act.parent_id, subprocess_id)
+        self.assertEqual(act.root_id, root_id)
+        self.assertEqual(act.depth, 2)
+        self.assertEqual(act.path, "{}/{}/{}/".format(root_id, subprocess_id, act_id))
+        self.assertEqual(Status.objects.get(id=legacy_id).path, "")
+
+        # 整行保存不覆盖层级字段
+        stale = Status.objects.get(id=legacy_id)
+        Status.objects.filter(id=legacy_id).update(path="path")
+        stale.state = states.FINISHED
+        stale.save()
+        self.assertEqual(Status.objects.get(id=legacy_id).path, "path")
+
+    def test_status_trees(self):
+        root_id, subprocess_id, act_1, act_2 = uniqid(), uniqid(), uniqid(), uniqid()
+        for node_id in [root_id, subprocess_id, act_1, act_2]:
+            Status.objects.create(id=node_id, state=states.RUNNING)
+        edges = [(root_id, root_id), (root_id, subprocess_id), (subprocess_id, act_1), (root_id, act_2)]
+        for parent_id, node_id in edges:
+            Status.objects.build_hierarchy(parent_id, node_id)
+
+        trees = Status.objects.status_trees([root_id, subprocess_id, uniqid()], max_depth=1)
+        self.assertEqual(set(trees), {root_id, subprocess_id})
+        self.assertEqual(set(trees[root_id]["children"]), {subprocess_id, act_2})
+        self.assertEqual(trees[root_id]["children"][subprocess_id]["children"], {})
+        self.assertEqual(set(trees[subprocess_id]["children"]), {act_1})
+        self.assertNotIn("path", trees[root_id])
+        self.assertNotIn("parent_id", trees[root_id])
+
+        trees = Status.objects.status_trees([root_id], max_depth=2)
+        self.assertEqual(set(trees[root_id]["children"][subprocess_id]["children"]), {act_1})
+
+    def test_brief_statuses(self):
+        root_id, subprocess_id, act_1, act_2 = uniqid(), uniqid(), uniqid(), uniqid()
+        for node_id in [root_id, subprocess_id, act_1, act_2]:
+            Status.objects.create(id=node_id, state=states.RUNNING)
+        edges = [(root_id, root_id), (root_id, subprocess_id), (subprocess_id, act_1), (root_id, act_2)]
+        for parent_id, node_id in edges:
+            Status.objects.build_hierarchy(parent_id, node_id)
+
+        # 未记录物化路径的流程
+        legacy_root_id, legacy_act = uniqid(), uniqid()
+        Status.objects.create(id=legacy_root_id, state=states.FINISHED)
+        Status.objects.create(id=legacy_act, state=states.FINISHED)
+        NodeRelationship.objects.build_closure(legacy_root_id, legacy_root_id)
+        NodeRelationship.objects.build_closure(legacy_root_id, legacy_act)
+
+        brief_statuses = Status.objects.brief_statuses([root_id, subprocess_id, legacy_root_id, uniqid()], max_depth=1)
+        self.assertEqual(set(brief_statuses), {root_id, subprocess_id, legacy_root_id})
+        self.assertEqual(set(brief_statuses[root_id]), {root_id, subprocess_id, act_2})
+        self.assertEqual(set(brief_statuses[subprocess_id]), {subprocess_id, act_1})
+        self.assertEqual(set(brief_statuses[legacy_root_id]), {legacy_root_id, legacy_act})
+        self.assertEqual(brief_statuses[root_id][act_2]["parent_id"], root_id)
+        self.assertEqual(brief_statuses[subprocess_id][act_1]["parent_id"], subprocess_id)
+        self.assertEqual(brief_statuses[legacy_root_id][legacy_act]["parent_id"], legacy_root_id)
+        self.assertEqual(brief_statuses[legacy_root_id][legacy_act]["state"], states.FINISHED)
+        self.assertEqual(set(brief_statuses[root_id][root_id]), set(BRIEF_FIELDS))
+
+        brief_statuses = Status.objects.brief_statuses([root_id], max_depth=2)
+        self.assertEqual(set(brief_statuses[root_id]), {root_id, subprocess_id, act_1, act_2})
+
+    def test_brief_statuses__query_count(self):
+        statuses = []
+        root_ids = []
+        for __ in range(1000):
+            root_id, act_id = uniqid(), uniqid()
+            root_ids.append(root_id)
+            statuses.append(Status(id=root_id, root_id=root_id, depth=0, path="{}/".format(root_id)))
+            statuses.append(
+                Status(id=act_id, parent_id=root_id, root_id=root_id, depth=1, path="{}/{}/".format(root_id, act_id))
+            )
+        Status.objects.bulk_create(statuses)
+
+        with self.assertNumQueries(1):
+            brief_statuses = Status.objects.brief_statuses(root_ids, max_depth=100)
+        self.assertEqual(len(brief_statuses), 1000)
+        self.assertTrue(all(len(brief_statuses[root_id]) == 2 for root_id in root_ids))
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import pickle
+import zlib
+
+import mock
+from django.test import TestCase
+
+from pipeline.engine.models import Data, ProcessSnapshot
+from pipeline.engine.models.fields import IOFIELD_HEADER, EncodedValue, decode, encode
+
+
+class TestIOFieldCodec(TestCase):
+    def setUp(self):
+        self.value = {"_children": ["child{}".format(index) for index in range(100)], "_root_pipeline": None}
+
+    def test_encode_and_decode(self):
+        data = encode(self.value, codec_name="zlib", level=1, threshold=0)
+        self.assertEqual(data[: len(IOFIELD_HEADER)], IOFIELD_HEADER)
+        self.assertEqual(data[len(IOFIELD_HEADER)], 1)
+        self.assertEqual(decode(data), self.value)
+
+    def test_encode_below_threshold(self):
+        data = encode(self.value, codec_name="zlib", level=6, threshold=1024 * 1024)
+        self.assertEqual(data[len(IOFIELD_HEADER)], 0)
+        self.assertEqual(decode(memoryview(data)), self.value)
+
+    def test_encode_with_codec_not_installed(self):
+        data = encode(self.value, codec_name="not_installed", level=6, threshold=0)
+        self.assertEqual(data[len(IOFIELD_HEADER)], 1)
+        self.assertEqual(decode(data), self.value)
+
+    def test_decode_legacy(self):
+        self.assertEqual(decode(zlib.compress(pickle.dumps(self.value), 6)), self.value)
+
+    def test_decode_unknown_codec(self):
+        self.assertRaises(ValueError, decode, IOFIELD_HEADER + bytes([255]))
+
+
+class TestLazyIOField(TestCase):
+    def setUp(self):
+        self.snapshot = ProcessSnapshot.objects.create_snapshot(
+            pipeline_stack=[], children=["child1"], root_pipeline="root_pipeline", subprocess_stack=[]
+        )
+
+    def test_decode_on_first_access(self):
+        snapshot = ProcessSnapshot.objects.get(id=self.snapshot.id)
+        self.assertIsInstance(snapshot.__dict__["data"], EncodedValue)
+
+        with mock.patch("pipeline.engine.models.fields.decode", mock.MagicMock(wraps=decode)) as mock_decode:
+            self.assertEqual(snapshot.children, ["child1"])
+            self.assertEqual(snapshot.root_pipeline, "root_pipeline")
+            mock_decode.assert_called_once()
+
+    def test_save_without_access(self):
+        snapshot = ProcessSnapshot.objects.get(id=self.snapshot.id)
+        raw = snapshot.__dict__["data"].raw
+
+        with mock.patch("pipeline.engine.models.fields.encode") as mock_encode:
+            snapshot.save()
+            mock_encode.assert_not_called()
+
+        snapshot = ProcessSnapshot.objects.get(id=self.snapshot.id)
+        self.assertEqual(bytes(snapshot.__dict__["data"].raw), bytes(raw))
+        self.assertEqual(snapshot.children, ["child1"])
+
+    def test_deferred(self):
+        snapshot = ProcessSnapshot.objects.defer("data").get(id=self.snapshot.id)
+        self.assertEqual(snapshot.children, ["child1"])
+
+    def test_values_list_decoded(self):
+        Data.objects.create(id="data_id", inputs={"input": 1}, outputs={"result": True}, ex_data="")
+
+        self.assertEqual(list(Data.objects.values_list("outputs", flat=True)), [{"result": True}])
+        self.assertEqual(list(Data.objects.values("inputs", "ex_data")), [{"inputs": {"input": 1}, "ex_data": ""}])
+        self.assertIsInstance(Data.objects.get(id="data_id").__dict__["outputs"], EncodedValue)
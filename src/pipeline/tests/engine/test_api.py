@@ -712,6 +712,20 @@ class TestEngineAPI(TestCase):
         tree = api.get_status_tree(s1.id, 4)
         self.assertDictEqual(tree, tree_depth_3)
 
+    def test_status_tree__by_relationship(self):
+        s1, s2, s3 = [Status.objects.create(id=uniqid(), state=states.FINISHED) for __ in range(3)]
+
+        # 只有闭包表记录的节点（升级前已开始执行的流程）
+        NodeRelationship.objects.build_closure(s1.id, s1.id)
+        NodeRelationship.objects.build_closure(s1.id, s2.id)
+        NodeRelationship.objects.build_closure(s2.id, s3.id)
+
+        tree = api.get_status_tree(s1.id, 2)
+        self.assertEqual(tree["id"], s1.id)
+        self.assertEqual(list(tree["children"]), [s2.id])
+        self.assertEqual(list(tree["children"][s2.id]["children"]), [s3.id])
+        self.assertNotIn("path", tree)
+
     @patch(PIPELINE_FUNCTION_SWITCH_IS_FROZEN, MagicMock(return_value=False))
     @patch(PIPELINE_ENGINE_API_WORKERS, MagicMock(return_value=True))
     @patch(PIPELINE_SCHEDULE_SCHEDULE_FOR, MagicMock(side_effect=ScheduleService.DoesNotExist))
@@ -18,7 +18,8 @@ from django.test import TestCase
 from pipeline.core.pipeline import Pipeline
 from pipeline.engine import api, signals, states, tasks
 from pipeline.engine.core import runtime, schedule
-from pipeline.engine.models import NodeCeleryTask, NodeRelationship, ProcessCeleryTask, Status
+from pipeline.django_signal_valve import valve
+from pipeline.engine.models import NodeCeleryTask, NodeRelationship, ProcessCeleryTask, ScheduleTimer, Status
 from pipeline.tests.engine.mock import *  # noqa
 from pipeline.tests.mock_settings import *  # noqa
 
@@ -270,7 +271,7 @@ class EngineTaskTestCase(TestCase):
             runtime.run_loop.assert_not_called()
 
     @mock.patch(ENGINE_TASKS_WAKE_UP_APPLY, mock.MagicMock(return_value=IdentifyObject(id="task_id")))
-    @mock.patch(PIPELINE_CELERYTASK_BIND, mock.MagicMock())
+    @mock.patch(PIPELINE_CELERYTASK_BULK_BIND, mock.MagicMock())
     def test_batch_wake_up(self):
         process_id_list = [uniqid() for _ in range(5)]
 
@@ -284,10 +285,10 @@ class EngineTaskTestCase(TestCase):
 
             tasks.wake_up.apply_async.assert_has_calls([mock.call(args=[pid]) for pid in process_id_list])
 
-            ProcessCeleryTask.objects.bind.assert_has_calls([mock.call(pid, "task_id") for pid in process_id_list])
+            ProcessCeleryTask.objects.bulk_bind.assert_called_once_with({pid: "task_id" for pid in process_id_list})
 
         tasks.wake_up.apply_async.reset_mock()
-        ProcessCeleryTask.objects.bind.reset_mock()
+        ProcessCeleryTask.objects.bulk_bind.reset_mock()
 
         # transit fail
         with mock.patch(PIPELINE_STATUS_TRANSIT, self.transit_fail):
@@ -299,7 +300,7 @@ class EngineTaskTestCase(TestCase):
 
             tasks.wake_up.apply_async.assert_not_called()
 
-            ProcessCeleryTask.objects.bind.assert_not_called()
+            ProcessCeleryTask.objects.bulk_bind.assert_not_called()
 
     @mock.patch(ENGINE_RUN_LOOP, mock.MagicMock())
     def test_wake_from_schedule(self):
@@ -322,6 +323,74 @@ class EngineTaskTestCase(TestCase):
         tasks.service_schedule(process_id, schedule_id, data_id)
         schedule.schedule.assert_called_with(process_id, schedule_id, data_id)
 
+    @mock.patch(ENGINE_SCHEDULE, mock.MagicMock(side_effect=[Exception, None]))
+    def test_batch_service_schedule(self):
+        schedules = [[uniqid(), uniqid()], [uniqid(), uniqid()]]
+        parent_data = {schedules[0][1]: "parent_data"}
+        with mock.patch(ENGINE_GET_SCHEDULE_PARENT_DATA_BULK, mock.MagicMock(return_value=parent_data)):
+            tasks.batch_service_schedule(schedules)
+            tasks.get_schedule_parent_data_bulk.assert_called_once_with([schedules[0][1], schedules[1][1]])
+        schedule.schedule.assert_has_calls(
+            [
+                mock.call(schedules[0][0], schedules[0][1], parent_data="parent_data"),
+                mock.call(schedules[1][0], schedules[1][1], parent_data=None),
+            ]
+        )
+
+    @mock.patch(SIGNAL_VALVE_SEND, mock.MagicMock())
+    def test_schedule_timer_tick(self):
+        timers = [(uniqid(), uniqid(), 1), (uniqid(), uniqid(), 2)]
+        with mock.patch(ENGINE_SCHEDULE_TIMER_ENABLED, False):
+            tasks.schedule_timer_tick()
+            valve.send.assert_not_called()
+
+        with mock.patch(ENGINE_SCHEDULE_TIMER_ENABLED, True):
+            with mock.patch(PIPELINE_SCHEDULE_TIMER_CLAIM_DUE, mock.MagicMock(return_value=[])):
+                tasks.schedule_timer_tick()
+                valve.send.assert_not_called()
+
+            with mock.patch(PIPELINE_SCHEDULE_TIMER_CLAIM_DUE, mock.MagicMock(return_value=timers)):
+                tasks.schedule_timer_tick()
+                valve.send.assert_called_once_with(
+                    signals,
+                    "batch_schedule_ready",
+                    sender=ScheduleTimer,
+                    schedules=[[process_id, schedule_id] for schedule_id, process_id, __ in timers],
+                )
+
+            # 阀门关闭时信号已持久化，确认全部调度
+            valve.send.return_value = None
+            with mock.patch(PIPELINE_SCHEDULE_TIMER_CLAIM_DUE, mock.MagicMock(return_value=timers)), mock.patch(
+                PIPELINE_SCHEDULE_TIMER_ACK, mock.MagicMock()
+            ):
+                tasks.schedule_timer_tick()
+                ScheduleTimer.objects.ack.assert_called_once_with([schedule_id for schedule_id, __, __ in timers])
+
+    def test_heal_zombie_process(self):
+        heal_zombie_process_shard = mock.MagicMock()
+        with mock.patch(ENGINE_TASKS_HEAL_ZOMBIE_PROCESS_SHARD, heal_zombie_process_shard):
+            with mock.patch(ENGINE_ZOMBIE_PROCESS_HEAL_SHARDS, 1):
+                tasks.heal_zombie_process()
+                heal_zombie_process_shard.assert_called_once_with(0, 1)
+                heal_zombie_process_shard.apply_async.assert_not_called()
+
+            heal_zombie_process_shard.reset_mock()
+            with mock.patch(ENGINE_ZOMBIE_PROCESS_HEAL_SHARDS, 3):
+                tasks.heal_zombie_process()
+                heal_zombie_process_shard.assert_not_called()
+                heal_zombie_process_shard.apply_async.assert_has_calls(
+                    [mock.call(args=(shard, 3)) for shard in range(3)]
+                )
+
+    def test_heal_zombie_process_shard(self):
+        healer = mock.MagicMock()
+        with mock.patch(ENGINE_TASKS_ZOMBIE_GET_HEALER, mock.MagicMock(return_value=healer)):
+            tasks.heal_zombie_process_shard(1, 3)
+            healer.heal.assert_called_once_with(shard=1, shard_count=3)
+
+            healer.heal.side_effect = Exception
+            tasks.heal_zombie_process_shard(1, 3)
+
     @mock.patch(PIPELINE_NODE_CELERYTASK_DESTROY, mock.MagicMock())
     @mock.patch(ENGINE_API_FORCED_FAIL, mock.MagicMock())
     @mock.patch(ENGINE_ACTIVITY_FAIL_SIGNAL, mock.MagicMock())
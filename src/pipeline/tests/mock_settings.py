@@ -47,6 +47,8 @@ PIPELINE_SCHEDULE_SERVICE_GET = "pipeline.engine.models.ScheduleService.objects.
 PIPELINE_SCHEDULE_SERVICE_SET_SCHEDULE = "pipeline.engine.models.ScheduleService.objects.set_schedule"
 PIPELINE_SCHEDULE_SCHEDULE_FOR = "pipeline.engine.models.ScheduleService.objects.schedule_for"
 PIPELINE_SCHEDULE_DELETE_SCHEDULE = "pipeline.engine.models.ScheduleService.objects.delete_schedule"
+PIPELINE_SCHEDULE_TIMER_CLAIM_DUE = "pipeline.engine.models.ScheduleTimer.objects.claim_due"
+PIPELINE_SCHEDULE_TIMER_ACK = "pipeline.engine.models.ScheduleTimer.objects.ack"
 
 PIPELINE_DATA_GET = "pipeline.engine.models.Data.objects.get"
 PIPELINE_DATA_WRITE_NODE_DATA = "pipeline.engine.models.Data.objects.write_node_data"
@@ -57,6 +59,7 @@ PIPELINE_NODE_RELATIONSHIP_BUILD = "pipeline.engine.models.NodeRelationship.obje
 PIPELINE_NODE_RELATIONSHIP_FILTER = "pipeline.engine.models.NodeRelationship.objects.filter"
 
 PIPELINE_CELERYTASK_BIND = "pipeline.engine.models.ProcessCeleryTask.objects.bind"
+PIPELINE_CELERYTASK_BULK_BIND = "pipeline.engine.models.ProcessCeleryTask.objects.bulk_bind"
 PIPELINE_CELERYTASK_UNBIND = "pipeline.engine.models.ProcessCeleryTask.objects.unbind"
 PIPELINE_CELERYTASK_REVOKE = "pipeline.engine.models.ProcessCeleryTask.objects.revoke"
 PIPELINE_CELERYTASK_DESTROY = "pipeline.engine.models.ProcessCeleryTask.objects.destroy"
@@ -137,5 +140,22 @@ ENGINE_DATA_API_SETTINGS = "pipeline.engine.core.data.api.settings"
 ENGINE_DATA_API_IMPORT_BACKEND = "pipeline.engine.core.data.api._import_backend"
 ENGINE_DATA_API_BACKEND = "pipeline.engine.core.data.api._backend"
 ENGINE_DATA_API_CANDIDATE_BACKEND = "pipeline.engine.core.data.api._candidate_backend"
+ENGINE_DATA_API_SETTINGS_WRITE_BEHIND = "pipeline.engine.core.data.api.settings.PIPELINE_DATA_CANDIDATE_WRITE_BEHIND"
+ENGINE_DATA_API_WRITE_BEHIND_EXECUTOR = "pipeline.engine.core.data.api._write_behind_executor"
+ENGINE_DATA_API_WRITE_BEHIND_PID = "pipeline.engine.core.data.api._write_behind_pid"
+ENGINE_DATA_API_CLOSE_OLD_CONNECTIONS = "pipeline.engine.core.data.api.close_old_connections"
 
 ENGINE_HEALTH_ZOMBIE_HEAL_DEFAULT_SETTINGS = "pipeline.engine.health.zombie.heal.default_settings"
+ENGINE_GET_SCHEDULE_PARENT_DATA_BULK = "pipeline.engine.tasks.get_schedule_parent_data_bulk"
+ENGINE_NODE_RELATIONSHIP_CLOSURE_ENABLED = (
+    "pipeline.engine.models.core.pipeline_settings.ENGINE_NODE_RELATIONSHIP_CLOSURE_ENABLED"
+)
+ENGINE_STATUS_PRECREATE_ENABLED = "pipeline.engine.models.core.pipeline_settings.ENGINE_STATUS_PRECREATE_ENABLED"
+ENGINE_SCHEDULE_TIMER_ENABLED = "pipeline.engine.tasks.default_settings.ENGINE_SCHEDULE_TIMER_ENABLED"
+ENGINE_ZOMBIE_PROCESS_HEAL_SHARDS = "pipeline.engine.tasks.default_settings.ENGINE_ZOMBIE_PROCESS_HEAL_SHARDS"
+ENGINE_TASKS_HEAL_ZOMBIE_PROCESS_SHARD = "pipeline.engine.tasks.heal_zombie_process_shard"
+ENGINE_TASKS_ZOMBIE_GET_HEALER = "pipeline.engine.tasks.zombie.get_healer"
+
+STATISTICS_COLLECT_INSTANCES_STATISTICS = "pipeline.contrib.statistics.tasks.collect_instances_statistics"
+STATISTICS_COLLECT_MAX_BATCHES = "pipeline.conf.default_settings.PIPELINE_STATISTICS_COLLECT_MAX_BATCHES"
+STATISTICS_COLLECT_QUEUE_PUSH = "pipeline.contrib.statistics.models.StatisticsCollectQueue.objects.push"
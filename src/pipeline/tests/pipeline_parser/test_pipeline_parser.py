@@ -12,6 +12,7 @@ specific language governing permissions and limitations under the License.
 """
 
 import unittest
+from copy import deepcopy
 
 from pipeline.core.pipeline import Pipeline
 from pipeline.parser.pipeline_parser import PipelineParser
@@ -48,3 +49,13 @@ class TestPipelineParser(unittest.TestCase):
     def test_conditional_parallel_parser(self):
         parser_obj = PipelineParser(CONDITIONAL_PARALLEL)
         self.assertIsInstance(parser_obj.parse(), Pipeline)
+
+    def test_parse_does_not_modify_tree(self):
+        parser_obj = PipelineParser(PIPELINE_WITH_SUB_PROCESS)
+        tree = deepcopy(parser_obj.pipeline_tree)
+        pipeline = parser_obj.parse()
+
+        self.assertEqual(parser_obj.pipeline_tree, tree)
+        self.assertEqual(
+            {act.id for act in pipeline.spec.activities}, set(PIPELINE_WITH_SUB_PROCESS["activities"].keys())
+        )
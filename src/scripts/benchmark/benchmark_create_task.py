@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from apps.backend.subscription.tasks import save_task_records
+from apps.node_man.models import PipelineTree, SubscriptionInstanceRecord
+
+
+class BenchmarkRollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "对比逐条保存与分批写入实例执行记录及 Pipeline 拓扑树的耗时，执行完毕后回滚全部数据"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hosts", type=int, nargs="+", default=[1000, 5000, 10000], help="主机数量")
+        parser.add_argument("--tree-nodes", type=int, default=30, help="单个拓扑树的节点数")
+
+    @staticmethod
+    def _build(host_count, tree_nodes):
+        """
+        生成与创建订阅任务时相同形态的实例记录及拓扑树
+        """
+        records = []
+        pipeline_trees = []
+        for index in range(host_count):
+            pipeline_id = uuid.uuid4().hex
+            instance_info = {
+                "host": {"bk_host_id": index, "bk_host_innerip": f"10.0.0.{index % 250}", "bk_cloud_id": 0},
+                "service": {},
+                "scope": [{"bk_biz_id": 2, "bk_inst_id": 1, "bk_obj_id": "module"}],
+            }
+            records.append(
+                SubscriptionInstanceRecord(
+                    task_id=0,
+                    subscription_id=0,
+                    instance_id=f"host|instance|host|{index}",
+                    instance_info=instance_info,
+                    steps=[],
+                    pipeline_id=pipeline_id,
+                )
+            )
+            activities = {
+                uuid.uuid4().hex: {"type": "ServiceActivity", "component": {"code": "install", "inputs": {}}}
+                for __ in range(tree_nodes)
+            }
+            pipeline_trees.append(PipelineTree(id=pipeline_id, tree={"id": pipeline_id, "activities": activities}))
+        return records, pipeline_trees
+
+    @staticmethod
+    def _save_one_by_one(records, pipeline_trees):
+        # 原逐条保存流程：每个实例一次 update_or_create 及一次 save
+        for record, pipeline_tree in zip(records, pipeline_trees):
+            record.save()
+            record.save_pipeline(pipeline_tree.id, pipeline_tree.tree)
+
+    def _timeit(self, func, host_count, tree_nodes):
+        records, pipeline_trees = self._build(host_count, tree_nodes)
+        try:
+            with transaction.atomic():
+                begin = time.perf_counter()
+                func(records, pipeline_trees)
+                cost = time.perf_counter() - begin
+                raise BenchmarkRollback
+        except BenchmarkRollback:
+            return cost
+
+    def handle(self, **options):
+        tree_nodes = options["tree_nodes"]
+        for host_count in options["hosts"]:
+            one_by_one_cost = self._timeit(self._save_one_by_one, host_count, tree_nodes)
+            bulk_cost = self._timeit(save_task_records, host_count, tree_nodes)
+            with override_settings(SUBSCRIPTION_INSTANCE_INFO_DEDUP=True):
+                dedup_cost = self._timeit(save_task_records, host_count, tree_nodes)
+            self.stdout.write(
+                f"hosts={host_count}: one by one {one_by_one_cost:.2f}s, bulk {bulk_cost:.2f}s, "
+                f"bulk with dedup {dedup_cost:.2f}s"
+            )
+        self.stdout.write("benchmark data rolled back")
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from pipeline.engine import tasks
+from pipeline.engine.models import PipelineModel, PipelineProcess, ProcessCeleryTask
+from pipeline.engine.models.core import pipeline_task_args_cache, process_root_pipeline_cache
+from pipeline.engine.signals.handlers import CeleryTaskArgsResolver
+from pipeline.utils.uniqid import node_uniqid, uniqid
+
+
+class BenchmarkRollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure queries and time per engine dispatch signal (routing args resolve + celery task bind)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1000, help="number of processes to dispatch")
+        parser.add_argument("--pipelines", type=int, default=10, help="number of root pipelines")
+
+    def dispatch(self, process_ids):
+        task = tasks.process_wake_up
+        with CaptureQueriesContext(connection) as context:
+            begin = time.perf_counter()
+            for process_id in process_ids:
+                args = CeleryTaskArgsResolver(process_id).resolve_args(task)
+                ProcessCeleryTask.objects.start_task(
+                    process_id=process_id, start_func=lambda **kwargs: uniqid(), kwargs={"args": [process_id], **args}
+                )
+            cost = time.perf_counter() - begin
+        return len(context.captured_queries) / len(process_ids), cost / len(process_ids) * 1000
+
+    def handle(self, **options):
+        process_count = options["processes"]
+        pipeline_count = options["pipelines"]
+
+        try:
+            with transaction.atomic():
+                pipeline_ids = [uniqid() for _ in range(pipeline_count)]
+                PipelineModel.objects.bulk_create(
+                    [PipelineModel(id=pipeline_id, priority=5, queue="") for pipeline_id in pipeline_ids]
+                )
+                processes = [
+                    PipelineProcess(id=node_uniqid(), root_pipeline_id=pipeline_ids[index % pipeline_count])
+                    for index in range(process_count)
+                ]
+                PipelineProcess.objects.bulk_create(processes)
+                process_ids = [process.id for process in processes]
+
+                process_root_pipeline_cache.clear()
+                pipeline_task_args_cache.clear()
+                for title in ["cold cache, new binding", "warm cache, rebind"]:
+                    queries, cost = self.dispatch(process_ids)
+                    self.stdout.write("[{}] {:.2f} queries/signal, {:.3f} ms/signal".format(title, queries, cost))
+                raise BenchmarkRollback
+        except BenchmarkRollback:
+            self.stdout.write("benchmark data rolled back")
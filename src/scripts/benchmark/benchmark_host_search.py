@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.node_man import constants as const
+from apps.node_man.models import Host, HostSearchIndex
+
+
+class BenchmarkRollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "在合成主机数据上对比 LIKE 扫描与主机搜索索引的查询耗时，执行完毕后回滚全部数据"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hosts", type=int, default=200000, help="合成主机数量")
+        parser.add_argument("--pagesize", type=int, default=20, help="分页大小")
+        parser.add_argument("--rounds", type=int, default=5, help="每个查询的执行次数")
+
+    @staticmethod
+    def _random_ip():
+        return ".".join(str(random.randint(1, 254)) for _ in range(4))
+
+    def _timeit(self, func, rounds):
+        begin = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return (time.perf_counter() - begin) / rounds * 1000
+
+    def handle(self, **options):
+        host_count = options["hosts"]
+        pagesize = options["pagesize"]
+        rounds = options["rounds"]
+        start_host_id = (Host.objects.order_by("-bk_host_id").values_list("bk_host_id", flat=True).first() or 0) + 1
+
+        try:
+            with transaction.atomic():
+                begin = time.perf_counter()
+                hosts = [
+                    Host(
+                        bk_host_id=start_host_id + index,
+                        bk_biz_id=random.randint(1, 100),
+                        bk_cloud_id=const.DEFAULT_CLOUD,
+                        inner_ip=self._random_ip(),
+                        outer_ip=self._random_ip(),
+                        login_ip=self._random_ip(),
+                        node_type=const.NodeType.AGENT,
+                    )
+                    for index in range(host_count)
+                ]
+                Host.objects.bulk_create(hosts, batch_size=const.HOST_SEARCH_BATCH_SIZE)
+                HostSearchIndex.refresh([host.bk_host_id for host in hosts])
+                self.stdout.write(f"build {host_count} hosts and index cost {time.perf_counter() - begin:.2f}s")
+
+                sample_ip = random.choice(hosts).inner_ip
+                queries = [
+                    (const.HostSearchMatchType.PREFIX, sample_ip.split(".")[0] + "."),
+                    (const.HostSearchMatchType.INFIX, sample_ip[2:9]),
+                    (const.HostSearchMatchType.SEGMENT, ".".join(sample_ip.split(".")[1:3])),
+                    (const.HostSearchMatchType.INFIX, sample_ip),
+                ]
+                host_queryset = Host.objects.filter(bk_host_id__gte=start_host_id)
+                for match_type, query in queries:
+                    like_cost = self._timeit(
+                        lambda: (
+                            host_queryset.filter(inner_ip__contains=query).count(),
+                            list(host_queryset.filter(inner_ip__contains=query).values("bk_host_id")[:pagesize]),
+                        ),
+                        rounds,
+                    )
+                    index_cost = self._timeit(
+                        lambda: HostSearchIndex.search(query, match_type, host_queryset, [], pagesize), rounds
+                    )
+                    self.stdout.write(
+                        f"[{match_type}] query={query}: like scan {like_cost:.2f}ms, search index {index_cost:.2f}ms"
+                    )
+                raise BenchmarkRollback
+        except BenchmarkRollback:
+            self.stdout.write("benchmark data rolled back")
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pipeline.engine.models import Data, ProcessSnapshot
+from pipeline.engine.models.fields import codecs_by_name, decode, encode
+
+
+class Command(BaseCommand):
+    help = "Measure CPU time and bytes stored per IOField codec over the latest process snapshots and node data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=200, help="number of snapshots and node data to sample")
+        parser.add_argument(
+            "--codecs",
+            default="zlib:1,zlib:6,lz4:0,zstd:1,zstd:3",
+            help="comma separated codec:level list, codecs not installed are skipped",
+        )
+        parser.add_argument("--threshold", type=int, default=256, help="size below which values are not compressed")
+        parser.add_argument("--rounds", type=int, default=3, help="rounds per codec")
+
+    def handle(self, **options):
+        limit = options["limit"]
+        values = [snapshot.data for snapshot in ProcessSnapshot.objects.order_by("-id")[:limit]]
+        values.extend(data.outputs for data in Data.objects.order_by("-id")[:limit])
+        if not values:
+            raise CommandError("no process snapshot or node data to benchmark")
+        self.stdout.write("sampled {} values".format(len(values)))
+
+        for codec_level in options["codecs"].split(","):
+            codec_name, level = codec_level.split(":")
+            if codec_name not in codecs_by_name:
+                self.stdout.write("[{}] skipped, codec not installed".format(codec_level))
+                continue
+
+            encode_cost = decode_cost = 0
+            for __ in range(options["rounds"]):
+                begin = time.process_time()
+                encoded_values = [
+                    encode(value, codec_name=codec_name, level=int(level), threshold=options["threshold"])
+                    for value in values
+                ]
+                encode_cost += time.process_time() - begin
+
+                begin = time.process_time()
+                for encoded_value in encoded_values:
+                    decode(encoded_value)
+                decode_cost += time.process_time() - begin
+
+            self.stdout.write(
+                "[{}] encode {:.3f} ms/value, decode {:.3f} ms/value, {} bytes stored".format(
+                    codec_level,
+                    encode_cost / options["rounds"] / len(values) * 1000,
+                    decode_cost / options["rounds"] / len(values) * 1000,
+                    sum(len(encoded_value) for encoded_value in encoded_values),
+                )
+            )
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import time
+from copy import deepcopy
+
+from django.core.management.base import BaseCommand
+
+from pipeline import builder
+from pipeline.parser import PipelineParser
+
+
+class Command(BaseCommand):
+    help = "Measure PipelineParser cost on NodeMan-shaped trees to check that parsing scales linearly"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--activities", type=int, default=10000, help="number of service activities")
+        parser.add_argument("--activities-per-host", type=int, default=10, help="activities per host subprocess")
+        parser.add_argument("--component", default="example_component", help="component code of activities")
+        parser.add_argument("--rounds", type=int, default=3, help="rounds per tree size")
+
+    @staticmethod
+    def build_tree(activity_count, activities_per_host, component_code):
+        """
+        生成与节点管理相同形态的树：根流程 -> 步骤子流程 -> 并行网关 -> 每台主机一个子流程 -> 子流程内的原子
+        """
+        host_subprocesses = []
+        for __ in range(max(activity_count // activities_per_host, 1)):
+            host_start = builder.EmptyStartEvent()
+            current_node = host_start
+            for __ in range(activities_per_host):
+                current_node = current_node.extend(builder.ServiceActivity(component_code=component_code))
+            current_node.extend(builder.EmptyEndEvent())
+            host_subprocesses.append(builder.SubProcess(start=host_start))
+
+        step_start = builder.EmptyStartEvent()
+        pg = builder.ParallelGateway()
+        cg = builder.ConvergeGateway()
+        step_start.extend(pg).connect(*host_subprocesses).to(pg).converge(cg).extend(builder.EmptyEndEvent())
+
+        start = builder.EmptyStartEvent()
+        start.extend(builder.SubProcess(start=step_start)).extend(builder.EmptyEndEvent())
+        return builder.build_tree(start, replace_id=True)
+
+    def timeit(self, func, rounds):
+        begin = time.perf_counter()
+        for __ in range(rounds):
+            func()
+        return (time.perf_counter() - begin) / rounds * 1000
+
+    def handle(self, **options):
+        activity_count = options["activities"]
+        rounds = options["rounds"]
+
+        costs = []
+        for count in [max(activity_count // 10, 1), activity_count]:
+            begin = time.perf_counter()
+            tree = self.build_tree(count, options["activities_per_host"], options["component"])
+            build_cost = (time.perf_counter() - begin) * 1000
+
+            parse_cost = self.timeit(lambda: PipelineParser(pipeline_tree=tree).parse(), rounds)
+            deepcopy_cost = self.timeit(lambda: deepcopy(tree), rounds)
+            costs.append(parse_cost)
+            self.stdout.write(
+                "{} activities: build tree {:.2f}ms, parse {:.2f}ms, one tree deepcopy {:.2f}ms".format(
+                    count, build_cost, parse_cost, deepcopy_cost
+                )
+            )
+
+        self.stdout.write("parse cost ratio for 10x activities: {:.2f}".format(costs[1] / costs[0]))
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pipeline.engine import api, states
+from pipeline.engine.models import NodeRelationship, Status
+from pipeline.utils.uniqid import uniqid
+
+
+class BenchmarkRollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare closure table and materialized path on insert cost and status tree query latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--nodes", type=int, default=100000, help="number of nodes")
+        parser.add_argument("--subprocesses", type=int, default=100, help="subprocesses per root pipeline")
+        parser.add_argument("--activities", type=int, default=10, help="activities per subprocess")
+        parser.add_argument("--rounds", type=int, default=20, help="rounds per status tree query")
+
+    @staticmethod
+    def build_edges(node_count, subprocess_count, activity_count):
+        """
+        生成与节点管理相同形态的树：根流程 -> 每台主机一个子流程 -> 子流程内的原子
+        """
+        edges = []
+        roots = []
+        while len(edges) < node_count:
+            root_id = uniqid()
+            roots.append(root_id)
+            edges.append((root_id, root_id))
+            for __ in range(subprocess_count):
+                subprocess_id = uniqid()
+                edges.append((root_id, subprocess_id))
+                edges.extend((subprocess_id, uniqid()) for __ in range(activity_count))
+        return roots, edges[:node_count]
+
+    def timeit(self, func, rounds):
+        begin = time.perf_counter()
+        for __ in range(rounds):
+            func()
+        return (time.perf_counter() - begin) / rounds * 1000
+
+    def handle(self, **options):
+        roots, edges = self.build_edges(options["nodes"], options["subprocesses"], options["activities"])
+        rounds = options["rounds"]
+
+        try:
+            with transaction.atomic():
+                Status.objects.bulk_create(
+                    [Status(id=node_id, state=states.FINISHED, version=uniqid()) for __, node_id in edges],
+                    batch_size=1000,
+                )
+
+                closure_count = NodeRelationship.objects.count()
+                for title, build in [
+                    ("closure table", NodeRelationship.objects.build_closure),
+                    ("materialized path", Status.objects.build_hierarchy),
+                ]:
+                    begin = time.perf_counter()
+                    for parent_id, node_id in edges:
+                        build(parent_id, node_id)
+                    cost = time.perf_counter() - begin
+                    self.stdout.write(
+                        "[{}] insert {:.3f} ms/node, {:.2f}s total".format(title, cost / len(edges) * 1000, cost)
+                    )
+                self.stdout.write(
+                    "closure table rows: {}, nodes: {}".format(
+                        NodeRelationship.objects.count() - closure_count, len(edges)
+                    )
+                )
+
+                root_id = roots[0]
+                for max_depth in [1, 100]:
+                    closure_cost = self.timeit(
+                        lambda: api._get_status_tree_by_relationship(root_id, max_depth=max_depth), rounds
+                    )
+                    path_cost = self.timeit(lambda: Status.objects.status_trees([root_id], max_depth=max_depth), rounds)
+                    self.stdout.write(
+                        "[status tree, max_depth={}] closure table {:.2f}ms, materialized path {:.2f}ms".format(
+                            max_depth, closure_cost, path_cost
+                        )
+                    )
+                raise BenchmarkRollback
+        except BenchmarkRollback:
+            self.stdout.write("benchmark data rolled back")
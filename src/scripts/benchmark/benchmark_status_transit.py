@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Tencent is pleased to support the open source community by making 蓝鲸智云PaaS平台社区版 (BlueKing PaaS Community
+Edition) available.
+Copyright (C) 2017-2019 THL A29 Limited, a Tencent company. All rights reserved.
+Licensed under the MIT License (the "License"); you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+http://opensource.org/licenses/MIT
+Unless required by applicable law or agreed to in writing, software distributed under the License is distributed on
+an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+
+from pipeline.engine import states
+from pipeline.engine.models import Status
+from pipeline.utils.uniqid import uniqid
+
+
+class Command(BaseCommand):
+    help = "Compare engine Status transit throughput between lazy creation and bulk pre-created READY rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--nodes", type=int, default=10000, help="number of nodes to transit")
+        parser.add_argument("--concurrency", type=int, default=16, help="number of worker threads")
+
+    @staticmethod
+    def _run_nodes(node_ids):
+        try:
+            for node_id in node_ids:
+                Status.objects.transit(id=node_id, to_state=states.RUNNING, start=True, name=node_id)
+                Status.objects.transit(id=node_id, to_state=states.FINISHED)
+        finally:
+            # 工作线程中的数据库连接需手动关闭
+            connections.close_all()
+
+    def _benchmark(self, node_ids, concurrency):
+        chunks = [node_ids[index::concurrency] for index in range(concurrency)]
+        begin = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as ex:
+            list(ex.map(self._run_nodes, chunks))
+        return len(node_ids) * 2 / (time.perf_counter() - begin)
+
+    def handle(self, **options):
+        node_count = options["nodes"]
+        concurrency = options["concurrency"]
+        lazy_ids = [uniqid() for __ in range(node_count)]
+        precreated_ids = [uniqid() for __ in range(node_count)]
+
+        try:
+            with override_settings(ENGINE_STATUS_PRECREATE_ENABLED=False):
+                lazy_rate = self._benchmark(lazy_ids, concurrency)
+
+            with override_settings(ENGINE_STATUS_PRECREATE_ENABLED=True):
+                Status.objects.bulk_create(
+                    [Status(id=node_id, state=states.READY, version=uniqid()) for node_id in precreated_ids],
+                    batch_size=1000,
+                )
+                precreated_rate = self._benchmark(precreated_ids, concurrency)
+        finally:
+            # 工作线程已提交数据，需手动清理
+            Status.objects.filter(id__in=lazy_ids + precreated_ids).delete()
+
+        self.stdout.write(f"nodes={node_count}, concurrency={concurrency}")
+        self.stdout.write(f"lazy creation: {lazy_rate:.0f} transits/s")
+        self.stdout.write(f"pre-created + conditional update: {precreated_rate:.0f} transits/s")
+        self.stdout.write(f"speedup: {precreated_rate / lazy_rate:.2f}x")
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import json
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpRequest, HttpResponse, QueryDict
+
+from blueapps.middleware.xss.middlewares import ESCAPE_PATH_RULES, CheckXssMiddleware
+
+
+def legacy_escape(s, is_json):
+    # 逐字符 replace 的原转义实现
+    if not is_json:
+        s = s.replace("&", "&amp;")
+    s = s.replace("<", "&lt;")
+    s = s.replace(">", "&gt;")
+    if not is_json:
+        s = s.replace(" ", "&nbsp;")
+        s = s.replace('"', "&quot;")
+        s = s.replace("'", "&#39;")
+    return s
+
+
+def legacy_escape_data(path, query_dict):
+    """
+    原中间件的转义流程：深拷贝参数，逐个参数完整解析json并逐个匹配特殊path
+    """
+    data_copy = query_dict.copy()
+    for key, value_list in data_copy.lists():
+        new_value_list = []
+        for value in value_list:
+            try:
+                json.loads(value)
+                is_json = True
+            except Exception:
+                is_json = False
+            for __, path_params in ESCAPE_PATH_RULES:
+                for rule_path, params in path_params.items():
+                    if re.match(r"^%s" % rule_path, path) and key in params:
+                        break
+            new_value_list.append(legacy_escape(value, is_json))
+        data_copy.setlist(key, new_value_list)
+    return data_copy
+
+
+def view(request):
+    return HttpResponse()
+
+
+class Command(BaseCommand):
+    help = "在不同大小的表单参数上对比原 XSS 转义流程与预编译规则 + 单次遍历转义的耗时"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000], help="参数个数")
+        parser.add_argument("--rounds", type=int, default=5, help="每种大小的执行次数")
+
+    @staticmethod
+    def _random_ip():
+        return ".".join(str(random.randint(1, 254)) for _ in range(4))
+
+    def _build_payload(self, size):
+        """
+        模拟批量导入主机的表单：IP、账号、含空格的文本及json串
+        """
+        query_dict = QueryDict(mutable=True)
+        for index in range(size):
+            kind = index % 4
+            if kind == 0:
+                value = self._random_ip()
+            elif kind == 1:
+                value = "root"
+            elif kind == 2:
+                value = "host {} <{}>".format(index, self._random_ip())
+            else:
+                value = json.dumps({"inner_ip": self._random_ip(), "os_type": "LINUX", "port": 22})
+            query_dict.appendlist("param_{}".format(index), value)
+        query_dict._mutable = False
+        return query_dict
+
+    @staticmethod
+    def _timeit(func, rounds):
+        begin = time.perf_counter()
+        for _ in range(rounds):
+            func()
+        return (time.perf_counter() - begin) / rounds * 1000
+
+    def handle(self, **options):
+        middleware = CheckXssMiddleware(lambda request: HttpResponse())
+        path = "/api/host/"
+        for size in options["sizes"]:
+            payload = self._build_payload(size)
+
+            def sanitize():
+                request = HttpRequest()
+                request.path, request.GET, request.POST = path, payload, payload
+                middleware.process_view(request, view, (), {})
+
+            legacy_cost = self._timeit(
+                lambda: (legacy_escape_data(path, payload), legacy_escape_data(path, payload)), options["rounds"]
+            )
+            cost = self._timeit(sanitize, options["rounds"])
+            self.stdout.write(
+                f"params={size}: legacy {legacy_cost:.2f}ms, precompiled single-pass {cost:.2f}ms, "
+                f"speedup {legacy_cost / cost:.2f}x"
+            )
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+性能基准脚本，不随应用发布，需在可连接数据库的开发环境中执行
+用法：python scripts/benchmark/run.py <脚本名> [参数]
+例如：python scripts/benchmark/run.py benchmark_iofield_codec --limit 100
+"""
+import importlib
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(os.path.dirname(BASE_DIR))
+
+
+def list_benchmarks():
+    return sorted(
+        filename[: -len(".py")]
+        for filename in os.listdir(BASE_DIR)
+        if filename.startswith("benchmark_") and filename.endswith(".py")
+    )
+
+
+def main():
+    benchmarks = list_benchmarks()
+    if len(sys.argv) < 2 or sys.argv[1] not in benchmarks:
+        print("usage: python {} <benchmark> [options]\navailable benchmarks:".format(sys.argv[0]))
+        for name in benchmarks:
+            print("    {}".format(name))
+        sys.exit(1)
+
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings")
+
+    import django
+
+    django.setup()
+
+    # 基准脚本沿用 management command 的参数解析及输出
+    name = sys.argv[1]
+    importlib.import_module(name).Command().run_from_argv([sys.argv[0], name] + sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()